@@ -0,0 +1,298 @@
+# artifact.py - Formato binário (carregável via mmap) para AST e IR da linguagem Cirius
+"""
+Alternativa compacta ao JSON de ``safe_json_dump`` para guardar um ``Program``
+ou uma lista de IR. O arquivo tem:
+
+- cabeçalho: ``MAGIC``, versão do formato, tipo do artefato e ordem de bytes;
+- tabela de seções: (offset, tamanho) de cada seção, alinhadas em 8 bytes;
+- tabela de constantes internadas (nomes, operadores, literais): um byte de
+  tipo e um offset por constante, mais o bloco com os dados (UTF-8);
+- registros: para a AST, os arrays de ``ASTArena`` (tipo, primeiro campo,
+  campos, listas); para o IR, cinco inteiros por instrução (índices de
+  constante do nome do opcode, dest, arg1, arg2 e tipo, ou -1 quando o campo
+  é ``None``).
+
+``load_artifact`` mapeia o arquivo com ``mmap`` e lê os arrays direto do
+mapeamento (``memoryview``); constantes, funções e instruções só são
+decodificadas quando acessadas.
+"""
+
+import mmap
+import struct
+import sys
+from array import array
+
+from ast_arena import ASTArena
+from cirius_ast import Program
+from ir import IR_FIELDS, IRInstruction, Op, normalize_ir
+
+MAGIC = b"CIRB"
+FORMAT_VERSION = 3
+
+PROGRAM_ARTIFACT = 1
+IR_ARTIFACT = 2
+
+HEADER = struct.Struct("<4sHBB")
+SECTION_COUNT = struct.Struct("<I")
+SECTION = struct.Struct("<QQ")
+ALIGNMENT = 8
+
+BYTE_ORDERS = {"little": 0, "big": 1}
+
+# Tipos de constante
+CONST_NONE, CONST_FALSE, CONST_TRUE, CONST_INT, CONST_FLOAT, CONST_STR = range(6)
+
+# Formato de cada seção, na ordem em que aparecem no arquivo
+CONSTANT_SECTIONS = ("B", "i", "B")
+PROGRAM_SECTIONS = CONSTANT_SECTIONS + ("B", "i", "i", "i")
+IR_SECTIONS = CONSTANT_SECTIONS + ("i",)
+
+
+class ArtifactError(Exception):
+    pass
+
+
+# -------------------------
+# Constantes
+# -------------------------
+def encode_constants(constants):
+    """Seções (tipos, offsets, dados) da tabela de constantes."""
+    tags = array("B")
+    offsets = array("i", [0])
+    data = bytearray()
+    for value in constants:
+        if value is None:
+            tags.append(CONST_NONE)
+        elif value is True or value is False:
+            tags.append(CONST_TRUE if value else CONST_FALSE)
+        elif isinstance(value, int):
+            tags.append(CONST_INT)
+            data += str(value).encode("ascii")
+        elif isinstance(value, float):
+            tags.append(CONST_FLOAT)
+            data += repr(value).encode("ascii")
+        elif isinstance(value, str):
+            tags.append(CONST_STR)
+            data += value.encode("utf-8")
+        else:
+            raise ArtifactError(f"Constante não suportada: {value!r}")
+        offsets.append(len(data))
+    return tags, offsets, bytes(data)
+
+
+class ConstantTable:
+    """Tabela de constantes lida de um artefato; cada constante é
+    decodificada no primeiro acesso."""
+    __slots__ = ("tags", "offsets", "data", "cache")
+
+    def __init__(self, tags, offsets, data):
+        self.tags = tags
+        self.offsets = offsets
+        self.data = data
+        self.cache = {}
+
+    def __len__(self):
+        return len(self.tags)
+
+    def __getitem__(self, index):
+        try:
+            return self.cache[index]
+        except KeyError:
+            pass
+        tag = self.tags[index]
+        if tag == CONST_NONE:
+            value = None
+        elif tag == CONST_FALSE:
+            value = False
+        elif tag == CONST_TRUE:
+            value = True
+        else:
+            raw = bytes(self.data[self.offsets[index]:self.offsets[index + 1]])
+            if tag == CONST_INT:
+                value = int(raw)
+            elif tag == CONST_FLOAT:
+                value = float(raw)
+            else:
+                value = raw.decode("utf-8")
+        self.cache[index] = value
+        return value
+
+
+# -------------------------
+# Escrita
+# -------------------------
+def pack_artifact(kind: int, sections) -> bytes:
+    """Junta cabeçalho, tabela de seções e seções (alinhadas)."""
+    out = bytearray(HEADER.pack(MAGIC, FORMAT_VERSION, kind, BYTE_ORDERS[sys.byteorder]))
+    out += SECTION_COUNT.pack(len(sections))
+    table_at = len(out)
+    out += bytes(SECTION.size * len(sections))
+    entries = []
+    for section in sections:
+        out += bytes(-len(out) % ALIGNMENT)
+        raw = section.tobytes() if isinstance(section, array) else section
+        entries.append((len(out), len(raw)))
+        out += raw
+    for index, entry in enumerate(entries):
+        SECTION.pack_into(out, table_at + index * SECTION.size, *entry)
+    return bytes(out)
+
+
+def encode_program(program: Program) -> bytes:
+    arena = ASTArena.from_ast(program)
+    return pack_artifact(PROGRAM_ARTIFACT, encode_constants(arena.constants) + (
+        arena.kinds, arena.first, arena.fields, arena.lists))
+
+
+def encode_ir(ir_code) -> bytes:
+    """Codifica uma lista de ``IRInstruction`` (ou de dicts, veja
+    ``normalize_ir``). O opcode é gravado pelo nome, então o arquivo não
+    depende da numeração de ``Op``."""
+    constants = []
+    constant_ids = {}
+    code = array("i")
+    for instr in normalize_ir(ir_code):
+        for value in (instr.op.name, instr.dest, instr.arg1, instr.arg2, instr.type):
+            if value is None:
+                code.append(-1)
+                continue
+            key = (type(value), value)
+            index = constant_ids.get(key)
+            if index is None:
+                index = constant_ids[key] = len(constants)
+                constants.append(value)
+            code.append(index)
+    return pack_artifact(IR_ARTIFACT, encode_constants(constants) + (code,))
+
+
+def write_artifact(path: str, obj):
+    """Grava um ``Program`` ou uma lista de IR em ``path``."""
+    data = encode_program(obj) if isinstance(obj, Program) else encode_ir(obj)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+# -------------------------
+# Leitura
+# -------------------------
+def unpack_artifact(buffer, formats):
+    """Valida o cabeçalho e devolve (tipo, seções como ``memoryview``)."""
+    view = memoryview(buffer)
+    if len(view) < HEADER.size + SECTION_COUNT.size:
+        raise ArtifactError("Artefato truncado")
+    magic, version, kind, byte_order = HEADER.unpack_from(view)
+    if magic != MAGIC:
+        raise ArtifactError("Não é um artefato Cirius")
+    if version != FORMAT_VERSION:
+        raise ArtifactError(f"Versão de formato {version} não suportada (esperada {FORMAT_VERSION})")
+    expected = formats.get(kind)
+    if expected is None:
+        raise ArtifactError(f"Tipo de artefato desconhecido: {kind}")
+    (count,) = SECTION_COUNT.unpack_from(view, HEADER.size)
+    if count != len(expected):
+        raise ArtifactError("Tabela de seções inválida")
+    swap = byte_order != BYTE_ORDERS[sys.byteorder]
+    sections = []
+    for index, typecode in enumerate(expected):
+        offset, length = SECTION.unpack_from(view, HEADER.size + SECTION_COUNT.size + index * SECTION.size)
+        if offset + length > len(view):
+            raise ArtifactError("Artefato truncado")
+        raw = view[offset:offset + length]
+        if typecode == "B":
+            sections.append(raw)
+        elif swap:
+            # Gerado em máquina com outra ordem de bytes: copia e inverte
+            values = array(typecode, raw)
+            values.byteswap()
+            sections.append(memoryview(values))
+        else:
+            sections.append(raw.cast(typecode))
+    return kind, sections
+
+
+class ProgramArtifact:
+    """``Program`` guardado em um artefato. ``arena`` dá acesso direto aos
+    registros; ``function(i)`` reconstrói só uma função."""
+
+    def __init__(self, sections, owner=None):
+        tags, offsets, data, kinds, first, fields, lists = sections
+        arena = ASTArena.__new__(ASTArena)
+        arena.kinds, arena.first, arena.fields, arena.lists = kinds, first, fields, lists
+        arena.constants = ConstantTable(tags, offsets, data)
+        arena._constant_ids = None
+        self.arena = arena
+        self.owner = owner
+        self._functions = None
+
+    @property
+    def function_indices(self):
+        """Índices (na arena) dos nós ``FunctionDecl`` da raiz."""
+        if self._functions is None:
+            self._functions = self.arena.get(self.arena.root, "functions")
+        return self._functions
+
+    def __len__(self):
+        return len(self.function_indices)
+
+    def function(self, position: int):
+        indices = self.function_indices
+        start = indices[position - 1] + 1 if position > 0 else 0
+        return self.arena.to_ast(indices[position], start)
+
+    def program(self) -> Program:
+        return self.arena.to_ast()
+
+
+class IRArtifact:
+    """Lista de IR guardada em um artefato; cada instrução é decodificada
+    (como ``IRInstruction``) quando acessada."""
+
+    def __init__(self, sections, owner=None):
+        tags, offsets, data, code = sections
+        self.constants = ConstantTable(tags, offsets, data)
+        self.code = code
+        self.owner = owner
+
+    def __len__(self):
+        return len(self.code) // len(IR_FIELDS)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Instrução fora da lista")
+        base = index * len(IR_FIELDS)
+        values = [None if raw < 0 else self.constants[raw] for raw in self.code[base:base + len(IR_FIELDS)]]
+        return IRInstruction(Op[values[0]], *values[1:])
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def tolist(self):
+        """Decodifica a lista inteira de uma vez (mais rápido que iterar)."""
+        # -1 (campo ausente) cai no último elemento: None
+        constants = [self.constants[index] for index in range(len(self.constants))] + [None]
+        opcodes = [Op[name] if isinstance(name, str) and name in Op.__members__ else None for name in constants]
+        code = self.code.tolist()
+        width = len(IR_FIELDS)
+        return [IRInstruction(opcodes[op], constants[dest], constants[arg1], constants[arg2], constants[t])
+                for op, dest, arg1, arg2, t in zip(*(code[offset::width] for offset in range(width)))]
+
+
+ARTIFACT_TYPES = {PROGRAM_ARTIFACT: ProgramArtifact, IR_ARTIFACT: IRArtifact}
+SECTION_FORMATS = {PROGRAM_ARTIFACT: PROGRAM_SECTIONS, IR_ARTIFACT: IR_SECTIONS}
+
+
+def decode_artifact(buffer, owner=None):
+    """Artefato a partir de ``bytes`` ou de um mapeamento já aberto."""
+    kind, sections = unpack_artifact(buffer, SECTION_FORMATS)
+    return ARTIFACT_TYPES[kind](sections, owner)
+
+
+def load_artifact(path: str):
+    """Abre ``path`` com ``mmap`` e devolve um ``ProgramArtifact`` ou um
+    ``IRArtifact`` lido preguiçosamente do mapeamento."""
+    with open(path, "rb") as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return decode_artifact(mapping, mapping)
@@ -0,0 +1,202 @@
+# ast_arena.py - Representação da AST em arena (arrays tipados) para a linguagem Cirius
+"""
+Guarda uma AST inteira em poucos arrays em vez de um objeto por nó. Cada nó é
+um índice; o tipo fica em ``kinds`` e os campos, codificados como inteiros,
+em ``fields`` a partir de ``first[nó]`` (na ordem de ``SCHEMAS``):
+
+- ``NODE``: índice do nó filho, ou -1 para ``None``;
+- ``VALUE``: índice na tabela de constantes (nomes, operadores, literais);
+- ``NODES`` / ``VALUES`` / ``PAIRS``: posição em ``lists``, onde ficam a
+  quantidade de itens seguida dos itens (índices de nó ou de constante; em
+  ``PAIRS`` dois índices de nó por item, como ``IfStatement.elifs``), ou -1
+  para uma lista ``None`` (``FunctionDecl.slot_types`` antes da inferência).
+
+Os nós são gravados em pós-ordem (filhos antes do pai), então a raiz é o
+último nó e um passe que só precisa visitar todos os nós de um tipo percorre
+``kinds`` em sequência, sem seguir ponteiros (``ASTArena.indices``).
+"""
+
+from array import array
+
+from cirius_ast import *
+
+NODE, VALUE, NODES, VALUES, PAIRS = range(5)
+
+# Campos de cada classe de nó, na ordem do construtor
+SCHEMAS = {
+    Program: (("functions", NODES),),
+    FunctionDecl: (("name", VALUE), ("params", VALUES), ("body", NODE), ("frame_size", VALUE),
+                   ("slot_types", VALUES), ("return_type", VALUE)),
+    Block: (("statements", NODES),),
+    Assignment: (("target", NODE), ("expr", NODE)),
+    Var: (("name", VALUE), ("slot", VALUE), ("type", VALUE)),
+    Number: (("value", VALUE), ("type", VALUE)),
+    String: (("value", VALUE), ("type", VALUE)),
+    Boolean: (("value", VALUE), ("type", VALUE)),
+    BinaryOp: (("left", NODE), ("op", VALUE), ("right", NODE), ("type", VALUE)),
+    UnaryOp: (("op", VALUE), ("operand", NODE), ("type", VALUE)),
+    IfStatement: (("cond", NODE), ("then", NODE), ("elifs", PAIRS), ("otherwise", NODE)),
+    WhileStatement: (("cond", NODE), ("body", NODE)),
+    ForStatement: (("var", VALUE), ("start", NODE), ("end", NODE), ("body", NODE), ("slot", VALUE)),
+    ReturnStatement: (("value", NODE),),
+    PrintStatement: (("value", NODE),),
+    InputStatement: (("type", VALUE),),
+    FunctionCall: (("name", VALUE), ("args", NODES), ("type", VALUE)),
+}
+
+NODE_TYPES = list(SCHEMAS)
+TYPE_CODES = {cls: code for code, cls in enumerate(NODE_TYPES)}
+
+
+class ASTArena:
+    """AST em arrays tipados. Use ``from_ast`` para converter uma árvore de
+    objetos e ``to_ast`` para reconstruí-la."""
+    __slots__ = ("kinds", "first", "fields", "lists", "constants", "_constant_ids")
+
+    def __init__(self):
+        self.kinds = array("B")
+        self.first = array("i")
+        self.fields = array("i")
+        self.lists = array("i")
+        self.constants = []
+        self._constant_ids = {}
+
+    def __len__(self):
+        return len(self.kinds)
+
+    @property
+    def root(self) -> int:
+        return len(self.kinds) - 1
+
+    # -------------------------
+    # Construção
+    # -------------------------
+    @classmethod
+    def from_ast(cls, node: Node) -> "ASTArena":
+        arena = cls()
+        arena.add(node)
+        return arena
+
+    def constant(self, value) -> int:
+        """Índice de ``value`` na tabela de constantes (internada; ``True`` e
+        ``1`` continuam distintos)."""
+        key = (type(value), value)
+        index = self._constant_ids.get(key)
+        if index is None:
+            index = self._constant_ids[key] = len(self.constants)
+            self.constants.append(value)
+        return index
+
+    def add(self, node) -> int:
+        """Grava ``node`` e seus descendentes; devolve o índice de ``node``."""
+        if node is None:
+            return -1
+        schema = SCHEMAS[type(node)]
+        encoded = []
+        for name, kind in schema:
+            value = getattr(node, name)
+            if kind == NODE:
+                encoded.append(self.add(value))
+            elif kind == VALUE:
+                encoded.append(self.constant(value))
+            elif value is None:
+                encoded.append(-1)
+            else:
+                if kind == NODES:
+                    items = [self.add(item) for item in value]
+                elif kind == VALUES:
+                    items = [self.constant(item) for item in value]
+                else:
+                    items = [self.add(item) for pair in value for item in pair]
+                encoded.append(len(self.lists))
+                self.lists.append(len(value))
+                self.lists.extend(items)
+        self.kinds.append(TYPE_CODES[type(node)])
+        self.first.append(len(self.fields))
+        self.fields.extend(encoded)
+        return len(self.kinds) - 1
+
+    # -------------------------
+    # Consulta
+    # -------------------------
+    def node_type(self, index: int):
+        return NODE_TYPES[self.kinds[index]]
+
+    def get(self, index: int, name: str):
+        """Campo ``name`` do nó ``index``: índice de nó (ou -1), valor da
+        constante, ou lista (de índices, valores ou pares de índices)."""
+        schema = SCHEMAS[NODE_TYPES[self.kinds[index]]]
+        for position, (field, kind) in enumerate(schema):
+            if field == name:
+                break
+        else:
+            raise KeyError(f"{NODE_TYPES[self.kinds[index]].__name__} não tem o campo '{name}'")
+        raw = self.fields[self.first[index] + position]
+        if kind == NODE:
+            return raw
+        if kind == VALUE:
+            return self.constants[raw]
+        if raw < 0:
+            return None
+        count = self.lists[raw]
+        if kind == PAIRS:
+            items = self.lists[raw + 1:raw + 1 + 2 * count]
+            return list(zip(items[::2], items[1::2]))
+        items = self.lists[raw + 1:raw + 1 + count]
+        if kind == VALUES:
+            return [self.constants[item] for item in items]
+        return list(items)
+
+    def indices(self, node_type):
+        """Índices de todos os nós de ``node_type``, em pós-ordem."""
+        kinds = self.kinds.tobytes()
+        marker = bytes([TYPE_CODES[node_type]])
+        index = kinds.find(marker)
+        while index >= 0:
+            yield index
+            index = kinds.find(marker, index + 1)
+
+    # -------------------------
+    # Reconstrução
+    # -------------------------
+    def to_ast(self, index: int = None, start: int = 0) -> Node:
+        """Reconstrói a árvore de objetos do nó ``index`` (a raiz, por
+        padrão). Em pós-ordem a subárvore de um nó é contígua e termina nele;
+        ``start`` é o primeiro nó dela (0 serve sempre, mas reconstrói também
+        o que vem antes). Como os filhos vêm antes dos pais, basta uma
+        passada."""
+        if index is None:
+            index = self.root
+        if index < 0:
+            return None
+        built = [None] * (index + 1 - start)
+        constants = self.constants
+        kinds = self.kinds
+        first = self.first
+        lists = self.lists
+        fields = self.fields
+        for current in range(start, index + 1):
+            node_type = NODE_TYPES[kinds[current]]
+            position = first[current]
+            values = []
+            for _, kind in SCHEMAS[node_type]:
+                raw = fields[position]
+                position += 1
+                if kind == NODE:
+                    values.append(None if raw < 0 else built[raw - start])
+                elif kind == VALUE:
+                    values.append(constants[raw])
+                elif raw < 0:
+                    values.append(None)
+                else:
+                    count = lists[raw]
+                    items = lists[raw + 1:raw + 1 + (2 * count if kind == PAIRS else count)]
+                    if kind == NODES:
+                        values.append([built[item - start] for item in items])
+                    elif kind == VALUES:
+                        values.append([constants[item] for item in items])
+                    else:
+                        values.append([(built[items[i] - start], built[items[i + 1] - start])
+                                       for i in range(0, len(items), 2)])
+            built[current - start] = node_type(*values)
+        return built[index - start]
@@ -0,0 +1,40 @@
+# bench.py - Benchmarks do compilador Cirius sobre programas sintéticos grandes
+"""
+Gera um programa Cirius sintético (muitas funções, laços, condicionais e
+expressões aritméticas) e mede fases do compilador sobre ele. Os benchmarks
+ficam no pacote ``benchmarks``, um módulo por área do compilador.
+
+Uso:
+    python bench.py lexer --functions 5000
+    python bench.py all --functions 2000 --repeat 5
+    python bench.py parser --input tests/loop.cir
+"""
+
+import argparse
+
+from benchmarks import BENCHMARKS
+from benchmarks.programs import generate_program
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks do compilador Cirius")
+    parser.add_argument("benchmark", choices=sorted(BENCHMARKS) + ["all"])
+    parser.add_argument("--functions", type=int, default=2000, help="Número de funções geradas.")
+    parser.add_argument("--statements", type=int, default=12, help="Instruções por função.")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetições (vale o melhor tempo).")
+    parser.add_argument("--input", help="Usa um arquivo .cir em vez do programa sintético.")
+    args = parser.parse_args()
+
+    if args.input:
+        with open(args.input, encoding="utf-8") as f:
+            source = f.read()
+    else:
+        source = generate_program(args.functions, args.statements)
+
+    names = sorted(BENCHMARKS) if args.benchmark == "all" else [args.benchmark]
+    for name in names:
+        BENCHMARKS[name](source, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
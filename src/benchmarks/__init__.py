@@ -0,0 +1,12 @@
+# benchmarks - Benchmarks do compilador Cirius, um módulo por área
+"""
+Cada benchmark é uma função ``bench_<nome>(source, repeat)`` que mede uma
+fase sobre o programa ``source`` (o sintético de ``programs`` ou um arquivo
+``.cir``) e imprime uma tabela com ``harness.report``. Cada módulo exporta os
+seus em ``BENCHMARKS``; ``bench.py`` é a linha de comando.
+"""
+
+from benchmarks import backend, frontend, lexer, optimizer
+
+BENCHMARKS = {**lexer.BENCHMARKS, **frontend.BENCHMARKS, **optimizer.BENCHMARKS,
+              **backend.BENCHMARKS}
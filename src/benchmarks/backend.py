@@ -0,0 +1,62 @@
+# backend.py - Benchmarks da representação do IR, da geração de C e da execução
+import contextlib
+import io
+
+from callgraph import prune_unreachable
+from codegen import CodeGenerator
+from interpreter import Interpreter
+from ir import IRGenerator, ir_to_dicts
+from ir_interpreter import IRInterpreter, compile_program
+from optimize import Optimizer
+
+from benchmarks.harness import captured, report, retained_memory, timed, versus
+from benchmarks.programs import generate_kernel_program, kernel_size, typed_program
+
+
+def bench_ir(source: str, repeat: int):
+    """IR como ``IRInstruction`` (slots, opcode inteiro) x dicts: memória,
+    custo da conversão para dicts e vazão de otimização + geração de C."""
+    program = typed_program(source)
+    generate_time, _ = timed(lambda: IRGenerator().generate(program), repeat)
+    objects_mem, ir_code = retained_memory(lambda: IRGenerator().generate(program))
+    dicts_mem, _ = retained_memory(lambda: ir_to_dicts(ir_code))
+    convert_time, _ = timed(lambda: ir_to_dicts(ir_code), repeat)
+    count = len(ir_code)
+
+    def backend():
+        with contextlib.redirect_stdout(io.StringIO()):
+            CodeGenerator().generate(Optimizer().optimize(ir_code))
+
+    backend_time, _ = timed(backend, repeat)
+    report(f"IR ({count} instruções)", [
+        ("memória: dicts x IRInstruction", f"{dicts_mem / 1e6:.1f} MB x {objects_mem / 1e6:.1f} MB  "
+                                           f"({dicts_mem / count:.0f} x {objects_mem / count:.0f} bytes/instrução)"),
+        ("geração de IR", f"{generate_time:.3f}s"),
+        ("conversão para dicts (só nos dumps)", f"{convert_time:.3f}s"),
+        ("otimização + C", f"{backend_time:.3f}s  ({count / backend_time / 1e3:.0f}k instruções/s)"),
+    ])
+
+
+def bench_run(source: str, repeat: int):
+    """Backends do comando ``run``: a AST com operadores genéricos, a AST com
+    operadores especializados pelos tipos e o IR otimizado."""
+    program, _ = prune_unreachable(typed_program(generate_kernel_program("constant", kernel_size(source), rounds=50)))
+    ir_code = Optimizer().optimize(IRGenerator().generate(program))
+    compile_time, _ = timed(lambda: compile_program(ir_code), repeat)
+    times, outputs = {}, set()
+    for label, run in (("AST genérica", lambda: Interpreter(specialize=False).interpret(program)),
+                       ("AST especializada", lambda: Interpreter().interpret(program)),
+                       ("IR otimizado", lambda: IRInterpreter().interpret(ir_code))):
+        times[label], output = timed(lambda: captured(run), repeat)
+        outputs.add(output)
+    assert len(outputs) == 1, "os backends imprimem saídas diferentes"
+    report(f"run ({len(program.functions)} funções)", [
+        (" x ".join(times), versus(times)),
+        ("IR para Python (exec)", f"{compile_time:.3f}s"),
+    ])
+
+
+BENCHMARKS = {
+    "ir": bench_ir,
+    "run": bench_run,
+}
@@ -0,0 +1,183 @@
+# frontend.py - Benchmarks do parser e da análise semântica
+import contextlib
+import io
+import json
+import os
+import tempfile
+
+import cirius_parser
+from artifact import load_artifact, write_artifact
+from ast_arena import NODE_TYPES, ASTArena
+from cirius_ast import Node, Var
+from frontend import parallel_front_end
+from ir import IRGenerator
+from lexer import Lexer
+from main import compile_pipeline, safe_json_dump
+from semantic import SemanticAnalyzer
+
+from benchmarks.harness import report, retained_memory, timed
+
+
+def bench_parser(source: str, repeat: int):
+    """Parser sobre lista de ``Token``, ``TokenBuffer`` e streaming."""
+    lexer = Lexer(source)
+    tokens = lexer.tokenize()
+    buffer = lexer.tokenize_buffer()
+    list_time, _ = timed(lambda: cirius_parser.Parser(tokens).parse(), repeat)
+    buffer_time, _ = timed(lambda: cirius_parser.Parser(buffer).parse(), repeat)
+    stream_time, _ = timed(lambda: cirius_parser.Parser(lexer.iter_tokens()).parse(), repeat)
+    report(f"Parser ({len(tokens)} tokens)", [
+        ("lista de Token", f"{list_time:.3f}s"),
+        ("TokenBuffer", f"{buffer_time:.3f}s"),
+        ("streaming (lexer + parser)", f"{stream_time:.3f}s"),
+    ])
+
+
+def bench_frontend(source: str, repeat: int):
+    """Parser + análise semântica sequenciais x paralelos por função."""
+    buffer = Lexer(source).tokenize_buffer()
+
+    def serial():
+        program = cirius_parser.Parser(buffer).parse()
+        SemanticAnalyzer().analyze(program)
+        return program
+
+    serial_time, _ = timed(serial, repeat)
+    rows = [("sequencial", f"{serial_time:.3f}s")]
+    jobs = 2
+    while True:
+        parallel_time, _ = timed(lambda: parallel_front_end(buffer, jobs), repeat)
+        rows.append((f"{jobs} processos", f"{parallel_time:.3f}s  ({serial_time / parallel_time:.2f}x)"))
+        if jobs >= (os.cpu_count() or 1):
+            break
+        jobs *= 2
+    report(f"Front-end ({len(buffer)} tokens, {os.cpu_count()} núcleos)", rows)
+
+
+def bench_cache(source: str, repeat: int):
+    """Compilação completa x recompilação com cache após editar uma função."""
+    middle = source.index("func ", len(source) // 2)
+    body = source.index("{", middle) + 1
+    edited = source[:body] + "\n    y = 1;" + source[body:]
+
+    with tempfile.TemporaryDirectory() as workdir:
+        output = os.path.join(workdir, "out.c")
+        cache_path = os.path.join(workdir, "cache.bin")
+
+        def build(text, cache=None):
+            with contextlib.redirect_stdout(io.StringIO()):
+                compile_pipeline(text, output, cache_path=cache)
+
+        def cold():
+            if os.path.exists(cache_path):
+                os.remove(cache_path)
+            build(source, cache_path)
+
+        full_time, _ = timed(lambda: build(source), repeat)
+        cold_time, _ = timed(cold, repeat)
+        warm_times = []
+        for _ in range(repeat):
+            build(source, cache_path)
+            warm_times.append(timed(lambda: build(edited, cache_path), 1)[0])
+        warm_time = min(warm_times)
+        size = os.path.getsize(cache_path)
+
+    report(f"Cache por função ({source.count('func ')} funções)", [
+        ("compilação sem cache", f"{full_time:.3f}s"),
+        ("compilação fria (gera o cache)", f"{cold_time:.3f}s  cache {size / 1e6:.1f} MB"),
+        ("após editar uma função", f"{warm_time:.3f}s  ({warm_time / full_time:.1%} da compilação sem cache)"),
+    ])
+
+
+# Cópias das classes da AST com ``__dict__`` por instância (o layout antigo),
+# para comparação no benchmark de memória
+DICT_NODE_TYPES = {cls: type(cls.__name__, (), {"__init__": cls.__init__}) for cls in NODE_TYPES}
+
+
+def to_dict_nodes(node):
+    """Copia uma AST para as classes com ``__dict__``."""
+    if isinstance(node, Node):
+        copy = DICT_NODE_TYPES[type(node)].__new__(DICT_NODE_TYPES[type(node)])
+        for field, value in node.to_dict().items():
+            setattr(copy, field, to_dict_nodes(value))
+        return copy
+    if isinstance(node, (list, tuple)):
+        return type(node)(to_dict_nodes(item) for item in node)
+    return node
+
+
+def count_vars(node):
+    """Conta os nós ``Var`` percorrendo a árvore de objetos."""
+    if isinstance(node, Var):
+        return 1
+    if isinstance(node, Node):
+        return sum(count_vars(value) for value in node.to_dict().values())
+    if isinstance(node, (list, tuple)):
+        return sum(count_vars(item) for item in node)
+    return 0
+
+
+def bench_memory(source: str, repeat: int):
+    """Memória da AST: classes com ``__dict__`` x ``__slots__`` x arena."""
+    buffer = Lexer(source).tokenize_buffer()
+    slots_mem, program = retained_memory(lambda: cirius_parser.Parser(buffer).parse())
+    dict_mem, _ = retained_memory(lambda: to_dict_nodes(program))
+    arena_mem, arena = retained_memory(lambda: ASTArena.from_ast(program))
+    count = len(arena)
+
+    tree_time, tree_vars = timed(lambda: count_vars(program), repeat)
+    arena_time, arena_vars = timed(lambda: sum(1 for _ in arena.indices(Var)), repeat)
+    if tree_vars != arena_vars:
+        raise AssertionError("Arena e árvore de objetos divergem")
+    report(f"Memória da AST ({count} nós)", [
+        ("classes com __dict__", f"{dict_mem / 1e6:.1f} MB  {dict_mem / count:.0f} bytes/nó"),
+        ("classes com __slots__", f"{slots_mem / 1e6:.1f} MB  {slots_mem / count:.0f} bytes/nó"),
+        ("arena (arrays tipados)", f"{arena_mem / 1e6:.1f} MB  {arena_mem / count:.0f} bytes/nó"),
+        ("contar Var: árvore x arena", f"{tree_time:.3f}s x {arena_time:.3f}s"),
+    ])
+
+
+def bench_artifact(source: str, repeat: int):
+    """AST e IR em JSON (``safe_json_dump``) x formato binário mmap."""
+    program = cirius_parser.Parser(Lexer(source).tokenize_buffer()).parse()
+    ir_code = IRGenerator().generate(program)
+    middle = len(program.functions) // 2
+    rows = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for label, obj in (("AST", program), ("IR", ir_code)):
+            json_path = os.path.join(workdir, f"{label}.json")
+            binary_path = os.path.join(workdir, f"{label}.cirb")
+            json_dump, _ = timed(lambda: safe_json_dump(obj, json_path), repeat)
+            binary_dump, _ = timed(lambda: write_artifact(binary_path, obj), repeat)
+
+            def json_load():
+                with open(json_path, encoding="utf-8") as f:
+                    return json.load(f)
+
+            json_time, _ = timed(json_load, repeat)
+            open_time, _ = timed(lambda: len(load_artifact(binary_path)), repeat)
+            if label == "AST":
+                one_time, _ = timed(lambda: load_artifact(binary_path).function(middle), repeat)
+                full_time, _ = timed(lambda: load_artifact(binary_path).program(), repeat)
+            else:
+                one_time, _ = timed(lambda: load_artifact(binary_path)[len(ir_code) // 2], repeat)
+                full_time, _ = timed(lambda: load_artifact(binary_path).tolist(), repeat)
+            rows += [
+                (f"{label}: tamanho JSON x binário",
+                 f"{os.path.getsize(json_path) / 1e6:.1f} MB x {os.path.getsize(binary_path) / 1e6:.1f} MB"),
+                (f"{label}: gravação JSON x binário", f"{json_dump:.3f}s x {binary_dump:.3f}s"),
+                (f"{label}: json.load", f"{json_time:.3f}s"),
+                (f"{label}: abrir (mmap)", f"{open_time * 1e3:.3f} ms  ({json_time / open_time:,.0f}x)"),
+                (f"{label}: abrir + decodificar um item", f"{one_time * 1e3:.3f} ms  ({json_time / one_time:,.0f}x)"),
+                (f"{label}: decodificar tudo", f"{full_time:.3f}s"),
+            ]
+    report(f"Artefatos ({len(program.functions)} funções, {len(ir_code)} instruções)", rows)
+
+
+BENCHMARKS = {
+    "artifact": bench_artifact,
+    "cache": bench_cache,
+    "frontend": bench_frontend,
+    "memory": bench_memory,
+    "parser": bench_parser,
+}
@@ -0,0 +1,105 @@
+# harness.py - Medição de tempo e memória, execução do código gerado e relatório dos benchmarks
+import contextlib
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+from codegen import CodeGenerator
+from ir_interpreter import IRInterpreter
+
+
+def timed(fn, repeat: int = 3):
+    """Executa ``fn`` ``repeat`` vezes; devolve (melhor tempo, resultado)."""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def retained_memory(fn):
+    """Memória (bytes) que continua alocada após ``fn``, enquanto o
+    resultado é mantido vivo, e o resultado."""
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        result = fn()
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return after - before, result
+
+
+def peak_memory(fn):
+    """Pico de memória alocada (bytes) durante ``fn`` e o resultado."""
+    tracemalloc.start()
+    try:
+        result = fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak, result
+
+
+def report(title: str, rows):
+    print(f"\n== {title} ==")
+    width = max(len(name) for name, _ in rows)
+    for name, value in rows:
+        print(f"  {name.ljust(width)}  {value}")
+
+
+def captured(fn):
+    """Saída impressa por ``fn``."""
+    with contextlib.redirect_stdout(io.StringIO()) as out:
+        fn()
+    return out.getvalue()
+
+
+def time_ir(versions, repeat: int = 3):
+    """Tempo de execução de cada versão do IR (``{rótulo: IR}``) no backend
+    interpretado; todas têm que imprimir a mesma saída."""
+    times, outputs = {}, set()
+    for label, ir_code in versions.items():
+        times[label], output = timed(lambda: captured(lambda: IRInterpreter().interpret(ir_code)), repeat)
+        outputs.add(output)
+    assert len(outputs) == 1, "as versões do IR imprimem saídas diferentes"
+    return times
+
+
+def run_c(ir_code, directory: str, name: str, repeat: int = 3):
+    """Gera C de ``ir_code``, compila com ``gcc -O0`` em ``directory`` e
+    devolve (melhor tempo de execução, saída)."""
+    c_path = os.path.join(directory, f"{name}.c")
+    exe_path = os.path.join(directory, name)
+    with open(c_path, "w", encoding="utf-8") as f:
+        f.write(CodeGenerator().generate(ir_code))
+    subprocess.run(["gcc", "-O0", "-w", "-o", exe_path, c_path, "-lm"], check=True)
+    return timed(lambda: subprocess.run([exe_path], capture_output=True, text=True, check=True).stdout, repeat)
+
+
+def time_c(versions, repeat: int = 3):
+    """Tempo de execução do C de cada versão do IR (``{rótulo: IR}``); todas
+    têm que imprimir a mesma saída. ``None`` se não há gcc."""
+    if shutil.which("gcc") is None:
+        return None
+    times, outputs = {}, set()
+    with tempfile.TemporaryDirectory() as directory:
+        for index, (label, ir_code) in enumerate(versions.items()):
+            times[label], output = run_c(ir_code, directory, f"v{index}", repeat)
+            outputs.add(output)
+    assert len(outputs) == 1, "as versões do IR imprimem saídas diferentes"
+    return times
+
+
+def versus(times) -> str:
+    """``{rótulo: tempo}`` como "0.500s x 0.250s  (2.00x)": a razão é entre
+    o primeiro e o último."""
+    values = list(times.values())
+    return " x ".join(f"{value:.3f}s" for value in values) + f"  ({values[0] / values[-1]:.2f}x)"
@@ -0,0 +1,78 @@
+# lexer.py - Benchmarks do analisador léxico
+from lexer import Lexer, relex
+
+from benchmarks.harness import peak_memory, report, timed
+
+
+def bench_lexer(source: str, repeat: int):
+    """Lista de ``Token`` x ``TokenBuffer``: vazão e pico de memória."""
+    lexer = Lexer(source)
+    list_time, tokens = timed(lexer.tokenize, repeat)
+    buffer_time, buffer = timed(lexer.tokenize_buffer, repeat)
+    list_mem, _ = peak_memory(lexer.tokenize)
+    buffer_mem, _ = peak_memory(lexer.tokenize_buffer)
+    count = len(tokens)
+    report(f"Lexer ({count} tokens, {len(source) / 1e6:.1f} MB)", [
+        ("lista de Token", f"{list_time:.3f}s  {count / list_time:,.0f} tok/s  pico {list_mem / 1e6:.1f} MB"),
+        ("TokenBuffer", f"{buffer_time:.3f}s  {count / buffer_time:,.0f} tok/s  pico {buffer_mem / 1e6:.1f} MB"),
+        ("bytes/token (lista -> buffer)", f"{list_mem / count:.0f} -> {buffer_mem / count:.0f}"),
+    ])
+
+
+def bench_scanner(source: str, repeat: int):
+    """Regex mestre x scanner manual (buffer e streaming), com verificação
+    de que os dois produzem a mesma sequência de tokens."""
+    regex = Lexer(source, scanner="regex")
+    manual = Lexer(source, scanner="manual")
+    regex_time, regex_tokens = timed(regex.tokenize_buffer, repeat)
+    manual_time, manual_tokens = timed(manual.tokenize_buffer, repeat)
+    if list(regex_tokens) != list(manual_tokens):
+        raise AssertionError("Scanner manual e regex produziram tokens diferentes")
+    regex_stream, _ = timed(lambda: sum(1 for _ in regex.iter_tokens()), repeat)
+    manual_stream, _ = timed(lambda: sum(1 for _ in manual.iter_tokens()), repeat)
+    count = len(manual_tokens)
+    report(f"Scanner ({count} tokens, sequências idênticas)", [
+        ("regex -> TokenBuffer", f"{regex_time:.3f}s  {count / regex_time:,.0f} tok/s"),
+        ("manual -> TokenBuffer", f"{manual_time:.3f}s  {count / manual_time:,.0f} tok/s"),
+        ("regex streaming", f"{regex_stream:.3f}s  {count / regex_stream:,.0f} tok/s"),
+        ("manual streaming", f"{manual_stream:.3f}s  {count / manual_stream:,.0f} tok/s"),
+    ])
+
+
+def bench_relex(source: str, repeat: int, edits: int = 200):
+    """Latência de edições de uma linha com ``relex`` x re-tokenizar tudo."""
+    full_time, buffer = timed(Lexer(source).tokenize_buffer, repeat)
+    middle = source.index("\n", len(source) // 2) + 1
+
+    def typing():
+        # Digita e apaga uma atribuição no meio do arquivo, caractere a caractere
+        line = "    z = x * 2 + 1;\n"
+        for index in range(edits):
+            char_index = index % len(line)
+            relex(buffer, middle + char_index, 0, line[char_index])
+        for index in range(edits):
+            relex(buffer, middle, 1, "")
+
+    def far_apart():
+        # Edições alternando entre o início e o fim do arquivo (pior caso do gap)
+        for index in range(edits // 10):
+            offset = 10 if index % 2 else len(buffer.source) - 10
+            relex(buffer, offset, 0, " ")
+
+    # As edições mudam o buffer: cada série roda uma vez só
+    typing_time, _ = timed(typing, 1)
+    far_time, _ = timed(far_apart, 1)
+    if list(buffer) != list(Lexer(buffer.source).tokenize_buffer()):
+        raise AssertionError("relex divergiu da re-tokenização completa")
+    report(f"Relex ({source.count(chr(10))} linhas, {len(buffer)} tokens)", [
+        ("re-tokenização completa", f"{full_time * 1e3:.1f} ms"),
+        ("edição local (digitação)", f"{typing_time / (2 * edits) * 1e3:.3f} ms/edição"),
+        ("edições alternando início/fim", f"{far_time / max(1, edits // 10) * 1e3:.1f} ms/edição"),
+    ])
+
+
+BENCHMARKS = {
+    "lexer": bench_lexer,
+    "relex": bench_relex,
+    "scanner": bench_scanner,
+}
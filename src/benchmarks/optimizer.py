@@ -0,0 +1,459 @@
+# optimizer.py - Benchmarks das análises e otimizações sobre o programa inteiro e o IR
+import os
+from collections import Counter
+
+from callgraph import CallGraph, prune_unreachable
+from cfg import ControlFlowGraph
+from cirius_ast import Program
+from codegen import CodeGenerator
+from folding import fold_constants
+from ir import IRGenerator, IRInstruction, Op
+from optimize import OPT_LEVELS, Optimizer, eliminate_dead_code, split_functions
+from peephole import STATS, peephole
+from ssa import SSAFunction, optimize_ssa
+
+from benchmarks.harness import report, time_c, time_ir, timed, versus
+from benchmarks.programs import function_irs, generate_kernel_program, kernel_size, typed_program
+
+
+def bench_callgraph(source: str, repeat: int):
+    """Grafo de chamadas e IR + otimização + C com e sem as funções
+    inalcançáveis a partir de ``main``."""
+    program = typed_program(source)
+
+    graph_time, graph = timed(lambda: CallGraph.from_program(program), repeat)
+    scc_time, _ = timed(lambda: CallGraph.from_program(program).sccs(), repeat)
+    pruned, removed = prune_unreachable(program)
+
+    def backend(ast: Program):
+        ir_code = IRGenerator().generate(ast)
+        CodeGenerator().generate(Optimizer().optimize(ir_code))
+        return len(ir_code)
+
+    full_time, full_size = timed(lambda: backend(program), repeat)
+    pruned_time, pruned_size = timed(lambda: backend(pruned), repeat)
+    report(f"Grafo de chamadas ({len(program.functions)} funções)", [
+        ("montar o grafo", f"{graph_time * 1e3:.1f} ms"),
+        ("grafo + componentes (Tarjan)", f"{scc_time * 1e3:.1f} ms"),
+        ("funções alcançáveis", f"{len(pruned.functions)}  ({len(removed)} removidas, "
+                                f"{len(graph.recursive_functions())} recursivas)"),
+        ("instruções de IR: todas x alcançáveis", f"{full_size} x {pruned_size}  ({pruned_size / full_size:.1%})"),
+        ("IR + otimização + C: todas x alcançáveis",
+         f"{full_time:.3f}s x {pruned_time:.3f}s  ({full_time / pruned_time:.2f}x)"),
+    ])
+
+
+def bench_cfg(source: str, repeat: int):
+    """Blocos básicos, dominadores, laços e volta para lista, por função."""
+    functions = function_irs(typed_program(source))
+    count = sum(len(function) for function in functions)
+
+    build_time, graphs = timed(lambda: [ControlFlowGraph(function) for function in functions], repeat)
+
+    def analyze():
+        loops = 0
+        for graph in graphs:
+            graph.invalidate()
+            graph.dominators()
+            loops += len(graph.loops())
+        return loops
+
+    analyze_time, loops = timed(analyze, repeat)
+    linearize_time, linear = timed(lambda: [graph.linearize() for graph in graphs], repeat)
+    jumps = (Op.GOTO, Op.IF_FALSE_GOTO, Op.LABEL)
+    before = sum(1 for function in functions for instr in function if instr.op in jumps)
+    after = sum(1 for function in linear for instr in function if instr.op in jumps)
+    report(f"CFG ({len(functions)} funções, {count} instruções)", [
+        ("montar blocos", f"{build_time:.3f}s  ({sum(len(graph.blocks) for graph in graphs)} blocos)"),
+        ("dominadores + laços", f"{analyze_time:.3f}s  ({loops} laços)"),
+        ("de volta para lista", f"{linearize_time:.3f}s"),
+        ("rótulos e desvios: antes x depois", f"{before} x {after}"),
+        ("instruções: antes x depois", f"{count} x {sum(len(function) for function in linear)}"),
+    ])
+
+
+def optimize_without_ssa(function):
+    """O otimizador antes da forma SSA: só código morto e volta para lista."""
+    return Optimizer(passes=["dce"]).optimize(function)
+
+
+def bench_ssa(source: str, repeat: int):
+    """IR sem x com SSA (SCCP + numeração de valores) num programa com
+    desvios decididos por constantes: tamanho, tempo de otimização e tempo de
+    execução nos backends interpretado e C."""
+    count = kernel_size(source)
+
+    def without_ssa(functions):
+        return [instr for function in functions for instr in optimize_without_ssa(function)]
+
+    def with_ssa(functions, optimizer=None):
+        optimizer = optimizer or Optimizer()
+        return [instr for function in functions for instr in optimizer.optimize_function(function)]
+
+    functions = function_irs(typed_program(generate_kernel_program("constant", count, rounds=10)))
+    size = sum(len(function) for function in functions)
+    plain_time, plain = timed(lambda: without_ssa(functions), repeat)
+    ssa_time, optimized = timed(lambda: with_ssa(functions), repeat)
+    optimizer = Optimizer()
+    with_ssa(functions, optimizer)
+    branches = (Op.GOTO, Op.IF_FALSE_GOTO)
+    rows = [
+        ("instruções: gerado x sem SSA x com SSA", f"{size} x {len(plain)} x {len(optimized)}  "
+                                                   f"({1 - len(optimized) / len(plain):.0%} menor)"),
+        ("desvios: sem SSA x com SSA", f"{sum(instr.op in branches for instr in plain)} x "
+                                       f"{sum(instr.op in branches for instr in optimized)}"),
+        ("SCCP / numeração de valores", ", ".join(f"{key} {value}" for key, value in sorted(optimizer.stats.items()))),
+        ("otimização: sem SSA x com SSA", f"{plain_time:.3f}s x {ssa_time:.3f}s"),
+        ("interpretador do IR: sem SSA x com SSA", versus(time_ir({"sem SSA": plain, "com SSA": optimized}, repeat))),
+    ]
+    # O C precisa de mais rodadas para o tempo de execução aparecer
+    functions = function_irs(typed_program(generate_kernel_program("constant", count, rounds=5000)))
+    times = time_c({"sem SSA": without_ssa(functions), "com SSA": with_ssa(functions)}, repeat)
+    if times:
+        rows.append(("C (gcc -O0, 5000 rodadas): sem SSA x com SSA", versus(times)))
+    report(f"SSA ({len(functions)} funções, {size} instruções)", rows)
+
+
+def global_dead_code_elimination(ir_code):
+    """A eliminação de código morto antiga: um conjunto com todo operando
+    texto do programa, repetida até o tamanho parar de cair."""
+    kept_ops = {Op.FUNC_BEGIN, Op.FUNC_END, Op.PARAM, Op.LABEL, Op.GOTO, Op.IF_FALSE_GOTO, Op.CALL, Op.INPUT}
+    previous_len = len(ir_code) + 1
+    while len(ir_code) < previous_len:
+        previous_len = len(ir_code)
+        used_vars = set()
+        for instr in ir_code:
+            if instr.arg1 and isinstance(instr.arg1, str):
+                used_vars.add(instr.arg1)
+            if instr.arg2 and isinstance(instr.arg2, str):
+                used_vars.add(instr.arg2)
+        ir_code = [instr for instr in ir_code
+                   if instr.dest is None or instr.dest in used_vars or instr.op in kept_ops]
+    return ir_code
+
+
+def optimize_without_cse(function):
+    """``Optimizer.optimize_function`` sem numeração de valores (local ou
+    global)."""
+    graph = ControlFlowGraph(peephole(function)[0])
+    optimize_ssa(graph, global_value_numbering=False)
+    eliminate_dead_code(graph)
+    return peephole(graph.linearize())[0]
+
+
+def bench_cse(source: str, repeat: int):
+    """Subexpressões comuns: instruções e tempo de execução sem numeração de
+    valores x só a local (por bloco) x local + global (SSA)."""
+    count = kernel_size(source, 200)
+
+    def versions(rounds, local=None, full=None):
+        functions = function_irs(typed_program(generate_kernel_program("arithmetic", count, rounds)))
+        local, full = local or Optimizer(global_cse=False), full or Optimizer()
+        return {"sem": [instr for function in functions for instr in optimize_without_cse(function)],
+                "local": [instr for function in functions for instr in local.optimize_function(function)],
+                "global": [instr for function in functions for instr in full.optimize_function(function)]}
+
+    local_optimizer, full_optimizer = Optimizer(global_cse=False), Optimizer()
+    codes = versions(3, local_optimizer, full_optimizer)
+    rows = [
+        ("instruções: sem x local x local + global", " x ".join(str(len(code)) for code in codes.values())),
+        ("reaproveitadas: local / global", f"{local_optimizer.stats['local_cse']} / "
+                                           f"{full_optimizer.stats['redundant']}"),
+        ("interpretador do IR: sem x local x local + global",
+         " x ".join(f"{run:.3f}s" for run in time_ir(codes, repeat).values())),
+    ]
+    # O C precisa de mais rodadas para o tempo de execução aparecer
+    times = time_c(versions(2000), repeat)
+    if times:
+        rows.append(("C (gcc -O0, 2000 rodadas): sem x local x local + global",
+                     " x ".join(f"{run:.3f}s" for run in times.values())))
+    report(f"Subexpressões comuns ({count + 1} funções)", rows)
+
+
+def bench_dce(source: str, repeat: int):
+    """Código morto: conjunto global repetido até estabilizar x vivacidade
+    por função sobre o CFG (lista de trabalho, conjuntos de bits)."""
+    functions = function_irs(typed_program(source))
+    ir_code = [instr for function in functions for instr in function]
+    count = len(ir_code)
+
+    global_time, global_code = timed(lambda: global_dead_code_elimination(ir_code), repeat)
+    live_time, live_code = timed(lambda: Optimizer(passes=["dce"]).optimize(ir_code), repeat)
+    # O CFG sozinho (montar + voltar para lista) já tira desvios e rótulos
+    cfg_time, cfg_code = timed(lambda: [instr for function in functions
+                                        for instr in ControlFlowGraph(function).linearize()], repeat)
+    values = lambda code: sum(1 for instr in code if instr.op not in (Op.LABEL, Op.GOTO, Op.IF_FALSE_GOTO))
+
+    # Uma cadeia de cópias sem uso: o conjunto global tira uma por rodada
+    length = 2000
+    chain = [IRInstruction(Op.FUNC_BEGIN, dest="main"), IRInstruction(Op.ASSIGN, dest="c0", arg1=1)]
+    chain += [IRInstruction(Op.ASSIGN, dest=f"c{index}", arg1=f"c{index - 1}") for index in range(1, length)]
+    chain.append(IRInstruction(Op.FUNC_END, dest="main"))
+    chain_global, _ = timed(lambda: global_dead_code_elimination(chain), repeat)
+    chain_live, _ = timed(lambda: Optimizer(passes=["dce"]).optimize(chain), repeat)
+    report(f"Código morto ({count} instruções)", [
+        ("conjunto global (antigo)", f"{global_time:.3f}s  ({values(ir_code) - values(global_code)} removidas)"),
+        ("vivacidade por função", f"{live_time:.3f}s  ({values(ir_code) - values(live_code)} removidas)"),
+        ("  só CFG + volta para lista", f"{cfg_time:.3f}s"),
+        ("instruções: antigo x vivacidade", f"{len(global_code)} x {len(live_code)}"),
+        (f"cadeia de {length} cópias mortas: antigo x vivacidade", f"{chain_global:.3f}s x {chain_live:.4f}s"),
+    ])
+
+
+def optimize_without_licm(function):
+    """``Optimizer.optimize_function`` sem ``hoist_invariants``."""
+    graph = ControlFlowGraph(function)
+    ssa = SSAFunction(graph)
+    ssa.sccp()
+    ssa.value_numbering()
+    ssa.to_cfg()
+    eliminate_dead_code(graph)
+    return graph.linearize()
+
+
+def loop_instructions(code):
+    """Instruções (fora rótulos e desvios) dentro de laços, com o peso da
+    profundidade: quanto cada volta dos laços internos executa."""
+    total = 0
+    for function in split_functions(code):
+        graph = ControlFlowGraph(function)
+        depth = {}
+        for loop in graph.loops():
+            for block in loop.blocks:
+                depth[block] = max(depth.get(block, 0), loop.depth)
+        total += sum(len(block.instructions) * level for block, level in depth.items())
+    return total
+
+
+def bench_licm(source: str, repeat: int):
+    """Código invariante de laço: instruções dentro dos laços e tempo de
+    execução (interpretador do IR e C) sem x com ``hoist_invariants``."""
+    count = kernel_size(source, 200)
+
+    def versions(rounds, optimizer=None):
+        functions = function_irs(typed_program(generate_kernel_program("loop", count, rounds)))
+        optimizer = optimizer or Optimizer()
+        return {"sem": [instr for function in functions for instr in optimize_without_licm(function)],
+                "com": [instr for function in functions for instr in optimizer.optimize_function(function)]}
+
+    optimizer = Optimizer()
+    codes = versions(3, optimizer)
+    rows = [
+        ("instruções em laços (peso = profundidade)",
+         f"{loop_instructions(codes['sem'])} x {loop_instructions(codes['com'])}  "
+         f"({optimizer.stats['hoisted']} movidas)"),
+        ("interpretador do IR: sem x com", versus(time_ir(codes, repeat))),
+    ]
+    # O C precisa de mais rodadas para o tempo de execução aparecer
+    times = time_c(versions(100), repeat)
+    if times:
+        rows.append(("C (gcc -O0, 100 rodadas): sem x com", versus(times)))
+    report(f"Código invariante de laço ({count + 1} funções)", rows)
+
+
+class EagerIRGenerator(IRGenerator):
+    """Geração de IR sem curto-circuito: ``and``/``or`` avaliam os dois
+    lados e toda condição vira um temporário antes de ``IF_FALSE_GOTO``."""
+
+    def gen_condition(self, expr, label_false):
+        cond_temp = self.gen_expression(expr)
+        self.instructions.append(IRInstruction(Op.IF_FALSE_GOTO, dest=label_false, arg1=cond_temp))
+
+    def gen_logical(self, expr):
+        left = self.gen_expression(expr.left)
+        right = self.gen_expression(expr.right)
+        temp = self.new_temp()
+        self.instructions.append(IRInstruction(Op[expr.op], dest=temp, arg1=left, arg2=right, type=expr.type))
+        return temp
+
+
+def bench_shortcircuit(source: str, repeat: int):
+    """``and``/``or`` avaliando os dois lados x em curto-circuito (desvios):
+    tamanho do IR otimizado e tempo de execução (interpretador do IR e C)."""
+    count = kernel_size(source, 200)
+
+    def versions(rounds):
+        program = typed_program(generate_kernel_program("branch", count, rounds))
+        return {label: Optimizer().optimize(generator.generate(program))
+                for label, generator in (("ambos os lados", EagerIRGenerator()), ("curto-circuito", IRGenerator()))}
+
+    codes = versions(3)
+    eager, short = codes.values()
+    branches = (Op.GOTO, Op.IF_FALSE_GOTO)
+    rows = [
+        ("instruções: ambos os lados x curto-circuito", f"{len(eager)} x {len(short)}"),
+        ("chamadas: ambos os lados x curto-circuito", f"{sum(instr.op is Op.CALL for instr in eager)} x "
+                                                      f"{sum(instr.op is Op.CALL for instr in short)}"),
+        ("desvios: ambos os lados x curto-circuito", f"{sum(instr.op in branches for instr in eager)} x "
+                                                     f"{sum(instr.op in branches for instr in short)}"),
+        ("interpretador do IR: ambos os lados x curto-circuito", versus(time_ir(codes, repeat))),
+    ]
+    # O C precisa de mais rodadas para o tempo de execução aparecer
+    times = time_c(versions(300), repeat)
+    if times:
+        rows.append(("C (gcc -O0, 300 rodadas): ambos os lados x curto-circuito", versus(times)))
+    report(f"Curto-circuito ({2 * count + 1} funções)", rows)
+
+
+def bench_fold(source: str, repeat: int):
+    """Dobra de constantes na AST: instruções do IR gerado e do otimizado e
+    tempo de IR + otimização, sem x com ``fold_constants``."""
+    count = kernel_size(source, 300)
+    literal_source = generate_kernel_program("literal", count, rounds=1)
+
+    def lower(program, optimizer=None):
+        ir_code = IRGenerator().generate(program)
+        return ir_code, (optimizer or Optimizer()).optimize(ir_code)
+
+    def lower_folded(program, optimizer=None):
+        stats = fold_constants(program)
+        return stats, lower(program, optimizer)
+
+    plain_optimizer, folded_optimizer = Optimizer(), Optimizer()
+    plain_ir, plain = lower(typed_program(literal_source), plain_optimizer)
+    stats, (folded_ir, folded) = lower_folded(typed_program(literal_source), folded_optimizer)
+    plain_time, _ = timed(lambda: lower(typed_program(literal_source)), repeat)
+    folded_time, _ = timed(lambda: lower_folded(typed_program(literal_source)), repeat)
+    report(f"Dobra de constantes ({count + 1} funções)", [
+        ("AST: dobradas / simplificadas / desvios", f"{stats['folded']} / {stats['simplified']} / {stats['branches']}"),
+        ("IR gerado: sem x com dobra", f"{len(plain_ir)} x {len(folded_ir)}  "
+                                       f"({len(plain_ir) - len(folded_ir)} instruções a menos)"),
+        ("IR otimizado: sem x com dobra", f"{len(plain)} x {len(folded)}  "
+                                          f"({len(plain) - len(folded)} instruções a menos)"),
+        ("identidades no IR: sem x com dobra", f"{plain_optimizer.stats['simplified']} x "
+                                               f"{folded_optimizer.stats['simplified']}"),
+        ("parse + tipos + IR + otimização: sem x com", f"{plain_time:.3f}s x {folded_time:.3f}s"),
+        ("interpretador do IR: sem x com", versus(time_ir({"sem": plain, "com": folded}, repeat))),
+    ])
+
+
+def bench_peephole(source: str, repeat: int):
+    """Peephole de desvios: o que sai do IR gerado, tempo contra montar o CFG
+    e linearizar, e desvios e rótulos que sobram no IR otimizado sem x com a
+    passada depois de ``linearize``."""
+    functions = [function for function in function_irs(typed_program(source)) if function[0].op is Op.FUNC_BEGIN]
+    size = sum(len(function) for function in functions)
+
+    def clean_all():
+        return [peephole(function) for function in functions]
+
+    peephole_time, cleaned = timed(clean_all, repeat)
+    cfg_time, _ = timed(lambda: [ControlFlowGraph(function).linearize() for function in functions], repeat)
+    stats = Counter()
+    for _, function_stats in cleaned:
+        stats.update(function_stats)
+
+    def without_peephole(function):
+        graph = ControlFlowGraph(function)
+        optimize_ssa(graph)
+        eliminate_dead_code(graph)
+        return graph.linearize()
+
+    control = (Op.GOTO, Op.IF_FALSE_GOTO, Op.LABEL)
+    plain = [instr for function in functions for instr in without_peephole(function)]
+    optimized = [instr for function in functions for instr in Optimizer().optimize_function(function)]
+    report(f"Peephole de desvios ({len(functions)} funções)", [
+        ("IR gerado: instruções antes x depois", f"{size} x {sum(len(code) for code, _ in cleaned)}"),
+        ("removidos / redirecionados", ", ".join(f"{key} {stats[key]}" for key in STATS)),
+        ("peephole x CFG + linearize", f"{peephole_time:.3f}s x {cfg_time:.3f}s"),
+        ("IR otimizado: instruções sem x com", f"{len(plain)} x {len(optimized)}"),
+        ("IR otimizado: desvios e rótulos sem x com", f"{sum(instr.op in control for instr in plain)} x "
+                                                      f"{sum(instr.op in control for instr in optimized)}"),
+    ])
+
+
+def bench_inline(source: str, repeat: int):
+    """Expansão de funções: instruções, chamadas que restam e tempo de
+    execução sem x com inlining de funções auxiliares pequenas."""
+    count = kernel_size(source, 200)
+
+    def versions(rounds, expanded=None):
+        ir_code = IRGenerator().generate(typed_program(generate_kernel_program("helper", count, rounds)))
+        return {"sem": Optimizer(inline_threshold=0).optimize(ir_code),
+                "com": (expanded or Optimizer()).optimize(ir_code)}
+
+    optimizer = Optimizer()
+    codes = versions(3, optimizer)
+    calls = lambda code: sum(instr.op is Op.CALL for instr in code)
+    rows = [
+        ("instruções: sem x com", " x ".join(str(len(code)) for code in codes.values())),
+        ("chamadas no IR: sem x com", " x ".join(str(calls(code)) for code in codes.values())),
+        ("expandidas (chamadas / instruções)", f"{optimizer.stats['inlined']} / "
+                                               f"{optimizer.stats['inlined_instructions']}"),
+        ("interpretador do IR: sem x com", versus(time_ir(codes, repeat))),
+    ]
+    # O C precisa de mais rodadas para o tempo de execução aparecer
+    times = time_c(versions(2000), repeat)
+    if times:
+        rows.append(("C (gcc -O0, 2000 rodadas): sem x com", versus(times)))
+    report(f"Expansão de funções ({count + 4} funções)", rows)
+
+
+def bench_passes(source: str, repeat: int):
+    """Níveis de otimização: tempo de otimização e instruções de -O0 a -O3,
+    e as passadas que mais custam em cada nível (``Optimizer.records``)."""
+    ir_code = IRGenerator().generate(typed_program(source))
+    rows = []
+    for level in sorted(OPT_LEVELS):
+        optimizer = Optimizer(level=level)
+        elapsed, optimized = timed(lambda: Optimizer(level=level).optimize(ir_code), repeat)
+        optimizer.optimize(ir_code)
+        costly = sorted(optimizer.records.items(), key=lambda item: -item[1].seconds)[:3]
+        rows.append((f"-O{level}: tempo, instruções", f"{elapsed:.3f}s, {len(ir_code)} -> {len(optimized)}"))
+        if costly:
+            rows.append((f"-O{level}: passadas mais caras", ", ".join(f"{name} {record.seconds:.3f}s"
+                                                                    for name, record in costly)))
+    report(f"Níveis de otimização ({len(split_functions(ir_code))} funções)", rows)
+
+
+def bench_strength(source: str, repeat: int):
+    """Redução de força: multiplicações e restos nos laços e tempo de
+    execução sem x com variáveis de indução e potências de dois."""
+    count = kernel_size(source, 200)
+    plain_passes = [name for name in OPT_LEVELS[2].passes if name != "strength"]
+
+    def versions(program_source, reduced=None):
+        ir_code = IRGenerator().generate(typed_program(program_source))
+        return {"sem": Optimizer(passes=plain_passes).optimize(ir_code),
+                "com": (reduced or Optimizer()).optimize(ir_code)}
+
+    optimizer = Optimizer()
+    codes = versions(generate_kernel_program("index", count, 3), optimizer)
+    costly = lambda code: sum(instr.op in (Op.MUL, Op.MOD, Op.DIV) for instr in code)
+    # O exemplo do repositório: o ``x % 2`` do laço vira ``x & 1``
+    tests = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tests")
+    with open(os.path.join(tests, "loop.cir"), encoding="utf-8") as f:
+        example = versions(f.read())
+    # ``time_ir`` confere que a saída do exemplo não muda com a passada
+    time_ir(example, 1)
+    rows = [
+        ("instruções: sem x com", " x ".join(str(len(code)) for code in codes.values())),
+        ("multiplicações, restos e divisões: sem x com", " x ".join(str(costly(code)) for code in codes.values())),
+        ("induções / testes de saída / potências de dois", f"{optimizer.stats['induction']} / "
+                                                           f"{optimizer.stats['exit_tests']} / "
+                                                           f"{optimizer.stats['power_of_two']}"),
+        ("tests/loop.cir: multiplicações e restos sem x com",
+         " x ".join(str(costly(code)) for code in example.values())),
+        ("interpretador do IR: sem x com", versus(time_ir(codes, repeat))),
+    ]
+    # O C precisa de mais rodadas para o tempo de execução aparecer
+    times = time_c(versions(generate_kernel_program("index", count, 500)), repeat)
+    if times:
+        rows.append(("C (gcc -O0, 500 rodadas): sem x com", versus(times)))
+    report(f"Redução de força ({count + 1} funções)", rows)
+
+
+BENCHMARKS = {
+    "callgraph": bench_callgraph,
+    "cfg": bench_cfg,
+    "cse": bench_cse,
+    "dce": bench_dce,
+    "fold": bench_fold,
+    "inline": bench_inline,
+    "licm": bench_licm,
+    "passes": bench_passes,
+    "peephole": bench_peephole,
+    "shortcircuit": bench_shortcircuit,
+    "ssa": bench_ssa,
+    "strength": bench_strength,
+}
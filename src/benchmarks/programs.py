@@ -0,0 +1,316 @@
+# programs.py - Programas Cirius sintéticos para os benchmarks
+import random
+
+import cirius_parser
+from ir import IRGenerator
+from lexer import Lexer
+from optimize import split_functions
+from semantic import SemanticAnalyzer
+from type_inference import infer_types
+
+
+def generate_program(functions: int = 1000, statements: int = 12, seed: int = 0) -> str:
+    """Gera um programa Cirius válido com ``functions`` funções auxiliares.
+
+    Cada função recebe dois parâmetros e mistura atribuições aritméticas,
+    ``if``/``elif``/``else``, laços ``for`` e ``while`` e chamadas a funções
+    declaradas antes dela. ``main`` chama algumas das funções geradas.
+    """
+    rng = random.Random(seed)
+    ops = ["+", "-", "*", "%"]
+    lines = []
+
+    def operand(names):
+        return rng.choice(names) if rng.random() < 0.7 else str(rng.randint(1, 9))
+
+    def arith(names, depth=2):
+        if depth == 0 or rng.random() < 0.3:
+            return operand(names)
+        return f"{arith(names, depth - 1)} {rng.choice(ops)} {arith(names, depth - 1)}"
+
+    for index in range(functions):
+        lines.append(f"func f{index}(a, b) {{")
+        names = ["a", "b"]
+        lines.append("    x = a + b;")
+        names.append("x")
+        for _ in range(statements):
+            choice = rng.random()
+            if choice < 0.4:
+                lines.append(f"    x = {arith(names)};")
+            elif choice < 0.6:
+                lines.append(f"    if x > {rng.randint(0, 50)} and a != b {{")
+                lines.append(f"        y = {arith(names)};")
+                lines.append(f"    }} elif x == {rng.randint(0, 9)} {{")
+                lines.append("        print(x);")
+                lines.append("    } else {")
+                lines.append(f"        y = x * {rng.randint(1, 8)};")
+                lines.append("    }")
+            elif choice < 0.75:
+                lines.append(f"    for i in 0..{rng.randint(1, 8)} {{")
+                lines.append(f"        x = x + i * {rng.randint(1, 8)};")
+                lines.append("    }")
+            elif choice < 0.85:
+                lines.append("    while x > 100 {")
+                lines.append("        x = x - 7;")
+                lines.append("    }")
+            elif index > 0:
+                callee = rng.randrange(index)
+                lines.append(f"    x = f{callee}(x, {operand(names)});")
+            else:
+                lines.append(f'    print("f{index}");')
+        lines.append("    return x;")
+        lines.append("}")
+        lines.append("")
+
+    lines.append("func main() {")
+    for index in range(0, functions, max(1, functions // 10)):
+        lines.append(f"    print(f{index}({rng.randint(0, 9)}, {rng.randint(0, 9)}));")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+# -------------------------
+# Núcleos: programas que exercitam uma otimização
+# -------------------------
+# Cada núcleo gera as linhas de uma função ``nome(a, b)`` (e de auxiliares
+# que ela use); ``generate_kernel_program`` repete o núcleo e monta o ``main``.
+def constant_kernel(name: str, rng: random.Random):
+    """Constantes locais (``debug``, ``mode``, ``scale``, ``limit``) decidem
+    quase todos os desvios, como código com chaves de configuração."""
+    mode, scale, limit = rng.randint(1, 4), rng.randint(2, 9), rng.randint(5, 20)
+    return [
+        f"func {name}(a, b) {{",
+        f"    debug = 0; mode = {mode}; scale = {scale}; limit = {limit};",
+        "    x = a * scale + mode * 2;",
+        "    if debug == 1 {",
+        f'        print("{name}"); print(x);',
+        "    }",
+        "    if mode == 1 {",
+        "        y = x + limit * scale;",
+        "        print(y);",
+        "    } elif mode == 2 and scale > 4 {",
+        "        print(x * scale - limit);",
+        "    }",
+        "    for i in 0..limit {",
+        "        if debug == 1 { print(i); }",
+        "        t = i * scale + mode * 3;",
+        "        if mode > 2 {",
+        "            u = t % (scale + 1) + b;",
+        "            if u == mode * 100 { print(u); }",
+        "        } else {",
+        "            v = t + limit - scale * 2;",
+        "            if v < 0 { print(v); }",
+        "        }",
+        "    }",
+        "    return x + scale * limit - mode;",
+        "}",
+    ]
+
+
+def loop_kernel(name: str, rng: random.Random):
+    """Laços ``for`` aninhados cujo limite e condição dependem de expressões
+    invariantes (dos parâmetros), como em código numérico."""
+    c1, c2, c3, prime = rng.randint(2, 9), rng.randint(2, 9), rng.randint(3, 12), rng.choice([89, 97, 101])
+    return [
+        f"func {name}(a, b) {{",
+        f"    for i in 0..b + {c3} {{",
+        f"        for j in 0..a * 2 + {c3} {{",
+        f"            if b * {c2} > i and (a * {c1} + b) % {prime} == (i * j + a * b) % {prime} {{",
+        "                print(j);",
+        "            }",
+        "        }",
+        "    }",
+        "    return a + b;",
+        "}",
+    ]
+
+
+def branch_kernel(name: str, rng: random.Random):
+    """Condições ``and``/``or`` num laço, em que o operando da esquerda
+    quase sempre decide e o da direita chama uma função auxiliar."""
+    modulus, limit, threshold = rng.randint(3, 9), rng.randint(20, 40), rng.randint(10, 30)
+    check = f"{name}_check"
+    return [
+        f"func {check}(v) {{",
+        f"    return v % {modulus} == 0;",
+        "}",
+        "",
+        f"func {name}(a, b) {{",
+        f"    for i in 0..{limit} {{",
+        f"        if i > {threshold} and {check}(i + a) {{",
+        "            print(i);",
+        f"        }} elif i > 2 or {check}(i * b) and b > 3 {{",
+        "            c = i + b;",
+        "        } else {",
+        "            print(b);",
+        "        }",
+        "    }",
+        "    return a;",
+        "}",
+    ]
+
+
+def index_kernel(name: str, rng: random.Random):
+    """Laços numéricos que calculam índices a partir da variável do laço
+    (``i * 8``, ``(i + a) * 4``, ``i % 2``), como em código que percorre
+    vetores."""
+    limit, scale, modulus = rng.randint(20, 60), rng.choice([3, 5, 8, 12]), rng.choice([2, 4, 8])
+    return [
+        f"func {name}(a, b) {{",
+        f"    for i in 0..b + {limit} {{",
+        f"        x = i * {scale} + (i + a) * 4;",
+        f"        if i % {modulus} == 0 and x % 8 < 4 {{",
+        f"            print(x + i * {scale + 1});",
+        "        }",
+        "    }",
+        f"    for j in 0..a + {limit} {{",
+        f"        if j * {scale} % 16 == {rng.randint(0, 15)} {{",
+        "            print(j * 2);",
+        "        }",
+        "    }",
+        "    return a + b;",
+        "}",
+    ]
+
+
+def literal_kernel(name: str, rng: random.Random):
+    """Expressões com literais (``2 * 3``, ``x * 1``, texto concatenado) e
+    desvios com condição constante, como código com parâmetros escritos à
+    mão e trechos de depuração desligados."""
+    size, step, offset = rng.randint(2, 9), rng.randint(1, 5), rng.randint(0, 50)
+    return [
+        f"func {name}(a, b) {{",
+        f"    x = a * 1 + {size} * {step} - 0;",
+        f"    y = (b + 0) * ({size} - {size} + 1) + {offset} % {size + 1};",
+        f'    name = "{name}" + "_" + "fold";',
+        f"    if {size} > 10 and a > 0 {{",
+        '        print(name + " grande");',
+        f"    }} elif {step} <= 5 or b > 3 {{",
+        f"        y = y + {step} * {step} * 1;",
+        "    } else {",
+        "        print(name);",
+        "    }",
+        "    while false {",
+        "        print(x);",
+        "    }",
+        f"    for i in 0..{size} * 2 {{",
+        f"        x = x + (i ^ 0) * {step} + (1 << 3) - 8;",
+        "    }",
+        "    return x + y * 1;",
+        "}",
+    ]
+
+
+def arithmetic_kernel(name: str, rng: random.Random):
+    """Expressões aritméticas que repetem subexpressões (``(a + i) * (b -
+    i)`` várias vezes no mesmo comando e entre comandos), dentro de laços."""
+    limit, modulus, offset = rng.randint(10, 30), rng.randint(3, 9), rng.randint(1, 9)
+    return [
+        f"func {name}(a, b) {{",
+        f"    for i in 0..{limit} {{",
+        f"        x = (a + i) * (b - i) + (a + i) * {offset};",
+        "        y = (a + i) * (b - i) - (b - i) * (b - i);",
+        f"        z = x % {modulus} + y % {modulus} + (a + i) % {modulus};",
+        f"        if x + y > z and x + y < z * {offset} {{",
+        "            print(x + y - z);",
+        "        } elif z == (a + i) * (b - i) {",
+        "            print(z);",
+        "        }",
+        "    }",
+        "    return a * b + a * b - (a * b) % 3;",
+        "}",
+    ]
+
+
+def helper_kernel(name: str, rng: random.Random):
+    """Chamadas a funções auxiliares pequenas (``HELPERS``: quadrado, mínimo,
+    limite) dentro de um laço, parte delas com argumentos constantes, como
+    em código dividido em funções curtas."""
+    limit, low, high = rng.randint(10, 30), rng.randint(0, 20), rng.randint(40, 90)
+    return [
+        f"func {name}(a, b) {{",
+        "    total = 0;",
+        f"    for i in 0..{limit} {{",
+        f"        total = total + clamp(sq(a + i) - sq(b), {low}, {high}) + smaller(i, sq(3));",
+        "    }",
+        "    return total;",
+        "}",
+    ]
+
+
+HELPERS = [
+    "func sq(x) {",
+    "    return x * x;",
+    "}",
+    "",
+    "func smaller(x, y) {",
+    "    if x < y {",
+    "        return x;",
+    "    }",
+    "    return y;",
+    "}",
+    "",
+    "func clamp(x, lo, hi) {",
+    "    if x < lo {",
+    "        return lo;",
+    "    }",
+    "    if x > hi {",
+    "        return hi;",
+    "    }",
+    "    return x;",
+    "}",
+    "",
+]
+
+# Funções que vêm uma vez antes das do núcleo
+PRELUDES = {"helper": HELPERS}
+
+KERNELS = {
+    "arithmetic": arithmetic_kernel,
+    "branch": branch_kernel,
+    "constant": constant_kernel,
+    "helper": helper_kernel,
+    "index": index_kernel,
+    "literal": literal_kernel,
+    "loop": loop_kernel,
+}
+
+
+def generate_kernel_program(kernel: str, functions: int = 200, rounds: int = 3, seed: int = 0) -> str:
+    """Gera ``functions`` funções do núcleo ``kernel`` (de ``KERNELS``).
+    ``main`` chama cada uma ``rounds`` vezes e imprime as somas de dez em
+    dez."""
+    rng = random.Random(seed)
+    lines = list(PRELUDES.get(kernel, ()))
+    for index in range(functions):
+        lines.extend(KERNELS[kernel](f"{kernel}{index}", rng))
+        lines.append("")
+    lines.append("func main() {")
+    lines.append(f"    for r in 1..{rounds} {{")
+    for start in range(0, functions, 10):
+        calls = [f"{kernel}{index}(r + {rng.randint(0, 9)}, {rng.randint(1, 9)})"
+                 for index in range(start, min(start + 10, functions))]
+        lines.append(f"        print({' + '.join(calls)});")
+    lines.append("    }")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+
+def kernel_size(source: str, limit: int = 300) -> int:
+    """Número de funções dos programas de núcleo: o de ``source`` (o
+    sintético ou o ``--input``), até ``limit``."""
+    return max(1, min(limit, source.count("func ") - 1))
+
+
+def typed_program(source: str):
+    """AST de ``source`` já analisada e com os tipos inferidos, como o
+    pipeline a entrega à geração de IR."""
+    program = cirius_parser.Parser(Lexer(source).tokenize_buffer()).parse()
+    SemanticAnalyzer().analyze(program)
+    infer_types(program)
+    return program
+
+
+def function_irs(program):
+    """IR de ``program`` separado por função (listas de ``IRInstruction``)."""
+    return split_functions(IRGenerator().generate(program))
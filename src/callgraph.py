@@ -0,0 +1,148 @@
+# callgraph.py - Grafo de chamadas do programa Cirius
+"""
+Grafo de chamadas montado a partir dos nós ``FunctionCall`` (ou, no cache
+por função, da lista de funções chamadas de cada uma). Oferece:
+
+- ``reachable``: funções alcançáveis a partir de ``main``;
+- ``sccs``: componentes fortemente conexos (Tarjan), das funções chamadas
+  para as que chamam; uma função é recursiva se está num componente com mais
+  de uma função ou chama a si mesma;
+- ``prune_unreachable``: remove do ``Program`` as funções que nunca rodam,
+  antes da geração de IR.
+
+Só funções declaradas no programa entram no grafo; chamadas a embutidas
+(``str``) são ignoradas.
+"""
+
+from cirius_ast import FunctionCall, Program, walk
+
+ROOT = "main"
+
+
+class CallGraph:
+    """Grafo de chamadas: ``callees[nome]`` e ``callers[nome]`` são os
+    conjuntos de funções chamadas por / que chamam ``nome``."""
+
+    def __init__(self, functions):
+        """``functions``: pares ``(nome, nomes chamados)`` em ordem de
+        declaração (a primeira declaração de um nome vale)."""
+        self.names = []
+        self.callees = {}
+        for name, called in functions:
+            if name not in self.callees:
+                self.names.append(name)
+                self.callees[name] = set(called)
+        self.position = {name: index for index, name in enumerate(self.names)}
+        for name in self.names:
+            self.callees[name] &= self.callees.keys()
+        self.callers = {name: set() for name in self.names}
+        for name in self.names:
+            for callee in self.callees[name]:
+                self.callers[callee].add(name)
+        self._sccs = None
+        self._component = None
+
+    @classmethod
+    def from_program(cls, program: Program) -> "CallGraph":
+        return cls((func.name, {node.name for node in walk(func.body) if isinstance(node, FunctionCall)})
+                   for func in program.functions)
+
+    # -------------------------
+    # Alcançabilidade
+    # -------------------------
+    def reachable(self, root: str = ROOT):
+        """Funções alcançáveis a partir de ``root`` (incluindo ``root``)."""
+        if root not in self.callees:
+            return set()
+        seen = {root}
+        stack = [root]
+        while stack:
+            for callee in self.callees[stack.pop()]:
+                if callee not in seen:
+                    seen.add(callee)
+                    stack.append(callee)
+        return seen
+
+    # -------------------------
+    # Componentes fortemente conexos
+    # -------------------------
+    def sccs(self):
+        """Componentes fortemente conexos em ordem topológica reversa (uma
+        função aparece depois de todas as que ela chama, fora do próprio
+        componente). Tarjan iterativo: programas grandes estourariam a pilha
+        de recursão do Python."""
+        if self._sccs is not None:
+            return self._sccs
+        index_of = {}
+        lowlink = {}
+        on_stack = set()
+        stack = []
+        components = []
+        counter = 0
+        for start in self.names:
+            if start in index_of:
+                continue
+            work = [(start, iter(sorted(self.callees[start])))]
+            index_of[start] = lowlink[start] = counter
+            counter += 1
+            stack.append(start)
+            on_stack.add(start)
+            while work:
+                name, children = work[-1]
+                for child in children:
+                    if child not in index_of:
+                        index_of[child] = lowlink[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack.add(child)
+                        work.append((child, iter(sorted(self.callees[child]))))
+                        break
+                    if child in on_stack:
+                        lowlink[name] = min(lowlink[name], index_of[child])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[name])
+                    if lowlink[name] == index_of[name]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack.discard(member)
+                            component.append(member)
+                            if member == name:
+                                break
+                        component.sort(key=self.position.__getitem__)
+                        components.append(component)
+        self._sccs = components
+        self._component = {name: index for index, component in enumerate(components) for name in component}
+        return components
+
+    def component_of(self, name: str) -> int:
+        """Índice do componente de ``name`` em ``sccs()``."""
+        self.sccs()
+        return self._component[name]
+
+    def is_recursive(self, name: str) -> bool:
+        """``name`` pode chamar a si mesma, direta ou indiretamente."""
+        return name in self.callees[name] or len(self.sccs()[self.component_of(name)]) > 1
+
+    def recursive_functions(self):
+        """Conjunto das funções recursivas."""
+        recursive = {name for name in self.names if name in self.callees[name]}
+        for component in self.sccs():
+            if len(component) > 1:
+                recursive.update(component)
+        return recursive
+
+
+def prune_unreachable(program: Program, root: str = ROOT):
+    """``Program`` só com as funções alcançáveis a partir de ``root`` (na
+    ordem original) e os nomes removidos. Sem ``root`` nada é removido."""
+    graph = CallGraph.from_program(program)
+    if root not in graph.callees:
+        return program, []
+    reachable = graph.reachable(root)
+    kept = [func for func in program.functions if func.name in reachable]
+    removed = [func.name for func in program.functions if func.name not in reachable]
+    return Program(kept), removed
@@ -0,0 +1,381 @@
+# cfg.py - Grafo de fluxo de controle (blocos básicos) do IR da linguagem Cirius
+"""
+Blocos básicos do IR de uma função (de ``FUNC_BEGIN`` a ``FUNC_END``), com
+arestas de predecessores e sucessores, ordem pós-ordem reversa, árvore de
+dominadores e laços naturais.
+
+Os desvios não ficam dentro dos blocos: um bloco guarda seus rótulos, as
+instruções sem desvio (``RETURN`` pode ser a última) e, se termina em
+``IF_FALSE_GOTO``, a condição; os sucessores são ``[]`` (``RETURN``),
+``[próximo]`` ou ``[se verdadeira, se falsa]``. Um bloco de saída vazio,
+sempre o último, recebe o fluxo que cai no fim da função.
+
+``linearize`` refaz a lista de instruções a partir das arestas: blocos
+inalcançáveis somem, um desvio só é emitido quando o destino não é o bloco
+seguinte e só ficam os rótulos que ainda são destino de algum desvio. As
+otimizações alteram blocos e arestas e chamam ``linearize`` no fim.
+"""
+
+from typing import List
+
+from ir import IRInstruction, Op
+
+
+class BasicBlock:
+    """Bloco básico: ``labels``, ``instructions``, ``condition`` (operando do
+    desvio condicional ou ``None``), ``successors`` e ``predecessors``.
+    ``idom`` e ``dominated`` (filhos na árvore de dominadores) são
+    preenchidos por ``ControlFlowGraph.dominators``."""
+    __slots__ = ("index", "labels", "instructions", "condition", "successors", "predecessors",
+                 "idom", "dominated", "_pre", "_post")
+
+    def __init__(self, index: int):
+        self.index = index
+        self.labels = []
+        self.instructions = []
+        self.condition = None
+        self.successors = []
+        self.predecessors = []
+        self.idom = None
+        self.dominated = []
+        self._pre = self._post = -1
+
+    @property
+    def returns(self) -> bool:
+        return bool(self.instructions) and self.instructions[-1].op is Op.RETURN
+
+    def __repr__(self):
+        return f"B{self.index}"
+
+
+class Loop:
+    """Laço natural: ``header``, ``blocks`` (conjunto de blocos, incluindo o
+    cabeçalho), ``latches`` (origens das arestas de volta), ``parent`` (laço
+    que o contém) e ``depth`` (1 para laços externos)."""
+    __slots__ = ("header", "blocks", "latches", "parent", "depth")
+
+    def __init__(self, header: BasicBlock):
+        self.header = header
+        self.blocks = {header}
+        self.latches = []
+        self.parent = None
+        self.depth = 1
+
+    @property
+    def exits(self):
+        """Blocos fora do laço alcançados a partir dele."""
+        return {succ for block in self.blocks for succ in block.successors if succ not in self.blocks}
+
+    def __repr__(self):
+        return f"Loop({self.header!r}, {sorted(block.index for block in self.blocks)})"
+
+
+class ControlFlowGraph:
+    """CFG de uma função. ``header`` são ``FUNC_BEGIN`` e os ``PARAM``;
+    ``blocks[0]`` é a entrada e ``exit`` o último bloco."""
+
+    def __init__(self, function_ir: List[IRInstruction]):
+        count = 1
+        while count < len(function_ir) and function_ir[count].op is Op.PARAM:
+            count += 1
+        self.header = function_ir[:count]
+        self.footer = function_ir[-1] if function_ir and function_ir[-1].op is Op.FUNC_END else None
+        body = function_ir[count:len(function_ir) - (self.footer is not None)]
+        self.blocks = []
+        self._build(body)
+        self._rpo = None
+        self._dominators = False
+
+    # -------------------------
+    # Construção
+    # -------------------------
+    def new_block(self) -> BasicBlock:
+        block = BasicBlock(len(self.blocks))
+        self.blocks.append(block)
+        return block
+
+    def _build(self, body):
+        jumps = {}
+        by_label = {}
+        label, goto, if_false_goto, return_ = Op.LABEL, Op.GOTO, Op.IF_FALSE_GOTO, Op.RETURN
+        current = self.new_block()
+        for instr in body:
+            op = instr.op
+            if op is label:
+                if current.instructions or current.index in jumps:
+                    current = self.new_block()
+                current.labels.append(instr.dest)
+                by_label[instr.dest] = current
+            elif op is goto or op is if_false_goto:
+                jumps[current.index] = instr
+                current = self.new_block()
+            else:
+                current.instructions.append(instr)
+                if op is return_:
+                    current = self.new_block()
+        if current.instructions or current.labels:
+            current = self.new_block()
+        # O último bloco (vazio e sem rótulos) é a saída
+        self.exit = current
+
+        blocks = self.blocks
+        for block in blocks[:-1]:
+            following = blocks[block.index + 1]
+            jump = jumps.get(block.index)
+            if jump is None:
+                successors = [] if block.returns else [following]
+            elif jump.op is goto:
+                successors = [by_label[jump.dest]]
+            else:
+                target = by_label[jump.dest]
+                successors = [following] if target is following else [following, target]
+                if target is not following:
+                    block.condition = jump.arg1
+            self.set_successors(block, successors)
+
+    def set_successors(self, block: BasicBlock, successors):
+        """Troca os sucessores de ``block`` (``[próximo]`` ou ``[se
+        verdadeira, se falsa]``), atualizando os predecessores. Invalida as
+        análises guardadas."""
+        for succ in block.successors:
+            succ.predecessors.remove(block)
+        block.successors = list(successors)
+        for succ in block.successors:
+            succ.predecessors.append(block)
+        if len(block.successors) != 2:
+            block.condition = None
+        self.invalidate()
+
+    def split_edge(self, pred: BasicBlock, succ: BasicBlock) -> BasicBlock:
+        """Bloco novo e vazio na aresta ``pred -> succ`` (o lugar das cópias
+        de uma aresta crítica ao sair da forma SSA)."""
+        block = self.new_block()
+        successors = [block if target is succ else target for target in pred.successors]
+        condition = pred.condition
+        self.set_successors(pred, successors)
+        pred.condition = condition
+        self.set_successors(block, [succ])
+        return block
+
+    def insert_preheader(self, loop: Loop) -> BasicBlock:
+        """Bloco novo e vazio por onde passam todas as entradas em ``loop``
+        (as arestas para o cabeçalho que não vêm de dentro do laço). Ele
+        entra nos laços que contêm ``loop``."""
+        header = loop.header
+        block = self.new_block()
+        for pred in [pred for pred in header.predecessors if pred not in loop.blocks]:
+            condition = pred.condition
+            self.set_successors(pred, [block if target is header else target for target in pred.successors])
+            pred.condition = condition
+        self.set_successors(block, [header])
+        outer = loop.parent
+        while outer is not None:
+            outer.blocks.add(block)
+            outer = outer.parent
+        return block
+
+    def invalidate(self):
+        self._rpo = None
+        self._dominators = False
+
+    # -------------------------
+    # Ordens
+    # -------------------------
+    def reverse_postorder(self) -> List[BasicBlock]:
+        """Blocos alcançáveis a partir da entrada em pós-ordem reversa (um
+        bloco vem antes dos seus sucessores, fora as arestas de volta)."""
+        if self._rpo is not None:
+            return self._rpo
+        entry = self.blocks[0]
+        seen = {entry}
+        postorder = []
+        stack = [(entry, iter(entry.successors))]
+        while stack:
+            block, successors = stack[-1]
+            for succ in successors:
+                if succ not in seen:
+                    seen.add(succ)
+                    stack.append((succ, iter(succ.successors)))
+                    break
+            else:
+                stack.pop()
+                postorder.append(block)
+        postorder.reverse()
+        self._rpo = postorder
+        return postorder
+
+    def reachable(self):
+        return set(self.reverse_postorder())
+
+    # -------------------------
+    # Dominadores
+    # -------------------------
+    def dominators(self):
+        """Preenche ``idom`` e ``dominated`` de cada bloco alcançável
+        (algoritmo iterativo de Cooper, Harvey e Kennedy sobre a pós-ordem
+        reversa). A entrada e os blocos inalcançáveis ficam com ``idom``
+        ``None``."""
+        if self._dominators:
+            return
+        rpo = self.reverse_postorder()
+        order = {block: position for position, block in enumerate(rpo)}
+        for block in self.blocks:
+            block.idom = None
+            block.dominated = []
+        entry = rpo[0]
+        idom = {entry: entry}
+
+        def intersect(a, b):
+            while a is not b:
+                while order[a] > order[b]:
+                    a = idom[a]
+                while order[b] > order[a]:
+                    b = idom[b]
+            return a
+
+        changed = True
+        while changed:
+            changed = False
+            for block in rpo[1:]:
+                new_idom = None
+                for pred in block.predecessors:
+                    if pred in idom:
+                        new_idom = pred if new_idom is None else intersect(pred, new_idom)
+                if idom.get(block) is not new_idom:
+                    idom[block] = new_idom
+                    changed = True
+
+        for block in rpo[1:]:
+            block.idom = idom[block]
+            block.idom.dominated.append(block)
+        # Numeração da árvore para responder ``dominates`` em O(1)
+        counter = 0
+        stack = [(entry, iter(entry.dominated))]
+        entry._pre = counter
+        while stack:
+            block, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                counter += 1
+                block._post = counter
+            else:
+                counter += 1
+                child._pre = counter
+                stack.append((child, iter(child.dominated)))
+        for block in self.blocks:
+            if block not in order:
+                block._pre = block._post = -1
+        self._dominators = True
+
+    def dominance_frontiers(self):
+        """Fronteira de dominância de cada bloco alcançável: os blocos onde a
+        dominância dele termina (onde uma definição nele encontra outra)."""
+        self.dominators()
+        frontiers = {block: set() for block in self.reverse_postorder()}
+        for block in frontiers:
+            if len(block.predecessors) < 2:
+                continue
+            for pred in block.predecessors:
+                runner = pred
+                while runner in frontiers and runner is not block.idom:
+                    frontiers[runner].add(block)
+                    runner = runner.idom
+        return frontiers
+
+    def dominates(self, a: BasicBlock, b: BasicBlock) -> bool:
+        """``a`` domina ``b`` (todo caminho da entrada a ``b`` passa por
+        ``a``; um bloco domina a si mesmo)."""
+        self.dominators()
+        return a._pre >= 0 and b._pre >= 0 and a._pre <= b._pre and b._post <= a._post
+
+    # -------------------------
+    # Laços
+    # -------------------------
+    def loops(self) -> List[Loop]:
+        """Laços naturais (arestas de volta para um bloco que domina a
+        origem), um por cabeçalho, dos externos para os internos. O IR vem de
+        laços estruturados, então não há laços irredutíveis."""
+        self.dominators()
+        reachable = self.reachable()
+        loops = {}
+        for block in self.reverse_postorder():
+            for succ in block.successors:
+                if self.dominates(succ, block):
+                    loop = loops.get(succ)
+                    if loop is None:
+                        loop = loops[succ] = Loop(succ)
+                    loop.latches.append(block)
+                    stack = [block]
+                    while stack:
+                        member = stack.pop()
+                        if member not in loop.blocks and member in reachable:
+                            loop.blocks.add(member)
+                            stack.extend(member.predecessors)
+        ordered = sorted(loops.values(), key=lambda loop: -len(loop.blocks))
+        for position, loop in enumerate(ordered):
+            for outer in reversed(ordered[:position]):
+                if loop.header in outer.blocks:
+                    loop.parent = outer
+                    loop.depth = outer.depth + 1
+                    break
+        ordered.sort(key=lambda loop: (loop.depth, loop.header.index))
+        return ordered
+
+    # -------------------------
+    # De volta para lista
+    # -------------------------
+    def linearize(self) -> List[IRInstruction]:
+        """IR linear da função: blocos alcançáveis na ordem original (a saída
+        por último), com o mínimo de desvios e só os rótulos usados."""
+        reachable = self.reachable()
+        # Blocos criados depois (``split_edge``, ``insert_preheader``) vêm
+        # depois da saída na lista; cada um vai para logo antes do seu
+        # sucessor, para cair nele sem desvio. A saída tem de ser o último
+        # bloco: ela cai no fim da função
+        order = [block for block in self.blocks[:self.exit.index] if block in reachable]
+        for block in self.blocks[self.exit.index + 1:]:
+            if block in reachable:
+                target = block.successors[0] if len(block.successors) == 1 else None
+                position = order.index(target) if target in order else len(order)
+                order.insert(position, block)
+        if self.exit in reachable:
+            order.append(self.exit)
+        used = {name for block in self.blocks for name in block.labels}
+        names = {}
+
+        def label_of(block):
+            name = names.get(block)
+            if name is None:
+                if block.labels:
+                    name = block.labels[0]
+                else:
+                    name = f"B{block.index}"
+                    while name in used:
+                        name += "_"
+                    used.add(name)
+                names[block] = name
+            return name
+
+        jumps = []
+        for position, block in enumerate(order):
+            following = order[position + 1] if position + 1 < len(order) else None
+            branch = []
+            if block.condition is not None:
+                when_true, when_false = block.successors
+                branch.append(IRInstruction(Op.IF_FALSE_GOTO, dest=label_of(when_false), arg1=block.condition))
+                if when_true is not following:
+                    branch.append(IRInstruction(Op.GOTO, label_of(when_true)))
+            elif block.successors and block.successors[0] is not following:
+                branch.append(IRInstruction(Op.GOTO, label_of(block.successors[0])))
+            jumps.append(branch)
+
+        code = list(self.header)
+        for block, branch in zip(order, jumps):
+            if block in names:
+                code.append(IRInstruction(Op.LABEL, dest=names[block]))
+            code.extend(block.instructions)
+            code.extend(branch)
+        if self.footer is not None:
+            code.append(self.footer)
+        return code
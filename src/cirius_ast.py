@@ -1,63 +1,103 @@
 # cirius_ast.py - Estrutura de AST para a linguagem Cirius
 
 class Node:
-    """Classe base para todos os nós da AST"""
+    """Classe base para todos os nós da AST.
+
+    Os nós usam ``__slots__`` (sem ``__dict__`` por instância): a AST de um
+    programa grande tem milhões de nós. ``__slots__`` de cada classe lista os
+    campos na ordem do construtor.
+    """
+    __slots__ = ()
+
     def to_dict(self):
-        return self.__dict__
+        return {field: getattr(self, field) for field in self.__slots__}
 
     @classmethod
     def from_dict(cls, d):
         obj = cls.__new__(cls)
-        obj.__dict__.update(d)
+        for field in cls.__slots__:
+            setattr(obj, field, d.get(field))
         return obj
 
 class Program(Node):
+    __slots__ = ("functions",)
+
     def __init__(self, functions=None):
         self.functions = functions or []
 
 class FunctionDecl(Node):
-    def __init__(self, name, params, body):
+    __slots__ = ("name", "params", "body", "frame_size", "slot_types", "return_type")
+
+    def __init__(self, name, params, body, frame_size=None, slot_types=None, return_type=None):
         self.name = name
         self.params = params
         self.body = body
+        self.frame_size = frame_size  # variáveis locais (preenchido pela análise semântica)
+        self.slot_types = slot_types  # tipo de cada slot (preenchido pela inferência de tipos)
+        self.return_type = return_type
 
 class Block(Node):
+    __slots__ = ("statements",)
+
     def __init__(self, statements=None):
         self.statements = statements or []
 
 class Assignment(Node):
+    __slots__ = ("target", "expr")
+
     def __init__(self, target, expr):
         self.target = target
         self.expr = expr
 
 class Var(Node):
-    def __init__(self, name):
+    __slots__ = ("name", "slot", "type")
+
+    def __init__(self, name, slot=None, type=None):
         self.name = name
+        self.slot = slot  # posição no frame da função (None para nomes globais)
+        self.type = type  # tipo inferido (type_inference.py)
 
 class Number(Node):
-    def __init__(self, value):
+    __slots__ = ("value", "type")
+
+    def __init__(self, value, type=None):
         self.value = value
+        self.type = type
 
 class String(Node):
-    def __init__(self, value):
+    __slots__ = ("value", "type")
+
+    def __init__(self, value, type=None):
         self.value = value
+        self.type = type
 
 class Boolean(Node):
-    def __init__(self, value):
+    __slots__ = ("value", "type")
+
+    def __init__(self, value, type=None):
         self.value = value
+        self.type = type
 
 class BinaryOp(Node):
-    def __init__(self, left, op, right):
+    __slots__ = ("left", "op", "right", "type")
+
+    def __init__(self, left, op, right, type=None):
         self.left = left
         self.op = op
         self.right = right
+        self.type = type
 
 class UnaryOp(Node):
-    def __init__(self, op, operand):
+    __slots__ = ("op", "operand", "type")
+
+    def __init__(self, op, operand, type=None):
         self.op = op
         self.operand = operand
+        self.type = type
 
 class IfStatement(Node):
+    __slots__ = ("cond", "then", "elifs", "otherwise")
+
     def __init__(self, cond, then, elifs=None, otherwise=None):
         self.cond = cond
         self.then = then
@@ -65,29 +105,63 @@ class IfStatement(Node):
         self.otherwise = otherwise
 
 class WhileStatement(Node):
+    __slots__ = ("cond", "body")
+
     def __init__(self, cond, body):
         self.cond = cond
         self.body = body
 
 class ForStatement(Node):
-    def __init__(self, var, start, end, body):
+    __slots__ = ("var", "start", "end", "body", "slot")
+
+    def __init__(self, var, start, end, body, slot=None):
         self.var = var
         self.start = start
         self.end = end
         self.body = body
+        self.slot = slot  # posição de ``var`` no frame da função
 
 class ReturnStatement(Node):
+    __slots__ = ("value",)
+
     def __init__(self, value):
         self.value = value
 
 class PrintStatement(Node):
+    __slots__ = ("value",)
+
     def __init__(self, value):
         self.value = value
 
 class InputStatement(Node):
-    pass
+    __slots__ = ("type",)
+
+    def __init__(self, type=None):
+        self.type = type
 
 class FunctionCall(Node):
-    def __init__(self, name, args=None):
+    __slots__ = ("name", "args", "type")
+
+    def __init__(self, name, args=None, type=None):
         self.name = name
         self.args = args or []
+        self.type = type
+
+
+def walk(node):
+    """Percorre ``node`` e todos os seus descendentes (pré-ordem)."""
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if not isinstance(node, Node):
+            continue
+        yield node
+        children = []
+        for field in node.__slots__:
+            value = getattr(node, field)
+            if isinstance(value, Node):
+                children.append(value)
+            elif isinstance(value, list):
+                for item in value:
+                    children.extend(item if isinstance(item, tuple) else (item,))
+        stack.extend(reversed(children))
@@ -1,275 +1,393 @@
 # parser.py - Analisador sintático (Parser) para Cirius
+from collections import deque
+
 from cirius_ast import *
+from lexer import EOF_CODE, KIND_CODES, TOKEN_KINDS, TokenBuffer
 
 class ParserError(Exception):
     pass
 
+EOF_TOKEN = ("EOF", None)
+
+# Códigos inteiros dos tokens usados pela gramática
+TK_FUNC = KIND_CODES["FUNC"]
+TK_IF = KIND_CODES["IF"]
+TK_ELIF = KIND_CODES["ELIF"]
+TK_ELSE = KIND_CODES["ELSE"]
+TK_WHILE = KIND_CODES["WHILE"]
+TK_FOR = KIND_CODES["FOR"]
+TK_IN = KIND_CODES["IN"]
+TK_PRINT = KIND_CODES["PRINT"]
+TK_INPUT = KIND_CODES["INPUT"]
+TK_RETURN = KIND_CODES["RETURN"]
+TK_TRUE = KIND_CODES["TRUE"]
+TK_FALSE = KIND_CODES["FALSE"]
+TK_AND = KIND_CODES["AND"]
+TK_OR = KIND_CODES["OR"]
+TK_NOT = KIND_CODES["NOT"]
+TK_EQ = KIND_CODES["EQ"]
+TK_NE = KIND_CODES["NE"]
+TK_GE = KIND_CODES["GE"]
+TK_LE = KIND_CODES["LE"]
+TK_GT = KIND_CODES["GT"]
+TK_LT = KIND_CODES["LT"]
+TK_PLUS = KIND_CODES["PLUS"]
+TK_MINUS = KIND_CODES["MINUS"]
+TK_MUL = KIND_CODES["MUL"]
+TK_DIV = KIND_CODES["DIV"]
+TK_MOD = KIND_CODES["MOD"]
+TK_ASSIGN = KIND_CODES["ASSIGN"]
+TK_NUMBER = KIND_CODES["NUMBER"]
+TK_STRING = KIND_CODES["STRING"]
+TK_IDENT = KIND_CODES["IDENT"]
+TK_LPAREN = KIND_CODES["LPAREN"]
+TK_RPAREN = KIND_CODES["RPAREN"]
+TK_LBRACE = KIND_CODES["LBRACE"]
+TK_RBRACE = KIND_CODES["RBRACE"]
+TK_DOTS = KIND_CODES["DOTS"]
+TK_SEMICOLON = KIND_CODES["SEMICOLON"]
+TK_COMMA = KIND_CODES["COMMA"]
+TK_EOF = EOF_CODE
+
 class Parser:
+    """Parser descendente recursivo sobre códigos inteiros de token.
+
+    ``tokens`` pode ser um ``TokenBuffer`` (caminho rápido: o parser lê os
+    arrays do buffer diretamente, sem criar um ``Token`` por elemento), uma
+    lista ou qualquer iterável de ``Token``, inclusive o gerador de
+    ``Lexer.iter_tokens()``: nesse caso o parser só mantém uma pequena janela
+    de lookahead e nunca indexa a sequência inteira.
+    """
     def __init__(self, tokens):
-        self.tokens = tokens
         self.pos = 0
+        if isinstance(tokens, TokenBuffer):
+            self.buffer = tokens
+            self.kinds = tokens.kinds
+            self.size = len(tokens)
+            self.window = None
+        else:
+            self.buffer = None
+            self.tokens = iter(tokens)
+            self.window = deque()
 
-    def peek(self):
-        return self.tokens[self.pos] if self.pos < len(self.tokens) else ("EOF", None)
+    def peek(self, offset=0):
+        """Devolve o token (tupla) ``offset`` posições à frente."""
+        window = self.window
+        if window is None:
+            index = self.pos + offset
+            return self.buffer[index] if index < self.size else EOF_TOKEN
+        while len(window) <= offset:
+            token = next(self.tokens, None)
+            if token is None:
+                return EOF_TOKEN
+            window.append(token)
+        return window[offset]
+
+    def peek_kind(self):
+        """Código inteiro do token atual (``TK_EOF`` no fim da entrada)."""
+        if self.window is None:
+            return self.kinds[self.pos] if self.pos < self.size else TK_EOF
+        return KIND_CODES[self.peek()[0]]
+
+    def advance(self):
+        """Consome o token atual e devolve seu código."""
+        kind = self.peek_kind()
+        if kind == TK_EOF:
+            raise ParserError("Fim inesperado dos tokens")
+        if self.window is not None:
+            self.window.popleft()
+        self.pos += 1
+        return kind
+
+    def expect(self, kind):
+        """Consome um token do tipo ``kind`` e devolve seu valor."""
+        found = self.peek_kind()
+        if found != kind:
+            if found == TK_EOF:
+                raise ParserError("Fim inesperado dos tokens")
+            raise ParserError(f"Esperado {TOKEN_KINDS[kind]}, mas encontrado {TOKEN_KINDS[found]}")
+        if self.window is None:
+            value = self.buffer.value(self.pos)
+        else:
+            value = self.window.popleft()[1]
+        self.pos += 1
+        return value
+
+    def take(self):
+        """Consome o token atual, qualquer que seja, e devolve seu valor."""
+        if self.window is None:
+            if self.pos >= self.size:
+                raise ParserError("Fim inesperado dos tokens")
+            value = self.buffer.value(self.pos)
+        else:
+            if self.peek() is EOF_TOKEN:
+                raise ParserError("Fim inesperado dos tokens")
+            value = self.window.popleft()[1]
+        self.pos += 1
+        return value
 
     def consume(self, expected_type=None):
-        if self.pos >= len(self.tokens):
+        """Consome e devolve o token atual (interface por nome de tipo)."""
+        token = self.peek()
+        if token is EOF_TOKEN:
             raise ParserError("Fim inesperado dos tokens")
-        token = self.tokens[self.pos]
         if expected_type and token[0] != expected_type:
             raise ParserError(f"Esperado {expected_type}, mas encontrado {token[0]}")
-        self.pos += 1
+        self.advance()
         return token
 
-    def match(self, *types):
-        if self.peek()[0] in types:
-            return self.consume()
-        return None
+    def match(self, *kinds):
+        """Consome o token atual se for de um dos tipos dados."""
+        if self.peek_kind() in kinds:
+            self.advance()
+            return True
+        return False
 
     # --------------------------
     # Regras principais
     # --------------------------
     def parse(self):
         functions = []
-        while self.pos < len(self.tokens):
+        while self.peek_kind() != TK_EOF:
             functions.append(self.parse_function())
         return Program(functions)
 
     def parse_function(self):
-        self.consume("FUNC")
-        name = self.consume("IDENT")[1]
+        self.expect(TK_FUNC)
+        name = self.expect(TK_IDENT)
 
-        self.consume("LPAREN")
+        self.expect(TK_LPAREN)
         params = []
-        if self.peek()[0] != "RPAREN":
-            params.append(self.consume("IDENT")[1])
-            while self.match("COMMA"):
-                params.append(self.consume("IDENT")[1])
-        self.consume("RPAREN")
+        if self.peek_kind() != TK_RPAREN:
+            params.append(self.expect(TK_IDENT))
+            while self.match(TK_COMMA):
+                params.append(self.expect(TK_IDENT))
+        self.expect(TK_RPAREN)
 
-        self.consume("LBRACE")
+        self.expect(TK_LBRACE)
         body = self.parse_block()
-        self.consume("RBRACE")
+        self.expect(TK_RBRACE)
         return FunctionDecl(name, params, body)
 
     def parse_block(self):
         statements = []
-        while self.peek()[0] not in ("RBRACE", "EOF"):
-            if self.peek()[0] == "SEMICOLON":
-                self.consume()
+        while self.peek_kind() not in (TK_RBRACE, TK_EOF):
+            if self.peek_kind() == TK_SEMICOLON:
+                self.advance()
                 continue
             statements.append(self.parse_statement())
         return Block(statements)
 
     def parse_statement(self):
-        token = self.peek()[0]
-        if token == "IF":
-            return self.parse_if()
-        elif token == "WHILE":
-            return self.parse_while()
-        elif token == "FOR":
-            return self.parse_for()
-        elif token == "RETURN":
-            return self.parse_return()
-        elif token == "PRINT":
-            return self.parse_print()
-        elif token == "INPUT":
-            return self.parse_input()
-        elif token == "IDENT":
-            return self.parse_assignment_or_call()
-        else:
-            raise ParserError(f"Instrução inesperada: {token}")
+        kind = self.peek_kind()
+        handler = STATEMENT_PARSERS.get(kind)
+        if handler is None:
+            raise ParserError(f"Instrução inesperada: {TOKEN_KINDS[kind]}")
+        return handler(self)
 
     # --- Estruturas de controle ---
     def parse_if(self):
-        self.consume("IF")
-        if self.peek()[0] == "LPAREN":
-            self.consume("LPAREN")
+        self.expect(TK_IF)
+        if self.peek_kind() == TK_LPAREN:
+            self.expect(TK_LPAREN)
             cond = self.parse_expression()
-            self.consume("RPAREN")
+            self.expect(TK_RPAREN)
         else:
             cond = self.parse_expression()
 
-        self.consume("LBRACE")
+        self.expect(TK_LBRACE)
         then_branch = self.parse_block()
-        self.consume("RBRACE")
+        self.expect(TK_RBRACE)
 
         elifs = []
-        while self.peek()[0] == "ELIF":
-            self.consume("ELIF")
-            if self.peek()[0] == "LPAREN":
-                self.consume("LPAREN")
+        while self.peek_kind() == TK_ELIF:
+            self.expect(TK_ELIF)
+            if self.peek_kind() == TK_LPAREN:
+                self.expect(TK_LPAREN)
                 c = self.parse_expression()
-                self.consume("RPAREN")
+                self.expect(TK_RPAREN)
             else:
                 c = self.parse_expression()
-            self.consume("LBRACE")
+            self.expect(TK_LBRACE)
             blk = self.parse_block()
-            self.consume("RBRACE")
+            self.expect(TK_RBRACE)
             elifs.append((c, blk))
 
         else_branch = None
-        if self.peek()[0] == "ELSE":
-            self.consume("ELSE")
-            self.consume("LBRACE")
+        if self.peek_kind() == TK_ELSE:
+            self.expect(TK_ELSE)
+            self.expect(TK_LBRACE)
             else_branch = self.parse_block()
-            self.consume("RBRACE")
+            self.expect(TK_RBRACE)
 
         return IfStatement(cond, then_branch, elifs, else_branch)
 
     def parse_while(self):
-        self.consume("WHILE")
-        if self.peek()[0] == "LPAREN":
-            self.consume("LPAREN")
+        self.expect(TK_WHILE)
+        if self.peek_kind() == TK_LPAREN:
+            self.expect(TK_LPAREN)
             cond = self.parse_expression()
-            self.consume("RPAREN")
+            self.expect(TK_RPAREN)
         else:
             cond = self.parse_expression()
-        self.consume("LBRACE")
+        self.expect(TK_LBRACE)
         body = self.parse_block()
-        self.consume("RBRACE")
+        self.expect(TK_RBRACE)
         return WhileStatement(cond, body)
 
     def parse_for(self):
-        self.consume("FOR")
-        var = self.consume("IDENT")[1]
-        self.consume("IN")
+        self.expect(TK_FOR)
+        var = self.expect(TK_IDENT)
+        self.expect(TK_IN)
         start = self.parse_expression()
-        self.consume("DOTS")
+        self.expect(TK_DOTS)
         end = self.parse_expression()
-        self.consume("LBRACE")
+        self.expect(TK_LBRACE)
         body = self.parse_block()
-        self.consume("RBRACE")
+        self.expect(TK_RBRACE)
         return ForStatement(var, start, end, body)
 
     def parse_return(self):
-        self.consume("RETURN")
+        self.expect(TK_RETURN)
         expr = self.parse_expression()
         return ReturnStatement(expr)
 
     def parse_print(self):
-        self.consume("PRINT")
-        self.consume("LPAREN")
+        self.expect(TK_PRINT)
+        self.expect(TK_LPAREN)
         expr = self.parse_expression()
-        self.consume("RPAREN")
+        self.expect(TK_RPAREN)
         return PrintStatement(expr)
 
     def parse_input(self):
-        self.consume("INPUT")
-        self.consume("LPAREN")
-        self.consume("RPAREN")
+        self.expect(TK_INPUT)
+        self.expect(TK_LPAREN)
+        self.expect(TK_RPAREN)
         return InputStatement()
 
     def parse_assignment_or_call(self):
-        name = self.consume("IDENT")[1]
-        if self.peek()[0] == "ASSIGN":
-            self.consume("ASSIGN")
+        name = self.expect(TK_IDENT)
+        if self.peek_kind() == TK_ASSIGN:
+            self.expect(TK_ASSIGN)
             expr = self.parse_expression()
             return Assignment(Var(name), expr)
-        elif self.peek()[0] == "LPAREN":
-            self.consume("LPAREN")
-            args = []
-            if self.peek()[0] != "RPAREN":
-                args.append(self.parse_expression())
-                while self.match("COMMA"):
-                    args.append(self.parse_expression())
-            self.consume("RPAREN")
-            return FunctionCall(name, args)
+        elif self.peek_kind() == TK_LPAREN:
+            return FunctionCall(name, self.parse_call_args())
         else:
             raise ParserError("Esperado '=' ou '(' após identificador")
 
-    # --- Expressões ---
-    def parse_expression(self):
-        return self.parse_logic_or()
+    def parse_call_args(self):
+        """Lista de argumentos ``( expr, ... )`` de uma chamada."""
+        self.expect(TK_LPAREN)
+        args = []
+        if self.peek_kind() != TK_RPAREN:
+            args.append(self.parse_expression())
+            while self.match(TK_COMMA):
+                args.append(self.parse_expression())
+        self.expect(TK_RPAREN)
+        return args
 
-    def parse_logic_or(self):
-        expr = self.parse_logic_and()
-        while self.peek()[0] == "OR":
-            op = self.consume()[0]
-            right = self.parse_logic_and()
-            expr = BinaryOp(expr, op, right)
-        return expr
+    # --- Expressões (Pratt / precedence climbing) ---
+    def parse_expression(self, min_bp=1):
+        """Analisa uma expressão cujos operadores ligam com força >= ``min_bp``.
 
-    def parse_logic_and(self):
-        expr = self.parse_equality()
-        while self.peek()[0] == "AND":
-            op = self.consume()[0]
-            right = self.parse_equality()
-            expr = BinaryOp(expr, op, right)
-        return expr
+        A precedência vem de ``INFIX_BINDING_POWER``: um único laço consome os
+        operadores binários em vez de uma função por nível de precedência.
+        Todos os operadores binários são associativos à esquerda.
+        """
+        left = self.parse_prefix()
+        binding_power = INFIX_BINDING_POWER
+        while True:
+            kind = self.peek_kind()
+            bp = binding_power[kind]
+            if bp < min_bp:
+                return left
+            self.advance()
+            left = BinaryOp(left, TOKEN_KINDS[kind], self.parse_expression(bp + 1))
 
-    def parse_equality(self):
-        expr = self.parse_comparison()
-        while self.peek()[0] in ("EQ", "NE"):
-            op = self.consume()[0]
-            right = self.parse_comparison()
-            expr = BinaryOp(expr, op, right)
-        return expr
+    def parse_prefix(self):
+        """Operando: operador unário, literal, variável, chamada ou parênteses."""
+        kind = self.peek_kind()
+        handler = PREFIX_PARSERS[kind]
+        if handler is None:
+            raise ParserError(f"Expressão inesperada: {self.peek()}")
+        return handler(self)
 
-    def parse_comparison(self):
-        expr = self.parse_term()
-        while self.peek()[0] in ("GT", "LT", "GE", "LE"):
-            op = self.consume()[0]
-            right = self.parse_term()
-            expr = BinaryOp(expr, op, right)
-        return expr
+    def parse_unary(self):
+        op = TOKEN_KINDS[self.advance()]
+        return UnaryOp(op, self.parse_prefix())
 
-    def parse_term(self):
-        expr = self.parse_factor()
-        while self.peek()[0] in ("PLUS", "MINUS"):
-            op = self.consume()[0]
-            right = self.parse_factor()
-            expr = BinaryOp(expr, op, right)
-        return expr
+    def parse_number(self):
+        return Number(self.take())
+
+    def parse_string(self):
+        return String(self.take().strip('"'))
+
+    def parse_true(self):
+        self.advance()
+        return Boolean(True)
 
-    def parse_factor(self):
-        expr = self.parse_unary()
-        while self.peek()[0] in ("MUL", "DIV", "MOD"):
-            op = self.consume()[0]
-            right = self.parse_unary()
-            expr = BinaryOp(expr, op, right)
+    def parse_false(self):
+        self.advance()
+        return Boolean(False)
+
+    def parse_name(self):
+        name = self.take()
+        if self.peek_kind() == TK_LPAREN:
+            return FunctionCall(name, self.parse_call_args())
+        return Var(name)
+
+    def parse_group(self):
+        self.expect(TK_LPAREN)
+        expr = self.parse_expression()
+        self.expect(TK_RPAREN)
         return expr
 
-    def parse_unary(self):
-        if self.peek()[0] in ("NOT", "MINUS"):
-            op = self.consume()[0]
-            right = self.parse_unary()
-            return UnaryOp(op, right)
-        return self.parse_primary()
 
-    def parse_primary(self):
-        token = self.peek()
-        if token[0] == "NUMBER":
-            return Number(self.consume()[1])
-        elif token[0] == "STRING":
-            return String(self.consume()[1].strip('"'))
-        elif token[0] == "TRUE":
-            self.consume()
-            return Boolean(True)
-        elif token[0] == "FALSE":
-            self.consume()
-            return Boolean(False)
-        elif token[0] == "IDENT":
-            name = self.consume()[1]
-            if self.peek()[0] == "LPAREN":
-                self.consume("LPAREN")
-                args = []
-                if self.peek()[0] != "RPAREN":
-                    args.append(self.parse_expression())
-                    while self.match("COMMA"):
-                        args.append(self.parse_expression())
-                self.consume("RPAREN")
-                return FunctionCall(name, args)
-            return Var(name)
-        elif token[0] == "INPUT":
-            self.consume("INPUT")
-            self.consume("LPAREN")
-            self.consume("RPAREN")
-            return InputStatement()
-        elif token[0] == "LPAREN":
-            self.consume("LPAREN")
-            expr = self.parse_expression()
-            self.consume("RPAREN")
-            return expr
-        else:
-            raise ParserError(f"Expressão inesperada: {token}")
+# Poder de ligação dos operadores binários, indexado pelo código do token
+# (0 = não é operador binário). Do mais fraco para o mais forte:
+#   or < and < | < ^ < & < == != < > < >= <= < << >> < + - < * / %
+INFIX_BINDING_POWER = [0] * len(TOKEN_KINDS)
+for _bp, _names in enumerate((
+    ("OR",),
+    ("AND",),
+    ("OR_BIT",),
+    ("XOR_BIT",),
+    ("AND_BIT",),
+    ("EQ", "NE"),
+    ("GT", "LT", "GE", "LE"),
+    ("LSHIFT", "RSHIFT"),
+    ("PLUS", "MINUS"),
+    ("MUL", "DIV", "MOD"),
+), start=1):
+    for _name in _names:
+        INFIX_BINDING_POWER[KIND_CODES[_name]] = _bp
+
+# Início de operando -> método que o analisa
+PREFIX_PARSERS = [None] * len(TOKEN_KINDS)
+for _name, _handler in (
+    ("NOT", Parser.parse_unary),
+    ("MINUS", Parser.parse_unary),
+    ("NOT_BIT", Parser.parse_unary),
+    ("NUMBER", Parser.parse_number),
+    ("FLOAT", Parser.parse_number),
+    ("STRING", Parser.parse_string),
+    ("TRUE", Parser.parse_true),
+    ("FALSE", Parser.parse_false),
+    ("IDENT", Parser.parse_name),
+    ("INPUT", Parser.parse_input),
+    ("LPAREN", Parser.parse_group),
+):
+    PREFIX_PARSERS[KIND_CODES[_name]] = _handler
+
+# Início de instrução -> método que a analisa
+STATEMENT_PARSERS = {
+    TK_IF: Parser.parse_if,
+    TK_WHILE: Parser.parse_while,
+    TK_FOR: Parser.parse_for,
+    TK_RETURN: Parser.parse_return,
+    TK_PRINT: Parser.parse_print,
+    TK_INPUT: Parser.parse_input,
+    TK_IDENT: Parser.parse_assignment_or_call,
+}
+del _bp, _names, _name, _handler
@@ -2,14 +2,154 @@
 """
 Cirius Compiler - Gerador de Código C
 Gera código C a partir do IR (TAC) produzido pelo IRGenerator.
+
+Os tipos vêm do IR (campo ``type``, preenchido a partir da inferência de
+tipos): ``int`` vira ``long long``, ``float`` vira ``double``, ``bool`` vira
+``int`` e ``str`` vira ``const char *``. Variáveis e temporários são
+declarados no início da função; o cabeçalho traz as funções auxiliares
+usadas para texto, ``%`` com o sinal do Python e impressão de floats no
+formato do ``repr`` do Python, para a saída bater com a do interpretador.
+O ``%`` entre floats (``fmod``, que pede ``-lm``) só entra no arquivo se
+algum programa o usa, então ``gcc out.c -o out`` basta para os demais.
 """
 
 from typing import List
 
+from ir import IRInstruction, Op, is_string_literal, literal_text
+from optimize import split_functions
+
+HEADER = r"""#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+static const char *cirius_concat(const char *a, const char *b) {
+    size_t n = strlen(a);
+    char *s = malloc(n + strlen(b) + 1);
+    memcpy(s, a, n);
+    strcpy(s + n, b);
+    return s;
+}
+
+static const char *cirius_str_int(long long x) {
+    char *s = malloc(24);
+    snprintf(s, 24, "%lld", x);
+    return s;
+}
+
+static const char *cirius_str_bool(int x) {
+    return x ? "True" : "False";
+}
+
+static const char *cirius_str_float(double x) {
+    char *s = malloc(40);
+    int digits, exponent;
+    if (x - x != x - x) {
+        /* nan ou infinito */
+        snprintf(s, 40, "%s", x != x ? "nan" : x > 0 ? "inf" : "-inf");
+        return s;
+    }
+    /* Menor número de dígitos que relê o mesmo valor */
+    for (digits = 1; digits < 17; digits++) {
+        snprintf(s, 40, "%.*e", digits - 1, x);
+        if (strtod(s, NULL) == x) break;
+    }
+    snprintf(s, 40, "%.*e", digits - 1, x);
+    exponent = atoi(strchr(s, 'e') + 1);
+    if (exponent >= -4 && exponent < 16) {
+        snprintf(s, 40, "%.*f", digits - 1 - exponent > 0 ? digits - 1 - exponent : 0, x);
+        if (!strchr(s, '.')) strcat(s, ".0");
+    }
+    return s;
+}
+
+static long long cirius_mod(long long a, long long b) {
+    long long r = a % b;
+    return (r != 0 && (r < 0) != (b < 0)) ? r + b : r;
+}
+"""
+
+# Só entra no arquivo quando algum ``%`` é entre floats
+FMOD_HEADER = r"""#include <math.h>
+
+static double cirius_fmod(double a, double b) {
+    double r = fmod(a, b);
+    return (r != 0 && (r < 0) != (b < 0)) ? r + b : r;
+}
+"""
+
+C_TYPES = {"int": "long long", "float": "double", "bool": "int", "str": "const char *"}
+
+# Nomes que não podem ser usados como identificadores no C gerado
+C_RESERVED = {
+    "auto", "break", "case", "char", "const", "continue", "default", "do", "double", "else", "enum",
+    "extern", "float", "for", "goto", "if", "inline", "int", "long", "register", "restrict", "return",
+    "short", "signed", "sizeof", "static", "struct", "switch", "typedef", "union", "unsigned", "void",
+    "volatile", "while", "printf", "puts", "scanf", "malloc", "strlen", "strcmp", "strcpy", "strcat",
+    "strchr", "memcpy", "snprintf", "strtod", "atoi", "fmod", "isnan", "isinf",
+}
+
+SYMBOLS = {
+    Op.PLUS: "+", Op.MINUS: "-", Op.MUL: "*",
+    Op.GT: ">", Op.LT: "<", Op.GE: ">=", Op.LE: "<=", Op.EQ: "==", Op.NE: "!=",
+    Op.AND_BIT: "&", Op.OR_BIT: "|", Op.XOR_BIT: "^", Op.LSHIFT: "<<", Op.RSHIFT: ">>",
+}
+
+COMPARISON_OPS = {Op.GT, Op.LT, Op.GE, Op.LE, Op.EQ, Op.NE}
+
+STR_CONVERSIONS = {"int": "cirius_str_int", "float": "cirius_str_float", "bool": "cirius_str_bool"}
+
+# Operações sem valor (o destino, quando existe, é um rótulo ou uma função)
+NON_VALUE_OPS = {Op.FUNC_BEGIN, Op.FUNC_END, Op.LABEL, Op.GOTO, Op.IF_FALSE_GOTO}
+
+
+def c_name(name: str) -> str:
+    return name + "_" if name in C_RESERVED else name
+
+
+def c_string(text: str) -> str:
+    """Literal de texto em C (UTF-8, com escapes)."""
+    out = []
+    for ch in text:
+        if ch in '"\\':
+            out.append("\\" + ch)
+        elif ch == "\n":
+            out.append("\\n")
+        elif ch == "\t":
+            out.append("\\t")
+        elif ord(ch) < 32 or ord(ch) == 127:
+            out.append(f"\\{ord(ch):03o}")
+        else:
+            out.append(ch)
+    return '"' + "".join(out) + '"'
+
+
+def link(functions) -> str:
+    """Arquivo C a partir de ``(protótipo, código)`` de cada função."""
+    prototypes = [prototype for prototype, _ in functions if prototype]
+    parts = [HEADER]
+    if any("cirius_fmod(" in code for _, code in functions):
+        parts.append(FMOD_HEADER)
+    if prototypes:
+        parts.append("\n".join(prototypes) + "\n")
+    parts.extend(code for _, code in functions)
+    return "\n".join(parts)
+
+
 class CodeGenerator:
     def __init__(self):
         self.output = []
         self.indent_level = 0
+        self.types = {}
+        self.pending_args = []
+        self.function = None
+        # Tratamento de cada opcode; os que faltam são operações binárias
+        self.handlers = {
+            Op.FUNC_END: self.gen_func_end, Op.PARAM: self.gen_param, Op.ASSIGN: self.gen_assign,
+            Op.PRINT: self.gen_print, Op.INPUT: self.gen_input, Op.GOTO: self.gen_goto,
+            Op.IF_FALSE_GOTO: self.gen_if_false_goto, Op.LABEL: self.gen_label, Op.ARG: self.gen_arg,
+            Op.CALL: self.gen_call, Op.RETURN: self.gen_return,
+            Op.NEG: self.gen_unary, Op.NOT: self.gen_unary, Op.NOT_BIT: self.gen_unary,
+        }
 
     # -------------------------------
     # Utilitários
@@ -26,51 +166,219 @@ class CodeGenerator:
     # -------------------------------
     # Geração Principal
     # -------------------------------
-    def generate(self, ir: List[dict]) -> str:
+    def generate(self, ir: List[IRInstruction]) -> str:
+        functions = []
+        for function in split_functions(ir):
+            functions.append((self.function_prototype(function), self.generate_function(function)))
+        return link(functions)
+
+    def generate_function(self, ir: List[IRInstruction]) -> str:
+        """Código C de uma única função, sem o cabeçalho do arquivo nem o
+        protótipo (veja ``function_prototype`` e ``link``)."""
         self.output = []
-        self.emit("#include <stdio.h>")
-        self.emit("")
-        for instr in ir:
-            self.gen_instruction(instr)
+        self.indent_level = 0
+        self.pending_args = []
+        self.types = self.collect_types(ir)
+        self.function = ir[0].dest
+        self.emit(self.signature(ir) + " {")
+        self.indent()
+        params = set() if self.function == "main" else set(self.params(ir))
+        for name, t in self.types.items():
+            if name not in params:
+                self.emit(f"{self.c_type(t)} {c_name(name)};")
+        handlers = self.handlers
+        binary = self.gen_binary
+        for instr in ir[1:]:
+            handlers.get(instr.op, binary)(instr)
         return "\n".join(self.output)
 
+    def function_prototype(self, ir: List[IRInstruction]):
+        """Declaração antecipada da função (``None`` para ``main``), para que
+        a ordem das funções no arquivo não importe."""
+        if ir[0].dest == "main":
+            return None
+        self.types = self.collect_types(ir)
+        return self.signature(ir) + ";"
+
+    # -------------------------------
+    # Tipos
+    # -------------------------------
+    def collect_types(self, ir: List[IRInstruction]) -> dict:
+        """Tipo de cada parâmetro, variável e temporário da função."""
+        types = {}
+        assign = Op.ASSIGN
+        for instr in ir:
+            dest = instr.dest
+            op = instr.op
+            if dest is None or op in NON_VALUE_OPS:
+                continue
+            t = instr.type
+            if t is None and op is assign:
+                t = self.value_type(instr.arg1, types)
+            if types.get(dest) is None:
+                types[dest] = t
+        return types
+
+    def value_type(self, value, types=None):
+        if isinstance(value, bool):
+            return "bool"
+        if isinstance(value, int):
+            return "int"
+        if isinstance(value, float):
+            return "float"
+        if is_string_literal(value):
+            return "str"
+        return (self.types if types is None else types).get(value)
+
+    def c_type(self, t) -> str:
+        return C_TYPES.get(t, "long long")
+
+    def value(self, value) -> str:
+        """Operando em C: literal ou nome."""
+        if isinstance(value, bool):
+            return "1" if value else "0"
+        if isinstance(value, (int, float)):
+            return repr(value)
+        if is_string_literal(value):
+            return c_string(literal_text(value))
+        return c_name(value)
+
+    def return_type(self, ir: List[IRInstruction]) -> str:
+        t = ir[0].type
+        if t == "void":
+            return "void"
+        if t is None and not any(instr.op is Op.RETURN and instr.arg1 is not None for instr in ir):
+            return "void"
+        return self.c_type(t)
+
+    def params(self, ir: List[IRInstruction]):
+        """Parâmetros da função: as instruções ``PARAM`` logo após
+        ``FUNC_BEGIN``."""
+        params = []
+        for instr in ir[1:]:
+            if instr.op is not Op.PARAM:
+                break
+            params.append(instr.dest)
+        return params
+
+    def signature(self, ir: List[IRInstruction]) -> str:
+        name = ir[0].dest
+        if name == "main":
+            # Parâmetros de ``main`` (nunca recebem argumentos) viram locais
+            return "int main(void)"
+        params = self.params(ir)
+        declared = ", ".join(f"{self.c_type(self.types.get(p))} {c_name(p)}" for p in params) or "void"
+        return f"{self.return_type(ir)} {c_name(name)}({declared})"
+
     # -------------------------------
     # Instruções
     # -------------------------------
-    def gen_instruction(self, instr: dict):
-        op = instr.get("op")
-        dest = instr.get("dest")
-        arg1 = instr.get("arg1")
-        arg2 = instr.get("arg2")
-
-        if op == "FUNC_BEGIN":
-            self.emit(f"void {dest}() {{")
-            self.indent()
-        elif op == "FUNC_END":
-            self.dedent()
-            self.emit("}")
-            self.emit("")
-        elif op == "ASSIGN":
-            self.emit(f"int {dest} = {arg1};")
-        elif op == "PRINT":
-            self.emit(f'printf("%d\\n", {arg1});')
-        elif op == "INPUT":
-            self.emit(f"scanf(\"%d\", &{dest});")
-        elif op == "GOTO":
-            self.emit(f"goto {dest};")
-        elif op == "IF_FALSE_GOTO":
-            self.emit(f"if (!{arg1}) goto {dest};")
-        elif op == "LABEL":
-            self.emit(f"{dest}: ;")
-        elif op in ("ADD", "SUB", "MUL", "DIV"):
-            self.emit(f"int {dest} = {arg1} {self.op_to_symbol(op)} {arg2};")
+    def gen_instruction(self, instr: IRInstruction):
+        self.handlers.get(instr.op, self.gen_binary)(instr)
+
+    def gen_func_end(self, instr: IRInstruction):
+        if instr.dest == "main":
+            self.emit("return 0;")
+        self.dedent()
+        self.emit("}")
+        self.emit("")
+
+    def gen_param(self, instr: IRInstruction):
+        pass
+
+    def gen_assign(self, instr: IRInstruction):
+        self.emit(f"{c_name(instr.dest)} = {self.value(instr.arg1)};")
+
+    def gen_print(self, instr: IRInstruction):
+        self.emit(self.print_statement(instr.arg1, instr.type or self.value_type(instr.arg1)))
+
+    def gen_input(self, instr: IRInstruction):
+        self.emit(f"scanf(\"%lld\", &{c_name(instr.dest)});")
+
+    def gen_goto(self, instr: IRInstruction):
+        self.emit(f"goto {instr.dest};")
+
+    def gen_if_false_goto(self, instr: IRInstruction):
+        cond = self.value(instr.arg1)
+        if self.value_type(instr.arg1) == "str":
+            cond += "[0]"
+        self.emit(f"if (!{cond}) goto {instr.dest};")
+
+    def gen_label(self, instr: IRInstruction):
+        self.emit(f"{instr.dest}: ;")
+
+    def gen_arg(self, instr: IRInstruction):
+        self.pending_args.append(instr.arg1)
+
+    def gen_call(self, instr: IRInstruction):
+        count = len(self.pending_args) - instr.arg2
+        args = self.pending_args[count:]
+        del self.pending_args[count:]
+        call = self.call_expression(instr.arg1, args)
+        self.emit(f"{c_name(instr.dest)} = {call};" if instr.dest is not None else f"{call};")
+
+    def gen_return(self, instr: IRInstruction):
+        if self.function == "main":
+            self.emit("return 0;")
         else:
-            self.emit(f"// [ERRO] operação não suportada: {op}")
-
-    def op_to_symbol(self, op: str) -> str:
-        return {
-            "ADD": "+",
-            "SUB": "-",
-            "MUL": "*",
-            "DIV": "/"
-        }.get(op, "?")
+            self.emit(f"return {self.value(instr.arg1)};" if instr.arg1 is not None else "return;")
+
+    def gen_unary(self, instr: IRInstruction):
+        self.emit(f"{c_name(instr.dest)} = {self.unary_expression(instr.op, instr.arg1)};")
+
+    def gen_binary(self, instr: IRInstruction):
+        expression = self.binary_expression(instr.op, instr.arg1, instr.arg2)
+        if expression is None:
+            self.emit(f"// [ERRO] operação não suportada: {instr.op.name}")
+        else:
+            self.emit(f"{c_name(instr.dest)} = {expression};")
+
+    def print_statement(self, arg, t) -> str:
+        value = self.value(arg)
+        if t == "str":
+            return f"puts({value});"
+        if t == "float":
+            return f"puts(cirius_str_float({value}));"
+        if t == "bool":
+            return f'puts({value} ? "True" : "False");'
+        return f'printf("%lld\\n", (long long){value});'
+
+    def call_expression(self, name: str, args) -> str:
+        if name == "str":
+            t = self.value_type(args[0])
+            conversion = STR_CONVERSIONS.get(t)
+            return self.value(args[0]) if t == "str" else f"{conversion or 'cirius_str_int'}({self.value(args[0])})"
+        return f"{c_name(name)}({', '.join(self.value(arg) for arg in args)})"
+
+    def unary_expression(self, op: Op, arg) -> str:
+        value = self.value(arg)
+        if op is Op.NEG:
+            return f"-{value}"
+        if op is Op.NOT:
+            return f"!{value}[0]" if self.value_type(arg) == "str" else f"!{value}"
+        return f"~{value}"
+
+    def binary_expression(self, op: Op, arg1, arg2):
+        left, right = self.value(arg1), self.value(arg2)
+        left_type, right_type = self.value_type(arg1), self.value_type(arg2)
+        if left_type == "str" and right_type == "str":
+            if op is Op.PLUS:
+                return f"cirius_concat({left}, {right})"
+            if op in COMPARISON_OPS:
+                return f"(strcmp({left}, {right}) {SYMBOLS[op]} 0)"
+        floats = "float" in (left_type, right_type)
+        if op is Op.DIV:
+            return f"(double){left} / {right}"
+        if op is Op.MOD:
+            return f"cirius_fmod({left}, {right})" if floats else f"cirius_mod({left}, {right})"
+        if op is Op.LSHIFT:
+            # Deslocar um negativo para a esquerda é indefinido em C; sem sinal
+            # o padrão de bits é o mesmo (o ``x * 2^n`` da redução de força)
+            return f"(long long)((unsigned long long){left} << {right})"
+        if op is Op.AND or op is Op.OR:
+            if left_type == right_type == "bool":
+                return f"{left} {'&&' if op is Op.AND else '||'} {right}"
+            return f"{left} ? {right} : {left}" if op is Op.AND else f"{left} ? {left} : {right}"
+        if op in SYMBOLS:
+            return f"{left} {SYMBOLS[op]} {right}"
+        return None
@@ -0,0 +1,173 @@
+# folding.py - Dobra de constantes sobre a AST da linguagem Cirius
+"""
+Dobra de constantes e simplificação algébrica na AST, depois da inferência de
+tipos e antes da geração de IR: ``2 * 3 + x * 1`` vira ``6 + x`` e
+``"a" + "b"`` vira ``"ab"`` sem passar por temporários do IR. ``if`` e
+``elif`` com condição constante perdem os ramos que nunca rodam (o ramo que
+sempre roda entra no lugar do ``if``) e ``while`` com condição falsa some.
+
+As regras são as de ``ssa.fold`` e ``ssa.identity``, as mesmas da dobra sobre
+o IR: o resultado tem de ser o mesmo no C e no interpretador, então uma
+divisão por zero fica para a execução, e o tipo do literal que substitui uma
+expressão tem de ser o tipo inferido para ela. Uma identidade que descarta
+um operando (``x * 0``, ``x and false``) só vale se ele não tem efeito nem
+pode falhar: sem chamadas, ``input`` ou divisões.
+
+Os nomes já estão resolvidos em slots, então os comandos de um bloco que
+sempre roda podem ir direto para o bloco de fora.
+"""
+
+from collections import Counter
+
+from cirius_ast import *
+from ir import Op
+from ssa import BOTTOM, fold, identity, value_type
+
+# Nós literais (o valor fica em ``value``)
+LITERALS = (Number, String, Boolean)
+
+
+def literal_node(value):
+    """Nó literal para um valor dobrado."""
+    kind = value_type(value)
+    if kind == "str":
+        return String(value, kind)
+    if kind == "bool":
+        return Boolean(value, kind)
+    return Number(value, kind)
+
+
+def is_pure(expr) -> bool:
+    """A expressão não tem efeito nem pode falhar: descartá-la não muda o
+    programa."""
+    for node in walk(expr):
+        if isinstance(node, (FunctionCall, InputStatement)):
+            return False
+        if isinstance(node, BinaryOp) and node.op in ("DIV", "MOD", "LSHIFT", "RSHIFT"):
+            return False
+    return True
+
+
+class ConstantFolder:
+    """Dobra as expressões e os desvios constantes de funções já tipadas.
+    ``stats`` conta as expressões dobradas, as simplificadas e os desvios
+    removidos."""
+
+    def __init__(self):
+        self.stats = Counter()
+
+    def fold_function(self, func: FunctionDecl):
+        func.body = self.fold_block(func.body)
+        return func
+
+    # -------------------------
+    # Comandos
+    # -------------------------
+    def fold_block(self, block: Block) -> Block:
+        statements = []
+        for stmt in block.statements:
+            self.fold_statement(stmt, statements)
+        block.statements = statements
+        return block
+
+    def fold_statement(self, stmt, statements):
+        """Acrescenta ``stmt`` dobrado a ``statements`` (nada, se nunca roda;
+        os comandos do ramo escolhido, se é um ``if`` constante)."""
+        if isinstance(stmt, Assignment):
+            stmt.expr = self.fold_expression(stmt.expr)
+        elif isinstance(stmt, (PrintStatement, ReturnStatement)):
+            if stmt.value is not None:
+                stmt.value = self.fold_expression(stmt.value)
+        elif isinstance(stmt, FunctionCall):
+            stmt.args = [self.fold_expression(arg) for arg in stmt.args]
+        elif isinstance(stmt, IfStatement):
+            self.fold_if(stmt, statements)
+            return
+        elif isinstance(stmt, WhileStatement):
+            stmt.cond = self.fold_expression(stmt.cond)
+            if isinstance(stmt.cond, LITERALS) and not stmt.cond.value:
+                self.stats["branches"] += 1
+                return
+            stmt.body = self.fold_block(stmt.body)
+        elif isinstance(stmt, ForStatement):
+            stmt.start = self.fold_expression(stmt.start)
+            stmt.end = self.fold_expression(stmt.end)
+            stmt.body = self.fold_block(stmt.body)
+        statements.append(stmt)
+
+    def fold_if(self, stmt: IfStatement, statements):
+        branches = []
+        otherwise = stmt.otherwise
+        for cond, block in [(stmt.cond, stmt.then)] + list(stmt.elifs):
+            cond = self.fold_expression(cond)
+            if not isinstance(cond, LITERALS):
+                branches.append((cond, block))
+                continue
+            self.stats["branches"] += 1
+            if cond.value:
+                # Sempre roda: vira o ``else`` e os ramos seguintes somem
+                otherwise = block
+                break
+        if otherwise is not None:
+            otherwise = self.fold_block(otherwise)
+        if not branches:
+            if otherwise is not None:
+                statements.extend(otherwise.statements)
+            return
+        stmt.cond, stmt.then = branches[0][0], self.fold_block(branches[0][1])
+        stmt.elifs = [(cond, self.fold_block(block)) for cond, block in branches[1:]]
+        stmt.otherwise = otherwise
+        statements.append(stmt)
+
+    # -------------------------
+    # Expressões
+    # -------------------------
+    def fold_expression(self, expr):
+        if isinstance(expr, UnaryOp):
+            expr.operand = self.fold_expression(expr.operand)
+            if isinstance(expr.operand, LITERALS):
+                op = Op.NEG if expr.op == "MINUS" else Op[expr.op]
+                return self.folded(expr, fold(op, [expr.operand.value]))
+        elif isinstance(expr, BinaryOp):
+            expr.left = self.fold_expression(expr.left)
+            expr.right = self.fold_expression(expr.right)
+            return self.fold_binary(expr)
+        elif isinstance(expr, FunctionCall):
+            expr.args = [self.fold_expression(arg) for arg in expr.args]
+        return expr
+
+    def fold_binary(self, expr: BinaryOp):
+        op = Op[expr.op]
+        operands = (expr.left, expr.right)
+        values = [node.value if isinstance(node, LITERALS) else None for node in operands]
+        if values[0] is not None and values[1] is not None:
+            return self.folded(expr, fold(op, values))
+        same = isinstance(expr.left, Var) and isinstance(expr.right, Var) and expr.left.slot == expr.right.slot \
+            and expr.left.name == expr.right.name
+        result = identity(op, values, [node.type for node in operands], expr.type, same)
+        if result is None:
+            return expr
+        if isinstance(result, int):
+            # O operando descartado é um literal, a mesma variável ou o da
+            # direita de um ``and``/``or`` que a esquerda já decide
+            self.stats["simplified"] += 1
+            return operands[result]
+        if not all(is_pure(node) for node in operands):
+            return expr
+        self.stats["simplified"] += 1
+        return literal_node(result[2])
+
+    def folded(self, expr, result):
+        if result is BOTTOM or result[0] != expr.type:
+            return expr
+        self.stats["folded"] += 1
+        return literal_node(result[2])
+
+
+def fold_constants(program: Program) -> Counter:
+    """Dobra as constantes de todas as funções de ``program`` (no lugar);
+    devolve a contagem do que mudou."""
+    folder = ConstantFolder()
+    for func in program.functions:
+        folder.fold_function(func)
+    return folder.stats
@@ -0,0 +1,161 @@
+# frontend.py - Front-end paralelo por função para a linguagem Cirius
+"""
+Divide um ``TokenBuffer`` nos limites das declarações ``func`` de nível
+superior e faz a análise sintática e semântica de cada grupo de funções em um
+``ProcessPoolExecutor``. O resultado é montado em um único ``Program`` na
+ordem do código-fonte.
+
+As assinaturas de todas as funções são lidas direto dos tokens e declaradas
+(fase 1 da análise semântica) uma vez por processo; cada grupo só verifica
+os corpos das suas funções contra esse escopo global congelado (fase 2).
+
+Os diagnósticos são os mesmos do front-end sequencial: um erro de sintaxe em
+qualquer grupo tem prioridade sobre erros semânticos (como acontece quando o
+parser roda antes da análise), e os erros semânticos vêm em ordem de
+declaração.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from cirius_ast import FunctionDecl, Program
+from cirius_parser import Parser
+from lexer import KIND_CODES, TokenBuffer
+from semantic import SemanticAnalyzer
+
+FUNC_CODE = KIND_CODES["FUNC"]
+IDENT_CODE = KIND_CODES["IDENT"]
+LPAREN_CODE = KIND_CODES["LPAREN"]
+RPAREN_CODE = KIND_CODES["RPAREN"]
+
+# Quantos grupos de funções por processo (equilíbrio de carga)
+CHUNKS_PER_JOB = 4
+
+# Analisador com as assinaturas do programa inteiro, montado uma vez em cada
+# processo do pool (``init_worker``)
+_analyzer = None
+
+
+def function_boundaries(buffer: TokenBuffer):
+    """Índices dos tokens ``func``.
+
+    ``func`` só é válido no nível superior, então cada ocorrência inicia uma
+    declaração; um ``func`` fora de lugar vira erro de sintaxe no parser.
+    """
+    kinds = bytes(buffer.kinds)
+    marker = bytes([FUNC_CODE])
+    boundaries = []
+    index = kinds.find(marker)
+    while index >= 0:
+        boundaries.append(index)
+        index = kinds.find(marker, index + 1)
+    return boundaries
+
+
+def function_signatures(buffer: TokenBuffer, boundaries):
+    """(nome, parâmetros) de cada declaração, lidos direto dos tokens.
+
+    Uma assinatura malformada vira ``(None, [])``; o parser do grupo
+    correspondente reporta o erro de sintaxe.
+    """
+    kinds = buffer.kinds
+    size = len(buffer)
+    signatures = []
+    for index in boundaries:
+        if index + 2 >= size or kinds[index + 1] != IDENT_CODE or kinds[index + 2] != LPAREN_CODE:
+            signatures.append((None, []))
+            continue
+        params = []
+        cursor = index + 3
+        while cursor < size and kinds[cursor] != RPAREN_CODE:
+            if kinds[cursor] == IDENT_CODE:
+                params.append(buffer.value(cursor))
+            cursor += 1
+        signatures.append((buffer.value(index + 1), params))
+    return signatures
+
+
+def split_chunks(boundaries, size, chunks):
+    """Agrupa funções consecutivas em até ``chunks`` grupos de tamanho
+    (em tokens) parecido. Devolve pares (primeira função, fim exclusivo)."""
+    count = len(boundaries)
+    if count == 0:
+        return [(0, 0)]
+    target = max(1, size // max(1, chunks))
+    groups = []
+    first = 0
+    for index in range(1, count):
+        if boundaries[index] - boundaries[first] >= target:
+            groups.append((first, index))
+            first = index
+    groups.append((first, count))
+    return groups
+
+
+def declare_signatures(signatures):
+    """Analisador com as funções de ``signatures`` declaradas (sem corpo) e
+    as redeclarações encontradas, como ``(posição, erro)``."""
+    sema = SemanticAnalyzer()
+    stubs = [FunctionDecl(name, params, None) for name, params in signatures if name is not None]
+    return sema, sema.declare_functions(stubs)
+
+
+def init_worker(signatures):
+    global _analyzer
+    _analyzer, _ = declare_signatures(signatures)
+
+
+def check_chunk(job):
+    """Tarefa executada em um processo do pool.
+
+    Recebe o trecho de tokens e a posição da sua primeira função. Devolve
+    ``(funções, erro de sintaxe, [(posição, erro semântico)])``.
+    """
+    buffer, first = job
+    try:
+        program = Parser(buffer).parse()
+    except Exception as error:
+        return None, error, []
+
+    errors = []
+    for offset, func in enumerate(program.functions):
+        error = _analyzer.check_function(func)
+        if error is not None:
+            errors.append((first + offset, error))
+    return program.functions, None, errors
+
+
+def parallel_front_end(buffer: TokenBuffer, jobs=None):
+    """Analisa ``buffer`` em paralelo e devolve ``(Program, erros
+    semânticos)``, com os erros em ordem de declaração.
+
+    Erros de sintaxe são levantados (``ParserError``). Para que a mensagem
+    seja idêntica à do modo sequencial, o buffer inteiro é re-analisado em
+    série quando algum grupo falha.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    boundaries = function_boundaries(buffer)
+    signatures = function_signatures(buffer, boundaries)
+    groups = split_chunks(boundaries, len(buffer), jobs * CHUNKS_PER_JOB)
+
+    tasks = []
+    for first, end in groups:
+        low = 0 if first == 0 else boundaries[first]
+        high = boundaries[end] if end < len(boundaries) else len(buffer)
+        tasks.append((buffer.slice(low, high), first))
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=init_worker, initargs=(signatures,)) as executor:
+        results = list(executor.map(check_chunk, tasks))
+
+    for _, syntax_error, _ in results:
+        if syntax_error is not None:
+            Parser(buffer).parse()
+            raise syntax_error
+
+    _, errors = declare_signatures(signatures)
+    functions = []
+    for chunk_functions, _, chunk_errors in results:
+        functions.extend(chunk_functions)
+        errors.extend(chunk_errors)
+    errors.sort(key=lambda item: item[0])
+    return Program(functions), [error for _, error in errors]
@@ -0,0 +1,365 @@
+# incremental.py - Cache de recompilação por função para a linguagem Cirius
+"""
+Guarda, para cada função, a ``FunctionDecl``, o resultado da análise
+semântica, o resumo da inferência de tipos, o IR, o IR otimizado e o código
+C gerado. Na compilação seguinte só as funções invalidadas passam de novo por
+parser, semântica, IR, otimização e geração de código; as demais são
+reaproveitadas do cache.
+
+O cache também guarda o ``TokenBuffer`` da versão anterior do arquivo: a nova
+versão é comparada com ela e só o trecho alterado é re-tokenizado
+(``relex``), então nem o lexer percorre o arquivo inteiro de novo.
+
+A chave de uma função é um hash do trecho de código-fonte que ela ocupa mais
+as assinaturas (nome e aridade) das funções globais que esse trecho menciona
+(a primeira declaração de cada nome no arquivo, já que uma função pode chamar
+outra declarada depois) e se o próprio nome já foi declarado antes. Mudar o
+corpo de uma função invalida só ela; mudar a aridade de ``f`` invalida também
+quem chama ``f``.
+
+Os tipos dependem do programa inteiro (parâmetros recebem o tipo dos
+argumentos de quem chama), então a inferência global (``solve``) roda a cada
+compilação, mas sobre os resumos guardados: uma função só é reanalisada, e
+seu código regerado, quando os tipos dos seus parâmetros ou os retornos das
+funções que ela chama mudam. Só as funções alcançáveis a partir de ``main``
+(veja ``callgraph``) são levadas a IR e C.
+
+O arquivo inteiro é descartado quando o próprio compilador muda: ele é
+gravado com ``compiler_fingerprint()``, um hash do código dos módulos do
+compilador, então nenhuma mudança de formato ou de saída precisa ser
+lembrada à mão.
+"""
+
+import functools
+import hashlib
+import os
+import pickle
+import re
+from pathlib import Path
+
+from callgraph import ROOT, CallGraph
+from cirius_ast import FunctionDecl
+from cirius_parser import Parser
+from codegen import CodeGenerator, link
+from frontend import function_boundaries, function_signatures
+from ir import IRGenerator
+from lexer import Lexer, TokenBuffer, relex
+from optimize import Optimizer
+from semantic import SemanticAnalyzer
+from type_inference import infer_function, solve
+
+IDENTIFIER = re.compile(r"[a-zA-Z_][a-zA-Z0-9_]*")
+
+# Resumos de inferência de tipos guardados por função
+MAX_SUMMARIES = 8
+
+# Tamanho dos blocos comparados de uma vez ao procurar o trecho alterado
+DIFF_BLOCK = 4096
+
+
+@functools.lru_cache(maxsize=None)
+def compiler_fingerprint() -> str:
+    """Hash do código-fonte dos módulos do compilador (os ``.py`` ao lado
+    deste arquivo). Qualquer mudança no lexer, na geração de IR, no
+    otimizador ou no codegen muda o hash e invalida os caches gravados."""
+    digest = hashlib.blake2b(digest_size=16)
+    for path in sorted(Path(__file__).resolve().parent.glob("*.py")):
+        digest.update(path.name.encode("utf-8"))
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def common_prefix(old: str, new: str, limit: int) -> int:
+    """Tamanho do maior prefixo comum (até ``limit``), comparando blocos
+    inteiros antes de descer ao nível de caractere."""
+    size = 0
+    while size + DIFF_BLOCK <= limit and old[size:size + DIFF_BLOCK] == new[size:size + DIFF_BLOCK]:
+        size += DIFF_BLOCK
+    while size < limit and old[size] == new[size]:
+        size += 1
+    return size
+
+
+def common_suffix(old: str, new: str, limit: int) -> int:
+    """Tamanho do maior sufixo comum (até ``limit``)."""
+    old_end, new_end = len(old), len(new)
+    size = 0
+    while (size + DIFF_BLOCK <= limit
+           and old[old_end - size - DIFF_BLOCK:old_end - size] == new[new_end - size - DIFF_BLOCK:new_end - size]):
+        size += DIFF_BLOCK
+    while size < limit and old[old_end - size - 1] == new[new_end - size - 1]:
+        size += 1
+    return size
+
+
+class CachedFunction:
+    """Resultados de uma função. AST e IR ficam serializados e só são
+    decodificados quando alguém os usa, então carregar o cache custa pouco."""
+    __slots__ = ("name", "params", "decl_data", "errors", "callees", "summaries", "type_inputs",
+                 "lowered_for", "ir_data", "optimized_data", "c_code", "prototype")
+
+    def __init__(self, decl: FunctionDecl, errors=()):
+        self.name = decl.name
+        self.params = decl.params
+        self.decl_data = pickle.dumps(decl, pickle.HIGHEST_PROTOCOL)
+        self.errors = list(errors)
+        # Resumos da inferência de tipos por entradas (tipos dos parâmetros,
+        # retornos das funções chamadas) e as entradas da última inferência
+        self.callees = None
+        self.summaries = {}
+        self.type_inputs = None
+        self.lowered_for = None
+        self.ir_data = None
+        self.optimized_data = None
+        self.c_code = None
+        self.prototype = None
+
+    @property
+    def decl(self) -> FunctionDecl:
+        return pickle.loads(self.decl_data)
+
+    @property
+    def ir(self):
+        return None if self.ir_data is None else pickle.loads(self.ir_data)
+
+    @property
+    def optimized(self):
+        return None if self.optimized_data is None else pickle.loads(self.optimized_data)
+
+    def infer(self, param_types, returns):
+        """Resumo da inferência de tipos para estas entradas.
+
+        Os resumos ficam guardados por entradas: ``solve`` visita as funções
+        sempre na mesma ordem, então a recompilação de um programa pouco
+        alterado passa pelas mesmas entradas intermediárias da anterior."""
+        if self.callees is None:
+            self.callees = infer_function(self.decl, param_types, returns).callees
+        inputs = (tuple(param_types), tuple(returns.get(name) for name in self.callees))
+        summary = self.summaries.get(inputs)
+        if summary is None:
+            if len(self.summaries) >= MAX_SUMMARIES:
+                self.summaries.clear()
+            summary = self.summaries[inputs] = infer_function(self.decl, param_types, returns)
+        self.type_inputs = inputs
+        return summary
+
+    def lower(self, callees=None, optimizer=None):
+        """Gera IR, IR otimizado e código C da função com os tipos da última
+        inferência (se ainda não existem para esses tipos). ``callees`` leva
+        o nome das funções chamadas que podem ser expandidas nas chamadas às
+        entradas delas, já baixadas: o resultado depende do IR otimizado
+        delas, que entra na comparação, assim como a configuração de
+        ``optimizer``."""
+        callees = callees or {}
+        optimizer = optimizer or Optimizer()
+        inputs = (self.type_inputs, optimizer.signature,
+                  tuple(sorted((name, hashlib.sha1(entry.optimized_data).digest())
+                               for name, entry in callees.items())))
+        if self.c_code is not None and self.lowered_for == inputs:
+            return
+        decl = self.decl
+        param_types, callee_returns = self.type_inputs
+        infer_function(decl, param_types, dict(zip(self.callees, callee_returns)))
+        self.decl_data = pickle.dumps(decl, pickle.HIGHEST_PROTOCOL)
+        # A dobra de constantes altera a AST: trabalha numa cópia, e a
+        # declaração fica como o parser a deixou para a próxima inferência
+        folded = pickle.loads(self.decl_data)
+        optimizer.fold([folded])
+        ir_code = IRGenerator().generate_function(folded)
+        optimized = optimizer.optimize_function(ir_code, {name: entry.optimized for name, entry in callees.items()})
+        self.ir_data = pickle.dumps(ir_code, pickle.HIGHEST_PROTOCOL)
+        self.optimized_data = pickle.dumps(optimized, pickle.HIGHEST_PROTOCOL)
+        codegen = CodeGenerator()
+        self.prototype = codegen.function_prototype(optimized)
+        self.c_code = codegen.generate_function(optimized)
+        self.lowered_for = inputs
+
+
+def function_keys(buffer: TokenBuffer, boundaries, signatures):
+    """Chave de cache, dependências ``((nome, parâmetros), ...)`` e se a
+    função redeclara um nome já usado, para cada função.
+
+    As dependências são os identificadores do trecho que são nomes de função
+    declarados no arquivo, com os parâmetros da primeira declaração (a que
+    fica no escopo global). Numa redeclaração o próprio nome sempre entra nas
+    dependências.
+    """
+    source = buffer.source
+    declared = {}
+    for name, params in signatures:
+        if name is not None:
+            declared.setdefault(name, params)
+    seen = set()
+    keys = []
+    for index, (name, params) in enumerate(signatures):
+        low = boundaries[index]
+        high = boundaries[index + 1] if index + 1 < len(boundaries) else len(buffer)
+        text = source[buffer.start(low):buffer.end(high - 1)]
+        mentioned = declared.keys() & set(IDENTIFIER.findall(text))
+        redeclared = name in seen
+        if redeclared:
+            mentioned.add(name)
+        seen.add(name)
+        deps = tuple((dep, declared[dep]) for dep in sorted(mentioned))
+
+        digest = hashlib.blake2b(text.encode("utf-8"), digest_size=16)
+        digest.update(repr((deps, redeclared)).encode("utf-8"))
+        keys.append((digest.hexdigest(), deps, redeclared))
+    return keys
+
+
+def check_function(tokens: TokenBuffer, deps, redeclared=False) -> CachedFunction:
+    """Parser + análise semântica de uma única função. As funções das quais
+    ela depende entram no escopo global como declarações sem corpo; numa
+    redeclaração a primeira declaração do nome vem antes da função."""
+    program = Parser(tokens).parse()
+    decl = program.functions[0]
+    sema = SemanticAnalyzer()
+    stubs = [FunctionDecl(dep, params, None) for dep, params in deps if dep != decl.name]
+    if redeclared:
+        stubs.append(FunctionDecl(decl.name, dict(deps)[decl.name], None))
+    errors = [error for position, error in sema.declare_functions(stubs + [decl]) if position == len(stubs)]
+    error = sema.check_function(decl)
+    if error is not None:
+        errors.append(error)
+    return CachedFunction(decl, errors)
+
+
+class FunctionCache:
+    """Cache persistente de funções compiladas, indexado pela chave de
+    ``function_keys``."""
+
+    def __init__(self):
+        self.entries = {}
+        self.tokens = None
+        # Entradas do programa compilado por último, em ordem, e as que são
+        # alcançáveis a partir de main (as únicas com IR e código C)
+        self.current = []
+        self.live = []
+        self.reused = 0
+        self.compiled = 0
+
+    @classmethod
+    def load(cls, path: str) -> "FunctionCache":
+        """Lê o cache de ``path``; um arquivo ausente, corrompido ou gravado
+        por outra versão do compilador resulta em um cache vazio."""
+        cache = cls()
+        try:
+            with open(path, "rb") as f:
+                # A impressão digital vem antes: entradas de outra versão do
+                # compilador nem chegam a ser decodificadas
+                if pickle.load(f) != compiler_fingerprint():
+                    return cache
+                tokens, entries = pickle.load(f)
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+            return cache
+        cache.tokens = tokens
+        cache.entries = entries
+        return cache
+
+    def save(self, path: str):
+        if self.tokens is not None:
+            self.tokens.normalize()
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            pickle.dump(compiler_fingerprint(), f, pickle.HIGHEST_PROTOCOL)
+            pickle.dump((self.tokens, self.entries), f, pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+
+    def tokenize(self, source: str, scanner: str = "manual") -> TokenBuffer:
+        """``TokenBuffer`` de ``source``. Havendo tokens da versão anterior no
+        cache, só o trecho entre o prefixo e o sufixo comuns é re-tokenizado."""
+        tokens = self.tokens
+        if tokens is None:
+            tokens = Lexer(source, scanner=scanner).tokenize_buffer()
+        elif tokens.source != source:
+            old = tokens.source
+            limit = min(len(old), len(source))
+            prefix = common_prefix(old, source, limit)
+            suffix = common_suffix(old, source, limit - prefix)
+            try:
+                relex(tokens, prefix, len(old) - prefix - suffix, source[prefix:len(source) - suffix], scanner)
+            except RuntimeError:
+                # Erro léxico: o lexer completo reporta a mesma mensagem do
+                # pipeline sem cache
+                tokens = Lexer(source, scanner=scanner).tokenize_buffer()
+        self.tokens = tokens
+        return tokens
+
+    def functions(self, buffer: TokenBuffer):
+        """Entradas do cache para as funções de ``buffer``, em ordem,
+        compilando as que faltam. Entradas que não pertencem mais ao
+        programa são descartadas.
+
+        Erros de sintaxe são levantados com a mesma mensagem do parser
+        sequencial.
+        """
+        boundaries = function_boundaries(buffer)
+        if not boundaries or boundaries[0] != 0:
+            # Sem funções ou com tokens soltos antes da primeira: o parser
+            # sequencial reporta o erro (ou devolve o programa vazio)
+            Parser(buffer).parse()
+            boundaries = []
+        signatures = function_signatures(buffer, boundaries)
+
+        self.reused = self.compiled = 0
+        entries = {}
+        functions = []
+        for index, (key, deps, redeclared) in enumerate(function_keys(buffer, boundaries, signatures)):
+            entry = entries.get(key) or self.entries.get(key)
+            if entry is not None:
+                self.reused += 1
+            else:
+                high = boundaries[index + 1] if index + 1 < len(boundaries) else len(buffer)
+                try:
+                    entry = check_function(buffer.slice(boundaries[index], high), deps, redeclared)
+                except Exception as error:
+                    Parser(buffer).parse()
+                    raise error
+                self.compiled += 1
+            entries[key] = entry
+            functions.append(entry)
+        self.entries = entries
+        self.current = functions
+        self.live = []
+        return functions
+
+    def compile(self, buffer: TokenBuffer, optimizer=None):
+        """Compila ``buffer`` para C reaproveitando o cache. ``optimizer``
+        (padrão: ``Optimizer()``) otimiza as funções recompiladas e acumula
+        as medidas das passadas.
+
+        Devolve ``(código C, erros semânticos, conflitos de tipo)``; havendo
+        erro ou conflito, o código é ``None`` e nada é gerado, como no
+        pipeline sem cache. Funções inalcançáveis a partir de ``main`` não
+        são levadas a IR nem entram no código C.
+        """
+        functions = self.functions(buffer)
+        errors = [error for entry in functions for error in entry.errors]
+        if errors:
+            return None, errors, []
+        _, _, conflicts = solve([(entry.name, entry.params) for entry in functions],
+                                lambda position, param_types, returns:
+                                functions[position].infer(param_types, returns))
+        if conflicts:
+            return None, [], conflicts
+        graph = CallGraph((entry.name, entry.callees) for entry in functions)
+        live = functions
+        if ROOT in graph.callees:
+            reachable = graph.reachable(ROOT)
+            live = [entry for entry in functions if entry.name in reachable]
+        # De baixo para cima no grafo de chamadas, como ``Optimizer.optimize``:
+        # funções não recursivas chegam baixadas para a expansão em quem chama
+        by_name = {}
+        for entry in live:
+            by_name.setdefault(entry.name, entry)
+        recursive = graph.recursive_functions()
+        optimizer = optimizer or Optimizer()
+        for component in graph.sccs():
+            for name in component:
+                entry = by_name.get(name)
+                if entry is not None:
+                    entry.lower({callee: by_name[callee] for callee in entry.callees
+                                 if callee in by_name and callee not in recursive}, optimizer)
+        self.live = live
+        return link([(entry.prototype, entry.c_code) for entry in live]), [], []
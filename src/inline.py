@@ -0,0 +1,166 @@
+# inline.py - Expansão de funções pequenas nas chamadas (inlining) no IR
+"""
+Troca ``ARG``/``CALL`` de funções pequenas pelo corpo delas. O otimizador
+percorre o grafo de chamadas de baixo para cima (``inline_order``): quando
+uma função é otimizada, as que ela chama já estão otimizadas (e já receberam
+as suas próprias expansões), então o corpo expandido é o IR otimizado da
+função chamada, e as constantes do ponto de chamada se propagam por ele na
+otimização de quem chama.
+
+Na expansão, os argumentos viram cópias para os parâmetros, ``RETURN x``
+vira uma cópia para o destino da chamada e um desvio para o fim, e todos os
+nomes (variáveis, temporários e rótulos) da função chamada ganham um prefixo
+novo (``in1_t3``), que não colide com nenhum nome de quem chama.
+
+Critérios:
+
+- funções de componentes recursivos do grafo de chamadas nunca são
+  expandidas (nem uma função em si mesma);
+- o corpo da função chamada tem no máximo ``threshold`` instruções (rótulos
+  não contam);
+- orçamento de crescimento por função: as expansões acrescentam no máximo
+  ``growth`` vezes o tamanho original de quem chama (e pelo menos
+  ``threshold`` instruções). O orçamento é local, então o resultado de uma
+  função só depende dela e dos corpos das funções que chama, como espera o
+  cache por função;
+- uma chamada cujo valor é usado só é expandida se a função chamada termina
+  sempre em ``RETURN`` (sem cair no fim, onde o valor seria indefinido).
+"""
+
+from typing import Dict, List, Tuple
+
+from callgraph import CallGraph
+from ir import IRInstruction, Op, is_variable
+
+# Tamanho máximo (instruções) de uma função expandida
+INLINE_THRESHOLD = 20
+# Crescimento máximo de uma função pelas expansões (fração do tamanho original)
+INLINE_GROWTH = 1.0
+
+# Rótulo do fim de uma expansão (antes do prefixo)
+END_LABEL = "END_INLINE"
+
+# Campos de cada instrução que podem ser nomes de variáveis ou rótulos
+NAME_FIELDS = ("dest", "arg1", "arg2")
+
+
+def inline_order(functions: List[List[IRInstruction]]):
+    """Índices das funções de ``functions`` (IR separado por função) de
+    baixo para cima no grafo de chamadas, e o conjunto das recursivas.
+    Trechos que não são funções ficam no fim da ordem."""
+    names = [function[0].dest if function and function[0].op is Op.FUNC_BEGIN else None
+             for function in functions]
+    graph = CallGraph((name, {instr.arg1 for instr in function if instr.op is Op.CALL})
+                      for name, function in zip(names, functions) if name is not None)
+    position = {}
+    for index, name in enumerate(names):
+        if name is not None:
+            position.setdefault(name, index)
+    order = [position[name] for component in graph.sccs() for name in component]
+    placed = set(order)
+    order.extend(index for index in range(len(functions)) if index not in placed)
+    return order, graph.recursive_functions()
+
+
+def body_size(function: List[IRInstruction]) -> int:
+    return sum(instr.op not in (Op.FUNC_BEGIN, Op.FUNC_END, Op.PARAM, Op.LABEL) for instr in function)
+
+
+class Inliner:
+    """Expande nas chamadas de uma função os corpos de ``callees`` (nome ->
+    IR otimizado), com o limite de tamanho e o orçamento de crescimento."""
+
+    def __init__(self, threshold: int = INLINE_THRESHOLD, growth: float = INLINE_GROWTH):
+        self.threshold = threshold
+        self.growth = growth
+
+    def inline(self, function: List[IRInstruction],
+               callees: Dict[str, List[IRInstruction]]) -> Tuple[List[IRInstruction], dict]:
+        """IR de ``function`` com as chamadas expandidas e quantas chamadas e
+        instruções entraram."""
+        stats = {"inlined": 0, "inlined_instructions": 0}
+        name = function[0].dest
+        candidates = {callee: body for callee, body in callees.items()
+                      if callee != name and body_size(body) <= self.threshold}
+        if not candidates or not any(instr.op is Op.CALL and instr.arg1 in candidates for instr in function):
+            return function, stats
+        budget = max(self.threshold, int(self.growth * body_size(function)))
+        taken = {arg for instr in function for arg in (instr.dest, instr.arg1, instr.arg2) if isinstance(arg, str)}
+        expansions = 0
+        result = []
+        for instr in function:
+            body = candidates.get(instr.arg1) if instr.op is Op.CALL else None
+            if body is None or body_size(body) > budget or not self.expandable(body, instr, result):
+                result.append(instr)
+                continue
+            expansions += 1
+            prefix = f"in{expansions}_"
+            while any(f"{prefix}{name}" in taken for name in local_names(body) | {END_LABEL}):
+                expansions += 1
+                prefix = f"in{expansions}_"
+            budget -= body_size(body)
+            self.expand(body, instr, result, prefix)
+            stats["inlined"] += 1
+            stats["inlined_instructions"] += body_size(body)
+        return result, stats
+
+    @staticmethod
+    def expandable(body, call, emitted) -> bool:
+        """Os ``ARG`` da chamada são as últimas instruções emitidas e, se o
+        valor é usado, a função chamada sempre devolve um valor (não cai no
+        fim nem tem ``RETURN`` vazio)."""
+        count = call.arg2
+        if len(emitted) < count or any(instr.op is not Op.ARG for instr in emitted[len(emitted) - count:]):
+            return False
+        params = [instr for instr in body if instr.op is Op.PARAM]
+        if len(params) != count:
+            return False
+        if call.dest is None:
+            return True
+        last = body[-2] if body[-1].op is Op.FUNC_END else body[-1]
+        return last.op in (Op.RETURN, Op.GOTO) and all(instr.arg1 is not None for instr in body
+                                                       if instr.op is Op.RETURN)
+
+    @staticmethod
+    def expand(body, call, emitted, prefix):
+        """Acrescenta a ``emitted`` (sem os ``ARG`` da chamada) o corpo de
+        ``body`` com os nomes prefixados."""
+        args = [instr.arg1 for instr in emitted[len(emitted) - call.arg2:]]
+        del emitted[len(emitted) - call.arg2:]
+
+        def rename(arg):
+            return f"{prefix}{arg}" if is_variable(arg) else arg
+
+        label_end = f"{prefix}{END_LABEL}"
+        params = [instr for instr in body if instr.op is Op.PARAM]
+        for param, arg in zip(params, args):
+            emitted.append(IRInstruction(Op.ASSIGN, dest=rename(param.dest), arg1=arg, type=param.type))
+        returns = False
+        for instr in body:
+            op = instr.op
+            if op in (Op.FUNC_BEGIN, Op.FUNC_END, Op.PARAM):
+                continue
+            if op is Op.RETURN:
+                if call.dest is not None:
+                    emitted.append(IRInstruction(Op.ASSIGN, dest=call.dest, arg1=rename(instr.arg1), type=call.type))
+                emitted.append(IRInstruction(Op.GOTO, label_end))
+                returns = True
+            elif op is Op.CALL:
+                # O nome da função chamada e o número de argumentos ficam
+                emitted.append(IRInstruction(op, rename(instr.dest), instr.arg1, instr.arg2, instr.type))
+            else:
+                emitted.append(IRInstruction(op, rename(instr.dest), rename(instr.arg1), rename(instr.arg2),
+                                             instr.type))
+        if returns:
+            emitted.append(IRInstruction(Op.LABEL, dest=label_end))
+
+
+def local_names(body: List[IRInstruction]):
+    """Nomes (variáveis, temporários e rótulos) usados em ``body``."""
+    names = set()
+    for instr in body:
+        if instr.op in (Op.FUNC_BEGIN, Op.FUNC_END):
+            continue
+        fields = ("dest",) if instr.op is Op.CALL else NAME_FIELDS
+        names.update(getattr(instr, field) for field in fields if is_variable(getattr(instr, field)))
+    return names
@@ -1,153 +1,225 @@
 # interpreter.py - Interpretador para a AST da linguagem Cirius
 
+import operator
+
 from cirius_ast import *
+from semantic import SemanticAnalyzer
+from type_inference import FLOAT, NUMERIC_RANK, STR, infer_types
 
 class ReturnValue(Exception):
     def __init__(self, value):
         self.value = value
 
-class Environment:
-    def __init__(self, parent=None):
-        self.vars = {}
-        self.parent = parent
-
-    def get(self, name):
-        if name in self.vars:
-            return self.vars[name]
-        if self.parent:
-            return self.parent.get(name)
-        raise NameError(f"Variável '{name}' não definida.")
-
-    def assign(self, name, value):
-        self.vars[name] = value
-
+# Operadores binários (montados uma vez, não a cada avaliação)
+BINARY_OPS = {
+    "PLUS": lambda a, b: a + b, "MINUS": lambda a, b: a - b,
+    "MUL": lambda a, b: a * b, "DIV": lambda a, b: a / b,
+    "MOD": lambda a, b: a % b,
+    "GT": lambda a, b: a > b, "LT": lambda a, b: a < b,
+    "GE": lambda a, b: a >= b, "LE": lambda a, b: a <= b,
+    "EQ": lambda a, b: a == b, "NE": lambda a, b: a != b,
+    "AND": lambda a, b: a and b, "OR": lambda a, b: a or b,
+    "AND_BIT": lambda a, b: a & b, "OR_BIT": lambda a, b: a | b,
+    "XOR_BIT": lambda a, b: a ^ b,
+    "LSHIFT": lambda a, b: a << b, "RSHIFT": lambda a, b: a >> b,
+}
+
+# ``and``/``or`` são avaliados em curto-circuito em ``visit_BinaryOp``: o
+# operando da direita só é visitado se o da esquerda não decide
+LOGICAL_AND = BINARY_OPS["AND"]
+LOGICAL_OR = BINARY_OPS["OR"]
+
+UNARY_OPS = {"MINUS": operator.neg, "NOT": operator.not_, "NOT_BIT": operator.invert}
+
+# Versões especializadas pelos tipos inferidos dos operandos: funções do
+# módulo ``operator`` (em C) no lugar das lambdas genéricas. Só entram
+# combinações em que o resultado é o mesmo da versão genérica.
+TYPED_BINARY_OPS = {}
+for _left in NUMERIC_RANK:
+    for _right in NUMERIC_RANK:
+        for _op, _function in (("PLUS", operator.add), ("MINUS", operator.sub), ("MUL", operator.mul),
+                               ("DIV", operator.truediv), ("MOD", operator.mod),
+                               ("GT", operator.gt), ("LT", operator.lt), ("GE", operator.ge),
+                               ("LE", operator.le), ("EQ", operator.eq), ("NE", operator.ne)):
+            TYPED_BINARY_OPS[_op, _left, _right] = _function
+        if FLOAT not in (_left, _right):
+            for _op, _function in (("AND_BIT", operator.and_), ("OR_BIT", operator.or_),
+                                   ("XOR_BIT", operator.xor), ("LSHIFT", operator.lshift),
+                                   ("RSHIFT", operator.rshift)):
+                TYPED_BINARY_OPS[_op, _left, _right] = _function
+for _op, _function in (("PLUS", operator.concat), ("GT", operator.gt), ("LT", operator.lt),
+                       ("GE", operator.ge), ("LE", operator.le), ("EQ", operator.eq), ("NE", operator.ne)):
+    TYPED_BINARY_OPS[_op, STR, STR] = _function
+del _left, _right, _op, _function
+
+# O interpretador roda sobre a AST anotada pela análise semântica: cada
+# chamada de função tem um frame, uma lista plana de ``frame_size`` posições,
+# e variáveis são lidas/escritas por ``slot``. Blocos e iterações de laço não
+# alocam nada; só nomes globais (funções e embutidas) são buscados por nome.
+#
+# Com a AST anotada pela inferência de tipos, cada ``BinaryOp`` usa a
+# implementação especializada para os tipos dos seus operandos
+# (``TYPED_BINARY_OPS``), escolhida na primeira avaliação e guardada. Com
+# conflitos de tipo os tipos anotados não são confiáveis: ``specialize=False``
+# mantém as implementações genéricas.
 class Interpreter:
-    def __init__(self):
-        self.globals = Environment()
+    def __init__(self, specialize=True):
+        self.globals = {}
+        self.specialize = specialize
+        self._visitors = {}
+        self._binary_ops = {}
         self._add_builtins()
 
     def _add_builtins(self):
-        self.globals.assign("str", lambda x: str(x))
-        self.globals.assign("input", lambda: input())  # texto
-        self.globals.assign("int", lambda x: int(x))
-        self.globals.assign("float", lambda x: float(x))
-        self.globals.assign("bool", lambda x: bool(x))
-        # Se quiser: self.globals.assign("len", lambda x: len(x))
+        self.globals["str"] = lambda x: str(x)
+        self.globals["input"] = lambda: input()  # texto
+        self.globals["int"] = lambda x: int(x)
+        self.globals["float"] = lambda x: float(x)
+        self.globals["bool"] = lambda x: bool(x)
+        # Se quiser: self.globals["len"] = lambda x: len(x)
 
     def interpret(self, node: Program):
         try:
+            if any(func.frame_size is None for func in node.functions):
+                # AST ainda sem slots: a análise semântica os atribui
+                SemanticAnalyzer().analyze(node)
+            if any(func.slot_types is None for func in node.functions):
+                if infer_types(node):
+                    self.specialize = False
+
             for func_decl in node.functions:
-                self.globals.assign(func_decl.name, func_decl)
+                self.globals[func_decl.name] = func_decl
 
             main_func = self.globals.get("main")
             if not main_func or not isinstance(main_func, FunctionDecl):
                 raise RuntimeError("Função 'main' não encontrada.")
             
-            self.visit(main_func, self.globals)
+            self.visit(main_func, None)
 
         except (NameError, TypeError, RuntimeError) as e:
             print(f"[Erro de Execução] {e}")
 
-    def visit(self, node, env: Environment):
-        method_name = f'visit_{type(node).__name__}'
-        visitor = getattr(self, method_name, self.generic_visit)
-        return visitor(node, env)
+    def visit(self, node, frame: list):
+        visitor = self._visitors.get(type(node))
+        if visitor is None:
+            method_name = f'visit_{type(node).__name__}'
+            visitor = self._visitors[type(node)] = getattr(self, method_name, self.generic_visit)
+        return visitor(node, frame)
 
-    def generic_visit(self, node, env: Environment):
+    def generic_visit(self, node, frame: list):
         raise NotImplementedError(f"Nenhum método visit_{type(node).__name__} implementado.")
 
-    def visit_Number(self, node: Number, env: Environment):
+    def visit_Number(self, node: Number, frame: list):
         return node.value
 
-    def visit_String(self, node: String, env: Environment):
+    def visit_String(self, node: String, frame: list):
         return node.value
 
-    def visit_Boolean(self, node: Boolean, env: Environment):
+    def visit_Boolean(self, node: Boolean, frame: list):
         return node.value
 
-    def visit_Var(self, node: Var, env: Environment):
-        return env.get(node.name)
+    def visit_Var(self, node: Var, frame: list):
+        if node.slot is not None:
+            return frame[node.slot]
+        if node.name in self.globals:
+            return self.globals[node.name]
+        raise NameError(f"Variável '{node.name}' não definida.")
 
-    def visit_Block(self, node: Block, env: Environment):
-        block_env = Environment(parent=env)
+    def visit_Block(self, node: Block, frame: list):
         for statement in node.statements:
-            self.visit(statement, block_env)
-
-    def visit_Assignment(self, node: Assignment, env: Environment):
-        var_name = node.target.name
-        value = self.visit(node.expr, env)
-        env.assign(var_name, value)
-
-    def visit_BinaryOp(self, node: BinaryOp, env: Environment):
-        left_val = self.visit(node.left, env)
-        right_val = self.visit(node.right, env)
-
-        op_map = {
-            "PLUS": lambda a, b: a + b, "MINUS": lambda a, b: a - b,
-            "MUL": lambda a, b: a * b, "DIV": lambda a, b: a / b,
-            "MOD": lambda a, b: a % b,
-            "GT": lambda a, b: a > b, "LT": lambda a, b: a < b,
-            "GE": lambda a, b: a >= b, "LE": lambda a, b: a <= b,
-            "EQ": lambda a, b: a == b, "NE": lambda a, b: a != b,
-            "AND": lambda a, b: a and b, "OR": lambda a, b: a or b,
-        }
-        if node.op in op_map:
-            return op_map[node.op](left_val, right_val)
-        raise RuntimeError(f"Operador binário desconhecido: {node.op}")
-
-    def visit_UnaryOp(self, node: UnaryOp, env: Environment):
-        operand_val = self.visit(node.operand, env)
-        if node.op == "MINUS":
-            return -operand_val
-        if node.op == "NOT":
-            return not operand_val
+            self.visit(statement, frame)
+
+    def visit_Assignment(self, node: Assignment, frame: list):
+        frame[node.target.slot] = self.visit(node.expr, frame)
+
+    def visit_BinaryOp(self, node: BinaryOp, frame: list):
+        left_val = self.visit(node.left, frame)
+        operation = self._binary_ops.get(node)
+        if operation is None:
+            operation = self._binary_ops[node] = self.select_binary_op(node)
+        if operation is LOGICAL_AND:
+            return self.visit(node.right, frame) if left_val else left_val
+        if operation is LOGICAL_OR:
+            return left_val if left_val else self.visit(node.right, frame)
+        return operation(left_val, self.visit(node.right, frame))
+
+    def select_binary_op(self, node: BinaryOp):
+        """Implementação de ``node.op`` para os tipos inferidos dos
+        operandos, ou a genérica se os tipos não são conhecidos."""
+        operation = None
+        if self.specialize:
+            operation = TYPED_BINARY_OPS.get((node.op, node.left.type, node.right.type))
+        if operation is None:
+            operation = BINARY_OPS.get(node.op)
+        if operation is None:
+            raise RuntimeError(f"Operador binário desconhecido: {node.op}")
+        return operation
+
+    def visit_UnaryOp(self, node: UnaryOp, frame: list):
+        operand_val = self.visit(node.operand, frame)
+        operation = UNARY_OPS.get(node.op)
+        if operation is not None:
+            return operation(operand_val)
         raise RuntimeError(f"Operador unário desconhecido: {node.op}")
 
-    def visit_IfStatement(self, node: IfStatement, env: Environment):
-        cond_val = self.visit(node.cond, env)
+    def visit_IfStatement(self, node: IfStatement, frame: list):
+        cond_val = self.visit(node.cond, frame)
         if cond_val:
-            self.visit(node.then, env)
+            self.visit(node.then, frame)
         else:
             for elif_cond, elif_block in node.elifs:
-                if self.visit(elif_cond, env):
-                    self.visit(elif_block, env)
+                if self.visit(elif_cond, frame):
+                    self.visit(elif_block, frame)
                     return
             if node.otherwise:
-                self.visit(node.otherwise, env)
+                self.visit(node.otherwise, frame)
 
-    def visit_WhileStatement(self, node: WhileStatement, env: Environment):
-        while self.visit(node.cond, env):
-            self.visit(node.body, env)
+    def visit_WhileStatement(self, node: WhileStatement, frame: list):
+        while self.visit(node.cond, frame):
+            self.visit(node.body, frame)
 
-    def visit_ForStatement(self, node: ForStatement, env: Environment):
-        start_val = self.visit(node.start, env)
-        end_val = self.visit(node.end, env)
-        loop_env = Environment(parent=env)
+    def visit_ForStatement(self, node: ForStatement, frame: list):
+        start_val = self.visit(node.start, frame)
+        end_val = self.visit(node.end, frame)
 
         for i in range(start_val, end_val + 1):
-            loop_env.assign(node.var, i)
-            self.visit(node.body, loop_env)
+            frame[node.slot] = i
+            self.visit(node.body, frame)
 
-    def visit_PrintStatement(self, node: PrintStatement, env: Environment):
-        value = self.visit(node.value, env)
+    def visit_PrintStatement(self, node: PrintStatement, frame: list):
+        value = self.visit(node.value, frame)
         print(value)
 
-    def visit_InputStatement(self, node: InputStatement, env: Environment):
+    def visit_ReturnStatement(self, node: ReturnStatement, frame: list):
+        raise ReturnValue(self.visit(node.value, frame) if node.value else None)
+
+    def visit_InputStatement(self, node: InputStatement, frame: list):
         try:
             return int(input())
         except ValueError:
             raise RuntimeError("Entrada inválida. Esperado um número inteiro.")
 
-    def visit_FunctionDecl(self, node: FunctionDecl, env: Environment):
-        func_env = Environment(parent=self.globals)
-        self.visit(node.body, func_env)
+    def visit_FunctionDecl(self, node: FunctionDecl, frame: list):
+        return self.call(node, [])
+
+    def call(self, func: FunctionDecl, arg_values: list):
+        """Executa ``func`` em um frame novo; os parâmetros ocupam os
+        primeiros slots."""
+        frame = arg_values + [None] * (func.frame_size - len(arg_values))
+        try:
+            self.visit(func.body, frame)
+        except ReturnValue as result:
+            return result.value
+        return None
 
-    def visit_FunctionCall(self, node: FunctionCall, env: Environment):
-        func = env.get(node.name)
+    def visit_FunctionCall(self, node: FunctionCall, frame: list):
+        func = self.globals.get(node.name)
+        if func is None:
+            raise NameError(f"Variável '{node.name}' não definida.")
 
         # 🧠 Função embutida (built-in)
         if callable(func):
-            args = [self.visit(arg, env) for arg in node.args]
+            args = [self.visit(arg, frame) for arg in node.args]
             try:
                 return func(*args)
             except Exception as e:
@@ -158,11 +230,7 @@ class Interpreter:
             if len(node.args) != len(func.params):
                 raise TypeError(f"Função '{node.name}' espera {len(func.params)} argumentos, mas recebeu {len(node.args)}.")
 
-            arg_values = [self.visit(arg, env) for arg in node.args]
-            call_env = Environment(parent=self.globals)
-            for param_name, arg_val in zip(func.params, arg_values):
-                call_env.assign(param_name, arg_val)
-            self.visit(func.body, call_env)
-            return
+            arg_values = [self.visit(arg, frame) for arg in node.args]
+            return self.call(func, arg_values)
 
         raise TypeError(f"'{node.name}' não é uma função.")
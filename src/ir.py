@@ -1,19 +1,142 @@
 """
 ir.py - Gerador de código intermediário (TAC) para a linguagem Cirius
 Compatível com a AST atual (FunctionDecl, IfStatement, WhileStatement, etc.)
+
+O IR é uma lista de ``IRInstruction`` (objetos com ``__slots__`` e opcode
+inteiro ``Op``) do gerador até o otimizador e o gerador de C. Dicts só
+aparecem na fronteira de depuração: ``to_dict``/``ir_to_dicts`` para os
+dumps JSON e ``normalize_ir`` para ler IR de volta desse formato.
 """
 
+import json
+from enum import IntEnum
+from typing import Any, Dict, List
+
 from cirius_ast import *
 
+# Literais de texto ficam entre aspas no IR (JSON), para não se confundirem
+# com nomes de variáveis: ``print("x")`` gera ``PRINT "\"x\""``.
+def string_literal(value: str) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+def is_string_literal(arg) -> bool:
+    return isinstance(arg, str) and arg.startswith('"')
+
+def literal_text(arg: str) -> str:
+    return json.loads(arg)
+
+class Op(IntEnum):
+    """Opcodes do IR. Os nomes são os que aparecem nos dumps; os binários e
+    unários coincidem com os operadores da AST (``Op[node.op]``)."""
+    FUNC_BEGIN = 0
+    FUNC_END = 1
+    PARAM = 2
+    LABEL = 3
+    GOTO = 4
+    IF_FALSE_GOTO = 5
+    ASSIGN = 6
+    ARG = 7
+    CALL = 8
+    RETURN = 9
+    PRINT = 10
+    INPUT = 11
+    # Unários (``MINUS`` unário vira ``NEG``)
+    NEG = 12
+    NOT = 13
+    NOT_BIT = 14
+    # Binários
+    PLUS = 15
+    MINUS = 16
+    MUL = 17
+    DIV = 18
+    MOD = 19
+    GT = 20
+    LT = 21
+    GE = 22
+    LE = 23
+    EQ = 24
+    NE = 25
+    AND = 26
+    OR = 27
+    AND_BIT = 28
+    OR_BIT = 29
+    XOR_BIT = 30
+    LSHIFT = 31
+    RSHIFT = 32
+
+
+IR_FIELDS = ("op", "dest", "arg1", "arg2", "type")
+
+UNARY_OPS = frozenset({Op.NEG, Op.NOT, Op.NOT_BIT})
+BINARY_OPS = frozenset(op for op in Op if op >= Op.PLUS)
+# Operações sem efeito colateral: o valor depende só dos operandos
+PURE_OPS = UNARY_OPS | BINARY_OPS | {Op.ASSIGN}
+# Operações cujo destino é um rótulo ou uma função, não um valor
+CONTROL_OPS = frozenset({Op.FUNC_BEGIN, Op.FUNC_END, Op.LABEL, Op.GOTO, Op.IF_FALSE_GOTO})
+
+
+def is_variable(arg) -> bool:
+    """Operando que é nome de variável ou temporário (não literal)."""
+    return isinstance(arg, str) and not arg.startswith('"')
+
+
+# Campos de cada opcode que são operandos (``CALL`` guarda o nome da função e
+# o número de argumentos; o destino de ``GOTO``/``IF_FALSE_GOTO`` é um rótulo)
+OPERAND_FIELDS = {op: ("arg1", "arg2") if op in BINARY_OPS else () for op in Op}
+for _op in UNARY_OPS | {Op.IF_FALSE_GOTO, Op.ASSIGN, Op.ARG, Op.RETURN, Op.PRINT}:
+    OPERAND_FIELDS[_op] = ("arg1",)
+del _op
+
+
+def defines(instr) -> bool:
+    """``instr.dest`` é uma variável definida pela instrução."""
+    return instr.dest is not None and instr.op not in CONTROL_OPS
+
+
+def can_raise(instr) -> bool:
+    """A operação pode falhar com estes operandos: divisão ou resto por um
+    divisor que não é um literal diferente de zero, deslocamento por uma
+    quantidade que não é um literal inteiro não negativo."""
+    op = instr.op
+    if op is Op.DIV or op is Op.MOD:
+        return is_variable(instr.arg2) or instr.arg2 == 0
+    if op is Op.LSHIFT or op is Op.RSHIFT:
+        return not (isinstance(instr.arg2, int) and instr.arg2 >= 0)
+    return False
+
+
 class IRInstruction:
-    def __init__(self, op, dest=None, arg1=None, arg2=None):
+    __slots__ = IR_FIELDS
+
+    def __init__(self, op: Op, dest=None, arg1=None, arg2=None, type=None):
         self.op = op
         self.dest = dest
         self.arg1 = arg1
         self.arg2 = arg2
+        self.type = type  # tipo do valor definido (ou impresso) pela instrução
+
+    def __eq__(self, other):
+        if not isinstance(other, IRInstruction):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in IR_FIELDS)
+
+    __hash__ = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Forma de depuração (JSON): nome do opcode e campos presentes."""
+        d = {"op": self.op.name}
+        for field in IR_FIELDS[1:]:
+            value = getattr(self, field)
+            if value is not None:
+                d[field] = value
+        return d
+
+    @classmethod
+    def from_dict(cls, d: Dict[str, Any]) -> "IRInstruction":
+        return cls(Op[d["op"]], d.get("dest"), d.get("arg1"), d.get("arg2"), d.get("type"))
 
     def __repr__(self):
-        parts = [self.op]
+        parts = [self.op.name]
         if self.dest is not None:
             parts.append(str(self.dest))
         if self.arg1 is not None:
@@ -28,6 +151,7 @@ class IRGenerator:
         self.instructions = []
         self.temp_counter = 0
         self.label_counter = 0
+        self.local_names = {}
 
     def new_temp(self):
         self.temp_counter += 1
@@ -41,17 +165,51 @@ class IRGenerator:
     # Função principal
     # -------------------------
     def generate(self, program: Program):
+        instructions = []
         for func in program.functions:
-            self.gen_function(func)
+            instructions.extend(self.generate_function(func))
+        self.instructions = instructions
+        return instructions
+
+    def generate_function(self, func: FunctionDecl):
+        """IR de uma única função. Temporários e rótulos recomeçam em cada
+        função (são locais no C gerado), então o resultado de uma função não
+        depende das outras."""
+        self.instructions = []
+        self.temp_counter = 0
+        self.label_counter = 0
+        self.gen_function(func)
         return self.instructions
 
     # -------------------------
     # Funções
     # -------------------------
     def gen_function(self, func: FunctionDecl):
-        self.instructions.append(IRInstruction("FUNC_BEGIN", dest=func.name))
+        self.local_names = self.slot_names(func)
+        slot_types = func.slot_types or [None] * len(func.params)
+        self.instructions.append(IRInstruction(Op.FUNC_BEGIN, dest=func.name, type=func.return_type))
+        for slot, param in enumerate(func.params):
+            self.instructions.append(IRInstruction(Op.PARAM, dest=self.var_name(param, slot), type=slot_types[slot]))
         self.gen_block(func.body)
-        self.instructions.append(IRInstruction("FUNC_END", dest=func.name))
+        self.instructions.append(IRInstruction(Op.FUNC_END, dest=func.name))
+
+    def slot_names(self, func: FunctionDecl):
+        """Nome no IR de cada slot: o da variável ou, se o mesmo nome ocupa
+        mais de um slot (variável de bloco que esconde outra), ``nome_slot``."""
+        slots = {param: {slot} for slot, param in enumerate(func.params)}
+        for node in walk(func.body):
+            if isinstance(node, Var) and node.slot is not None:
+                slots.setdefault(node.name, set()).add(node.slot)
+            elif isinstance(node, ForStatement) and node.slot is not None:
+                slots.setdefault(node.var, set()).add(node.slot)
+        names = {}
+        for name, used in slots.items():
+            for slot in used:
+                names[slot] = name if len(used) == 1 else f"{name}_{slot}"
+        return names
+
+    def var_name(self, name: str, slot) -> str:
+        return name if slot is None else self.local_names.get(slot, name)
 
     # -------------------------
     # Blocos
@@ -66,22 +224,24 @@ class IRGenerator:
     def gen_statement(self, stmt):
         if isinstance(stmt, Assignment):
             value = self.gen_expression(stmt.expr)
-            self.instructions.append(IRInstruction("ASSIGN", dest=stmt.target.name, arg1=value))
+            target = stmt.target
+            self.instructions.append(IRInstruction(Op.ASSIGN, dest=self.var_name(target.name, target.slot),
+                                                   arg1=value, type=target.type))
         elif isinstance(stmt, FunctionCall):
             args = [self.gen_expression(arg) for arg in stmt.args]
             for arg in args:
-                self.instructions.append(IRInstruction("ARG", arg1=arg))
-            self.instructions.append(IRInstruction("CALL", dest=stmt.name, arg1=len(args)))
+                self.instructions.append(IRInstruction(Op.ARG, arg1=arg))
+            self.instructions.append(IRInstruction(Op.CALL, arg1=stmt.name, arg2=len(args)))
         elif isinstance(stmt, PrintStatement):
             val = self.gen_expression(stmt.value)
-            self.instructions.append(IRInstruction("PRINT", arg1=val))
+            self.instructions.append(IRInstruction(Op.PRINT, arg1=val, type=stmt.value.type))
         elif isinstance(stmt, InputStatement):
             temp = self.new_temp()
-            self.instructions.append(IRInstruction("INPUT", dest=temp))
+            self.instructions.append(IRInstruction(Op.INPUT, dest=temp, type=stmt.type))
             return temp
         elif isinstance(stmt, ReturnStatement):
             val = self.gen_expression(stmt.value) if stmt.value else None
-            self.instructions.append(IRInstruction("RETURN", arg1=val))
+            self.instructions.append(IRInstruction(Op.RETURN, arg1=val))
         elif isinstance(stmt, IfStatement):
             self.gen_if(stmt)
         elif isinstance(stmt, WhileStatement):
@@ -100,28 +260,26 @@ class IRGenerator:
         label_else_main = self.new_label("ELSE") if stmt.otherwise else label_end
 
         # IF principal
-        cond_temp = self.gen_expression(stmt.cond)
         first_label = label_else_list[0] if stmt.elifs else label_else_main
-        self.instructions.append(IRInstruction("IF_FALSE_GOTO", cond_temp, first_label))
+        self.gen_condition(stmt.cond, first_label)
         self.gen_block(stmt.then)
-        self.instructions.append(IRInstruction("GOTO", label_end))
+        self.instructions.append(IRInstruction(Op.GOTO, label_end))
 
         # ELIFs
         for i, (elif_cond, elif_block) in enumerate(stmt.elifs):
             label_next = label_else_list[i + 1] if i + 1 < len(stmt.elifs) else label_else_main
-            self.instructions.append(IRInstruction("LABEL", dest=label_else_list[i]))
-            cond_temp = self.gen_expression(elif_cond)
-            self.instructions.append(IRInstruction("IF_FALSE_GOTO", cond_temp, label_next))
+            self.instructions.append(IRInstruction(Op.LABEL, dest=label_else_list[i]))
+            self.gen_condition(elif_cond, label_next)
             self.gen_block(elif_block)
-            self.instructions.append(IRInstruction("GOTO", label_end))
+            self.instructions.append(IRInstruction(Op.GOTO, label_end))
 
         # ELSE
         if stmt.otherwise:
-            self.instructions.append(IRInstruction("LABEL", dest=label_else_main))
+            self.instructions.append(IRInstruction(Op.LABEL, dest=label_else_main))
             self.gen_block(stmt.otherwise)
 
         # END IF
-        self.instructions.append(IRInstruction("LABEL", dest=label_end))
+        self.instructions.append(IRInstruction(Op.LABEL, dest=label_end))
 
     # -------------------------
     # While
@@ -130,12 +288,11 @@ class IRGenerator:
         label_start = self.new_label("WHILE")
         label_end = self.new_label("END_WHILE")
 
-        self.instructions.append(IRInstruction("LABEL", dest=label_start))
-        cond_temp = self.gen_expression(stmt.cond)
-        self.instructions.append(IRInstruction("IF_FALSE_GOTO", cond_temp, label_end))
+        self.instructions.append(IRInstruction(Op.LABEL, dest=label_start))
+        self.gen_condition(stmt.cond, label_end)
         self.gen_block(stmt.body)
-        self.instructions.append(IRInstruction("GOTO", label_start))
-        self.instructions.append(IRInstruction("LABEL", dest=label_end))
+        self.instructions.append(IRInstruction(Op.GOTO, label_start))
+        self.instructions.append(IRInstruction(Op.LABEL, dest=label_end))
 
     # -------------------------
     # For (range)
@@ -145,18 +302,62 @@ class IRGenerator:
         label_start = self.new_label("FOR")
         label_end = self.new_label("END_FOR")
 
+        var = self.var_name(stmt.var, stmt.slot)
         start_val = self.gen_expression(stmt.start)
-        self.instructions.append(IRInstruction("ASSIGN", dest=stmt.var, arg1=start_val))
-
-        self.instructions.append(IRInstruction("LABEL", dest=label_start))
+        self.instructions.append(IRInstruction(Op.ASSIGN, dest=var, arg1=start_val, type="int"))
+        # O limite é avaliado uma vez, antes do laço (como ``range`` no
+        # interpretador da AST): uma chamada no limite não se repete a cada volta
         end_val = self.gen_expression(stmt.end)
+
+        self.instructions.append(IRInstruction(Op.LABEL, dest=label_start))
         cond_temp = self.new_temp()
-        self.instructions.append(IRInstruction("LT_EQ", dest=cond_temp, arg1=stmt.var, arg2=end_val))
-        self.instructions.append(IRInstruction("IF_FALSE_GOTO", cond_temp, label_end))
+        self.instructions.append(IRInstruction(Op.LE, dest=cond_temp, arg1=var, arg2=end_val, type="bool"))
+        self.instructions.append(IRInstruction(Op.IF_FALSE_GOTO, dest=label_end, arg1=cond_temp))
         self.gen_block(stmt.body)
-        self.instructions.append(IRInstruction("ADD", dest=stmt.var, arg1=stmt.var, arg2=1))
-        self.instructions.append(IRInstruction("GOTO", label_start))
-        self.instructions.append(IRInstruction("LABEL", dest=label_end))
+        self.instructions.append(IRInstruction(Op.PLUS, dest=var, arg1=var, arg2=1, type="int"))
+        self.instructions.append(IRInstruction(Op.GOTO, label_start))
+        self.instructions.append(IRInstruction(Op.LABEL, dest=label_end))
+
+    # -------------------------
+    # Condições (contexto de desvio)
+    # -------------------------
+    # ``and``, ``or`` e ``not`` numa condição viram cadeias de desvios: o
+    # operando da direita só é avaliado se o da esquerda não decide
+    def gen_condition(self, expr, label_false):
+        """Desvia para ``label_false`` se ``expr`` é falsa; cai adiante se é
+        verdadeira."""
+        if isinstance(expr, BinaryOp) and expr.op == "AND":
+            self.gen_condition(expr.left, label_false)
+            self.gen_condition(expr.right, label_false)
+        elif isinstance(expr, BinaryOp) and expr.op == "OR":
+            label_true = self.new_label("OR_TRUE")
+            self.gen_condition_true(expr.left, label_true)
+            self.gen_condition(expr.right, label_false)
+            self.instructions.append(IRInstruction(Op.LABEL, dest=label_true))
+        elif isinstance(expr, UnaryOp) and expr.op == "NOT":
+            self.gen_condition_true(expr.operand, label_false)
+        else:
+            cond_temp = self.gen_expression(expr)
+            self.instructions.append(IRInstruction(Op.IF_FALSE_GOTO, dest=label_false, arg1=cond_temp))
+
+    def gen_condition_true(self, expr, label_true):
+        """Desvia para ``label_true`` se ``expr`` é verdadeira; cai adiante
+        se é falsa."""
+        if isinstance(expr, BinaryOp) and expr.op == "AND":
+            label_false = self.new_label("AND_FALSE")
+            self.gen_condition(expr.left, label_false)
+            self.gen_condition_true(expr.right, label_true)
+            self.instructions.append(IRInstruction(Op.LABEL, dest=label_false))
+        elif isinstance(expr, BinaryOp) and expr.op == "OR":
+            self.gen_condition_true(expr.left, label_true)
+            self.gen_condition_true(expr.right, label_true)
+        elif isinstance(expr, UnaryOp) and expr.op == "NOT":
+            self.gen_condition(expr.operand, label_true)
+        else:
+            label_false = self.new_label("FALSE")
+            self.gen_condition(expr, label_false)
+            self.instructions.append(IRInstruction(Op.GOTO, label_true))
+            self.instructions.append(IRInstruction(Op.LABEL, dest=label_false))
 
     # -------------------------
     # Expressões
@@ -165,32 +366,71 @@ class IRGenerator:
         if isinstance(expr, Number):
             return expr.value
         elif isinstance(expr, String):
-            return expr.value
+            return string_literal(expr.value)
         elif isinstance(expr, Boolean):
             return expr.value
         elif isinstance(expr, Var):
-            return expr.name
+            return self.var_name(expr.name, expr.slot)
         elif isinstance(expr, UnaryOp):
             right = self.gen_expression(expr.operand)
             temp = self.new_temp()
-            self.instructions.append(IRInstruction(expr.op, dest=temp, arg1=right))
+            # ``MINUS`` unário vira ``NEG`` para não se confundir com a subtração
+            op = Op.NEG if expr.op == "MINUS" else Op[expr.op]
+            self.instructions.append(IRInstruction(op, dest=temp, arg1=right, type=expr.type))
             return temp
+        elif isinstance(expr, BinaryOp) and expr.op in ("AND", "OR"):
+            return self.gen_logical(expr)
         elif isinstance(expr, BinaryOp):
             left = self.gen_expression(expr.left)
             right = self.gen_expression(expr.right)
             temp = self.new_temp()
-            self.instructions.append(IRInstruction(expr.op, dest=temp, arg1=left, arg2=right))
+            self.instructions.append(IRInstruction(Op[expr.op], dest=temp, arg1=left, arg2=right, type=expr.type))
             return temp
         elif isinstance(expr, FunctionCall):
             args = [self.gen_expression(arg) for arg in expr.args]
             for arg in args:
-                self.instructions.append(IRInstruction("ARG", arg1=arg))
+                self.instructions.append(IRInstruction(Op.ARG, arg1=arg))
             temp = self.new_temp()
-            self.instructions.append(IRInstruction("CALL", dest=temp, arg1=expr.name, arg2=len(args)))
+            self.instructions.append(IRInstruction(Op.CALL, dest=temp, arg1=expr.name, arg2=len(args), type=expr.type))
             return temp
         elif isinstance(expr, InputStatement):
             temp = self.new_temp()
-            self.instructions.append(IRInstruction("INPUT", dest=temp))
+            self.instructions.append(IRInstruction(Op.INPUT, dest=temp, type=expr.type))
             return temp
         else:
             raise Exception(f"IR generation not implemented for {type(expr).__name__}")
+
+    def gen_logical(self, expr: BinaryOp):
+        """``and``/``or`` como valor, em curto-circuito: o resultado é o
+        operando da esquerda se ele decide (falso no ``and``, verdadeiro no
+        ``or``), senão o da direita, que só então é avaliado."""
+        temp = self.new_temp()
+        label_end = self.new_label("END_AND" if expr.op == "AND" else "END_OR")
+        left = self.gen_expression(expr.left)
+        self.instructions.append(IRInstruction(Op.ASSIGN, dest=temp, arg1=left, type=expr.type))
+        if expr.op == "AND":
+            self.instructions.append(IRInstruction(Op.IF_FALSE_GOTO, dest=label_end, arg1=temp))
+        else:
+            label_right = self.new_label("OR_RIGHT")
+            self.instructions.append(IRInstruction(Op.IF_FALSE_GOTO, dest=label_right, arg1=temp))
+            self.instructions.append(IRInstruction(Op.GOTO, label_end))
+            self.instructions.append(IRInstruction(Op.LABEL, dest=label_right))
+        right = self.gen_expression(expr.right)
+        self.instructions.append(IRInstruction(Op.ASSIGN, dest=temp, arg1=right, type=expr.type))
+        self.instructions.append(IRInstruction(Op.LABEL, dest=label_end))
+        return temp
+
+
+def normalize_ir(ir_list: List[Any]) -> List[IRInstruction]:
+    """Lista de ``IRInstruction`` a partir de instruções ou dicts (IR lido de
+    um dump JSON); entradas ``None`` são descartadas."""
+    normalized = []
+    for instr in ir_list:
+        if instr is None: continue
+        normalized.append(IRInstruction.from_dict(instr) if isinstance(instr, dict) else instr)
+    return normalized
+
+
+def ir_to_dicts(ir_list: List[IRInstruction]) -> List[Dict[str, Any]]:
+    """IR na forma de dicts, para os dumps de depuração."""
+    return [instr.to_dict() for instr in ir_list]
@@ -0,0 +1,168 @@
+# ir_interpreter.py - Execução do IR otimizado da linguagem Cirius
+"""
+Backend interpretado sobre o IR: cada função do IR (já otimizado) vira uma
+função Python, compilada uma vez com ``exec``, de modo que o interpretador
+executa exatamente o código que o otimizador deixou, como o backend C.
+
+Variáveis viram locais (prefixo ``v_``) e funções do programa ``f_nome``.
+Sem rótulos, o corpo é uma sequência reta; com rótulos, cada trecho que
+começa num rótulo é um caso de uma máquina de estados (``while True`` com a
+variável ``_b``): um desvio para trás muda ``_b`` e volta ao início com
+``continue``; um desvio para frente só muda ``_b`` e deixa o resto do trecho
+num ``else``, e o fim de um trecho cai no seguinte. As operações têm a
+mesma semântica das versões genéricas do interpretador da AST
+(``interpreter.BINARY_OPS``).
+"""
+
+from typing import Dict, List
+
+from ir import IRInstruction, Op, defines, is_variable, literal_text
+from optimize import split_functions
+
+# Expressões Python de cada operação (``{0}`` e ``{1}`` são os operandos)
+EXPRESSIONS = {
+    Op.PLUS: "{0} + {1}", Op.MINUS: "{0} - {1}", Op.MUL: "{0} * {1}",
+    Op.DIV: "{0} / {1}", Op.MOD: "{0} % {1}",
+    Op.GT: "{0} > {1}", Op.LT: "{0} < {1}", Op.GE: "{0} >= {1}", Op.LE: "{0} <= {1}",
+    Op.EQ: "{0} == {1}", Op.NE: "{0} != {1}",
+    Op.AND: "{0} and {1}", Op.OR: "{0} or {1}",
+    Op.AND_BIT: "{0} & {1}", Op.OR_BIT: "{0} | {1}", Op.XOR_BIT: "{0} ^ {1}",
+    Op.LSHIFT: "{0} << {1}", Op.RSHIFT: "{0} >> {1}",
+    Op.NEG: "-{0}", Op.NOT: "not {0}", Op.NOT_BIT: "~{0}",
+}
+
+# Aninhamento máximo de ``else`` de desvios para frente num mesmo trecho
+MAX_NESTING = 40
+
+# Funções embutidas visíveis para o programa
+BUILTINS = {"str": "str"}
+
+
+def read_int():
+    try:
+        return int(input())
+    except ValueError:
+        raise RuntimeError("Entrada inválida. Esperado um número inteiro.")
+
+
+def operand(arg) -> str:
+    """Expressão Python de um operando do IR."""
+    if is_variable(arg):
+        return f"v_{arg}"
+    value = literal_text(arg) if isinstance(arg, str) else arg
+    text = repr(value)
+    return f"({text})" if text.startswith("-") else text
+
+
+class FunctionCompiler:
+    """Fonte Python de uma função do IR."""
+
+    def __init__(self, function_ir: List[IRInstruction]):
+        self.ir = function_ir
+        self.lines = []
+        self.pending_args = []
+        labels = [instr.dest for instr in function_ir if instr.op is Op.LABEL]
+        # Estado 0 é a entrada; cada rótulo inicia um estado
+        self.states = {label: position for position, label in enumerate(labels, 1)}
+
+    def compile(self) -> str:
+        begin = self.ir[0]
+        params = [instr.dest for instr in self.ir if instr.op is Op.PARAM]
+        local = sorted({instr.dest for instr in self.ir if defines(instr) and instr.op is not Op.PARAM}
+                       - set(params))
+        self.lines.append(f"def f_{begin.dest}({', '.join(operand(param) for param in params)}):")
+        # Um caminho que lê uma variável antes de escrevê-la vê ``None``,
+        # como num frame novo do interpretador da AST
+        if local:
+            self.lines.append(f"    {' = '.join(operand(name) for name in local)} = None")
+        body = [instr for instr in self.ir if instr.op not in (Op.FUNC_BEGIN, Op.FUNC_END, Op.PARAM)]
+        if self.states:
+            self.lines.append("    _b = 0")
+            self.lines.append("    while True:")
+            self.lines.append("        if _b == 0:")
+            indent = " " * 12
+        else:
+            indent = " " * 4
+        previous = None
+        state = 0
+        depth = 0
+        for instr in body:
+            if instr.op is Op.LABEL:
+                # O trecho anterior cai neste, a não ser que termine em desvio
+                if previous not in (Op.GOTO, Op.RETURN):
+                    self.lines.append(f"{indent}{'    ' * depth}_b = {self.states[instr.dest]}")
+                state = self.states[instr.dest]
+                depth = 0
+                self.lines.append(f"        if _b == {state}:")
+            elif previous in (Op.GOTO, Op.RETURN):
+                # Código após um desvio incondicional só é alcançado por rótulo
+                continue
+            elif instr.op in (Op.GOTO, Op.IF_FALSE_GOTO) and self.states[instr.dest] > state \
+                    and depth < MAX_NESTING:
+                # Desvio para frente: o estado alvo é testado mais adiante na
+                # mesma volta do laço, sem recomeçar a cadeia de ``if _b ==``
+                prefix = indent + "    " * depth
+                target = self.states[instr.dest]
+                if instr.op is Op.GOTO:
+                    self.lines.append(f"{prefix}_b = {target}")
+                else:
+                    self.lines.extend([f"{prefix}if not {operand(instr.arg1)}:",
+                                       f"{prefix}    _b = {target}", f"{prefix}else:"])
+                    depth += 1
+            else:
+                self.lines.extend(indent + "    " * depth + line for line in self.statement(instr))
+            previous = instr.op
+        self.lines.append(f"{indent}{'    ' * depth}return None")
+        return "\n".join(self.lines)
+
+    def statement(self, instr: IRInstruction):
+        op = instr.op
+        if op is Op.ASSIGN:
+            return [f"{operand(instr.dest)} = {operand(instr.arg1)}"]
+        if op in EXPRESSIONS:
+            args = [operand(instr.arg1)] if instr.arg2 is None else [operand(instr.arg1), operand(instr.arg2)]
+            return [f"{operand(instr.dest)} = {EXPRESSIONS[op].format(*args)}"]
+        if op is Op.PRINT:
+            return [f"print({operand(instr.arg1)})"]
+        if op is Op.ARG:
+            self.pending_args.append(operand(instr.arg1))
+            return []
+        if op is Op.CALL:
+            count = len(self.pending_args) - instr.arg2
+            args = self.pending_args[count:]
+            del self.pending_args[count:]
+            name = BUILTINS.get(instr.arg1, f"f_{instr.arg1}")
+            call = f"{name}({', '.join(args)})"
+            return [f"{operand(instr.dest)} = {call}" if instr.dest is not None else call]
+        if op is Op.INPUT:
+            return [f"{operand(instr.dest)} = read_int()"]
+        if op is Op.RETURN:
+            return [f"return {operand(instr.arg1)}" if instr.arg1 is not None else "return None"]
+        if op is Op.GOTO:
+            return [f"_b = {self.states[instr.dest]}", "continue"]
+        if op is Op.IF_FALSE_GOTO:
+            return [f"if not {operand(instr.arg1)}:", f"    _b = {self.states[instr.dest]}", "    continue"]
+        raise RuntimeError(f"Instrução do IR não suportada: {op.name}")
+
+
+def compile_program(ir_code: List[IRInstruction]) -> Dict[str, object]:
+    """Compila o IR do programa; devolve as funções Python pelo nome."""
+    source = "\n\n".join(FunctionCompiler(function).compile() for function in split_functions(ir_code)
+                         if function and function[0].op is Op.FUNC_BEGIN)
+    namespace = {"read_int": read_int}
+    exec(compile(source, "<cirius-ir>", "exec"), namespace)
+    return {name[2:]: value for name, value in namespace.items() if name.startswith("f_")}
+
+
+class IRInterpreter:
+    """Executa o IR de um programa a partir de ``main``."""
+
+    def interpret(self, ir_code: List[IRInstruction]):
+        try:
+            functions = compile_program(ir_code)
+            main_func = functions.get("main")
+            if main_func is None:
+                raise RuntimeError("Função 'main' não encontrada.")
+            main_func()
+        except (NameError, TypeError, RuntimeError) as e:
+            print(f"[Erro de Execução] {e}")
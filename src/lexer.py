@@ -7,7 +7,11 @@ aritméticos, relacionais, lógicos, palavras-chave, literais, comentários e
 identificadores.
 """
 
+import codecs
+import io
+import mmap
 import re
+from array import array
 from collections import namedtuple
 
 # Estrutura de token
@@ -56,6 +60,8 @@ TOKEN_SPECIFICATION = [
     ("MINUS_ASSIGN", r"-="),
     ("MUL_ASSIGN", r"\*="),
     ("DIV_ASSIGN", r"/="),
+    ("LSHIFT", r"<<"),
+    ("RSHIFT", r">>"),
 
     # Operadores relacionais
     ("EQ", r"=="),
@@ -78,8 +84,6 @@ TOKEN_SPECIFICATION = [
     ("OR_BIT", r"\|"),
     ("XOR_BIT", r"\^"),
     ("NOT_BIT", r"~"),
-    ("LSHIFT", r"<<"),
-    ("RSHIFT", r">>"),
 
     # Símbolos
     ("LPAREN", r"\("),
@@ -104,48 +108,588 @@ TOKEN_SPECIFICATION = [
 TOK_REGEX = "|".join(f"(?P<{name}>{pattern})" for name, pattern in TOKEN_SPECIFICATION)
 TOK_REGEX_COMPILED = re.compile(TOK_REGEX)
 
+# Códigos inteiros dos tipos de token (usados pelo TokenBuffer e pelo parser)
+TOKEN_KINDS = tuple(
+    name for name, _ in TOKEN_SPECIFICATION if name not in ("COMMENT", "SKIP", "MISMATCH")
+) + ("EOF",)
+KIND_CODES = {name: code for code, name in enumerate(TOKEN_KINDS)}
+KEYWORD_CODES = {word: KIND_CODES[word.upper()] for word in KEYWORDS}
+
+NUMBER_CODE = KIND_CODES["NUMBER"]
+FLOAT_CODE = KIND_CODES["FLOAT"]
+IDENT_CODE = KIND_CODES["IDENT"]
+STRING_CODE = KIND_CODES["STRING"]
+DIV_CODE = KIND_CODES["DIV"]
+DIV_ASSIGN_CODE = KIND_CODES["DIV_ASSIGN"]
+EOF_CODE = KIND_CODES["EOF"]
+
+# Grupo do regex mestre (mo.lastindex) -> código do token; negativos marcam
+# trechos ignorados (-1) e caracteres inválidos (-2)
+_SKIPPED, _INVALID = -1, -2
+_GROUP_CODES = [None] + [
+    _SKIPPED if name in ("COMMENT", "SKIP") else _INVALID if name == "MISMATCH" else KIND_CODES[name]
+    for name, _ in TOKEN_SPECIFICATION
+]
+
+
+
+def _regex_spans(code, pos=0):
+    """Tokens de ``code`` a partir de ``pos`` como (código, início, fim),
+    usando o regex mestre. Palavras-chave já saem com o código próprio."""
+    group_codes = _GROUP_CODES
+    keyword_codes = KEYWORD_CODES
+    for mo in TOK_REGEX_COMPILED.finditer(code, pos):
+        kind = group_codes[mo.lastindex]
+        if kind == IDENT_CODE:
+            kind = keyword_codes.get(mo.group(), kind)
+        yield (kind,) + mo.span()
+
+
+# -------------------------------
+# Scanner manual
+# -------------------------------
+# Operadores e símbolos; o scanner manual aplica "maximal munch" sobre uma
+# trie montada a partir desta tabela
+OPERATORS = {
+    "++": "INC", "--": "DEC",
+    "+=": "PLUS_ASSIGN", "-=": "MINUS_ASSIGN", "*=": "MUL_ASSIGN", "/=": "DIV_ASSIGN",
+    "<<": "LSHIFT", ">>": "RSHIFT",
+    "==": "EQ", "!=": "NE", ">=": "GE", "<=": "LE", ">": "GT", "<": "LT",
+    "+": "PLUS", "-": "MINUS", "*": "MUL", "/": "DIV", "%": "MOD", "=": "ASSIGN",
+    "&": "AND_BIT", "|": "OR_BIT", "^": "XOR_BIT", "~": "NOT_BIT",
+    "(": "LPAREN", ")": "RPAREN", "{": "LBRACE", "}": "RBRACE",
+    "..": "DOTS", ";": "SEMICOLON", ",": "COMMA",
+}
+
+
+def _build_operator_trie(operators):
+    """Trie de operadores: cada nó é ``[código ou None, {caractere: nó}]``."""
+    root = [None, {}]
+    for text, name in operators.items():
+        node = root
+        for char in text:
+            node = node[1].setdefault(char, [None, {}])
+        node[0] = KIND_CODES[name]
+    return root[1]
+
+
+OPERATOR_TRIE = _build_operator_trie(OPERATORS)
+
+_IDENT_RE = re.compile(r"[a-zA-Z_][a-zA-Z0-9_]*")
+_NUMBER_RE = re.compile(r"\d+(\.\d+)?")
+_SPACE_RE = re.compile(r"[ \t\n]+")
+_LINE_COMMENT_RE = re.compile(r".*")
+_STRING_RE = re.compile(r'"[^"\n]*"')
+
+# Classe de cada caractere inicial: decide qual reconhecedor é usado
+_START_IDENT, _START_NUMBER, _START_SPACE, _START_SLASH, _START_HASH, _START_STRING, _START_OP = range(7)
+_START_CLASSES = {}
+for _char in "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_":
+    _START_CLASSES[_char] = _START_IDENT
+for _char in "0123456789":
+    _START_CLASSES[_char] = _START_NUMBER
+for _char in " \t\n":
+    _START_CLASSES[_char] = _START_SPACE
+for _char in OPERATOR_TRIE:
+    _START_CLASSES[_char] = _START_OP
+_START_CLASSES["/"] = _START_SLASH
+_START_CLASSES["#"] = _START_HASH
+_START_CLASSES['"'] = _START_STRING
+del _char
+
+
+def _manual_spans(code, pos=0):
+    """Scanner manual: mesmo contrato de ``_regex_spans``.
+
+    O primeiro caractere escolhe o reconhecedor (identificador + tabela de
+    palavras-chave, número, espaço, comentário, string ou a trie de
+    operadores), em vez de testar as ~60 alternativas do regex mestre.
+    """
+    classes = _START_CLASSES
+    keyword_codes = KEYWORD_CODES
+    trie = OPERATOR_TRIE
+    ident_match = _IDENT_RE.match
+    number_match = _NUMBER_RE.match
+    space_match = _SPACE_RE.match
+    end = len(code)
+
+    while pos < end:
+        char = code[pos]
+        start_class = classes.get(char)
+
+        if start_class == _START_IDENT:
+            stop = ident_match(code, pos).end()
+            yield keyword_codes.get(code[pos:stop], IDENT_CODE), pos, stop
+        elif start_class == _START_SPACE:
+            stop = space_match(code, pos).end()
+            yield _SKIPPED, pos, stop
+        elif start_class == _START_OP:
+            # Maximal munch: anda na trie guardando o último operador completo
+            node = trie[char]
+            kind, stop = node[0], pos + 1
+            children, scan = node[1], pos + 1
+            while children and scan < end:
+                node = children.get(code[scan])
+                if node is None:
+                    break
+                scan += 1
+                if node[0] is not None:
+                    kind, stop = node[0], scan
+                children = node[1]
+            if kind is None:
+                kind, stop = _INVALID, pos + 1
+            yield kind, pos, stop
+        elif start_class == _START_NUMBER:
+            mo = number_match(code, pos)
+            stop = mo.end()
+            yield (NUMBER_CODE if mo.group(1) is None else FLOAT_CODE), pos, stop
+        elif start_class == _START_SLASH:
+            following = code[pos + 1:pos + 2]
+            if following == "/":
+                stop = _LINE_COMMENT_RE.match(code, pos).end()
+                yield _SKIPPED, pos, stop
+            elif following == "*" and code.find("*/", pos + 2) >= 0:
+                stop = code.find("*/", pos + 2) + 2
+                yield _SKIPPED, pos, stop
+            elif following == "=":
+                stop = pos + 2
+                yield DIV_ASSIGN_CODE, pos, stop
+            else:
+                stop = pos + 1
+                yield DIV_CODE, pos, stop
+        elif start_class == _START_HASH:
+            stop = _LINE_COMMENT_RE.match(code, pos).end()
+            yield _SKIPPED, pos, stop
+        elif start_class == _START_STRING:
+            mo = _STRING_RE.match(code, pos)
+            if mo is None:
+                stop = pos + 1
+                yield _INVALID, pos, stop
+            else:
+                stop = mo.end()
+                yield STRING_CODE, pos, stop
+        else:
+            # Dígitos não ASCII também casam com \d no regex mestre
+            mo = number_match(code, pos)
+            if mo is None:
+                stop = pos + 1
+                yield _INVALID, pos, stop
+            else:
+                stop = mo.end()
+                yield (NUMBER_CODE if mo.group(1) is None else FLOAT_CODE), pos, stop
+        pos = stop
+
+
+SCANNERS = {
+    "regex": _regex_spans,
+    "manual": _manual_spans,
+}
+
+# Tamanho padrão dos blocos lidos no modo streaming (caracteres ou bytes)
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+# Quantos caracteres além do fim de um token precisam estar no buffer para
+# que ele seja aceito antes de ler o próximo bloco ("12" + ".5", "<" + "<")
+_LOOKAHEAD = 2
+
+
+def _iter_chunks(source, chunk_size):
+    """Produz o código-fonte em blocos de texto.
+
+    Aceita uma ``str`` (um único bloco), um buffer de bytes (``bytes`` ou
+    ``mmap``) ou um objeto de arquivo aberto em modo texto ou binário. Bytes
+    são decodificados como UTF-8 de forma incremental, então um caractere
+    multibyte partido entre dois blocos é reconstruído corretamente, e
+    quebras de linha ``\r\n`` viram ``\n`` como em ``Path.read_text()``.
+    """
+    if isinstance(source, str):
+        yield source
+        return
+
+    decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder("utf-8")(), translate=True)
+    if isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+        for offset in range(0, len(source), chunk_size):
+            data = decoder.decode(source[offset:offset + chunk_size])
+            if data:
+                yield data
+    else:
+        while True:
+            data = source.read(chunk_size)
+            if not data:
+                break
+            if isinstance(data, bytes):
+                data = decoder.decode(data)
+            if data:
+                yield data
+
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+class TokenBuffer:
+    """Sequência de tokens armazenada em colunas (struct-of-arrays).
+
+    Em vez de um ``Token`` por elemento, cada campo fica em um ``array``
+    compacto: o código do tipo (1 byte), os offsets de início/fim no código-
+    fonte e a linha/coluna (4 bytes cada). O valor só é materializado quando
+    pedido, a partir da fatia correspondente do código-fonte.
+
+    Indexar ou iterar devolve ``Token`` normais, então o buffer pode ser usado
+    onde uma lista de tokens era esperada.
+
+    Depois de edições incrementais (``relex``), offsets e linhas dos tokens a
+    partir de ``gap`` ficam guardados sem o deslocamento ``gap_offset`` /
+    ``gap_line``, que é somado na leitura; por isso o acesso deve passar por
+    ``start()``, ``end()`` e ``line()`` (ou por ``normalize()`` antes de ler
+    os arrays diretamente).
+    """
+
+    __slots__ = ("source", "kinds", "starts", "ends", "lines", "columns", "gap", "gap_offset", "gap_line")
+
+    def __init__(self, source: str):
+        self.source = source
+        self.kinds = array("B")
+        self.starts = array("i")
+        self.ends = array("i")
+        self.lines = array("i")
+        self.columns = array("i")
+        self.gap = 0
+        self.gap_offset = 0
+        self.gap_line = 0
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self.kinds)
+        return Token(TOKEN_KINDS[self.kinds[index]], self.value(index), self.line(index), self.columns[index])
+
+    def __iter__(self):
+        for index in range(len(self.kinds)):
+            yield self[index]
+
+    def start(self, index) -> int:
+        if index >= self.gap:
+            return self.starts[index] + self.gap_offset
+        return self.starts[index]
+
+    def end(self, index) -> int:
+        if index >= self.gap:
+            return self.ends[index] + self.gap_offset
+        return self.ends[index]
+
+    def line(self, index) -> int:
+        if index >= self.gap:
+            return self.lines[index] + self.gap_line
+        return self.lines[index]
+
+    def text(self, index) -> str:
+        """Trecho do código-fonte correspondente ao token."""
+        return self.source[self.start(index):self.end(index)]
+
+    def value(self, index):
+        """Valor do token, convertido como em ``Lexer.tokenize()``."""
+        kind = self.kinds[index]
+        start, end = self.starts[index], self.ends[index]
+        if index >= self.gap:
+            start += self.gap_offset
+            end += self.gap_offset
+        text = self.source[start:end]
+        if kind == NUMBER_CODE:
+            return int(text)
+        if kind == FLOAT_CODE:
+            return float(text)
+        return text
+
+    def move_gap(self, index):
+        """Aplica o deslocamento pendente aos tokens entre ``gap`` e ``index``.
+
+        O custo é proporcional à distância percorrida, então edições próximas
+        umas das outras (o caso típico de um editor) ficam baratas.
+        """
+        offset, line = self.gap_offset, self.gap_line
+        if index < self.gap:
+            low, high = index, self.gap
+            offset, line = -offset, -line
+        else:
+            low, high = self.gap, index
+        if offset:
+            self.starts[low:high] = array("i", map(offset.__add__, self.starts[low:high]))
+            self.ends[low:high] = array("i", map(offset.__add__, self.ends[low:high]))
+        if line:
+            self.lines[low:high] = array("i", map(line.__add__, self.lines[low:high]))
+        self.gap = index
+
+    def slice(self, low, high) -> "TokenBuffer":
+        """Novo buffer com os tokens ``[low, high)`` e só o trecho de
+        código-fonte que eles cobrem. Linhas e colunas continuam absolutas;
+        os offsets são rebaseados pelo mecanismo de ``gap``."""
+        self.normalize()
+        base = self.starts[low] if low < high else 0
+        part = TokenBuffer(self.source[base:self.ends[high - 1]] if low < high else "")
+        part.kinds = self.kinds[low:high]
+        part.starts = self.starts[low:high]
+        part.ends = self.ends[low:high]
+        part.lines = self.lines[low:high]
+        part.columns = self.columns[low:high]
+        part.gap = 0
+        part.gap_offset = -base
+        return part
+
+    def normalize(self):
+        """Aplica todo deslocamento pendente; os arrays passam a valer direto."""
+        self.move_gap(len(self.kinds))
+        self.gap_offset = self.gap_line = 0
+        return self
+
 
 class Lexer:
-    """Implementação do analisador léxico para a linguagem Cirius."""
+    """Implementação do analisador léxico para a linguagem Cirius.
+
+    ``code`` pode ser uma ``str`` com o programa inteiro ou, para fontes muito
+    grandes, um objeto de arquivo / ``mmap``. Nesse caso ``iter_tokens()`` lê
+    a entrada em blocos de ``chunk_size`` e nunca mantém o arquivo inteiro em
+    memória.
 
-    def __init__(self, code: str):
+    ``scanner`` escolhe o reconhecedor: ``"manual"`` (padrão, despacho pelo
+    primeiro caractere) ou ``"regex"`` (regex mestre de
+    ``TOKEN_SPECIFICATION``). Ambos produzem exatamente os mesmos tokens.
+    """
+
+    def __init__(self, code, chunk_size: int = DEFAULT_CHUNK_SIZE, scanner: str = "manual"):
+        if scanner not in SCANNERS:
+            raise ValueError(f"Scanner desconhecido: {scanner}")
         self.code = code
+        self.chunk_size = chunk_size
+        self.scanner = scanner
 
     def tokenize(self):
         """Converte o código-fonte em uma lista de tokens."""
+        return list(self.iter_tokens())
+
+    def tokenize_buffer(self) -> TokenBuffer:
+        """Converte o código-fonte em um ``TokenBuffer`` compacto.
+
+        O buffer referencia o código-fonte para materializar os valores, então
+        uma entrada em arquivo/``mmap`` é lida por inteiro para uma ``str``.
+        """
+        code = self.code
+        if not isinstance(code, str):
+            code = "".join(_iter_chunks(code, self.chunk_size))
+
+        buffer = TokenBuffer(code)
+        add_kind = buffer.kinds.append
+        add_start = buffer.starts.append
+        add_end = buffer.ends.append
+        add_line = buffer.lines.append
+        add_column = buffer.columns.append
         line_num = 1
         line_start = 0
-        tokens = []
-
-        for mo in TOK_REGEX_COMPILED.finditer(self.code):
-            kind = mo.lastgroup
-            value = mo.group()
-            column = mo.start() - line_start + 1
-
-            # Ignora espaços e comentários
-            if kind == "SKIP" or kind == "COMMENT":
-                line_num += value.count("\n")
-                if "\n" in value:
-                    line_start = mo.end()
+
+        for kind, start, end in SCANNERS[self.scanner](code):
+            if kind < 0:
+                if kind == _INVALID:
+                    raise RuntimeError(f"[Erro Léxico] Caractere inesperado '{code[start:end]}' na linha {line_num}")
+                newlines = code.count("\n", start, end)
+                if newlines:
+                    line_num += newlines
+                    line_start = code.rfind("\n", start, end) + 1
                 continue
 
-            # Converte número para int ou float
-            if kind == "NUMBER":
-                value = int(value)
-            elif kind == "FLOAT":
-                value = float(value)
+            add_kind(kind)
+            add_start(start)
+            add_end(end)
+            add_line(line_num)
+            add_column(start - line_start + 1)
+
+        buffer.gap = len(buffer)
+        return buffer
+
+    def iter_tokens(self):
+        """Gera os tokens do código-fonte sob demanda (modo streaming).
+
+        O buffer interno guarda apenas o bloco atual e o trecho ainda não
+        consumido do bloco anterior. Um token que encosta no fim do buffer
+        (ou um comentário ``/* */`` / string ainda sem fechamento) só é
+        emitido depois que o próximo bloco é lido, de modo que linha e coluna
+        continuam corretas através das fronteiras entre blocos.
+        """
+        spans = SCANNERS[self.scanner]
+        line_num = 1
+        line_start = 0  # posição (relativa ao buffer) do início da linha atual
+        chunks = _iter_chunks(self.code, self.chunk_size)
+        buf = ""
+        pos = 0
+        # Um bloco de antecipação: sem ele não dá para saber se o buffer atual
+        # é o último e, portanto, se um token no fim dele está completo.
+        chunk = next(chunks, None)
+
+        while True:
+            if chunk is not None:
+                buf = buf[pos:] + chunk
+                line_start -= pos
+                pos = 0
+                chunk = next(chunks, None)
+            final = chunk is None
+            limit = len(buf) - _LOOKAHEAD
+
+            for kind, start, end in spans(buf, pos):
+                if not final and (
+                    end > limit
+                    or (kind == DIV_CODE and buf.startswith("/*", start))
+                    or (kind == _INVALID and buf[start] == '"' and buf.find("\n", start) < 0)
+                ):
+                    break
+
+                pos = end
+                value = buf[start:end]
+
+                # Ignora espaços e comentários
+                if kind < 0:
+                    # Token inesperado
+                    if kind == _INVALID:
+                        raise RuntimeError(f"[Erro Léxico] Caractere inesperado '{value}' na linha {line_num}")
+                    newlines = value.count("\n")
+                    if newlines:
+                        line_num += newlines
+                        line_start = start + value.rfind("\n") + 1
+                    continue
+
+                # Converte número para int ou float
+                if kind == NUMBER_CODE:
+                    value = int(value)
+                elif kind == FLOAT_CODE:
+                    value = float(value)
+
+                yield Token(TOKEN_KINDS[kind], value, line_num, start - line_start + 1)
+
+            if final:
+                return
+
+
+# -------------------------------
+# Re-tokenização incremental
+# -------------------------------
+def _bisect_tokens(buffer, position, key):
+    """Primeiro índice ``i`` com ``key(i) >= position`` (busca binária)."""
+    lo, hi = 0, len(buffer)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if key(mid) < position:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+def relex(buffer: TokenBuffer, offset: int, removed: int, inserted: str, scanner: str = "manual") -> TokenBuffer:
+    """Atualiza ``buffer`` após substituir ``removed`` caracteres a partir de
+    ``offset`` por ``inserted``, re-tokenizando só a região afetada.
+
+    A varredura recomeça no início do token anterior à edição (o início de um
+    token nunca está dentro de comentário ou string) e para assim que um
+    token novo, já depois da edição, cai exatamente no início de um token
+    antigo: dali em diante o texto é o mesmo, logo os tokens também. Os tokens
+    seguintes recebem o deslocamento de offset e de linha de forma preguiçosa
+    (veja ``TokenBuffer.gap``); só as colunas da linha onde a varredura parou
+    são corrigidas na hora.
+
+    O buffer é alterado no lugar e devolvido. Um erro léxico no trecho novo
+    levanta ``RuntimeError`` e deixa o buffer intacto.
+    """
+    old_source = buffer.source
+    if offset < 0 or removed < 0 or offset + removed > len(old_source):
+        raise ValueError("Edição fora dos limites do código-fonte")
+
+    source = old_source[:offset] + inserted + old_source[offset + removed:]
+    delta = len(inserted) - removed
+    edit_end = offset + len(inserted)
+    count = len(buffer)
+
+    # Ponto de retomada seguro: o token anterior ao primeiro que toca a edição
+    lo = max(0, _bisect_tokens(buffer, offset, buffer.end) - 1)
+    if lo < count and buffer.start(lo) <= offset:
+        pos = buffer.start(lo)
+        line_num = buffer.line(lo)
+        line_start = pos - buffer.columns[lo] + 1
+    else:
+        lo, pos, line_num, line_start = 0, 0, 1, 0
+
+    # Um "/*" sem fechamento (lexado como DIV MUL) enxerga até o fim do texto:
+    # se a edição criar um "*/" depois dele, ele passa a abrir um comentário.
+    # Só os "/*" posteriores ao último "*/" do texto antigo estão nessa situação.
+    creates_close = "*/" in source[max(0, offset - 1):edit_end + 1]
+    search = max(0, old_source.rfind("*/") - 1) if creates_close else pos
+    while creates_close and lo > 0:
+        opener = old_source.find("/*", search, pos + 1)
+        if opener < 0:
+            break
+        index = _bisect_tokens(buffer, opener, buffer.start)
+        if index < count and buffer.start(index) == opener and buffer.kinds[index] == DIV_CODE:
+            lo, pos = index, opener
+            line_num = buffer.line(index)
+            line_start = pos - buffer.columns[index] + 1
+            break
+        search = opener + 1
+
+    # Candidatos à ressincronização: tokens antigos que começam após a edição
+    old_index = _bisect_tokens(buffer, offset + removed, buffer.start)
+    resync = count
+    new_kinds, new_starts, new_ends, new_lines, new_columns = [], [], [], [], []
+
+    for kind, start, end in SCANNERS[scanner](source, pos):
+        if start >= edit_end:
+            old_start = start - delta
+            while old_index < count and buffer.start(old_index) < old_start:
+                old_index += 1
+            if old_index < count and buffer.start(old_index) == old_start:
+                resync = old_index
+                break
 
-            # Identificadores que são palavras-chave viram token especial
-            elif kind == "IDENT" and value in KEYWORDS:
-                kind = value.upper()
+        if kind < 0:
+            if kind == _INVALID:
+                raise RuntimeError(f"[Erro Léxico] Caractere inesperado '{source[start:end]}' na linha {line_num}")
+            newlines = source.count("\n", start, end)
+            if newlines:
+                line_num += newlines
+                line_start = source.rfind("\n", start, end) + 1
+            continue
 
-            # Token inesperado
-            elif kind == "MISMATCH":
-                raise RuntimeError(f"[Erro Léxico] Caractere inesperado '{value}' na linha {line_num}")
+        new_kinds.append(kind)
+        new_starts.append(start)
+        new_ends.append(end)
+        new_lines.append(line_num)
+        new_columns.append(start - line_start + 1)
 
-            tokens.append(Token(kind, value, line_num, column))
+    # Tokens a partir de ``resync`` ficam com valores "guardados" + deslocamento
+    buffer.move_gap(resync)
+    line_delta = 0
+    if resync < count:
+        old_line = buffer.line(resync)
+        line_delta = line_num - old_line
+        column_delta = (start - line_start + 1) - buffer.columns[resync]
+        if column_delta:
+            columns = buffer.columns
+            index = resync
+            while index < count and buffer.line(index) == old_line:
+                columns[index] += column_delta
+                index += 1
 
-        return tokens
+    buffer.kinds[lo:resync] = array("B", new_kinds)
+    buffer.starts[lo:resync] = array("i", new_starts)
+    buffer.ends[lo:resync] = array("i", new_ends)
+    buffer.lines[lo:resync] = array("i", new_lines)
+    buffer.columns[lo:resync] = array("i", new_columns)
+    buffer.source = source
+    buffer.gap = lo + len(new_kinds)
+    if buffer.gap == len(buffer):
+        buffer.gap_offset = buffer.gap_line = 0
+    else:
+        buffer.gap_offset += delta
+        buffer.gap_line += line_delta
+    return buffer
 
 
 # -------------------------------
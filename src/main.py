@@ -4,17 +4,25 @@ import argparse
 import json
 import os
 from pathlib import Path
-from typing import Any, Dict, List
 
 # Imports do compilador
-from lexer import Lexer
+from lexer import Lexer, TokenBuffer
 import cirius_parser
+from frontend import parallel_front_end
+from incremental import FunctionCache
+from artifact import write_artifact
 from cirius_ast import Node, Program
+from callgraph import prune_unreachable
 from semantic import SemanticAnalyzer
-from ir import IRGenerator
-from optimize import Optimizer
+from type_inference import infer_types
+from ir import IRGenerator, IRInstruction
+from optimize import DEFAULT_OPT_LEVEL, OPT_LEVELS, Optimizer, format_report
 from codegen import CodeGenerator
 from interpreter import Interpreter # <-- NOVO IMPORT
+from ir_interpreter import IRInterpreter
+
+# Backends do comando 'run'
+BACKENDS = ("ast", "ir")
 
 # -------------------------
 # Utilitários (sem alterações)
@@ -27,60 +35,136 @@ def write_file(path: str, contents: str):
     with open(path, "w", encoding="utf-8") as f:
         f.write(contents)
 
-# ... (todas as outras funções utilitárias como safe_json_dump e normalize_ir permanecem iguais)
+# ... (todas as outras funções utilitárias como safe_json_dump permanecem iguais)
 def safe_json_dump(obj, path: str):
     with open(path, "w", encoding="utf-8") as f:
-        json.dump(obj, f, indent=2, ensure_ascii=False, default=lambda o: o.to_dict() if isinstance(o, Node) else o.__dict__)
-
-def normalize_ir(ir_list: List[Any]) -> List[Dict[str, Any]]:
-    normalized = []
-    for instr in ir_list:
-        if instr is None: continue
-        if isinstance(instr, dict):
-            normalized.append(instr)
-        else:
-            d = {"op": getattr(instr, "op", None)}
-            for attr in ["dest", "arg1", "arg2"]:
-                if hasattr(instr, attr):
-                    val = getattr(instr, attr)
-                    if val is not None: d[attr] = val
-            normalized.append(d)
-    return normalized
+        json.dump(obj, f, indent=2, ensure_ascii=False, default=lambda o: o.to_dict() if isinstance(o, (Node, IRInstruction)) else o.__dict__)
 
-# -------------------------
-# Funções de Pipeline
-# -------------------------
-def compile_pipeline(source: str, output_path: str, verbose=False):
-    """Executa o pipeline de compilação para gerar código C."""
-    if verbose: print(f"\n[Compilando] {source[:30].strip()}... -> {output_path}")
+def emit_artifact(obj, path: str):
+    """Salva a AST ou o IR em ``path``: JSON se a extensão for ``.json``,
+    senão no formato binário de ``artifact.py``."""
+    ensure_dir(os.path.dirname(path) or ".")
+    if path.endswith(".json"):
+        safe_json_dump(obj, path)
+    else:
+        write_artifact(path, obj)
 
-    # 1. Lexer
-    lexer = Lexer(source)
-    tokens = lexer.tokenize()
+def emit_opt_report(optimizer: Optimizer, path: str):
+    """Relatório das passadas de otimização (``--opt-report``): tabela na
+    saída padrão com ``path`` igual a ``-``, senão JSON em ``path``."""
+    report = optimizer.report()
+    if path == "-":
+        print(format_report(report))
+    else:
+        safe_json_dump(report, path)
+
+def describe_source(source) -> str:
+    """Texto curto identificando a entrada nas mensagens de --verbose."""
+    if isinstance(source, str):
+        return source[:30].strip()
+    return getattr(source, "name", "<stream>")
+
+def lex_source(source, stream=False, verbose=False, scanner="manual"):
+    """Executa o lexer.
+
+    Em modo streaming devolve um gerador de tokens; caso contrário, um
+    ``TokenBuffer`` compacto que o parser percorre diretamente.
+    """
+    lexer = Lexer(source, scanner=scanner)
+    if stream:
+        if verbose: print("[Lexer] Modo streaming: tokens gerados sob demanda.")
+        return lexer.iter_tokens()
+    tokens = lexer.tokenize_buffer()
     if verbose: print(f"[Lexer] {len(tokens)} tokens gerados.")
+    return tokens
+
+def report_semantic_errors(errors, verbose=False) -> bool:
+    """Imprime os erros semânticos (em ordem de declaração); devolve True se
+    houve algum."""
+    for error in errors:
+        print(f"[ERRO Semântico] {error}")
+    if verbose and not errors: print("[Semântica] Nenhum erro semântico encontrado.")
+    return bool(errors)
+
+def analyze_source(tokens, verbose=False, jobs=1):
+    """Parser + análise semântica. Devolve a AST, ou None após reportar os
+    erros semânticos. Com ``jobs > 1`` as funções são analisadas em paralelo
+    (exige um ``TokenBuffer``; em modo streaming a análise é sequencial)."""
+    if jobs != 1 and isinstance(tokens, TokenBuffer):
+        ast, errors = parallel_front_end(tokens, jobs or None)
+        if verbose: print(f"[Parser] AST gerada com sucesso ({len(ast.functions)} funções em paralelo).")
+        return None if report_semantic_errors(errors, verbose) else ast
 
     # 2. Parser
-    parser = cirius_parser(tokens)
+    parser = cirius_parser.Parser(tokens)
     ast = parser.parse()
     if verbose: print("[Parser] AST gerada com sucesso.")
 
-    # 3. Análise Semântica
-    sema = SemanticAnalyzer()
-    try:
-        sema.analyze(ast)
-        if verbose: print("[Semântica] Nenhum erro semântico encontrado.")
-    except Exception as e:
-        print(f"[ERRO Semântico] {e}")
+    # 3. Análise Semântica (assinaturas de todas as funções, depois os corpos)
+    errors = SemanticAnalyzer().check(ast)
+    return None if report_semantic_errors(errors, verbose) else ast
+
+def check_types(ast, verbose=False, strict=True):
+    """Inferência de tipos sobre a AST. Conflitos são erros na compilação
+    (``strict``) e avisos na execução. Devolve a lista de conflitos."""
+    conflicts = infer_types(ast)
+    for conflict in conflicts:
+        print(f"[ERRO de Tipo] {conflict}" if strict else f"[Aviso de Tipo] {conflict}")
+    if verbose and not conflicts: print("[Tipos] Tipos inferidos sem conflitos.")
+    return conflicts
+
+# -------------------------
+# Funções de Pipeline
+# -------------------------
+def compile_pipeline(source, output_path: str, verbose=False, stream=False, scanner="manual", jobs=1,
+                     cache_path=None, emit_ast=None, emit_ir=None, opt_level=DEFAULT_OPT_LEVEL, opt_report=None):
+    """Executa o pipeline de compilação para gerar código C.
+
+    ``source`` é o texto do programa ou, com ``stream=True``, um arquivo
+    aberto que é tokenizado em blocos. Com ``cache_path`` só as funções que
+    mudaram desde a última compilação são recompiladas. ``emit_ast`` e
+    ``emit_ir`` são caminhos onde salvar a AST e o IR (veja ``emit_artifact``).
+    ``opt_level`` é o nível de otimização (0 a 3) e ``opt_report`` onde
+    escrever o relatório das passadas (veja ``emit_opt_report``).
+    """
+    if verbose: print(f"\n[Compilando] {describe_source(source)}... -> {output_path}")
+
+    if cache_path and not stream:
+        compile_cached(source, output_path, cache_path, verbose, scanner, emit_ast, emit_ir, opt_level, opt_report)
+        return
+
+    # 1. Lexer
+    tokens = lex_source(source, stream, verbose, scanner)
+
+    # 2-3. Parser + Análise Semântica
+    ast = analyze_source(tokens, verbose, jobs)
+    if ast is None or check_types(ast, verbose):
         return
+    if emit_ast: emit_artifact(ast, emit_ast)
+
+    # Funções que main nunca chama não chegam ao IR
+    ast, removed = prune_unreachable(ast)
+    if verbose and removed:
+        print(f"[CallGraph] {len(removed)} função(ões) inalcançável(is) removida(s): {', '.join(removed)}")
+
+    # Dobra de constantes na AST: expressões e desvios constantes não chegam ao
+    # IR. Com --verbose ou --opt-report o IR também é medido sem a dobra
+    opt = Optimizer(level=opt_level, measure_fold=verbose or bool(opt_report))
+    folded = opt.fold(ast.functions)
+    if verbose: print(f"[Fold] {folded['folded']} expressão(ões) dobrada(s), {folded['simplified']} "
+                      f"simplificada(s), {folded['branches']} desvio(s) constante(s) removido(s).")
 
     # 4. Geração de IR
     irgen = IRGenerator()
-    ir_code = normalize_ir(irgen.generate(ast))
-    if verbose: print(f"[IR] Geradas {len(ir_code)} instruções.")
+    ir_code = irgen.generate(ast)
+    if verbose: print(f"[IR] Geradas {len(ir_code)} instruções ({opt.records['fold'].before - len(ir_code)} "
+                      f"a menos com a dobra de constantes).")
+    if emit_ir: emit_artifact(ir_code, emit_ir)
 
     # 5. Otimização
-    opt = Optimizer()
     ir_opt = opt.optimize(ir_code)
+    if verbose: print(f"[Optimizer] -O{opt_level}: IR reduzido de {len(ir_code)} para {len(ir_opt)} instruções.")
+    if opt_report: emit_opt_report(opt, opt_report)
 
     # 6. Geração de Código
     cg = CodeGenerator()
@@ -89,33 +173,64 @@ def compile_pipeline(source: str, output_path: str, verbose=False):
     if verbose: print(f"[CodeGen] Código C gerado em {output_path} (tamanho {len(c_code)})")
     print(f"[OK] Compilado para {output_path}")
 
-def run_pipeline(source: str, verbose=False):
-    """Executa o pipeline do interpretador."""
-    if verbose: print(f"\n[Executando] {source[:30].strip()}...")
+def compile_cached(source: str, output_path: str, cache_path: str, verbose=False, scanner="manual",
+                   emit_ast=None, emit_ir=None, opt_level=DEFAULT_OPT_LEVEL, opt_report=None):
+    """Pipeline de compilação por função, reaproveitando o cache de
+    ``cache_path`` (tokens da versão anterior e funções já compiladas). O
+    relatório das passadas só cobre as funções recompiladas."""
+    cache = FunctionCache.load(cache_path)
+    tokens = cache.tokenize(source, scanner)
+    if verbose: print(f"[Lexer] {len(tokens)} tokens.")
+    opt = Optimizer(level=opt_level, measure_fold=bool(opt_report))
+    c_code, errors, conflicts = cache.compile(tokens, opt)
+    cache.save(cache_path)
+    if verbose: print(f"[Cache] {cache.reused} função(ões) reaproveitada(s), {cache.compiled} recompilada(s).")
+    removed = len(cache.current) - len(cache.live)
+    if verbose and removed and not errors and not conflicts:
+        print(f"[CallGraph] {removed} função(ões) inalcançável(is) removida(s)")
+    if report_semantic_errors(errors):
+        return
+    for conflict in conflicts:
+        print(f"[ERRO de Tipo] {conflict}")
+    if conflicts:
+        return
+    if opt_report: emit_opt_report(opt, opt_report)
+    if emit_ast: emit_artifact(Program([entry.decl for entry in cache.current]), emit_ast)
+    if emit_ir: emit_artifact([instr for entry in cache.live for instr in entry.ir], emit_ir)
+    write_file(output_path, c_code)
+    if verbose: print(f"[CodeGen] Código C gerado em {output_path} (tamanho {len(c_code)})")
+    print(f"[OK] Compilado para {output_path}")
+
+def run_pipeline(source, verbose=False, stream=False, scanner="manual", jobs=1, backend="ast",
+                 opt_level=DEFAULT_OPT_LEVEL, opt_report=None):
+    """Executa o pipeline do interpretador. ``backend="ast"`` interpreta a
+    AST; ``backend="ir"`` executa o IR otimizado no nível ``opt_level``, o
+    mesmo que vai para o C. O relatório das passadas sai depois da execução
+    (não se mistura à saída do programa)."""
+    if verbose: print(f"\n[Executando] {describe_source(source)}...")
 
     # 1. Lexer
-    lexer = Lexer(source)
-    tokens = lexer.tokenize()
-    if verbose: print(f"[Lexer] {len(tokens)} tokens gerados.")
+    tokens = lex_source(source, stream, verbose, scanner)
     
-    # 2. Parser
-    parser = cirius_parser(tokens)
-    ast = parser.parse()
-    if verbose: print("[Parser] AST gerada com sucesso.")
-
-    # 3. Análise Semântica
-    sema = SemanticAnalyzer()
-    try:
-        sema.analyze(ast)
-        if verbose: print("[Semântica] Nenhum erro semântico encontrado.")
-    except Exception as e:
-        print(f"[ERRO Semântico] {e}")
+    # 2-3. Parser + Análise Semântica
+    ast = analyze_source(tokens, verbose, jobs)
+    if ast is None:
         return
-        
-    # 4. Interpretação
+    conflicts = check_types(ast, verbose, strict=False)
+
+    # 4. Interpretação. Com conflitos de tipo o IR não é confiável (o
+    # compile recusa o programa): o backend IR recorre à AST
     if verbose: print("[Interpretador] Iniciando execução...")
-    interpreter = Interpreter()
-    interpreter.interpret(ast)
+    if backend == "ir" and not conflicts:
+        ast, _ = prune_unreachable(ast)
+        opt = Optimizer(level=opt_level, measure_fold=bool(opt_report))
+        opt.fold(ast.functions)
+        ir_code = opt.optimize(IRGenerator().generate(ast))
+        IRInterpreter().interpret(ir_code)
+        if opt_report: emit_opt_report(opt, opt_report)
+    else:
+        if backend == "ir" and verbose: print("[Interpretador] Conflitos de tipo: executando a AST.")
+        Interpreter(specialize=not conflicts).interpret(ast)
     if verbose: print("[Interpretador] Execução concluída.")
 
 
@@ -125,6 +240,18 @@ def run_pipeline(source: str, verbose=False):
 def main():
     parser = argparse.ArgumentParser(description="Compilador/Interpretador Cirius")
     parser.add_argument("--verbose", action="store_true", help="Mostra detalhes do processo.")
+    parser.add_argument("--stream", action="store_true",
+                        help="Lê e tokeniza a entrada em blocos, sem carregar o arquivo inteiro na memória.")
+    parser.add_argument("--scanner", choices=["manual", "regex"], default="manual",
+                        help="Reconhecedor léxico: manual (padrão) ou o regex mestre.")
+    parser.add_argument("-j", "--jobs", type=int, default=1,
+                        help="Processos para analisar as funções em paralelo (0 = todos os núcleos).")
+    parser.add_argument("-O", dest="opt_level", type=int, choices=sorted(OPT_LEVELS), default=DEFAULT_OPT_LEVEL,
+                        metavar="N", help=f"Nível de otimização do IR, de -O0 a -O3 (padrão -O{DEFAULT_OPT_LEVEL}).")
+    parser.add_argument("--opt-report", action="store_true",
+                        help="Mostra tempo, tamanho do IR e estatísticas por passada de otimização.")
+    parser.add_argument("--opt-report-json", metavar="ARQUIVO",
+                        help="Salva o relatório das passadas de otimização em JSON.")
     
     subparsers = parser.add_subparsers(dest="command", required=True, help="Comando a ser executado")
 
@@ -132,20 +259,36 @@ def main():
     parser_compile = subparsers.add_parser("compile", help="Compila um arquivo .cir para .c")
     parser_compile.add_argument("input_path", help="Arquivo .cir de entrada")
     parser_compile.add_argument("-o", "--output", help="Arquivo .c de saída (opcional)")
+    parser_compile.add_argument("--cache", metavar="ARQUIVO",
+                                help="Cache por função: recompila só as funções alteradas desde a última compilação.")
+    parser_compile.add_argument("--emit-ast", metavar="ARQUIVO",
+                                help="Salva a AST (JSON se terminar em .json, senão formato binário).")
+    parser_compile.add_argument("--emit-ir", metavar="ARQUIVO",
+                                help="Salva o IR (JSON se terminar em .json, senão formato binário).")
 
     # Comando 'run'
     parser_run = subparsers.add_parser("run", help="Executa (interpreta) um arquivo .cir")
     parser_run.add_argument("input_path", help="Arquivo .cir para executar")
+    parser_run.add_argument("--backend", choices=BACKENDS, default="ast",
+                            help="Interpreta a AST (padrão) ou executa o IR otimizado.")
 
     args = parser.parse_args()
-    
-    source_code = Path(args.input_path).read_text(encoding="utf-8")
 
+    if args.stream:
+        with open(args.input_path, encoding="utf-8") as source_file:
+            dispatch(args, source_file)
+    else:
+        dispatch(args, Path(args.input_path).read_text(encoding="utf-8"))
+
+def dispatch(args, source):
+    opt_report = args.opt_report_json or ("-" if args.opt_report else None)
     if args.command == "compile":
         output_path = args.output or str(Path(args.input_path).with_suffix(".c"))
-        compile_pipeline(source_code, output_path, args.verbose)
+        compile_pipeline(source, output_path, args.verbose, args.stream, args.scanner, args.jobs,
+                         args.cache, args.emit_ast, args.emit_ir, args.opt_level, opt_report)
     elif args.command == "run":
-        run_pipeline(source_code, args.verbose)
+        run_pipeline(source, args.verbose, args.stream, args.scanner, args.jobs, args.backend, args.opt_level,
+                     opt_report)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,52 +1,553 @@
-# optimizer.py (CORRIGIDO)
-from typing import List, Dict, Any, Set
-
-class Optimizer:
-    def __init__(self):
-        # Este otimizador é simples e não mantém estado entre as chamadas
-        pass
-
-    def dead_code_elimination(self, ir_code: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """
-        Remove instruções cujo destino não é usado posteriormente.
-        Funciona melhor em uma única passagem para variáveis temporárias.
-        """
-        used_vars: Set[str] = set()
-        # Passada reversa para encontrar variáveis usadas antes de serem definidas
-        for instr in reversed(ir_code):
-            if instr.get("arg1") and isinstance(instr["arg1"], str):
-                used_vars.add(instr["arg1"])
-            if instr.get("arg2") and isinstance(instr["arg2"], str):
-                used_vars.add(instr["arg2"])
-        
-        optimized_code = []
-        for instr in ir_code:
-            dest = instr.get("dest")
-            # Mantém a instrução se ela não tiver destino (ex: GOTO, LABEL, PRINT)
-            # ou se o destino for usado em algum lugar.
-            # Funções e labels principais também são mantidos.
-            if dest is None or dest in used_vars or instr['op'] in ('FUNC_BEGIN', 'LABEL'):
-                optimized_code.append(instr)
-        
-        return optimized_code
-
-    # Outras otimizações (propagação de constantes, etc.) são complexas
-    # e exigiriam uma análise de fluxo de controle mais robusta.
-    # Por enquanto, focaremos na eliminação de código morto, que é mais segura.
-
-    def optimize(self, ir_code: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """
-        Pipeline principal de otimizações.
-        """
-        print("\n[Optimizer] Iniciando otimizações...")
-        
-        # A otimização é executada múltiplas vezes para garantir que as melhorias se propaguem
-        # Por exemplo, remover código morto pode abrir portas para mais otimizações.
-        previous_len = len(ir_code) + 1
-        while len(ir_code) < previous_len:
-            previous_len = len(ir_code)
-            # Adicione outras funções de otimização aqui no futuro
-            ir_code = self.dead_code_elimination(ir_code)
-        
-        print(f"[Optimizer] Otimizações concluídas. Tamanho do IR reduzido para {len(ir_code)} instruções.")
-        return ir_code
\ No newline at end of file
+# optimizer.py (CORRIGIDO)
+import time
+from collections import Counter, namedtuple
+from typing import List
+
+from cfg import ControlFlowGraph
+from folding import ConstantFolder
+from ir import (BINARY_OPS, CONTROL_OPS, OPERAND_FIELDS, PURE_OPS, UNARY_OPS, IRGenerator, IRInstruction, Op,
+                can_raise, is_variable)
+from inline import INLINE_GROWTH, INLINE_THRESHOLD, Inliner, inline_order
+from peephole import peephole
+from ssa import COMMUTATIVE_OPS, SSAFunction, operand_value, value_type
+
+
+def is_removable(instr: IRInstruction) -> bool:
+    """A instrução só escreve ``dest``: sai se ``dest`` não for lido depois.
+    ``CALL``, ``INPUT`` e ``PRINT`` têm efeito e ficam sempre, e uma operação
+    que pode falhar (``can_raise``) também: a divisão por zero tem de
+    continuar acontecendo."""
+    return instr.op in PURE_OPS and not can_raise(instr)
+
+
+# Tabelas por opcode para ``eliminate_dead_code``: número de operandos e se a
+# instrução é removível (``True``), não tem destino que seja variável
+# (``None``) ou depende dos operandos (``False``: veja ``is_removable``)
+OPERAND_COUNT = [len(OPERAND_FIELDS[op]) for op in Op]
+REMOVABLE_KIND = [None if op in CONTROL_OPS else
+                  False if op in (Op.DIV, Op.MOD, Op.LSHIFT, Op.RSHIFT) or op not in PURE_OPS else True
+                  for op in Op]
+
+
+def eliminate_dead_code(graph: ControlFlowGraph) -> int:
+    """Remove dos blocos de ``graph`` as instruções removíveis cujo destino
+    não está vivo; devolve quantas saíram.
+
+    A vivacidade é calculada de trás para frente com uma lista de trabalho
+    sobre o CFG, com conjuntos como bits de inteiros. É vivacidade "forte":
+    os operandos de uma instrução removível só ficam vivos se o destino dela
+    estiver, então uma cadeia inteira de cálculos sem uso cai de uma vez."""
+    blocks = graph.reverse_postorder()
+    bits = {}
+
+    def bit(name):
+        value = bits.get(name)
+        if value is None:
+            value = bits[name] = 1 << len(bits)
+        return value
+
+    # Por bloco: (bit do destino, bits dos operandos, removível) de cada
+    # instrução e os bits da condição do desvio. O laço é o mais quente da
+    # passada: campos lidos diretamente e tabelas indexadas pelo opcode
+    summaries = {}
+    operand_count = OPERAND_COUNT
+    removable_kind = REMOVABLE_KIND
+    for block in blocks:
+        entries = []
+        for instr in block.instructions:
+            op = instr.op
+            uses = 0
+            count = operand_count[op]
+            if count:
+                arg = instr.arg1
+                if arg.__class__ is str and arg[0] != '"':
+                    uses = bits.get(arg) or bit(arg)
+                if count == 2:
+                    arg = instr.arg2
+                    if arg.__class__ is str and arg[0] != '"':
+                        uses |= bits.get(arg) or bit(arg)
+            dest = instr.dest
+            kind = removable_kind[op]
+            if dest is None or kind is None:
+                entries.append((0, uses, False))
+            else:
+                entries.append((bits.get(dest) or bit(dest), uses, kind is True or is_removable(instr)))
+        summaries[block] = (entries, bit(block.condition) if is_variable(block.condition) else 0)
+
+    live_in = dict.fromkeys(blocks, 0)
+
+    def live_out(block):
+        live = 0
+        for succ in block.successors:
+            live |= live_in.get(succ, 0)
+        return live
+
+    def transfer(block, live):
+        entries, condition = summaries[block]
+        live |= condition
+        for dest, uses, removable in reversed(entries):
+            if dest:
+                if removable and not live & dest:
+                    continue
+                live &= ~dest
+            live |= uses
+        return live
+
+    # Começa pelo fim da pós-ordem reversa: os sucessores vêm antes
+    pending = list(blocks)
+    queued = set(blocks)
+    while pending:
+        block = pending.pop()
+        queued.discard(block)
+        live = transfer(block, live_out(block))
+        if live != live_in[block]:
+            live_in[block] = live
+            for pred in block.predecessors:
+                if pred not in queued and pred in live_in:
+                    queued.add(pred)
+                    pending.append(pred)
+
+    removed = 0
+    for block in blocks:
+        entries, condition = summaries[block]
+        live = live_out(block) | condition
+        kept = []
+        for instr, (dest, uses, removable) in zip(reversed(block.instructions), reversed(entries)):
+            if dest:
+                if removable and not live & dest:
+                    removed += 1
+                    continue
+                live &= ~dest
+            live |= uses
+            kept.append(instr)
+        kept.reverse()
+        block.instructions = kept
+    return removed
+
+
+def local_value_numbering(graph: ControlFlowGraph) -> int:
+    """Numeração de valores local: em cada bloco básico, uma operação pura
+    igual a uma anterior do mesmo bloco (mesmos números de valor nos
+    operandos) vira cópia da variável que ainda guarda o resultado, e os
+    operandos passam a ler essa variável. Devolve quantas operações foram
+    reaproveitadas.
+
+    Sem SSA, uma variável pode ser redefinida no bloco: cada definição dá um
+    número novo ao destino, e uma variável só serve de origem enquanto ainda
+    guarda o número que a tabela registrou. Cópias só repassam o número se o
+    tipo é o mesmo (``float`` que recebe ``int`` converte)."""
+    types = {instr.dest: instr.type for instr in graph.header if instr.op is Op.PARAM}
+    blocks = graph.reverse_postorder()
+    for block in blocks:
+        for instr in block.instructions:
+            if instr.dest is not None and types.get(instr.dest) is None:
+                types[instr.dest] = instr.type
+
+    def operand_type(arg):
+        return types.get(arg) if is_variable(arg) else value_type(operand_value(arg))
+
+    reused = 0
+    for block in blocks:
+        numbers = {}
+        holders = []
+        table = {}
+
+        def number(arg):
+            key = arg if is_variable(arg) else (arg.__class__, arg)
+            value = numbers.get(key)
+            if value is None:
+                value = numbers[key] = len(holders)
+                holders.append(arg)
+            return value
+
+        def holder(arg):
+            """Variável que guarda o valor de ``arg`` desde antes (ou ele mesmo)."""
+            candidate = holders[number(arg)]
+            if candidate != arg and is_variable(candidate) and numbers.get(candidate) == numbers[arg] \
+                    and types.get(candidate) == types.get(arg):
+                return candidate
+            return arg
+
+        def define(dest, value=None):
+            if value is None:
+                value = len(holders)
+                holders.append(dest)
+            elif not (is_variable(holders[value]) and numbers.get(holders[value]) == value):
+                holders[value] = dest
+            numbers[dest] = value
+
+        instructions = []
+        for instr in block.instructions:
+            op = instr.op
+            if OPERAND_FIELDS[op]:
+                # As instruções de entrada não mudam: uma leitura trocada é cópia
+                arg1 = holder(instr.arg1) if is_variable(instr.arg1) else instr.arg1
+                arg2 = holder(instr.arg2) if is_variable(instr.arg2) else instr.arg2
+                if arg1 != instr.arg1 or arg2 != instr.arg2:
+                    instr = IRInstruction(op, instr.dest, arg1, arg2, instr.type)
+            if op is Op.ASSIGN:
+                value = number(instr.arg1)
+                define(instr.dest, value if operand_type(instr.arg1) == types.get(instr.dest) else None)
+            elif op in BINARY_OPS or op in UNARY_OPS:
+                operands = tuple(number(getattr(instr, field)) for field in OPERAND_FIELDS[op])
+                if op in COMMUTATIVE_OPS and instr.type != "str":
+                    operands = tuple(sorted(operands))
+                key = (op, instr.type, operands)
+                value = table.get(key)
+                source = holders[value] if value is not None else None
+                if source is not None and numbers.get(source) == value and types.get(source) == types.get(instr.dest):
+                    instr = IRInstruction(Op.ASSIGN, dest=instr.dest, arg1=source, type=instr.type)
+                    reused += 1
+                    define(instr.dest, value)
+                else:
+                    define(instr.dest)
+                    table[key] = numbers[instr.dest]
+            elif instr.dest is not None:
+                define(instr.dest)
+            instructions.append(instr)
+        block.instructions = instructions
+        if is_variable(block.condition):
+            block.condition = holder(block.condition)
+    return reused
+
+
+# -------------------------
+# Gerenciador de passadas
+# -------------------------
+class OptimizationPass(namedtuple("OptimizationPass", ["name", "form", "run", "requires", "produces"])):
+    """Passada registrada. ``form`` é a representação sobre a qual ela roda
+    (``"list"``: lista do IR, ``"cfg"``: grafo de fluxo, ``"ssa"``: forma
+    SSA), ``requires`` as passadas que têm de rodar antes dela no pipeline
+    (entram sozinhas quando faltam) e ``produces`` a representação que ela
+    deixa (só as conversões mudam de representação)."""
+
+
+# Passadas pelo nome, na ordem em que foram registradas
+PASSES = {}
+
+
+def register_pass(name: str, form: str, requires=(), produces=None):
+    """Registra ``run(optimizer, unit) -> estatísticas`` como a passada
+    ``name``."""
+    def decorator(run):
+        PASSES[name] = OptimizationPass(name, form, run, tuple(requires), produces or form)
+        return run
+    return decorator
+
+
+class FunctionUnit:
+    """Uma função durante o pipeline, na representação em que está: a lista
+    ``code``, o grafo ``graph`` ou, sobre ele, a forma SSA ``ssa``."""
+    __slots__ = ("code", "graph", "ssa", "callees")
+
+    def __init__(self, code: List[IRInstruction], callees=None):
+        self.code = code
+        self.graph = None
+        self.ssa = None
+        self.callees = callees
+
+    @property
+    def form(self) -> str:
+        return "ssa" if self.ssa is not None else "cfg" if self.graph is not None else "list"
+
+    def size(self) -> int:
+        """Instruções da função. No grafo, rótulos e desvios não contam (são
+        as arestas); na forma SSA, as phis contam."""
+        if self.graph is None:
+            return len(self.code)
+        graph = self.graph
+        size = len(graph.header) + (graph.footer is not None)
+        for block in graph.blocks:
+            size += len(block.instructions)
+        if self.ssa is not None:
+            size += sum(len(phis) for phis in self.ssa.phis.values())
+        return size
+
+
+@register_pass("cfg", "list", produces="cfg")
+def build_cfg(optimizer, unit):
+    unit.graph, unit.code = ControlFlowGraph(unit.code), None
+
+
+@register_pass("ssa", "cfg", produces="ssa")
+def build_ssa(optimizer, unit):
+    unit.ssa = SSAFunction(unit.graph)
+
+
+@register_pass("out_of_ssa", "ssa", produces="cfg")
+def leave_ssa(optimizer, unit):
+    unit.ssa.to_cfg()
+    unit.ssa = None
+
+
+@register_pass("linearize", "cfg", produces="list")
+def linearize(optimizer, unit):
+    unit.code, unit.graph = unit.graph.linearize(), None
+
+
+# Conversões entre representações, na ordem em que rodam
+CONVERSIONS = {
+    ("list", "cfg"): ("cfg",),
+    ("list", "ssa"): ("cfg", "ssa"),
+    ("cfg", "ssa"): ("ssa",),
+    ("cfg", "list"): ("linearize",),
+    ("ssa", "cfg"): ("out_of_ssa",),
+    ("ssa", "list"): ("out_of_ssa", "linearize"),
+}
+
+
+@register_pass("inline", "list")
+def run_inline(optimizer, unit):
+    """Expansão das funções pequenas chamadas (``inline.py``)."""
+    if not unit.callees or optimizer.inliner is None:
+        return None
+    unit.code, stats = optimizer.inliner.inline(unit.code, unit.callees)
+    return stats
+
+
+@register_pass("peephole", "list")
+def run_peephole(optimizer, unit):
+    unit.code, stats = peephole(unit.code)
+    return stats
+
+
+@register_pass("local_cse", "cfg")
+def run_local_cse(optimizer, unit):
+    return {"local_cse": local_value_numbering(unit.graph)}
+
+
+@register_pass("sccp", "ssa")
+def run_sccp(optimizer, unit):
+    return unit.ssa.sccp()
+
+
+@register_pass("gvn", "ssa")
+def run_gvn(optimizer, unit):
+    return unit.ssa.value_numbering()
+
+
+# Uma divisão só sai do laço com divisor literal diferente de zero
+# (``can_raise``): o literal chega ao operando pela SCCP
+@register_pass("licm", "ssa", requires=("sccp",))
+def run_licm(optimizer, unit):
+    return unit.ssa.hoist_invariants()
+
+
+# Só sai do laço o que é definido nele: com os invariantes já no
+# pré-cabeçalho, mais expressões ficam na forma ``k * i + invariante``
+@register_pass("strength", "ssa", requires=("licm",))
+def run_strength(optimizer, unit):
+    return unit.ssa.reduce_strength()
+
+
+@register_pass("dce", "cfg")
+def run_dce(optimizer, unit):
+    return {"dead": eliminate_dead_code(unit.graph)}
+
+
+# Níveis de otimização: passadas na ordem e rodadas do pipeline por função.
+# Numa rodada extra (-O3) o pipeline roda de novo sem a expansão, enquanto a
+# função diminui
+OptLevel = namedtuple("OptLevel", ["passes", "rounds"])
+OPT_LEVELS = {
+    0: OptLevel((), 1),
+    1: OptLevel(("peephole", "local_cse", "dce", "peephole"), 1),
+    2: OptLevel(("inline", "peephole", "local_cse", "sccp", "gvn", "licm", "strength", "dce", "peephole"), 1),
+    3: OptLevel(("inline", "peephole", "local_cse", "sccp", "gvn", "licm", "strength", "dce", "peephole"), 4),
+}
+DEFAULT_OPT_LEVEL = 2
+
+
+def resolve_passes(names) -> List[str]:
+    """Pipeline com as passadas de ``names`` na ordem dada, cada uma depois
+    das que ela requer (as que faltam entram logo antes dela)."""
+    pipeline = []
+
+    def add(name, path):
+        if name not in PASSES:
+            raise ValueError(f"Passada de otimização desconhecida: '{name}'")
+        if name in path:
+            raise ValueError(f"Dependência circular entre passadas: {' -> '.join(path + (name,))}")
+        for required in PASSES[name].requires:
+            if required not in pipeline:
+                add(required, path + (name,))
+        pipeline.append(name)
+
+    for name in names:
+        add(name, ())
+    return pipeline
+
+
+class PassRecord:
+    """Medidas acumuladas de uma passada: execuções, tempo, instruções antes
+    e depois (somadas sobre as funções) e as estatísticas dela."""
+    __slots__ = ("runs", "seconds", "before", "after", "stats")
+
+    def __init__(self):
+        self.runs = 0
+        self.seconds = 0.0
+        self.before = 0
+        self.after = 0
+        self.stats = Counter()
+
+    def to_dict(self) -> dict:
+        return {"runs": self.runs, "seconds": self.seconds, "before": self.before, "after": self.after,
+                "stats": dict(self.stats)}
+
+
+class Optimizer:
+    """Gerenciador de passadas: roda o pipeline do nível ``level`` (ou a
+    lista ``passes``) em cada função e registra, por passada, tempo,
+    tamanho do IR antes e depois e estatísticas (``records``)."""
+
+    def __init__(self, global_cse=True, inline_threshold=INLINE_THRESHOLD, inline_growth=INLINE_GROWTH,
+                 level=DEFAULT_OPT_LEVEL, passes=None, measure_fold=False):
+        if level not in OPT_LEVELS:
+            raise ValueError(f"Nível de otimização inválido: {level}")
+        self.level = level
+        names, self.rounds = OPT_LEVELS[level]
+        if passes is not None:
+            names = passes
+        # ``global_cse=False``: só a numeração de valores local, sem a global
+        # da SSA; ``inline_threshold=0``: sem expansão de funções
+        names = [name for name in names if (global_cse or name != "gvn") and (inline_threshold or name != "inline")]
+        self.pipeline = resolve_passes(names)
+        # Rodadas extras (-O3) não repetem a expansão
+        self.repeated = [name for name in self.pipeline if name != "inline"]
+        self.inliner = Inliner(inline_threshold, inline_growth) if "inline" in self.pipeline else None
+        # Identifica a configuração (o cache por função não mistura saídas)
+        self.signature = (tuple(self.pipeline), self.rounds, inline_threshold, inline_growth)
+        # Mede o IR que a dobra na AST poupa (``fold``), para os relatórios
+        self.measure_fold = measure_fold
+        # Contagem do que cada passada fez (constantes, desvios resolvidos...)
+        self.stats = Counter()
+        self.records = {}
+        # Rodadas do pipeline (mais de uma por função só no -O3)
+        self.iterations = 0
+        self.functions = 0
+
+    def record(self, name: str) -> PassRecord:
+        record = self.records.get(name)
+        if record is None:
+            record = self.records[name] = PassRecord()
+        return record
+
+    def run_pass(self, name: str, unit: FunctionUnit):
+        """Roda uma passada (convertendo antes a representação, se preciso)
+        e registra as medidas."""
+        optimization = PASSES[name]
+        if unit.form != optimization.form:
+            for conversion in CONVERSIONS[unit.form, optimization.form]:
+                self.run_pass(conversion, unit)
+        record = self.record(name)
+        before = unit.size()
+        start = time.perf_counter()
+        stats = optimization.run(self, unit)
+        record.seconds += time.perf_counter() - start
+        record.runs += 1
+        record.before += before
+        record.after += unit.size()
+        if stats:
+            record.stats.update(stats)
+            self.stats.update(stats)
+
+    def fold(self, functions):
+        """Dobra de constantes na AST das ``functions`` (``folding.py``; no
+        lugar), registrada como a passada ``fold``. Ela roda antes da
+        geração de IR: com ``measure_fold`` o IR de cada função é gerado
+        antes e depois da dobra, e o registro traz as instruções que ela
+        poupou; sem, só o tempo e as contagens."""
+        record = self.record("fold")
+        folder = ConstantFolder()
+        measure = self.measure_fold
+        for func in functions:
+            if measure:
+                record.before += len(IRGenerator().generate_function(func))
+            start = time.perf_counter()
+            folder.fold_function(func)
+            record.seconds += time.perf_counter() - start
+            record.runs += 1
+            if measure:
+                record.after += len(IRGenerator().generate_function(func))
+        record.stats.update(folder.stats)
+        self.stats.update(folder.stats)
+        return folder.stats
+
+    def optimize_function(self, ir_code: List[IRInstruction], callees=None) -> List[IRInstruction]:
+        """
+        Otimiza o IR de uma única função (de FUNC_BEGIN a FUNC_END).
+        As variáveis são locais, então cada função é otimizada isoladamente.
+        ``callees`` leva o nome de funções chamadas (não recursivas) ao IR
+        otimizado delas, para a expansão nas chamadas (``inline.py``).
+        """
+        if not self.pipeline:
+            return ir_code
+        self.functions += 1
+        unit = FunctionUnit(ir_code, callees)
+        pipeline = self.pipeline
+        size = None
+        for _ in range(self.rounds):
+            self.iterations += 1
+            for name in pipeline:
+                self.run_pass(name, unit)
+            if unit.form != "list":
+                for conversion in CONVERSIONS[unit.form, "list"]:
+                    self.run_pass(conversion, unit)
+            if size is not None and len(unit.code) >= size:
+                break
+            size = len(unit.code)
+            pipeline = self.repeated
+        return unit.code
+
+    def optimize(self, ir_code: List[IRInstruction]) -> List[IRInstruction]:
+        """Pipeline principal de otimizações, função por função."""
+        if not self.pipeline:
+            return ir_code
+        # De baixo para cima no grafo de chamadas: quem é chamado é otimizado
+        # antes e pode ser expandido em quem chama
+        functions = split_functions(ir_code)
+        order, recursive = inline_order(functions)
+        bodies = {}
+        results = [None] * len(functions)
+        for index in order:
+            function = functions[index]
+            callees = {instr.arg1: bodies[instr.arg1] for instr in function
+                       if instr.op is Op.CALL and instr.arg1 in bodies and instr.arg1 not in recursive}
+            results[index] = self.optimize_function(function, callees)
+            if function[0].op is Op.FUNC_BEGIN:
+                bodies.setdefault(function[0].dest, results[index])
+        return [instr for result in results for instr in result]
+
+    def report(self) -> dict:
+        """Medidas por passada (na ordem em que rodaram pela primeira vez),
+        em dados simples (para JSON)."""
+        return {"level": self.level, "pipeline": list(self.pipeline), "functions": self.functions,
+                "iterations": self.iterations,
+                "passes": {name: record.to_dict() for name, record in self.records.items()}}
+
+
+def format_report(report: dict) -> str:
+    """Tabela de ``Optimizer.report``: uma linha por passada."""
+    lines = [f"[Optimizer] -O{report['level']}: {report['functions']} função(ões), "
+             f"{report['iterations']} rodada(s) do pipeline",
+             f"  {'passada':<12} {'execuções':>9} {'tempo (ms)':>11} {'antes':>9} {'depois':>9}  estatísticas"]
+    total = 0.0
+    for name, record in report["passes"].items():
+        total += record["seconds"]
+        stats = ", ".join(f"{key} {value}" for key, value in sorted(record["stats"].items()) if value)
+        lines.append(f"  {name:<12} {record['runs']:>9} {record['seconds'] * 1000:>11.2f} "
+                     f"{record['before']:>9} {record['after']:>9}  {stats}")
+    lines.append(f"  {'total':<12} {'':>9} {total * 1000:>11.2f}")
+    return "\n".join(lines)
+
+
+def split_functions(ir_code: List[IRInstruction]) -> List[List[IRInstruction]]:
+    """Separa o IR do programa em listas, uma por função (FUNC_BEGIN inicia
+    uma nova)."""
+    functions = []
+    func_begin = Op.FUNC_BEGIN  # acesso a membro de Enum é lento no laço
+    for instr in ir_code:
+        if instr.op is func_begin or not functions:
+            functions.append([])
+        functions[-1].append(instr)
+    return functions
\ No newline at end of file
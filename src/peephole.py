@@ -0,0 +1,156 @@
+# peephole.py - Otimização de desvios (peephole) sobre a lista do IR
+"""
+Limpeza dos desvios do IR de uma função, direto na lista de instruções (sem
+montar o CFG), em tempo linear:
+
+- rótulos seguidos viram um só (o primeiro);
+- encadeamento de desvios: um desvio para um rótulo cuja primeira instrução
+  é ``GOTO`` vai direto ao destino final (ciclos de ``GOTO`` param no ciclo);
+- ``IF_FALSE_GOTO`` com condição literal vira ``GOTO`` (falsa) ou some
+  (verdadeira);
+- código inalcançável (depois de ``GOTO``/``RETURN`` até um rótulo que seja
+  destino de algum desvio alcançável) é removido;
+- desvios para a instrução seguinte e rótulos sem uso são removidos.
+
+Cada rótulo é resolvido uma única vez e cada instrução é visitada um número
+constante de vezes. O otimizador roda a passada antes de montar o CFG (menos
+blocos) e depois de ``linearize``, que deixa blocos vazios com um só
+``GOTO`` no meio de cadeias.
+"""
+
+from typing import List, Tuple
+
+from ir import IRInstruction, Op, is_variable, literal_text
+
+STATS = ("threaded", "jumps", "labels", "unreachable", "constant_branches")
+
+
+def peephole(function_ir: List[IRInstruction]) -> Tuple[List[IRInstruction], dict]:
+    """IR da função ``function_ir`` com os desvios limpos e a contagem do
+    que foi removido ou redirecionado. As
+    instruções originais não são alteradas: desvios redirecionados são
+    cópias."""
+    stats = dict.fromkeys(STATS, 0)
+    code = function_ir
+    size = len(code)
+    label, goto, if_false_goto, return_ = Op.LABEL, Op.GOTO, Op.IF_FALSE_GOTO, Op.RETURN
+
+    # Rótulos seguidos: todos apontam para o primeiro do grupo, que guarda a
+    # posição dele e a da primeira instrução depois do grupo
+    canonical = {}
+    label_at = {}
+    body_at = {}
+    index = 0
+    while index < size:
+        if code[index].op is not label:
+            index += 1
+            continue
+        first = code[index].dest
+        label_at[first] = index
+        while index < size and code[index].op is label:
+            canonical[code[index].dest] = first
+            index += 1
+        body_at[first] = index
+
+    final = {}
+
+    def resolve(name):
+        """Destino final de um desvio para ``name``."""
+        name = canonical[name]
+        path = []
+        seen = set()
+        while name not in final and name not in seen:
+            seen.add(name)
+            path.append(name)
+            at = body_at[name]
+            if at < size and code[at].op is goto:
+                name = canonical[code[at].dest]
+            else:
+                break
+        target = final.get(name, name)
+        for item in path:
+            final[item] = target
+        return target
+
+    # Destino de cada desvio; ``None`` para um ``IF_FALSE_GOTO`` que nunca
+    # desvia (condição literal verdadeira)
+    targets = {}
+    for index, instr in enumerate(code):
+        op = instr.op
+        if op is goto or op is if_false_goto:
+            if op is if_false_goto and not is_variable(instr.arg1):
+                stats["constant_branches"] += 1
+                value = literal_text(instr.arg1) if isinstance(instr.arg1, str) else instr.arg1
+                if value:
+                    targets[index] = None
+                    continue
+            target = resolve(instr.dest)
+            if target != instr.dest:
+                stats["threaded"] += 1
+            targets[index] = target
+
+    # Alcançabilidade: do início, seguindo o fluxo e os desvios
+    reachable = [False] * size
+    work = [0]
+    while work:
+        index = work.pop()
+        while index < size and not reachable[index]:
+            reachable[index] = True
+            instr = code[index]
+            op = instr.op
+            if op is goto or op is if_false_goto:
+                target = targets[index]
+                if target is not None:
+                    work.append(label_at[target])
+                    if op is goto or not is_variable(instr.arg1):
+                        break
+            elif op is return_:
+                break
+            index += 1
+
+    # De trás para frente: um desvio é inútil se o destino está entre os
+    # rótulos que vêm antes da próxima instrução que fica (rótulos não
+    # contam: o desvio removido adiante também não)
+    redundant = set()
+    ahead = set()
+    for index in range(size - 1, -1, -1):
+        if not reachable[index]:
+            continue
+        instr = code[index]
+        op = instr.op
+        if op is label:
+            ahead.add(canonical[instr.dest])
+            continue
+        if (op is goto or op is if_false_goto) and (targets[index] is None or targets[index] in ahead):
+            # A condição é só uma variável ou literal: descartá-la não tem efeito
+            redundant.add(index)
+            continue
+        ahead = set()
+
+    # Quantos desvios que ficam chegam a cada rótulo
+    references = dict.fromkeys(label_at, 0)
+    for index, target in targets.items():
+        if reachable[index] and index not in redundant:
+            references[target] += 1
+
+    optimized = []
+    for index, instr in enumerate(code):
+        op = instr.op
+        if not reachable[index] and op is not Op.FUNC_END:
+            stats["labels" if op is label else "unreachable"] += 1
+            continue
+        if op is label:
+            if canonical[instr.dest] != instr.dest or not references[instr.dest]:
+                stats["labels"] += 1
+                continue
+        elif index in redundant:
+            stats["jumps"] += 1
+            continue
+        elif op is goto or op is if_false_goto:
+            target = targets[index]
+            if op is if_false_goto and not is_variable(instr.arg1):
+                instr = IRInstruction(goto, target)
+            elif target != instr.dest:
+                instr = IRInstruction(op, target, instr.arg1, instr.arg2, instr.type)
+        optimized.append(instr)
+    return optimized, stats
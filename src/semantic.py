@@ -17,8 +17,11 @@ class SymbolTable:
     def __init__(self, parent=None):
         self.symbols = {}
         self.parent = parent
+        self.frozen = False
 
     def define(self, name, value):
+        if self.frozen:
+            raise RuntimeError(f"Escopo congelado: não é possível definir '{name}'.")
         if name in self.symbols:
             raise SemanticError(f"Símbolo '{name}' já declarado.")
         self.symbols[name] = value
@@ -31,10 +34,25 @@ class SymbolTable:
         raise SemanticError(f"Símbolo '{name}' não declarado.")
 
 # Analisador semântico principal
+#
+# A análise tem duas fases. Na primeira (``declare_functions``) as assinaturas
+# de todas as funções entram no escopo global, que então é congelado; na
+# segunda (``check_function``) o corpo de cada função é verificado lendo só
+# esse escopo, então uma função pode chamar outra declarada depois dela e os
+# corpos podem ser verificados em qualquer ordem (ou em processos separados,
+# veja ``frontend.py``). ``check`` devolve todos os erros, em ordem de
+# declaração; ``analyze`` levanta o primeiro.
+#
+# Além de validar, resolve cada variável para uma posição (slot) no frame da
+# função: ``Var.slot`` e ``ForStatement.slot`` recebem o índice e
+# ``FunctionDecl.frame_size`` o total de slots. Nos escopos locais a tabela de
+# símbolos guarda o slot da variável. Como só funções são globais, a
+# profundidade é sempre a do frame da função e basta o índice.
 class SemanticAnalyzer:
     def __init__(self):
         self.global_scope = SymbolTable()
         self.current_scope = self.global_scope
+        self.frame_size = 0
 
         # Adiciona funções built-in conhecidas
         self._add_builtins()
@@ -52,17 +70,60 @@ class SemanticAnalyzer:
     def generic_visit(self, node):
         raise SemanticError(f"Semântico não implementado para {type(node).__name__}")
 
-    def visit_Program(self, node: Program):
-        for func in node.functions:
+    def new_slot(self):
+        self.frame_size += 1
+        return self.frame_size - 1
+
+    def declare_functions(self, functions):
+        """Fase 1: define as funções (``FunctionDecl``, com ou sem corpo) no
+        escopo global e o congela. Devolve ``(posição, erro)`` de cada
+        redeclaração."""
+        errors = []
+        for position, func in enumerate(functions):
+            try:
+                self.global_scope.define(func.name, func)
+            except SemanticError as error:
+                errors.append((position, error))
+        self.global_scope.frozen = True
+        return errors
+
+    def check_function(self, func: FunctionDecl):
+        """Fase 2: verifica o corpo de ``func``. Devolve o erro encontrado
+        ou ``None``."""
+        try:
             self.analyze(func)
+        except SemanticError as error:
+            return error
+        finally:
+            self.current_scope = self.global_scope
+        return None
+
+    def check(self, program: Program):
+        """Analisa o programa inteiro e devolve a lista de erros, em ordem
+        de declaração (vazia se não há erros)."""
+        errors = dict(self.declare_functions(program.functions))
+        diagnostics = []
+        for position, func in enumerate(program.functions):
+            if position in errors:
+                diagnostics.append(errors[position])
+            error = self.check_function(func)
+            if error is not None:
+                diagnostics.append(error)
+        return diagnostics
+
+    def visit_Program(self, node: Program):
+        errors = self.check(node)
+        if errors:
+            raise errors[0]
 
     def visit_FunctionDecl(self, node: FunctionDecl):
-        self.global_scope.define(node.name, node)
         prev_scope = self.current_scope
         self.current_scope = SymbolTable(parent=self.global_scope)
+        self.frame_size = 0
         for param in node.params:
-            self.current_scope.define(param, "param")
+            self.current_scope.define(param, self.new_slot())
         self.analyze(node.body)
+        node.frame_size = self.frame_size
         self.current_scope = prev_scope
 
     def visit_Block(self, node: Block):
@@ -76,12 +137,14 @@ class SemanticAnalyzer:
         self.analyze(node.expr)
         if isinstance(node.target, Var):
             if node.target.name not in self.current_scope.symbols:
-                self.current_scope.define(node.target.name, "var")
+                self.current_scope.define(node.target.name, self.new_slot())
+            node.target.slot = self.current_scope.symbols[node.target.name]
         else:
             self.analyze(node.target)
 
     def visit_Var(self, node: Var):
-        self.current_scope.resolve(node.name)
+        symbol = self.current_scope.resolve(node.name)
+        node.slot = symbol if type(symbol) is int else None
 
     def visit_Number(self, node: Number): pass
     def visit_String(self, node: String): pass
@@ -110,7 +173,8 @@ class SemanticAnalyzer:
     def visit_ForStatement(self, node: ForStatement):
         prev_scope = self.current_scope
         self.current_scope = SymbolTable(parent=prev_scope)
-        self.current_scope.define(node.var, "var")
+        node.slot = self.new_slot()
+        self.current_scope.define(node.var, node.slot)
         self.analyze(node.start)
         self.analyze(node.end)
         self.analyze(node.body)
@@ -0,0 +1,1021 @@
+# ssa.py - Forma SSA, propagação de constantes e numeração de valores do IR
+"""
+Otimizações sobre a forma SSA de uma função (veja ``cfg.py``):
+
+- construção: funções phi nas fronteiras de dominância, só para variáveis
+  lidas em algum bloco antes de serem escritas nele (SSA "semi-podada"), e
+  renomeação pela árvore de dominadores. A primeira definição de cada nome
+  mantém o nome original (temporários não mudam); as seguintes viram
+  ``nome_N``;
+- ``sccp``: propagação esparsa de constantes condicional (Wegman e Zadeck).
+  Só percorre arestas que podem ser executadas, então desvios com condição
+  constante somem junto com os blocos que deixam de ser alcançados;
+- ``value_numbering``: numeração global de valores sobre a árvore de
+  dominadores. Uma operação pura igual a outra que a domina vira a anterior
+  e cópias são propagadas; operações que ficam só com literais são dobradas
+  e identidades algébricas (``x * 1``, ``x + 0``, ``x and true``...)
+  simplificadas;
+- ``hoist_invariants``: movimentação de código invariante de laço. Uma
+  operação pura, que não pode falhar, com operandos definidos fora do laço
+  (ou também invariantes) vai para um pré-cabeçalho, executado uma vez antes
+  do laço; é o caso do limite de um ``for``, que o IR recalcula a cada volta;
+- ``reduce_strength``: variáveis de indução. ``k * i`` (``k`` constante,
+  ``i`` somado de um passo constante a cada volta) vira uma variável nova
+  somada de ``k * passo`` a cada volta, e o teste de saída passa para ela se
+  ``i`` só servia para o teste. Multiplicação, resto e divisão por potências
+  de dois viram deslocamento, máscara e multiplicação pelo inverso;
+- ``to_cfg``: sai da forma SSA, trocando cada phi por cópias nos
+  predecessores (arestas críticas são divididas antes).
+
+Constantes e cópias só substituem um nome quando o tipo é o mesmo: no C, uma
+variável ``float`` que recebe ``1`` guarda ``1.0``. Uma dobra só acontece se
+o resultado é o mesmo no C: nada de divisão por zero, deslocamentos fora de
+0..63, inteiros fora de 64 bits ou floats infinitos.
+"""
+
+import math
+import operator
+from collections import defaultdict
+
+from cfg import ControlFlowGraph
+from ir import (BINARY_OPS, OPERAND_FIELDS, PURE_OPS, UNARY_OPS, IRInstruction, Op, can_raise, defines,
+                is_variable, literal_text, string_literal)
+
+FOLD_OPS = {
+    Op.PLUS: operator.add, Op.MINUS: operator.sub, Op.MUL: operator.mul,
+    Op.DIV: operator.truediv, Op.MOD: operator.mod,
+    Op.GT: operator.gt, Op.LT: operator.lt, Op.GE: operator.ge, Op.LE: operator.le,
+    Op.EQ: operator.eq, Op.NE: operator.ne,
+    Op.AND: lambda a, b: a and b, Op.OR: lambda a, b: a or b,
+    Op.AND_BIT: operator.and_, Op.OR_BIT: operator.or_, Op.XOR_BIT: operator.xor,
+    Op.LSHIFT: operator.lshift, Op.RSHIFT: operator.rshift,
+    Op.NEG: operator.neg, Op.NOT: operator.not_, Op.NOT_BIT: operator.invert,
+}
+
+# Operações em que a ordem dos operandos não importa (fora texto)
+COMMUTATIVE_OPS = {Op.PLUS, Op.MUL, Op.EQ, Op.NE, Op.AND_BIT, Op.OR_BIT, Op.XOR_BIT}
+
+INT_MIN = -2 ** 63 + 1
+INT_MAX = 2 ** 63 - 1
+EXACT_FLOAT_INT = 2 ** 53
+
+# Operações que mantêm uma variável de indução afim (``k * p + c``) e
+# comparações com os operandos trocados (multiplicar por ``k < 0`` inverte)
+AFFINE_OPS = {Op.ASSIGN, Op.NEG, Op.PLUS, Op.MINUS, Op.MUL}
+MIRRORED = {Op.LT: Op.GT, Op.GT: Op.LT, Op.LE: Op.GE, Op.GE: Op.LE}
+
+# Reticulado da SCCP: ausente = ainda desconhecido, ``BOTTOM`` = não é
+# constante, ``(tipo, repr, valor)`` = constante
+BOTTOM = object()
+
+
+def value_type(value):
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    return "str"
+
+
+def constant(value):
+    return (value_type(value), repr(value), value)
+
+
+def to_operand(value):
+    """Operando do IR para um valor constante."""
+    return string_literal(value) if isinstance(value, str) else value
+
+
+def operand_value(arg):
+    """Valor de um operando literal."""
+    return literal_text(arg) if isinstance(arg, str) else arg
+
+
+def fold(op: Op, values):
+    """Constante resultante de ``op`` sobre ``values`` ou ``BOTTOM`` se a
+    dobra não é segura (veja o cabeçalho do módulo)."""
+    if op in (Op.DIV, Op.MOD) and values[1] == 0:
+        return BOTTOM
+    if op in (Op.LSHIFT, Op.RSHIFT) and not (isinstance(values[1], int) and 0 <= values[1] < 64):
+        return BOTTOM
+    if any(isinstance(value, float) for value in values) and any(
+            isinstance(value, int) and abs(value) > EXACT_FLOAT_INT for value in values):
+        return BOTTOM
+    try:
+        result = FOLD_OPS[op](*values)
+    except (TypeError, ValueError, ArithmeticError):
+        return BOTTOM
+    if isinstance(result, int) and not isinstance(result, bool) and not INT_MIN <= result <= INT_MAX:
+        return BOTTOM
+    if isinstance(result, float) and not math.isfinite(result):
+        return BOTTOM
+    return constant(result)
+
+
+def is_zero(value) -> bool:
+    return value_type(value) in ("int", "float") and value == 0
+
+
+def is_int_literal(arg) -> bool:
+    return isinstance(arg, int) and not isinstance(arg, bool)
+
+
+def power_of_two(value) -> int:
+    """``n`` se ``value`` é ``2^n`` com ``1 <= n <= 62``; senão 0."""
+    if not is_int_literal(value) or value < 2 or value & (value - 1):
+        return 0
+    return value.bit_length() - 1 if value.bit_length() <= 63 else 0
+
+
+def induction_step(instr, var):
+    """Passo ``c`` se ``instr`` é ``var + c``, ``c + var`` ou ``var - c``
+    com ``c`` inteiro literal."""
+    if instr.type != "int":
+        return None
+    if instr.op is Op.PLUS:
+        if instr.arg1 == var and is_int_literal(instr.arg2):
+            return instr.arg2
+        if instr.arg2 == var and is_int_literal(instr.arg1):
+            return instr.arg1
+    elif instr.op is Op.MINUS and instr.arg1 == var and is_int_literal(instr.arg2):
+        return -instr.arg2
+    return None
+
+
+def identity(op: Op, values, types, result_type, same=False):
+    """Identidade algébrica de ``op`` com operandos não todos constantes:
+    devolve o índice do operando que é o resultado (``x * 1``), uma constante
+    (``x * 0``) ou ``None``. ``values`` traz o valor de cada operando
+    (``None`` se não é literal), ``types`` o tipo de cada um e ``same`` diz se
+    os dois são a mesma variável. Só vale o que é exato também no C: ``x + 0``
+    só para inteiros (``-0.0 + 0`` é ``0.0``) e nada de ``x * 0`` em float."""
+    if op not in BINARY_OPS:
+        return None
+    a, b = values
+    known = [value is not None for value in values]
+    result = None
+    if op is Op.PLUS:
+        if result_type == "int":
+            result = 0 if known[1] and is_zero(b) else 1 if known[0] and is_zero(a) else None
+        elif result_type == "str":
+            result = 0 if known[1] and b == "" else 1 if known[0] and a == "" else None
+    elif op is Op.MINUS:
+        if known[1] and is_zero(b):
+            result = 0
+        elif same and result_type == "int":
+            result = constant(0)
+    elif op is Op.MUL:
+        if known[1] and value_type(b) in ("int", "float") and b == 1:
+            result = 0
+        elif known[0] and value_type(a) in ("int", "float") and a == 1:
+            result = 1
+        elif result_type == "int" and (known[0] and is_zero(a) or known[1] and is_zero(b)):
+            result = constant(0)
+    elif op in (Op.OR_BIT, Op.XOR_BIT, Op.AND_BIT) and result_type == "int":
+        if same:
+            result = constant(0) if op is Op.XOR_BIT else 0
+        elif op is Op.AND_BIT and (known[0] and a == 0 or known[1] and b == 0):
+            result = constant(0)
+        else:
+            neutral = -1 if op is Op.AND_BIT else 0
+            result = 0 if known[1] and b == neutral else 1 if known[0] and a == neutral else None
+    elif op in (Op.LSHIFT, Op.RSHIFT):
+        result = 0 if known[1] and b == 0 and value_type(b) == "int" else None
+    elif op in (Op.AND, Op.OR) and result_type == "bool":
+        # O operando da esquerda decide (falso no ``and``, verdadeiro no
+        # ``or``) ou passa o resultado para o da direita
+        decides = op is Op.OR
+        if known[0]:
+            result = 0 if bool(a) is decides else 1
+        elif known[1]:
+            result = 0 if bool(b) is not decides else constant(decides)
+        elif same:
+            result = 0
+    elif same and types[0] in ("int", "bool", "str") and op in (Op.EQ, Op.NE, Op.GE, Op.LE, Op.GT, Op.LT):
+        result = constant(op in (Op.EQ, Op.GE, Op.LE))
+    if isinstance(result, int) and types[result] != result_type:
+        return None
+    if isinstance(result, tuple) and result[0] != result_type:
+        return None
+    return result
+
+
+class Phi:
+    """``dest = phi(args)``: ``args`` leva cada predecessor ao operando que
+    chega por ele (``None`` se a variável não está definida nesse caminho)."""
+    __slots__ = ("dest", "var", "type", "args")
+
+    def __init__(self, var: str, type):
+        self.dest = var
+        self.var = var
+        self.type = type
+        self.args = {}
+
+    def __repr__(self):
+        return f"{self.dest} = phi({', '.join(f'{block!r}: {arg}' for block, arg in self.args.items())})"
+
+
+class SSAFunction:
+    """Uma função em forma SSA. As instruções dos blocos são cópias, então o
+    IR de entrada não é alterado."""
+
+    def __init__(self, graph: ControlFlowGraph):
+        self.graph = graph
+        self.phis = defaultdict(list)
+        # Tipo de cada nome SSA e nomes com definição (parâmetros incluídos)
+        self.types = {}
+        self.defined = set()
+        self._build()
+
+    # -------------------------
+    # Construção
+    # -------------------------
+    def _build(self):
+        graph = self.graph
+        reachable = graph.reachable()
+        for block in graph.blocks:
+            if block not in reachable:
+                graph.set_successors(block, [])
+                block.instructions = []
+            else:
+                block.instructions = [IRInstruction(instr.op, instr.dest, instr.arg1, instr.arg2, instr.type)
+                                      for instr in block.instructions]
+        blocks = graph.reverse_postorder()
+        entry = blocks[0]
+
+        params = self.params = [instr.dest for instr in graph.header if instr.op is Op.PARAM]
+        var_types = {instr.dest: instr.type for instr in graph.header if instr.op is Op.PARAM}
+        def_blocks = defaultdict(set)
+        for param in params:
+            def_blocks[param].add(entry)
+        names = set(params)
+        global_names = set()
+        for block in blocks:
+            written = set()
+            for instr in block.instructions:
+                for field in OPERAND_FIELDS[instr.op]:
+                    arg = getattr(instr, field)
+                    if is_variable(arg) and arg not in written:
+                        global_names.add(arg)
+                if defines(instr):
+                    written.add(instr.dest)
+                    def_blocks[instr.dest].add(block)
+                    names.add(instr.dest)
+                    if var_types.get(instr.dest) is None:
+                        var_types[instr.dest] = instr.type
+            if is_variable(block.condition) and block.condition not in written:
+                global_names.add(block.condition)
+
+        frontiers = graph.dominance_frontiers()
+        # Ordem fixa (nomes e índices dos blocos): o código gerado não pode
+        # depender da ordem de iteração de conjuntos
+        by_index = lambda block: block.index
+        for var in sorted(global_names & def_blocks.keys()):
+            has_phi = set()
+            pending = sorted(def_blocks[var], key=by_index, reverse=True)
+            while pending:
+                block = pending.pop()
+                for target in sorted(frontiers[block], key=by_index):
+                    if target not in has_phi:
+                        has_phi.add(target)
+                        self.phis[target].append(Phi(var, var_types.get(var)))
+                        if target not in def_blocks[var]:
+                            pending.append(target)
+
+        self._rename(entry, params, var_types, names)
+
+    def _rename(self, entry, params, var_types, names):
+        stacks = defaultdict(list)
+        versions = {}
+        taken = set(names)
+
+        def new_name(var, type):
+            count = versions.get(var, 0)
+            name = var
+            while count > 0 and name in taken:
+                name = f"{var}_{count}"
+                count += 1
+            versions[var] = max(count, 1)
+            taken.add(name)
+            self.types[name] = type
+            self.defined.add(name)
+            stacks[var].append(name)
+            return name
+
+        for param in params:
+            new_name(param, var_types.get(param))
+
+        def current(arg):
+            stack = stacks.get(arg)
+            return stack[-1] if stack else arg
+
+        work = [(entry, None)]
+        while work:
+            block, pushed = work.pop()
+            if pushed is not None:
+                for var in pushed:
+                    stacks[var].pop()
+                continue
+            pushed = []
+            for phi in self.phis[block]:
+                phi.dest = new_name(phi.var, phi.type)
+                pushed.append(phi.var)
+            for instr in block.instructions:
+                for field in OPERAND_FIELDS[instr.op]:
+                    arg = getattr(instr, field)
+                    if is_variable(arg):
+                        setattr(instr, field, current(arg))
+                if defines(instr):
+                    var = instr.dest
+                    instr.dest = new_name(var, instr.type)
+                    pushed.append(var)
+            if is_variable(block.condition):
+                block.condition = current(block.condition)
+            for succ in block.successors:
+                for phi in self.phis[succ]:
+                    stack = stacks.get(phi.var)
+                    phi.args[block] = stack[-1] if stack else None
+            work.append((block, pushed))
+            work.extend((child, None) for child in reversed(block.dominated))
+
+    # -------------------------
+    # Utilitários
+    # -------------------------
+    def operand_type(self, arg):
+        return self.types.get(arg) if is_variable(arg) else value_type(operand_value(arg))
+
+    def uses(self):
+        """Usos de cada nome: ``(bloco, phi ou instrução ou None)``, onde
+        ``None`` é a condição do desvio do bloco."""
+        uses = defaultdict(list)
+        for block in self.graph.reverse_postorder():
+            for phi in self.phis[block]:
+                for arg in phi.args.values():
+                    if arg is not None and is_variable(arg):
+                        uses[arg].append((block, phi))
+            for instr in block.instructions:
+                for field in OPERAND_FIELDS[instr.op]:
+                    arg = getattr(instr, field)
+                    if is_variable(arg):
+                        uses[arg].append((block, instr))
+            if is_variable(block.condition):
+                uses[block.condition].append((block, None))
+        return uses
+
+    def drop_edge(self, block, succ):
+        """Remove ``block`` dos argumentos das phis de ``succ``."""
+        for phi in self.phis[succ]:
+            phi.args.pop(block, None)
+
+    # -------------------------
+    # SCCP
+    # -------------------------
+    def sccp(self) -> dict:
+        """Propagação esparsa de constantes condicional. Devolve quantas
+        definições viraram constantes e quantos desvios foram resolvidos."""
+        graph = self.graph
+        # Parâmetros chegam de fora: nunca são constantes
+        values = dict.fromkeys(self.params, BOTTOM)
+        uses = self.uses()
+        executable = set()
+        edges = set()
+        flow = [(None, graph.reverse_postorder()[0])]
+        changed = []
+
+        def lattice(arg):
+            if is_variable(arg):
+                return values.get(arg) if arg in self.defined else BOTTOM
+            return constant(operand_value(arg))
+
+        def update(name, new):
+            old = values.get(name)
+            if new is None or old is BOTTOM or (old is not None and new is not BOTTOM and old[:2] == new[:2]):
+                return
+            values[name] = new if old is None else BOTTOM
+            changed.append(name)
+
+        def visit_phi(block, phi):
+            result = None
+            for pred, arg in phi.args.items():
+                if arg is None or (pred, block) not in edges:
+                    continue
+                value = lattice(arg)
+                if value is None:
+                    continue
+                if value is BOTTOM or (result is not None and result[:2] != value[:2]):
+                    result = BOTTOM
+                    break
+                result = value
+            update(phi.dest, result)
+
+        def visit_instr(instr):
+            if not defines(instr):
+                return
+            op = instr.op
+            if op is Op.ASSIGN:
+                update(instr.dest, lattice(instr.arg1))
+            elif op in BINARY_OPS or op in UNARY_OPS:
+                operands = [lattice(getattr(instr, field)) for field in OPERAND_FIELDS[op]]
+                if any(value is BOTTOM for value in operands):
+                    update(instr.dest, BOTTOM)
+                elif all(value is not None for value in operands):
+                    update(instr.dest, fold(op, [value[2] for value in operands]))
+            else:
+                update(instr.dest, BOTTOM)
+
+        def visit_branch(block):
+            if block.condition is None:
+                flow.extend((block, succ) for succ in block.successors)
+                return
+            value = lattice(block.condition)
+            if value is BOTTOM:
+                flow.extend((block, succ) for succ in block.successors)
+            elif value is not None:
+                flow.append((block, block.successors[0 if value[2] else 1]))
+
+        while flow or changed:
+            while flow:
+                edge = flow.pop()
+                if edge in edges:
+                    continue
+                edges.add(edge)
+                block = edge[1]
+                for phi in self.phis[block]:
+                    visit_phi(block, phi)
+                if block not in executable:
+                    executable.add(block)
+                    for instr in block.instructions:
+                        visit_instr(instr)
+                    visit_branch(block)
+            while changed:
+                for block, item in uses[changed.pop()]:
+                    if block not in executable:
+                        continue
+                    if item is None:
+                        visit_branch(block)
+                    elif isinstance(item, Phi):
+                        visit_phi(block, item)
+                    else:
+                        visit_instr(item)
+
+        return self._apply_constants(values, executable, edges)
+
+    def _apply_constants(self, values, executable, edges):
+        graph = self.graph
+        known = {}
+        for name, value in values.items():
+            if value is not BOTTOM and value[0] == self.types.get(name):
+                known[name] = to_operand(value[2])
+        stats = {"constants": 0, "branches": 0}
+
+        for block in graph.reverse_postorder():
+            if block not in executable:
+                for succ in block.successors:
+                    self.drop_edge(block, succ)
+                graph.set_successors(block, [])
+                block.instructions = []
+                self.phis.pop(block, None)
+                continue
+            if block.condition is not None:
+                taken = [succ for succ in block.successors if (block, succ) in edges]
+                if len(taken) == 1:
+                    for succ in block.successors:
+                        if succ is not taken[0]:
+                            self.drop_edge(block, succ)
+                    graph.set_successors(block, taken)
+                    stats["branches"] += 1
+                elif block.condition in known:
+                    block.condition = known[block.condition]
+
+        for block in graph.reverse_postorder():
+            phis = []
+            for phi in self.phis[block]:
+                if phi.dest in known:
+                    stats["constants"] += 1
+                    continue
+                phi.args = {pred: known.get(arg, arg) if is_variable(arg) else arg
+                            for pred, arg in phi.args.items() if (pred, block) in edges}
+                phis.append(phi)
+            self.phis[block] = phis
+            instructions = []
+            for instr in block.instructions:
+                if instr.op in PURE_OPS and instr.dest in known:
+                    stats["constants"] += 1
+                    continue
+                for field in OPERAND_FIELDS[instr.op]:
+                    arg = getattr(instr, field)
+                    if is_variable(arg) and arg in known:
+                        setattr(instr, field, known[arg])
+                instructions.append(instr)
+            block.instructions = instructions
+        return stats
+
+    # -------------------------
+    # Numeração global de valores
+    # -------------------------
+    def value_numbering(self) -> dict:
+        """Elimina operações puras redundantes e propaga cópias, percorrendo a
+        árvore de dominadores com uma tabela de expressões por escopo.
+        Devolve quantas instruções e phis foram removidas ou simplificadas."""
+        graph = self.graph
+        graph.dominators()
+        replace = {}
+        stats = {"redundant": 0, "copies": 0, "phis": 0, "simplified": 0}
+
+        def resolve(arg):
+            while is_variable(arg) and arg in replace:
+                arg = replace[arg]
+            return arg
+
+        def key(arg):
+            return arg if is_variable(arg) else (value_type(operand_value(arg)), repr(arg))
+
+        self._simplify_phis(replace, resolve, stats)
+        table = {}
+        work = [(graph.reverse_postorder()[0], None)]
+        while work:
+            block, added = work.pop()
+            if added is not None:
+                for expression in added:
+                    del table[expression]
+                continue
+            added = []
+            instructions = []
+            for instr in block.instructions:
+                op = instr.op
+                for field in OPERAND_FIELDS[op]:
+                    arg = getattr(instr, field)
+                    if is_variable(arg):
+                        setattr(instr, field, resolve(arg))
+                if op is Op.ASSIGN and self.types.get(instr.dest) is not None \
+                        and self.operand_type(instr.arg1) == self.types[instr.dest]:
+                    replace[instr.dest] = instr.arg1
+                    stats["copies"] += 1
+                    continue
+                if op in BINARY_OPS or op in UNARY_OPS:
+                    simple = self._simplify(instr)
+                    if simple is not None:
+                        replace[instr.dest] = simple
+                        stats["simplified"] += 1
+                        continue
+                    operands = tuple(key(getattr(instr, field)) for field in OPERAND_FIELDS[op])
+                    if op in COMMUTATIVE_OPS and instr.type != "str":
+                        operands = tuple(sorted(operands, key=repr))
+                    expression = (op, operands)
+                    leader = table.get(expression)
+                    if leader is not None:
+                        replace[instr.dest] = leader
+                        stats["redundant"] += 1
+                        continue
+                    table[expression] = instr.dest
+                    added.append(expression)
+                instructions.append(instr)
+            block.instructions = instructions
+            if is_variable(block.condition):
+                block.condition = resolve(block.condition)
+            work.append((block, added))
+            work.extend((child, None) for child in reversed(block.dominated))
+
+        self._simplify_phis(replace, resolve, stats)
+        return stats
+
+    def _simplify(self, instr):
+        """Operando equivalente à operação ``instr``: a constante, se todos
+        os operandos são literais (como ficam depois da propagação de
+        cópias), ou o resultado de uma identidade algébrica; senão ``None``."""
+        args = [getattr(instr, field) for field in OPERAND_FIELDS[instr.op]]
+        values = [None if is_variable(arg) else operand_value(arg) for arg in args]
+        result_type = self.types.get(instr.dest)
+        if all(value is not None for value in values):
+            result = fold(instr.op, values)
+        else:
+            types = [self.operand_type(arg) for arg in args]
+            result = identity(instr.op, values, types, result_type, len(args) == 2 and args[0] == args[1])
+        if result is None or result is BOTTOM:
+            return None
+        if isinstance(result, tuple):
+            return to_operand(result[2]) if result[0] == result_type else None
+        return args[result]
+
+    def _simplify_phis(self, replace, resolve, stats):
+        """Troca por seu valor as phis cujos argumentos (fora a própria phi)
+        são todos o mesmo operando."""
+        changed = True
+        while changed:
+            changed = False
+            for block in self.graph.reverse_postorder():
+                phis = []
+                for phi in self.phis[block]:
+                    args = {pred: resolve(arg) if arg is not None else None for pred, arg in phi.args.items()}
+                    phi.args = args
+                    distinct = {key for key in ((value_type(arg), repr(arg)) if not is_variable(arg) else arg
+                                                for arg in args.values() if arg is not None)
+                                if key != phi.dest}
+                    if len(distinct) == 1:
+                        value = next(arg for arg in args.values() if arg is not None and arg != phi.dest)
+                        if self.operand_type(value) == phi.type:
+                            replace[phi.dest] = value
+                            stats["phis"] += 1
+                            changed = True
+                            continue
+                    phis.append(phi)
+                self.phis[block] = phis
+        for block in self.graph.reverse_postorder():
+            for instr in block.instructions:
+                for field in OPERAND_FIELDS[instr.op]:
+                    arg = getattr(instr, field)
+                    if is_variable(arg):
+                        setattr(instr, field, resolve(arg))
+            if is_variable(block.condition):
+                block.condition = resolve(block.condition)
+
+    # -------------------------
+    # Código invariante de laço
+    # -------------------------
+    def hoist_invariants(self) -> dict:
+        """Move as operações invariantes de cada laço para o seu
+        pré-cabeçalho, dos laços internos para os externos (o que sai de um
+        laço interno ainda pode sair do externo). Devolve quantas saíram."""
+        graph = self.graph
+        graph.dominators()
+        loops = graph.loops()
+        stats = {"hoisted": 0}
+        for loop in sorted(loops, key=lambda loop: -loop.depth):
+            defined = set()
+            for block in loop.blocks:
+                defined.update(phi.dest for phi in self.phis[block])
+                defined.update(instr.dest for instr in block.instructions if defines(instr))
+            hoisted = []
+            # Em pós-ordem reversa a definição de um nome vem antes dos usos
+            for block in graph.reverse_postorder():
+                if block not in loop.blocks:
+                    continue
+                kept = []
+                for instr in block.instructions:
+                    if instr.op in PURE_OPS and not can_raise(instr) and not any(
+                            getattr(instr, field) in defined for field in OPERAND_FIELDS[instr.op]):
+                        defined.discard(instr.dest)
+                        hoisted.append(instr)
+                    else:
+                        kept.append(instr)
+                block.instructions = kept
+            if hoisted:
+                self._preheader(loop).instructions.extend(hoisted)
+                stats["hoisted"] += len(hoisted)
+        return stats
+
+    def _preheader(self, loop):
+        """Pré-cabeçalho de ``loop``: o único predecessor de fora, se ele só
+        leva ao cabeçalho; senão um bloco novo, com as phis do cabeçalho
+        divididas entre os dois."""
+        header = loop.header
+        outside = [pred for pred in header.predecessors if pred not in loop.blocks]
+        if len(outside) == 1 and len(outside[0].successors) == 1:
+            return outside[0]
+        block = self.graph.insert_preheader(loop)
+        for phi in self.phis[header]:
+            incoming = {pred: phi.args.pop(pred) for pred in outside if pred in phi.args}
+            values = {arg for arg in incoming.values() if arg is not None}
+            if len(values) == 1 and None not in incoming.values():
+                phi.args[block] = values.pop()
+            elif incoming:
+                entry = Phi(phi.var, phi.type)
+                entry.dest = self._fresh_name(phi.var, phi.type)
+                entry.args = incoming
+                self.phis[block].append(entry)
+                phi.args[block] = entry.dest
+        return block
+
+    def _fresh_name(self, var, type):
+        count = 1
+        while f"{var}_{count}" in self.types:
+            count += 1
+        name = f"{var}_{count}"
+        self.types[name] = type
+        self.defined.add(name)
+        return name
+
+    # -------------------------
+    # Variáveis de indução e redução de força
+    # -------------------------
+    def reduce_strength(self) -> dict:
+        """Redução de força, dos laços internos para os externos: cada
+        multiplicação de uma variável de indução por uma constante vira uma
+        variável nova, somada a cada volta; o teste de saída passa para ela
+        quando a variável original só serve para o teste (e então morre).
+        Depois, em toda a função, multiplicação, resto e divisão por
+        potências de dois viram deslocamento, máscara e multiplicação pelo
+        inverso. Devolve quantas variáveis, testes e operações mudaram."""
+        graph = self.graph
+        stats = {"induction": 0, "exit_tests": 0, "power_of_two": 0}
+        for loop in sorted(graph.loops(), key=lambda loop: -loop.depth):
+            self._reduce_loop(loop, stats)
+        for block in graph.reverse_postorder():
+            block.instructions = [self._power_of_two(instr, stats) for instr in block.instructions]
+        return stats
+
+    def _reduce_loop(self, loop, stats):
+        graph = self.graph
+        header = loop.header
+        defined = set()
+        for block in loop.blocks:
+            defined.update(phi.dest for phi in self.phis[block])
+            defined.update(instr.dest for instr in block.instructions if defines(instr))
+
+        def invariant(arg):
+            return not is_variable(arg) or arg not in defined
+
+        # Variáveis de indução básicas: ``p = phi(início, q)`` no cabeçalho
+        # com ``q = p + c`` (``c`` inteiro literal) num bloco que domina as
+        # voltas
+        inductions = {}
+        increments = {}
+        for block in loop.blocks:
+            for instr in block.instructions:
+                if instr.op in (Op.PLUS, Op.MINUS) and defines(instr):
+                    increments[instr.dest] = (block, instr)
+        for phi in self.phis[header]:
+            inside = {arg for pred, arg in phi.args.items() if pred in loop.blocks}
+            if self.types.get(phi.dest) != "int" or len(inside) != 1:
+                continue
+            found = increments.get(inside.pop())
+            if found is None:
+                continue
+            block, instr = found
+            step = induction_step(instr, phi.dest)
+            if step is not None and all(graph.dominates(block, latch) for latch in loop.latches):
+                inductions[phi.dest] = (phi, step, block, instr)
+        if not inductions:
+            return
+
+        # Derivadas ``k * p + invariante``: nome -> (p, k, tem multiplicação)
+        # e a operação que o define, na pós-ordem reversa (definições antes
+        # dos usos)
+        affine = {p: (p, 1, False) for p in inductions}
+        forms = {}
+        derived = []
+        for block in graph.reverse_postorder():
+            if block not in loop.blocks:
+                continue
+            for instr in block.instructions:
+                form = self._affine(instr, affine, invariant)
+                if form is None:
+                    continue
+                affine[instr.dest] = form
+                forms[instr.dest] = (instr.op, instr.arg1, instr.arg2)
+                if form[2] and instr.op is not Op.ASSIGN:
+                    derived.append(instr)
+        if not derived:
+            return
+        # Só vira variável nova a expressão que tem algum uso fora de outra
+        # derivada (``i * 12 + i * 4`` é uma variável, não duas)
+        uses = self.uses()
+        absorbed = {id(instr) for instr in derived}
+        candidates = [instr for instr in derived
+                      if any(not isinstance(item, IRInstruction) or id(item) not in absorbed
+                             for _, item in uses[instr.dest])]
+        if not candidates:
+            return
+
+        preheader = self._preheader(loop)
+        clones = defaultdict(dict)
+
+        def value_at(name, p, start):
+            """Operando com o valor de ``name`` quando ``p`` vale ``start``,
+            calculado no fim do pré-cabeçalho."""
+            if name == p:
+                return start
+            if not is_variable(name) or name not in forms:
+                return name
+            computed = clones[p, start]
+            if name not in computed:
+                op, arg1, arg2 = forms[name]
+                operands = [value_at(arg, p, start) for arg in (arg1, arg2) if arg is not None]
+                values = [None if is_variable(arg) else operand_value(arg) for arg in operands]
+                result = None
+                if op is Op.ASSIGN:
+                    result = 0
+                elif None not in values:
+                    result = fold(op, values)
+                elif len(operands) == 2:
+                    result = identity(op, values, ["int", "int"], "int")
+                if isinstance(result, int):
+                    computed[name] = operands[result]
+                elif result is not None and result is not BOTTOM and result[0] == "int":
+                    computed[name] = to_operand(result[2])
+                else:
+                    computed[name] = self._fresh_name(name, "int")
+                    preheader.instructions.append(IRInstruction(op, computed[name], *operands, type="int"))
+            return computed[name]
+
+        reduced = defaultdict(list)
+        rename = {}
+        for instr in candidates:
+            p, scale, _ = affine[instr.dest]
+            phi, step, block, increment = inductions[p]
+            start = phi.args.get(preheader)
+            if start is None or self.operand_type(start) != "int" or not INT_MIN <= scale * step <= INT_MAX:
+                continue
+            initial = value_at(instr.dest, p, start)
+            current = Phi(instr.dest, "int")
+            current.dest = self._fresh_name(instr.dest, "int")
+            following = self._fresh_name(instr.dest, "int")
+            current.args = {pred: initial if pred is preheader else following for pred in header.predecessors}
+            self.phis[header].append(current)
+            block.instructions.insert(block.instructions.index(increment) + 1,
+                                      IRInstruction(Op.PLUS, following, current.dest, scale * step, "int"))
+            # Dentro do laço os usos passam para a variável nova; a cópia
+            # fica para os usos depois do laço (ou sai como código morto)
+            rename[instr.dest] = current.dest
+            instr.op, instr.arg1, instr.arg2 = Op.ASSIGN, current.dest, None
+            reduced[p].append((instr.dest, scale, current.dest))
+            stats["induction"] += 1
+        if not rename:
+            return
+        for block in loop.blocks:
+            for instr in block.instructions:
+                for field in OPERAND_FIELDS[instr.op]:
+                    arg = getattr(instr, field)
+                    if arg in rename:
+                        setattr(instr, field, rename[arg])
+            if block.condition in rename:
+                block.condition = rename[block.condition]
+            for phi in self.phis[block]:
+                for pred, arg in phi.args.items():
+                    if pred in loop.blocks and arg in rename:
+                        phi.args[pred] = rename[arg]
+
+        # Troca do teste de saída: ``p <= e`` vira ``s <= k * e + ...`` se
+        # ``p`` só é usado pelo teste e pelo incremento
+        uses = self.uses()
+        for p, variables in reduced.items():
+            phi, step, block, increment = inductions[p]
+            tests = [(block, item) for block, item in uses[p] if item is not increment]
+            if len(tests) != 1 or tests[0][0] not in loop.blocks or not isinstance(tests[0][1], IRInstruction) \
+                    or any(item is not phi for _, item in uses[increment.dest]):
+                continue
+            test = tests[0][1]
+            if test.op not in MIRRORED or (test.arg1 == p) == (test.arg2 == p):
+                continue
+            bound = test.arg2 if test.arg1 == p else test.arg1
+            if not invariant(bound) or self.operand_type(bound) != "int":
+                continue
+            name, scale, variable = next(((name, scale, variable) for name, scale, variable in variables
+                                          if scale), (None, 0, None))
+            if not scale:
+                continue
+            limit = value_at(name, p, bound)
+            if test.arg1 == p:
+                test.arg1, test.arg2 = variable, limit
+            else:
+                test.arg1, test.arg2 = limit, variable
+            if scale < 0:
+                test.op = MIRRORED[test.op]
+            stats["exit_tests"] += 1
+
+    def _affine(self, instr, affine, invariant):
+        """``(p, k, m)`` se ``instr`` calcula ``k * p`` mais um invariante
+        inteiro, com ``p`` uma variável de indução básica; ``m`` diz se há
+        multiplicação no cálculo."""
+        if instr.type != "int" or not defines(instr) or instr.op not in AFFINE_OPS:
+            return None
+        arg1, arg2 = instr.arg1, instr.arg2
+        if any(arg is not None and self.operand_type(arg) != "int" for arg in (arg1, arg2)):
+            return None
+        left, right = affine.get(arg1), affine.get(arg2)
+        op = instr.op
+        if op is Op.ASSIGN:
+            return left
+        if op is Op.NEG:
+            return None if left is None else (left[0], -left[1], left[2])
+        if left is not None and right is not None:
+            if op is Op.MUL or left[0] != right[0]:
+                return None
+            scale = left[1] + right[1] if op is Op.PLUS else left[1] - right[1]
+            return left[0], scale, left[2] or right[2]
+        if op is Op.MUL:
+            if left is not None and is_int_literal(arg2):
+                return left[0], left[1] * arg2, True
+            if right is not None and is_int_literal(arg1):
+                return right[0], right[1] * arg1, True
+            return None
+        if left is not None and invariant(arg2):
+            return left
+        if right is not None and invariant(arg1):
+            return right if op is Op.PLUS else (right[0], -right[1], right[2])
+        return None
+
+    def _power_of_two(self, instr, stats):
+        """``x * 2^n`` vira ``x << n`` e ``x % 2^n`` vira ``x & (2^n - 1)``
+        (inteiros; o resto já é o do Python, não negativo), ``x / 2^n`` vira
+        ``x * 2^-n`` (exato em ponto flutuante)."""
+        op = instr.op
+        if op is Op.MUL and instr.type == "int":
+            arg1, arg2 = instr.arg1, instr.arg2
+            if is_int_literal(arg1):
+                arg1, arg2 = arg2, arg1
+            if is_int_literal(arg2) and self.operand_type(arg1) == "int" and power_of_two(arg2):
+                stats["power_of_two"] += 1
+                return IRInstruction(Op.LSHIFT, instr.dest, arg1, power_of_two(arg2), "int")
+        elif op is Op.MOD and instr.type == "int" and is_int_literal(instr.arg2) and power_of_two(instr.arg2) \
+                and self.operand_type(instr.arg1) == "int":
+            stats["power_of_two"] += 1
+            return IRInstruction(Op.AND_BIT, instr.dest, instr.arg1, instr.arg2 - 1, "int")
+        elif op is Op.DIV and is_int_literal(instr.arg2) and power_of_two(instr.arg2) \
+                and self.operand_type(instr.arg1) in ("int", "float"):
+            stats["power_of_two"] += 1
+            return IRInstruction(Op.MUL, instr.dest, instr.arg1, 1 / instr.arg2, instr.type)
+        return instr
+
+    # -------------------------
+    # Saída da forma SSA
+    # -------------------------
+    def to_cfg(self) -> ControlFlowGraph:
+        """Troca as phis por cópias no fim dos predecessores (dividindo as
+        arestas críticas) e devolve o CFG, pronto para ``linearize``. Uma
+        cópia logo depois da definição do seu único uso é juntada a ela:
+        ``i_2 = i_1 + 1; i_1 = i_2`` volta a ser ``i_1 = i_1 + 1``."""
+        graph = self.graph
+        taken = set(self.types)
+        for block in list(graph.reverse_postorder()):
+            phis = self.phis.get(block)
+            if not phis:
+                continue
+            for pred in list(block.predecessors):
+                source = pred
+                if len(pred.successors) > 1:
+                    source = graph.split_edge(pred, block)
+                copies = [(phi.dest, phi.args.get(pred), phi.type) for phi in phis]
+                source.instructions.extend(self._sequentialize(
+                    [(dest, arg, t) for dest, arg, t in copies if arg is not None and arg != dest], taken))
+            self.phis[block] = []
+        self._fold_copies()
+        return graph
+
+    def _fold_copies(self):
+        """Junta cada cópia ``d = y`` à definição de ``y`` no mesmo bloco
+        quando ``y`` só é usado pela cópia e ``d`` não é lido nem escrito
+        entre as duas (as cópias das phis vêm depois de outros incrementos)."""
+        uses = self.uses()
+        for block in self.graph.reverse_postorder():
+            code = []
+            defined_at = {}
+            for instr in block.instructions:
+                position = defined_at.get(instr.arg1) if instr.op is Op.ASSIGN else None
+                if position is not None and len(uses[instr.arg1]) == 1:
+                    previous = code[position]
+                    dest = instr.dest
+                    if previous.op in PURE_OPS and self.types.get(previous.dest) == self.types.get(dest) and \
+                            not any(other.dest == dest or any(getattr(other, field) == dest
+                                                              for field in OPERAND_FIELDS[other.op])
+                                    for other in code[position + 1:]):
+                        del defined_at[previous.dest]
+                        previous.dest = dest
+                        defined_at[dest] = position
+                        continue
+                if defines(instr):
+                    defined_at[instr.dest] = len(code)
+                code.append(instr)
+            block.instructions = code
+
+    @staticmethod
+    def _sequentialize(copies, taken):
+        """Cópias paralelas ``dest = origem`` em sequência: uma cópia sai
+        quando nenhuma outra ainda lê seu destino; num ciclo, o destino é
+        salvo num temporário antes."""
+        code = []
+        pending = list(copies)
+        while pending:
+            sources = {arg for _, arg, _ in pending if is_variable(arg)}
+            for position, (dest, arg, t) in enumerate(pending):
+                if dest not in sources:
+                    code.append(IRInstruction(Op.ASSIGN, dest=dest, arg1=arg, type=t))
+                    del pending[position]
+                    break
+            else:
+                dest, _, t = pending[0]
+                count = 1
+                while f"{dest}_tmp{count}" in taken:
+                    count += 1
+                temp = f"{dest}_tmp{count}"
+                taken.add(temp)
+                code.append(IRInstruction(Op.ASSIGN, dest=temp, arg1=dest, type=t))
+                pending = [(d, temp if arg == dest else arg, tt) for d, arg, tt in pending]
+        return code
+
+
+def optimize_ssa(graph: ControlFlowGraph, global_value_numbering=True) -> dict:
+    """SSA + SCCP + numeração de valores + código invariante de laço +
+    redução de força sobre o CFG de uma função, que sai da forma SSA pronto
+    para ``linearize``. ``global_value_numbering=False`` pula a numeração de
+    valores. Devolve as estatísticas das passadas."""
+    ssa = SSAFunction(graph)
+    stats = ssa.sccp()
+    if global_value_numbering:
+        stats.update(ssa.value_numbering())
+    stats.update(ssa.hoist_invariants())
+    stats.update(ssa.reduce_strength())
+    ssa.to_cfg()
+    return stats
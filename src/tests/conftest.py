@@ -0,0 +1,96 @@
+# conftest.py - Utilitários comuns aos testes do compilador Cirius
+"""
+Os testes importam os módulos de ``src`` diretamente (como o ``main.py``
+faz), então o diretório entra no ``sys.path`` aqui. As fixtures devolvem a
+saída de um programa pelo comando ``run`` (``run_output``), pelo
+interpretador da AST (``ast_output``) e pelo executável gerado a partir do C
+(``c_output``); ``inputs`` são as linhas lidas por ``input()``.
+"""
+
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC = Path(__file__).resolve().parent.parent
+TESTS = Path(__file__).resolve().parent
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+import main  # noqa: E402
+from cirius_ast import Node  # noqa: E402
+from interpreter import Interpreter  # noqa: E402
+
+# Programas de exemplo do repositório e as entradas que leem
+EXAMPLES = {"hello.cir": (), "loop.cir": (), "cond.cir": ("42",), "calls.cir": ()}
+
+
+def example(name: str) -> str:
+    return (TESTS / name).read_text(encoding="utf-8")
+
+
+def shape(value):
+    """Estrutura comparável de uma AST (nós viram tuplas com os campos)."""
+    if isinstance(value, Node):
+        return (type(value).__name__,) + tuple(shape(getattr(value, field)) for field in value.__slots__)
+    if isinstance(value, (list, tuple)):
+        return tuple(shape(item) for item in value)
+    # ``True == 1``: o tipo do literal também tem que ser o mesmo
+    return type(value).__name__, value
+
+
+def feed(monkeypatch, inputs):
+    lines = iter(inputs)
+    monkeypatch.setattr("builtins.input", lambda *_: next(lines))
+
+
+@pytest.fixture
+def run_output(capsys, monkeypatch):
+    """``run_output(fonte, entradas)``: saída do comando ``run``."""
+    def run(source, inputs=(), **options):
+        feed(monkeypatch, inputs)
+        capsys.readouterr()
+        main.run_pipeline(source, **options)
+        return capsys.readouterr().out
+    return run
+
+
+@pytest.fixture
+def ast_output(capsys, monkeypatch):
+    """``ast_output(fonte, entradas, specialize)``: saída do interpretador da
+    AST, com ou sem os operadores especializados pelos tipos."""
+    def run(source, inputs=(), specialize=True):
+        feed(monkeypatch, inputs)
+        ast = main.analyze_source(main.lex_source(source))
+        conflicts = main.check_types(ast)
+        capsys.readouterr()
+        Interpreter(specialize=specialize and not conflicts).interpret(ast)
+        return capsys.readouterr().out
+    return run
+
+
+@pytest.fixture
+def c_output(capsys, tmp_path):
+    """``c_output(fonte, entradas)``: saída do executável compilado com gcc a
+    partir do C gerado, ou ``None`` se o ``compile`` recusou o programa."""
+    if shutil.which("gcc") is None:
+        pytest.skip("gcc não encontrado")
+
+    def compile_and_run(source, inputs=(), **options):
+        c_path = tmp_path / "out.c"
+        exe_path = tmp_path / "out"
+        c_path.unlink(missing_ok=True)
+        main.compile_pipeline(source, str(c_path), **options)
+        capsys.readouterr()
+        if not c_path.exists():
+            return None
+        # O comando de build do README: -lm só para ``%`` entre floats
+        command = ["gcc", "-w", "-o", str(exe_path), str(c_path)]
+        if "cirius_fmod(" in c_path.read_text(encoding="utf-8"):
+            command.append("-lm")
+        subprocess.run(command, check=True)
+        stdin = "".join(line + "\n" for line in inputs)
+        return subprocess.run([str(exe_path)], input=stdin, capture_output=True, text=True, check=True).stdout
+    return compile_and_run
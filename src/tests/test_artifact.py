@@ -0,0 +1,71 @@
+# test_artifact.py - Formato binário de AST e IR: ida e volta
+import json
+
+import pytest
+from conftest import EXAMPLES, example, shape
+
+import main
+from artifact import ArtifactError, decode_artifact, encode_program, load_artifact
+from ir import IR_FIELDS, IRGenerator, ir_to_dicts
+
+
+def program(name):
+    return main.analyze_source(main.lex_source(example(name)))
+
+
+def typed(ir_code):
+    """IR comparável: ``True == 1``, então o tipo de cada campo também conta."""
+    return [[(field, type(getattr(instr, field)).__name__, getattr(instr, field)) for field in IR_FIELDS]
+            for instr in ir_code]
+
+
+@pytest.mark.parametrize("name", sorted(EXAMPLES))
+def test_program_round_trip(name, tmp_path):
+    ast = program(name)
+    path = tmp_path / "ast.cirb"
+    main.emit_artifact(ast, str(path))
+    loaded = load_artifact(str(path))
+    assert shape(loaded.program()) == shape(ast)
+    assert len(loaded) == len(ast.functions)
+    for position, func in enumerate(ast.functions):
+        assert shape(loaded.function(position)) == shape(func)
+
+
+@pytest.mark.parametrize("name", sorted(EXAMPLES))
+def test_ir_round_trip(name, tmp_path):
+    ir_code = IRGenerator().generate(program(name))
+    path = tmp_path / "ir.cirb"
+    main.emit_artifact(ir_code, str(path))
+    loaded = load_artifact(str(path))
+    assert len(loaded) == len(ir_code)
+    assert typed(loaded.tolist()) == typed(ir_code)
+    assert typed(list(loaded)) == typed(ir_code)
+    assert loaded[-1] == ir_code[-1]
+
+
+def test_json_artifacts(tmp_path):
+    path = tmp_path / "ir.json"
+    ir_code = IRGenerator().generate(program("loop.cir"))
+    main.emit_artifact(ir_code, str(path))
+    assert json.loads(path.read_text(encoding="utf-8")) == ir_to_dicts(ir_code)
+
+
+def test_cached_compile_emits_the_same_artifacts(tmp_path, capsys):
+    source = example("loop.cir")
+    paths = {}
+    for label, cache in (("full", None), ("cached", str(tmp_path / "cache.bin"))):
+        paths[label] = (tmp_path / f"{label}.ast", tmp_path / f"{label}.ir")
+        main.compile_pipeline(source, str(tmp_path / "out.c"), cache_path=cache,
+                              emit_ast=str(paths[label][0]), emit_ir=str(paths[label][1]))
+    for full, cached in zip(paths["full"], paths["cached"]):
+        assert full.read_bytes() == cached.read_bytes()
+
+
+def test_invalid_artifacts_are_rejected():
+    data = encode_program(program("hello.cir"))
+    with pytest.raises(ArtifactError, match="Não é um artefato"):
+        decode_artifact(b"XXXX" + data[4:])
+    with pytest.raises(ArtifactError, match="truncado"):
+        decode_artifact(data[:len(data) // 2])
+    with pytest.raises(ArtifactError, match="Versão de formato"):
+        decode_artifact(data[:4] + b"\xff\xff" + data[6:])
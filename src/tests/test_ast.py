@@ -0,0 +1,75 @@
+# test_ast.py - Nós com __slots__ e a AST em arena
+import pytest
+from conftest import EXAMPLES, example, shape
+
+from ast_arena import NODE_TYPES, ASTArena
+from cirius_ast import BinaryOp, Node, Var
+from cirius_parser import Parser
+from lexer import Lexer
+
+# Todos os tipos de nó
+ALL_NODES = """func f(a, b) {
+    x = -a * 2.5 + ~b << 1;
+    if a == b and not (a > 1) {
+        print("igual");
+    } elif a < b {
+        return a;
+    } elif a > 10 {
+        x = input();
+    } else {
+        while x > 0 {
+            x = x - 1;
+        }
+    }
+    for i in 0..b {
+        print(f(i, true));
+    }
+    return x;
+}
+"""
+
+SOURCES = [ALL_NODES] + [example(name) for name in sorted(EXAMPLES)]
+
+
+def parse(source):
+    return Parser(Lexer(source).tokenize_buffer()).parse()
+
+
+def walk(value):
+    """Todos os nós da árvore de objetos."""
+    if isinstance(value, Node):
+        yield value
+        for field in value.__slots__:
+            yield from walk(getattr(value, field))
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from walk(item)
+
+
+@pytest.mark.parametrize("source", SOURCES)
+def test_arena_round_trip(source):
+    program = parse(source)
+    arena = ASTArena.from_ast(program)
+    assert shape(arena.to_ast()) == shape(program)
+    assert len(arena) == sum(1 for _ in walk(program))
+    assert arena.node_type(arena.root).__name__ == "Program"
+
+
+@pytest.mark.parametrize("source", SOURCES)
+def test_arena_scans_nodes_by_type(source):
+    program = parse(source)
+    arena = ASTArena.from_ast(program)
+    names = sorted(node.name for node in walk(program) if isinstance(node, Var))
+    assert sorted(arena.get(index, "name") for index in arena.indices(Var)) == names
+    ops = sorted(node.op for node in walk(program) if isinstance(node, BinaryOp))
+    assert sorted(arena.get(index, "op") for index in arena.indices(BinaryOp)) == ops
+
+
+def test_nodes_have_slots_and_keep_the_json_shape():
+    program = parse(example("loop.cir"))
+    for node_type in NODE_TYPES:
+        assert not hasattr(node_type.__new__(node_type), "__dict__")
+    data = program.to_dict()
+    assert list(data) == ["functions"]
+    assert shape(type(program).from_dict(data)) == shape(program)
+    assert all(isinstance(func, Node) for func in data["functions"])
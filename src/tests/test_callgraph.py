@@ -0,0 +1,85 @@
+# test_callgraph.py - Grafo de chamadas, componentes e remoção de funções inalcançáveis
+from conftest import example
+
+import main
+from callgraph import CallGraph, prune_unreachable
+from cirius_parser import Parser
+from incremental import FunctionCache
+from lexer import Lexer
+
+# even/odd são mutuamente recursivas, fact chama a si mesma, lost e orphan
+# nunca são chamadas a partir de main (lost só chama a si e a fact)
+SOURCE = """func even(n) {
+    if n == 0 {
+        return true;
+    }
+    return odd(n - 1);
+}
+func odd(n) {
+    if n == 0 {
+        return false;
+    }
+    return even(n - 1);
+}
+func fact(n) {
+    if n <= 1 {
+        return 1;
+    }
+    return n * fact(n - 1);
+}
+func lost(n) {
+    return lost(fact(n));
+}
+func orphan() {
+    print("nunca");
+}
+func main() {
+    print(even(4));
+    print(str(fact(5)));
+}
+"""
+
+
+def parse(source):
+    return Parser(Lexer(source).tokenize()).parse()
+
+
+def test_edges_ignore_builtins():
+    graph = CallGraph.from_program(parse(SOURCE))
+    assert graph.callees["main"] == {"even", "fact"}
+    assert graph.callers["fact"] == {"main", "lost", "fact"}
+    assert graph.reachable() == {"main", "even", "odd", "fact"}
+
+
+def test_components_go_from_callees_to_callers():
+    graph = CallGraph.from_program(parse(SOURCE))
+    components = graph.sccs()
+    assert ["even", "odd"] in components
+    order = {name: graph.component_of(name) for name in graph.names}
+    assert order["even"] == order["odd"]
+    assert order["fact"] < order["main"] and order["odd"] < order["main"]
+    assert order["fact"] < order["lost"]
+    assert graph.recursive_functions() == {"even", "odd", "fact", "lost"}
+    assert not graph.is_recursive("main") and graph.is_recursive("lost")
+
+
+def test_prune_keeps_declaration_order():
+    pruned, removed = prune_unreachable(parse(SOURCE))
+    assert [func.name for func in pruned.functions] == ["even", "odd", "fact", "main"]
+    assert removed == ["lost", "orphan"]
+    # Sem main nada é removido
+    library = parse(SOURCE[:SOURCE.index("func main()")])
+    assert prune_unreachable(library) == (library, [])
+
+
+def test_unreachable_functions_are_not_compiled(tmp_path, run_output, c_output):
+    source = example("calls.cir")
+    path = tmp_path / "calls.c"
+    main.compile_pipeline(source, str(path))
+    code = path.read_text(encoding="utf-8")
+    assert "unused" not in code and "fact(" in code
+    cache = FunctionCache()
+    cached, _, _ = cache.compile(cache.tokenize(source))
+    assert cached == code
+    assert len(cache.current) - len(cache.live) == 1
+    assert c_output(source) == run_output(source)
@@ -0,0 +1,93 @@
+# test_cfg.py - Blocos básicos, dominadores, laços naturais e linearização
+import pytest
+from conftest import EXAMPLES, example
+
+import main
+from cfg import ControlFlowGraph
+from ir import IRGenerator, Op
+from optimize import split_functions
+
+# Um while dentro de um for e um if com return nos dois caminhos
+NESTED = """func f(n) {
+    total = 0;
+    for i in 0..n {
+        j = 0;
+        while j < i {
+            total = total + j;
+            j = j + 1;
+        }
+    }
+    if total > 10 {
+        return total;
+    }
+    return 0;
+}
+func main() {
+    print(f(5));
+}
+"""
+
+
+def functions_of(source):
+    ast = main.analyze_source(main.lex_source(source))
+    main.check_types(ast)
+    return split_functions(IRGenerator().generate(ast))
+
+
+def test_blocks_and_edges():
+    graph = ControlFlowGraph(functions_of(NESTED)[0])
+    entry, loop_header, inner_header = graph.blocks[0], graph.blocks[1], graph.blocks[3]
+    assert [instr.op for instr in graph.header] == [Op.FUNC_BEGIN, Op.PARAM]
+    assert loop_header.labels == ["FOR1"] and loop_header.condition == "t1"
+    assert inner_header.labels == ["WHILE3"]
+    assert entry.successors == [loop_header]
+    # Condicional: [se verdadeira, se falsa]; o bloco após o for é o falso
+    assert len(loop_header.successors) == 2 and loop_header.successors[1].labels == ["END_FOR2"]
+    assert set(loop_header.predecessors) == {entry, graph.blocks[5]}
+    assert graph.exit is graph.blocks[-1] and graph.exit.instructions == []
+    # Nenhum desvio fica dentro dos blocos
+    jumps = {Op.GOTO, Op.IF_FALSE_GOTO, Op.LABEL}
+    assert not any(instr.op in jumps for block in graph.blocks for instr in block.instructions)
+    assert sum(block.returns for block in graph.blocks) == 2
+
+
+def test_dominators():
+    graph = ControlFlowGraph(functions_of(NESTED)[0])
+    graph.dominators()
+    entry, loop_header, inner_header, body = graph.blocks[0], graph.blocks[1], graph.blocks[3], graph.blocks[4]
+    assert entry.idom is None and loop_header.idom is entry
+    assert body.idom is inner_header
+    assert graph.dominates(loop_header, body) and graph.dominates(body, body)
+    assert not graph.dominates(body, inner_header)
+    order = graph.reverse_postorder()
+    assert order[0] is entry
+    assert all(order.index(block.idom) < order.index(block) for block in order[1:])
+
+
+def test_loops_are_nested():
+    graph = ControlFlowGraph(functions_of(NESTED)[0])
+    outer, inner = sorted(graph.loops(), key=lambda loop: loop.depth)
+    assert outer.header.labels == ["FOR1"] and inner.header.labels == ["WHILE3"]
+    assert inner.parent is outer and (outer.depth, inner.depth) == (1, 2)
+    assert inner.blocks < outer.blocks
+    assert [latch.index for latch in inner.latches] == [4]
+    assert [block.labels for block in outer.exits] == [["END_FOR2"]]
+
+
+def test_linearize_drops_dead_jumps_and_unused_labels():
+    function = functions_of(NESTED)[0]
+    linear = ControlFlowGraph(function).linearize()
+    # O GOTO depois do ``return total`` some; o resto é o mesmo
+    assert len(linear) == len(function) - 1
+    assert [instr for instr in function if instr.op is not Op.GOTO or instr.dest != "END_IF5"] == linear
+    # Linearizar de novo não muda nada
+    assert ControlFlowGraph(linear).linearize() == linear
+
+
+@pytest.mark.parametrize("name", sorted(EXAMPLES))
+def test_linearize_is_stable_on_the_examples(name):
+    # O otimizador termina com ``linearize``; test_pipeline compara a saída
+    for function in functions_of(example(name)):
+        linear = ControlFlowGraph(function).linearize()
+        assert linear[0] == function[0] and linear[-1] == function[-1]
+        assert ControlFlowGraph(linear).linearize() == linear
@@ -0,0 +1,85 @@
+# test_cse.py - Numeração de valores local (por bloco) e global (SSA)
+import pytest
+
+import main
+from cfg import ControlFlowGraph
+from ir import IRInstruction, Op
+from optimize import Optimizer, local_value_numbering
+
+# Subexpressões repetidas no mesmo comando, entre comandos e entre blocos
+SOURCE = """func f(a, b) {
+    for i in 0..4 {
+        x = (a + i) * (b - i) + (a + i) * 3;
+        y = (a + i) * (b - i) - (b - i) * (b - i);
+        if x + y > 0 {
+            print(x + y);
+        }
+    }
+    return a * b + a * b - (a * b) % 3;
+}
+func main() {
+    print(f(2, 9));
+    print(f(7, 3));
+}
+"""
+
+
+def function(*body, params=("a", "b")):
+    code = [IRInstruction(Op.FUNC_BEGIN, dest="f")]
+    code += [IRInstruction(Op.PARAM, dest=param, type="int") for param in params]
+    code += list(body)
+    code.append(IRInstruction(Op.FUNC_END, dest="f"))
+    return code
+
+
+def lvn(code):
+    graph = ControlFlowGraph(code)
+    reused = local_value_numbering(graph)
+    return graph.linearize(), reused
+
+
+def binary(op, dest, arg1, arg2):
+    return IRInstruction(op, dest=dest, arg1=arg1, arg2=arg2, type="int")
+
+
+def test_repeated_operation_becomes_a_copy():
+    code, reused = lvn(function(binary(Op.PLUS, "t1", "a", "b"), binary(Op.PLUS, "t2", "b", "a"),
+                                binary(Op.MUL, "t3", "t2", "t2"), IRInstruction(Op.RETURN, arg1="t3")))
+    assert reused == 1
+    assert (code[4].op, code[4].arg1) == (Op.ASSIGN, "t1")
+    # A leitura de ``t2`` passa a ser da variável que guarda o valor
+    assert (code[5].arg1, code[5].arg2) == ("t1", "t1")
+
+
+def test_redefined_source_is_not_reused():
+    code, reused = lvn(function(binary(Op.PLUS, "t1", "a", "b"), IRInstruction(Op.ASSIGN, dest="a", arg1=7),
+                                binary(Op.PLUS, "t2", "a", "b"), IRInstruction(Op.RETURN, arg1="t2")))
+    assert reused == 0 and code[5].op is Op.PLUS
+
+
+def test_overwritten_holder_is_not_used():
+    code, reused = lvn(function(binary(Op.PLUS, "t1", "a", "b"), IRInstruction(Op.ASSIGN, dest="t1", arg1=0),
+                                binary(Op.PLUS, "t2", "a", "b"), IRInstruction(Op.RETURN, arg1="t2")))
+    assert reused == 0 and code[5].op is Op.PLUS
+
+
+def test_input_instructions_are_not_mutated():
+    second = binary(Op.PLUS, "t2", "a", "b")
+    lvn(function(binary(Op.PLUS, "t1", "a", "b"), second, IRInstruction(Op.RETURN, arg1="t2")))
+    assert second.op is Op.PLUS and second.arg1 == "a"
+
+
+def test_global_cse_switch():
+    code = function(binary(Op.PLUS, "t1", "a", "b"), IRInstruction(Op.IF_FALSE_GOTO, dest="L", arg1="a"),
+                    IRInstruction(Op.PRINT, arg1="t1"), IRInstruction(Op.LABEL, dest="L"),
+                    binary(Op.PLUS, "t2", "a", "b"), IRInstruction(Op.RETURN, arg1="t2"))
+    local, full = Optimizer(global_cse=False), Optimizer()
+    local_code, full_code = local.optimize_function(code), full.optimize_function(code)
+    # A soma repetida está em outro bloco: só a numeração global a reaproveita
+    assert sum(instr.op is Op.PLUS for instr in local_code) == 2
+    assert sum(instr.op is Op.PLUS for instr in full_code) == 1
+
+
+@pytest.mark.parametrize("backend", main.BACKENDS)
+def test_compiled_program_matches_run(run_output, c_output, backend):
+    assert c_output(SOURCE) == run_output(SOURCE, backend=backend)
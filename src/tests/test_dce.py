@@ -0,0 +1,66 @@
+# test_dce.py - Eliminação de código morto por vivacidade sobre o CFG
+from cfg import ControlFlowGraph
+from ir import IRInstruction, Op
+from optimize import Optimizer, eliminate_dead_code, is_removable
+
+
+def function(*body, params=()):
+    code = [IRInstruction(Op.FUNC_BEGIN, dest="f")]
+    code += [IRInstruction(Op.PARAM, dest=param) for param in params]
+    code += list(body)
+    code.append(IRInstruction(Op.FUNC_END, dest="f"))
+    return code
+
+
+def assign(dest, arg1):
+    return IRInstruction(Op.ASSIGN, dest=dest, arg1=arg1)
+
+
+def dce(code):
+    graph = ControlFlowGraph(code)
+    removed = eliminate_dead_code(graph)
+    return graph.linearize(), removed
+
+
+def test_dead_chain_goes_in_one_pass():
+    chain = [assign("c0", 1)] + [assign(f"c{index}", f"c{index - 1}") for index in range(1, 500)]
+    code, removed = dce(function(*chain, IRInstruction(Op.RETURN, arg1=0)))
+    assert removed == 500
+    assert [instr.op for instr in code] == [Op.FUNC_BEGIN, Op.RETURN, Op.FUNC_END]
+
+
+def test_dead_store_to_a_name_read_elsewhere():
+    # ``x = 1`` é sobrescrito antes de qualquer leitura
+    code, removed = dce(function(assign("x", 1), assign("x", "a"), IRInstruction(Op.PRINT, arg1="x"),
+                                 params=("a",)))
+    assert removed == 1
+    assert [(instr.op, instr.arg1) for instr in code[2:-1]] == [(Op.ASSIGN, "a"), (Op.PRINT, "x")]
+
+
+def test_values_live_around_a_loop_are_kept():
+    # i = 0; L: if not (i < n) goto E; i = i + 1; goto L; E: return 0
+    body = [assign("i", 0), IRInstruction(Op.LABEL, dest="L"),
+            IRInstruction(Op.LT, dest="t", arg1="i", arg2="n"),
+            IRInstruction(Op.IF_FALSE_GOTO, dest="E", arg1="t"),
+            IRInstruction(Op.PLUS, dest="i", arg1="i", arg2=1), IRInstruction(Op.GOTO, dest="L"),
+            IRInstruction(Op.LABEL, dest="E"), IRInstruction(Op.RETURN, arg1=0)]
+    code, removed = dce(function(*body, params=("n",)))
+    assert removed == 0 and code == function(*body, params=("n",))
+
+
+def test_side_effects_and_possible_errors_stay():
+    kept = [IRInstruction(Op.CALL, dest="r", arg1="g", arg2=0), IRInstruction(Op.INPUT, dest="k"),
+            IRInstruction(Op.DIV, dest="d", arg1=1, arg2="a"), IRInstruction(Op.MOD, dest="m", arg1="a", arg2=0),
+            IRInstruction(Op.LSHIFT, dest="s", arg1="a", arg2=-1)]
+    removed = [IRInstruction(Op.DIV, dest="q", arg1="a", arg2=2), IRInstruction(Op.RSHIFT, dest="h", arg1="a", arg2=3),
+               IRInstruction(Op.PLUS, dest="p", arg1="a", arg2="a")]
+    assert not any(is_removable(instr) for instr in kept)
+    assert all(is_removable(instr) for instr in removed)
+    code, count = dce(function(*(kept + removed), IRInstruction(Op.RETURN, arg1=0), params=("a",)))
+    assert count == len(removed) and code[2:-2] == kept
+
+
+def test_optimizer_counts_removed_instructions():
+    optimizer = Optimizer(passes=["dce"])
+    code = optimizer.optimize(function(assign("x", 1), IRInstruction(Op.RETURN, arg1=0)))
+    assert optimizer.stats["dead"] == 1 and len(code) == 3
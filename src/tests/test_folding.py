@@ -0,0 +1,89 @@
+# test_folding.py - Dobra de constantes e identidades algébricas na AST e no IR
+import pytest
+
+import main
+from cirius_ast import BinaryOp, IfStatement, Number, String, WhileStatement, walk
+from folding import fold_constants
+from ir import IRGenerator, Op
+from ssa import identity
+
+SOURCE = """func twice(v) {
+    print("twice");
+    return v * 2;
+}
+func main() {
+    a = input();
+    x = a * 1 + 2 * 3 - 0;
+    y = twice(a) * 0;
+    s = "a" + "b" + "";
+    print(x); print(y); print(s);
+    if 1 > 2 {
+        print("nunca");
+    } elif 2 >= 2 {
+        print("sempre");
+    } else {
+        print("nunca");
+    }
+    while false {
+        print("nunca");
+    }
+    print(7 / 2);
+    print(7 % 3 + (1 << 4));
+}
+"""
+
+EXPECTED = "twice\n10\n0\nab\nsempre\n3.5\n17\n"
+
+
+def folded(source):
+    ast = main.analyze_source(main.lex_source(source))
+    main.check_types(ast)
+    return ast, fold_constants(ast)
+
+
+def test_literals_and_identities_fold_on_the_ast():
+    ast, stats = folded(SOURCE)
+    (main_func,) = [func for func in ast.functions if func.name == "main"]
+    nodes = list(walk(main_func))
+    assert stats["folded"] >= 4 and stats["simplified"] >= 2 and stats["branches"] == 3
+    assert not any(isinstance(node, (IfStatement, WhileStatement)) for node in nodes)
+    assert any(isinstance(node, String) and node.value == "ab" for node in nodes)
+    assert any(isinstance(node, Number) and node.value == 6 for node in nodes)
+    # ``twice(a) * 0`` não pode descartar a chamada
+    assert any(isinstance(node, BinaryOp) and node.op == "MUL" for node in nodes)
+
+
+def test_division_by_zero_is_left_for_run_time():
+    ast, stats = folded("func main() {\n    print(1 / 0);\n}\n")
+    assert stats["folded"] == 0
+    assert any(instr.op is Op.DIV for instr in IRGenerator().generate(ast))
+
+
+def test_identities_stay_exact_for_floats():
+    # ``x * 0`` é -0.0 ou nan num float; ``x + 0`` com x = -0.0 dá 0.0
+    assert identity(Op.MUL, [None, 0], ["float", "int"], "float") is None
+    assert identity(Op.PLUS, [None, 0], ["float", "int"], "float") is None
+    assert identity(Op.MUL, [None, 1], ["int", "int"], "int") == 0
+
+
+def test_folding_shrinks_the_generated_ir():
+    ast, _ = folded(SOURCE)
+    unfolded = IRGenerator().generate(main.analyze_source(main.lex_source(SOURCE)))
+    assert len(IRGenerator().generate(ast)) < len(unfolded)
+
+
+def test_verbose_compile_reports_the_instructions_saved(capsys, tmp_path):
+    main.compile_pipeline(SOURCE, str(tmp_path / "out.c"), verbose=True)
+    out = capsys.readouterr().out
+    assert "[Fold] " in out and "3 desvio(s) constante(s) removido(s)" in out
+    saved = int(out.split("instruções (")[1].split(" a menos com a dobra")[0])
+    assert saved > 0
+
+
+@pytest.mark.parametrize("backend", main.BACKENDS)
+def test_folded_program_output(run_output, backend):
+    assert run_output(SOURCE, ["4"], backend=backend) == EXPECTED
+
+
+def test_compiled_program_matches_run(run_output, c_output):
+    assert c_output(SOURCE, ["4"]) == run_output(SOURCE, ["4"])
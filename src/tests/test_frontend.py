@@ -0,0 +1,61 @@
+# test_frontend.py - Parser + análise semântica em paralelo, por função
+import pytest
+from conftest import EXAMPLES, example, shape
+
+from cirius_parser import Parser, ParserError
+from frontend import parallel_front_end
+from lexer import Lexer
+from semantic import SemanticAnalyzer
+
+# Funções suficientes para vários grupos por processo
+PROGRAM = "".join(f"func f{index}(a, b) {{\n    x = a * {index} + b;\n    return f{index - 1}(x, b);\n}}\n"
+                  for index in range(1, 12))
+PROGRAM = "func f0(a, b) {\n    return a + b;\n}\n" + PROGRAM + "func main() {\n    print(f11(1, 2));\n}\n"
+
+
+def serial(source):
+    program = Parser(Lexer(source).tokenize_buffer()).parse()
+    SemanticAnalyzer().analyze(program)
+    return program
+
+
+@pytest.mark.parametrize("source", [PROGRAM] + [example(name) for name in sorted(EXAMPLES)])
+def test_parallel_ast_matches_serial(source):
+    program, errors = parallel_front_end(Lexer(source).tokenize_buffer(), 2)
+    assert errors == []
+    assert shape(program) == shape(serial(source))
+
+
+def test_functions_can_call_later_declarations(run_output):
+    # As funções de PROGRAM em ordem inversa: cada uma chama a seguinte
+    functions = PROGRAM.split("func ")[1:]
+    source = "".join("func " + function for function in reversed(functions))
+    assert source.startswith("func main()")
+    program = Parser(Lexer(source).tokenize_buffer()).parse()
+    assert SemanticAnalyzer().check(program) == []
+    _, errors = parallel_front_end(Lexer(source).tokenize_buffer(), 2)
+    assert errors == []
+    assert run_output(source) == run_output(PROGRAM) == "47992630\n"
+
+
+def test_all_semantic_errors_in_declaration_order():
+    source = (PROGRAM.replace("x = a * 3 + b;", "x = a * 3 + w;").replace("x = a * 9 + b;", "x = z;")
+              + "func f2(a) {\n    return a;\n}\n")
+    program = Parser(Lexer(source).tokenize_buffer()).parse()
+    expected = [str(error) for error in SemanticAnalyzer().check(program)]
+    assert expected == ["Símbolo 'w' não declarado.", "Símbolo 'z' não declarado.",
+                        "Símbolo 'f2' já declarado."]
+    with pytest.raises(Exception, match="Símbolo 'w' não declarado"):
+        serial(source)
+    _, errors = parallel_front_end(Lexer(source).tokenize_buffer(), 2)
+    assert [str(error) for error in errors] == expected
+
+
+def test_syntax_errors_win_over_semantic_errors():
+    source = PROGRAM.replace("x = a * 3 + b;", "x = w;").replace("x = a * 9 + b;", "x = = 1;")
+    with pytest.raises(ParserError):
+        parallel_front_end(Lexer(source).tokenize_buffer(), 2)
+
+
+def test_run_with_jobs(run_output):
+    assert run_output(PROGRAM, jobs=2) == run_output(PROGRAM)
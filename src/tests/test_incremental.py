@@ -0,0 +1,132 @@
+# test_incremental.py - Cache de compilação por função
+import pickle
+
+import pytest
+
+import incremental
+import main
+from incremental import FunctionCache
+from optimize import Optimizer
+
+SOURCE = """func scale(x, k) {
+    return x * k + 1;
+}
+func twice(x) {
+    return scale(x, 2);
+}
+func show(n) {
+    print(n);
+}
+func main() {
+    show(twice(3));
+    show(scale(4, 5));
+}
+"""
+
+
+def full_compile(source, tmp_path, opt_level=main.DEFAULT_OPT_LEVEL):
+    """C do pipeline sem cache."""
+    path = tmp_path / "full.c"
+    main.compile_pipeline(source, str(path), opt_level=opt_level)
+    return path.read_text(encoding="utf-8")
+
+
+def cached_compile(path, source, optimizer=None):
+    cache = FunctionCache.load(str(path))
+    code, errors, conflicts = cache.compile(cache.tokenize(source), optimizer)
+    assert errors == [] and conflicts == []
+    cache.save(str(path))
+    return cache, code
+
+
+def test_unchanged_source_is_a_full_hit(tmp_path, capsys):
+    path = tmp_path / "cache.bin"
+    cache, code = cached_compile(path, SOURCE)
+    assert code == full_compile(SOURCE, tmp_path)
+    assert (cache.compiled, cache.reused) == (4, 0)
+    cache, again = cached_compile(path, SOURCE)
+    assert again == code
+    assert (cache.compiled, cache.reused) == (0, 4)
+
+
+def test_body_edit_recompiles_one_function(tmp_path, capsys):
+    path = tmp_path / "cache.bin"
+    cached_compile(path, SOURCE)
+    edited = SOURCE.replace("return x * k + 1;", "return x * k + 2;")
+    cache, code = cached_compile(path, edited)
+    assert (cache.compiled, cache.reused) == (1, 3)
+    assert code == full_compile(edited, tmp_path)
+
+
+def test_opt_level_change_lowers_again(tmp_path, capsys):
+    path = tmp_path / "cache.bin"
+    cached_compile(path, SOURCE)
+    optimizer = Optimizer(level=0)
+    _, code = cached_compile(path, SOURCE, optimizer)
+    assert code == full_compile(SOURCE, tmp_path, opt_level=0)
+    assert optimizer.report()["passes"]["fold"]["runs"] == 4
+    # De volta ao -O2: o cache não devolve o código do -O0
+    _, code = cached_compile(path, SOURCE)
+    assert code == full_compile(SOURCE, tmp_path)
+
+
+def test_arity_change_recompiles_callers(tmp_path, capsys):
+    path = tmp_path / "cache.bin"
+    cached_compile(path, SOURCE)
+    edited = SOURCE.replace("func scale(x, k) {", "func scale(x, k, unused) {")
+    cache = FunctionCache.load(str(path))
+    _, errors, _ = cache.compile(cache.tokenize(edited))
+    assert errors
+    assert (cache.compiled, cache.reused) == (3, 1)
+
+
+def test_callers_declared_earlier_are_invalidated_too(tmp_path, capsys):
+    # ``main`` primeiro: chama funções declaradas depois dela
+    main_start = SOURCE.index("func main()")
+    source = SOURCE[main_start:] + SOURCE[:main_start]
+    path = tmp_path / "cache.bin"
+    cache, code = cached_compile(path, source)
+    assert code == full_compile(source, tmp_path)
+    edited = source.replace("func scale(x, k) {", "func scale(x, k, unused) {")
+    cache = FunctionCache.load(str(path))
+    _, errors, _ = cache.compile(cache.tokenize(edited))
+    assert errors
+    assert (cache.compiled, cache.reused) == (3, 1)
+
+
+def test_type_change_reaches_callers(tmp_path, capsys):
+    path = tmp_path / "cache.bin"
+    cached_compile(path, SOURCE)
+    # ``scale`` passa a devolver float: só ela é reanalisada, mas ``twice`` e
+    # ``show`` são regeradas com os novos tipos
+    edited = SOURCE.replace("return x * k + 1;", "return x * k + 1.5;")
+    cache, code = cached_compile(path, edited)
+    assert (cache.compiled, cache.reused) == (1, 3)
+    assert code == full_compile(edited, tmp_path)
+    assert "double scale(" in code and "double twice(" in code
+
+
+def test_type_conflict_is_reported(tmp_path):
+    path = tmp_path / "cache.bin"
+    cached_compile(path, SOURCE)
+    edited = SOURCE.replace("show(scale(4, 5));", "show(scale(4, 5));\n    show(\"texto\");")
+    cache = FunctionCache.load(str(path))
+    code, errors, conflicts = cache.compile(cache.tokenize(edited))
+    assert code is None and errors == [] and conflicts
+
+
+@pytest.mark.parametrize("contents", [b"", b"lixo", pickle.dumps("outro compilador")])
+def test_unreadable_cache_starts_empty(tmp_path, contents):
+    path = tmp_path / "cache.bin"
+    path.write_bytes(contents)
+    cache = FunctionCache.load(str(path))
+    assert cache.entries == {} and cache.tokens is None
+
+
+def test_cache_of_another_compiler_version_starts_empty(tmp_path, monkeypatch):
+    path = tmp_path / "cache.bin"
+    cached_compile(path, SOURCE)
+    assert FunctionCache.load(str(path)).entries
+    monkeypatch.setattr(incremental, "compiler_fingerprint", lambda: "outro compilador")
+    cache = FunctionCache.load(str(path))
+    assert cache.entries == {} and cache.tokens is None
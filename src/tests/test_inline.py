@@ -0,0 +1,103 @@
+# test_inline.py - Expansão de funções pequenas nas chamadas
+import pytest
+
+import main
+from incremental import FunctionCache
+from ir import IRGenerator, Op
+from optimize import Optimizer
+
+SOURCE = """func sq(x) {
+    return x * x;
+}
+func smaller(x, y) {
+    if x < y {
+        return x;
+    }
+    return y;
+}
+func fact(n) {
+    if n < 2 {
+        return 1;
+    }
+    return n * fact(n - 1);
+}
+func log(v) {
+    print(v);
+}
+func main() {
+    log(sq(4) + smaller(3, sq(2)));
+    for i in 1..3 {
+        log(smaller(i, 2) + sq(i));
+    }
+    print(fact(5));
+}
+"""
+
+EXPECTED = "19\n2\n6\n11\n120\n"
+
+
+def optimized(source, **options):
+    ast = main.analyze_source(main.lex_source(source))
+    main.check_types(ast)
+    optimizer = Optimizer(**options)
+    return optimizer, optimizer.optimize(IRGenerator().generate(ast))
+
+
+def body_of(code, function):
+    inside, body = False, []
+    for instr in code:
+        if instr.op is Op.FUNC_BEGIN:
+            inside = instr.dest == function
+        elif inside:
+            body.append(instr)
+    return body
+
+
+def calls_in(code, function):
+    return [instr.arg1 for instr in body_of(code, function) if instr.op is Op.CALL]
+
+
+def test_small_functions_are_expanded():
+    optimizer, code = optimized(SOURCE)
+    assert calls_in(code, "main") == ["fact"]
+    assert optimizer.stats["inlined"] >= 5
+    # Argumentos constantes se propagam pelo corpo expandido: 16 + 3
+    prints = [instr for instr in body_of(code, "main") if instr.op is Op.PRINT]
+    assert prints[0].arg1 == 19
+
+
+def test_recursive_functions_are_not_expanded():
+    _, code = optimized(SOURCE)
+    assert calls_in(code, "fact") == ["fact"]
+
+
+def test_threshold_zero_turns_inlining_off():
+    optimizer, code = optimized(SOURCE, inline_threshold=0)
+    assert sorted(set(calls_in(code, "main"))) == ["fact", "log", "smaller", "sq"]
+    assert optimizer.stats["inlined"] == 0
+
+
+def test_expanded_names_do_not_collide():
+    _, code = optimized(SOURCE)
+    names = [instr.dest for instr in body_of(code, "main") if instr.op is Op.LABEL]
+    assert len(names) == len(set(names))
+
+
+@pytest.mark.parametrize("backend", main.BACKENDS)
+def test_inlined_program_output(run_output, backend):
+    assert run_output(SOURCE, backend=backend) == EXPECTED
+
+
+def test_compiled_program_matches_run(run_output, c_output):
+    assert c_output(SOURCE) == run_output(SOURCE)
+
+
+def test_cache_follows_an_edited_callee(tmp_path, capsys):
+    path, full = str(tmp_path / "cache.bin"), tmp_path / "full.c"
+    edited = SOURCE.replace("return x * x;", "return x * x + 1;")
+    for source in (SOURCE, edited):
+        cache = FunctionCache.load(path)
+        code, _, _ = cache.compile(cache.tokenize(source))
+        cache.save(path)
+        main.compile_pipeline(source, str(full))
+        assert code == full.read_text(encoding="utf-8")
@@ -0,0 +1,61 @@
+# test_interpreter.py - Variáveis resolvidas em slots e o interpretador sobre frames
+from cirius_ast import Assignment, ForStatement, Node, Var
+from cirius_parser import Parser
+from lexer import Lexer
+from semantic import SemanticAnalyzer
+
+# Escopos aninhados: uma atribuição num bloco interno define uma variável nova
+SCOPES = """func fact(n) {
+    if n <= 1 {
+        return 1;
+    }
+    return n * fact(n - 1);
+}
+func main() {
+    x = 1;
+    total = 0;
+    for i in 0..5 {
+        t = i * 2;
+        total = total + t;
+        x = t;
+        print(total);
+    }
+    print(total);
+    print(x);
+    if x == 1 {
+        x = 7;
+        y = x + 1;
+        print(y);
+    }
+    print(x);
+    print(fact(6));
+}
+"""
+
+
+def nodes(value):
+    if isinstance(value, Node):
+        yield value
+        for field in value.__slots__:
+            yield from nodes(getattr(value, field))
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from nodes(item)
+
+
+def test_variables_resolve_to_frame_slots():
+    program = Parser(Lexer(SCOPES).tokenize_buffer()).parse()
+    SemanticAnalyzer().analyze(program)
+    for func in program.functions:
+        slots = {node.slot for node in nodes(func.body) if isinstance(node, (Var, ForStatement))}
+        assert slots == set(range(func.frame_size))
+    fact, main = program.functions
+    assert fact.frame_size == 1
+    # x, total, i, t, e as cópias de total e x no laço e de x e y no if
+    assert main.frame_size == 8
+    targets = [node.target for node in nodes(main.body) if isinstance(node, Assignment)]
+    assert len({target.slot for target in targets if target.name == "total"}) == 2
+
+
+def test_shadowing_and_recursion(run_output):
+    assert run_output(SCOPES) == "0\n2\n4\n6\n8\n10\n0\n1\n8\n1\n720\n"
@@ -0,0 +1,53 @@
+# test_ir.py - IR como IRInstruction: opcodes, slots e a forma de dicts dos dumps
+import pytest
+from conftest import EXAMPLES, example
+
+import main
+from codegen import CodeGenerator
+from ir import IR_FIELDS, IRGenerator, IRInstruction, Op, ir_to_dicts, normalize_ir
+from optimize import Optimizer
+
+
+def generate(name):
+    ast = main.analyze_source(main.lex_source(example(name)))
+    main.check_types(ast)
+    return IRGenerator().generate(ast)
+
+
+@pytest.mark.parametrize("name", sorted(EXAMPLES))
+def test_generator_emits_instruction_objects(name):
+    ir_code = generate(name)
+    assert ir_code
+    for instr in ir_code:
+        assert type(instr) is IRInstruction and isinstance(instr.op, Op)
+        assert not hasattr(instr, "__dict__")
+
+
+@pytest.mark.parametrize("name", sorted(EXAMPLES))
+def test_dicts_round_trip(name):
+    ir_code = generate(name)
+    dicts = ir_to_dicts(ir_code)
+    assert all(isinstance(d["op"], str) and None not in d.values() for d in dicts)
+    assert normalize_ir(dicts) == ir_code
+    # Listas mistas (e entradas None) também são aceitas
+    assert normalize_ir([None] + ir_code[:3] + dicts[3:]) == ir_code
+
+
+def test_instruction_equality_covers_every_field():
+    instr = IRInstruction(Op.PLUS, "t1", "a", 1, "int")
+    assert instr == IRInstruction(Op.PLUS, "t1", "a", 1, "int")
+    for field in IR_FIELDS[1:]:
+        other = IRInstruction.from_dict(instr.to_dict())
+        setattr(other, field, None)
+        assert other != instr
+    assert repr(instr) == "PLUS t1 a 1"
+    with pytest.raises(TypeError):
+        hash(instr)
+
+
+def test_c_from_dumped_ir_is_the_same(capsys):
+    # O C gerado a partir do IR lido de um dump JSON é o mesmo
+    ir_code = generate("calls.cir")
+    direct = CodeGenerator().generate(Optimizer().optimize(ir_code))
+    again = CodeGenerator().generate(Optimizer().optimize(normalize_ir(ir_to_dicts(generate("calls.cir")))))
+    assert direct == again
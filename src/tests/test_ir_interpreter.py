@@ -0,0 +1,49 @@
+# test_ir_interpreter.py - Backend do comando run sobre o IR otimizado
+import pytest
+from conftest import EXAMPLES, example
+
+import main
+from ir import IRGenerator
+from ir_interpreter import FunctionCompiler, IRInterpreter
+from optimize import split_functions
+from test_types import MIXED, TYPED
+
+
+def generate(source):
+    ast = main.analyze_source(main.lex_source(source))
+    assert main.check_types(ast) == []
+    return IRGenerator().generate(ast)
+
+
+@pytest.mark.parametrize("name", sorted(EXAMPLES))
+def test_ir_backend_matches_ast_backend(name, run_output):
+    source, inputs = example(name), EXAMPLES[name]
+    expected = run_output(source, inputs)
+    assert expected and "[Erro" not in expected
+    assert run_output(source, inputs, backend="ir") == expected
+
+
+def test_unoptimized_ir_runs_the_same(capsys, run_output):
+    expected = run_output(TYPED)
+    capsys.readouterr()
+    IRInterpreter().interpret(generate(TYPED))
+    assert capsys.readouterr().out == expected
+
+
+def test_straight_line_functions_have_no_state_machine():
+    functions = split_functions(generate(example("calls.cir")))
+    by_name = {function[0].dest: FunctionCompiler(function).compile() for function in functions}
+    assert "while True" not in by_name["scale"]
+    assert "while True" in by_name["main"] and "continue" in by_name["main"]
+
+
+@pytest.mark.parametrize("name", sorted(MIXED))
+def test_type_conflicts_fall_back_to_the_ast(name, run_output):
+    source, expected = MIXED[name]
+    assert run_output(source, backend="ir") == run_output(source)
+    assert run_output(source, backend="ir").endswith(expected)
+
+
+def test_missing_main_is_a_runtime_error(capsys):
+    IRInterpreter().interpret(generate("func f() {\n    print(1);\n}\n"))
+    assert capsys.readouterr().out == "[Erro de Execução] Função 'main' não encontrada.\n"
@@ -0,0 +1,86 @@
+# test_lexer.py - Scanners manual e regex, modo streaming e re-tokenização
+import io
+
+import pytest
+from conftest import EXAMPLES, example
+
+from lexer import SCANNERS, TOKEN_KINDS, Lexer, relex
+
+# Todos os tipos de token, comentários dos três estilos e texto não ASCII
+ALL_TOKENS = """/* comentário
+   de bloco */ func f(a, b) { // linha
+    # outro comentário
+    x = 12.5 + 3 - 4 * 5 / 6 % 7;
+    x += 1; x -= 2; x *= 3; x /= 4; x++; x--;
+    y = a << 2 >> 1 & 3 | 4 ^ ~5;
+    if a == b and a != 1 or not (a >= 2) { print("ação"); }
+    elif a <= 3 { return a < b; } else { return a > b; }
+    while true { break; continue; }
+    for i in 0..10 { z = input(); }
+    return false;
+}
+"""
+
+SOURCES = [ALL_TOKENS] + [example(name) for name in sorted(EXAMPLES)]
+
+
+def reference(source):
+    return Lexer(source).tokenize()
+
+
+@pytest.mark.parametrize("source", SOURCES)
+def test_scanners_produce_identical_tokens(source):
+    tokens = reference(source)
+    assert tokens[0].type != "EOF"
+    for scanner in SCANNERS:
+        assert Lexer(source, scanner=scanner).tokenize() == tokens
+        assert list(Lexer(source, scanner=scanner).tokenize_buffer()) == tokens
+
+
+@pytest.mark.parametrize("scanner", sorted(SCANNERS))
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64])
+def test_streaming_matches_whole_input(scanner, chunk_size):
+    tokens = reference(ALL_TOKENS)
+    data = ALL_TOKENS.replace("\n", "\r\n").encode("utf-8")
+    for source in (io.StringIO(ALL_TOKENS), io.BytesIO(data), data):
+        assert list(Lexer(source, chunk_size=chunk_size, scanner=scanner).iter_tokens()) == tokens
+
+
+@pytest.mark.parametrize("source", SOURCES)
+def test_unclosed_tokens_wait_for_the_next_chunk(source):
+    # Blocos de 1 caractere partem todo token, comentário e string
+    assert Lexer(io.StringIO(source), chunk_size=1).tokenize() == reference(source)
+
+
+@pytest.mark.parametrize("scanner", sorted(SCANNERS))
+def test_lexical_errors_are_reported_the_same_way(scanner):
+    source = "func main() {\n    x = 1 $ 2;\n}\n"
+    with pytest.raises(RuntimeError, match=r"Caractere inesperado '\$' na linha 2"):
+        Lexer(source, scanner=scanner).tokenize_buffer()
+    with pytest.raises(RuntimeError, match=r"Caractere inesperado '\$' na linha 2"):
+        Lexer(io.StringIO(source), chunk_size=3, scanner=scanner).tokenize()
+
+
+@pytest.mark.parametrize("source", SOURCES)
+def test_token_buffer_matches_token_list(source):
+    tokens = reference(source)
+    buffer = Lexer(source).tokenize_buffer()
+    assert len(buffer) == len(tokens)
+    assert list(buffer) == tokens
+    for index in (0, len(tokens) // 2, len(tokens) - 1):
+        assert buffer[index] == tokens[index]
+        assert TOKEN_KINDS[buffer.kinds[index]] == tokens[index].type
+
+
+@pytest.mark.parametrize("scanner", sorted(SCANNERS))
+def test_relex_matches_a_full_lex(scanner):
+    buffer = Lexer(ALL_TOKENS, scanner=scanner).tokenize_buffer()
+    source = ALL_TOKENS
+    edits = [("12.5", "1"), ("de bloco */", "*/ x = 2;\n"), ("print(\"ação\")", "print(a)\n"),
+             ("0..10", "0..n"), ("return false;", "return 1.25;"), ("", "/* novo */ ")]
+    for old, new in edits:
+        offset = source.index(old)
+        relex(buffer, offset, len(old), new, scanner)
+        source = source[:offset] + new + source[offset + len(old):]
+        assert buffer.source == source
+        assert list(buffer) == reference(source)
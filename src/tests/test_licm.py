@@ -0,0 +1,69 @@
+# test_licm.py - Movimentação de código invariante de laço para o pré-cabeçalho
+import main
+from cfg import ControlFlowGraph
+from ir import IRGenerator, IRInstruction, Op, can_raise
+from optimize import Optimizer, split_functions
+
+# ``a * b + 3`` não depende do laço; ``a / b`` pode falhar (b = 0) e o
+# limite ``limit(n)`` tem efeito colateral: os dois ficam onde estão
+SOURCE = """func limit(n) {
+    print("limite");
+    return n;
+}
+func f(a, b, n) {
+    for i in 1..limit(n) {
+        print(i * (a * b + 3));
+        if i > n {
+            print(a / b);
+        }
+    }
+    return a * b;
+}
+func main() {
+    print(f(2, 5, 4));
+    print(f(3, 0, 2));
+}
+"""
+
+
+def function_of(source, name):
+    ast = main.analyze_source(main.lex_source(source))
+    main.check_types(ast)
+    for function in split_functions(IRGenerator().generate(ast)):
+        if function[0].dest == name:
+            return function
+
+
+def loop_blocks(code):
+    graph = ControlFlowGraph(code)
+    return graph, {block for loop in graph.loops() for block in loop.blocks}
+
+
+def test_invariants_move_to_the_preheader():
+    optimizer = Optimizer()
+    optimized = optimizer.optimize_function(function_of(SOURCE, "f"))
+    graph, inside = loop_blocks(optimized)
+    assert inside and optimizer.stats["hoisted"] >= 2
+    in_loop = [instr for block in inside for instr in block.instructions]
+    assert not any(instr.op is Op.MUL and {instr.arg1, instr.arg2} == {"a", "b"} for instr in in_loop)
+    # A divisão pode falhar e só roda quando a condição vale: fica no laço
+    assert any(instr.op is Op.DIV for instr in in_loop)
+
+
+def test_operations_that_can_raise_are_not_hoisted():
+    assert can_raise(IRInstruction(Op.DIV, dest="d", arg1="a", arg2="b"))
+    assert can_raise(IRInstruction(Op.MOD, dest="m", arg1="a", arg2=0))
+    assert can_raise(IRInstruction(Op.LSHIFT, dest="s", arg1="a", arg2="k"))
+    assert not can_raise(IRInstruction(Op.DIV, dest="d", arg1="a", arg2=2))
+    assert not can_raise(IRInstruction(Op.RSHIFT, dest="s", arg1="a", arg2=3))
+
+
+def test_for_bound_is_evaluated_once(run_output):
+    # Uma vez por chamada de ``f``, não uma por volta
+    expected = "limite\n13\n26\n39\n52\n10\nlimite\n3\n6\n0\n"
+    assert run_output(SOURCE) == expected
+    assert run_output(SOURCE, backend="ir") == expected
+
+
+def test_compiled_program_matches_run(run_output, c_output):
+    assert c_output(SOURCE) == run_output(SOURCE)
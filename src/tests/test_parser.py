@@ -0,0 +1,52 @@
+# test_parser.py - Parser de Pratt sobre a janela de tokens e o TokenBuffer
+import io
+
+import pytest
+from conftest import EXAMPLES, example, shape
+
+from cirius_parser import Parser
+from lexer import Lexer
+
+
+def parse(tokens):
+    return shape(Parser(tokens).parse())
+
+
+# Precedência e associatividade de docs/grammar.ebnf (as do C)
+EXPRESSIONS = [
+    ("2 + 3 * 4 - 5 - 1", "8"),
+    ("2 * (3 + 4) - 10 % 4 * 3", "8"),
+    ("1 << 2 + 1", "8"),
+    ("6 & 3 | 8 ^ 1", "11"),
+    ("-2 * -3 + ~1", "4"),
+    ("1 < 2 == 2 > 1", "True"),
+    ("not 1 == 2", "False"),
+    ("2.5 * 2", "5.0"),
+    ("3 > 2 and 1 > 2 or 4 > 3", "True"),
+]
+
+
+@pytest.mark.parametrize("expression, expected", EXPRESSIONS)
+def test_operator_precedence(expression, expected, run_output):
+    source = f"func main() {{\n    print({expression});\n}}\n"
+    assert run_output(source) == expected + "\n"
+
+
+def test_binary_operators_associate_to_the_left():
+    expected = parse(Lexer("func f(a, b, c) { return (a - b) - c; }").tokenize())
+    assert parse(Lexer("func f(a, b, c) { return a - b - c; }").tokenize()) == expected
+
+
+@pytest.mark.parametrize("name", sorted(EXAMPLES))
+def test_parser_reads_a_token_stream_and_a_buffer(name):
+    source = example(name)
+    expected = parse(Lexer(source).tokenize())
+    assert parse(Lexer(io.StringIO(source), chunk_size=5).iter_tokens()) == expected
+    assert parse(Lexer(source).tokenize_buffer()) == expected
+
+
+@pytest.mark.parametrize("name", sorted(EXAMPLES))
+def test_run_streams_a_file(name, run_output):
+    source = example(name)
+    with io.StringIO(source) as stream:
+        assert run_output(stream, EXAMPLES[name], stream=True) == run_output(source, EXAMPLES[name])
@@ -0,0 +1,82 @@
+# test_passes.py - Gerenciador de passadas, níveis -O e relatório das passadas
+import json
+
+import pytest
+
+import main
+from ir import IRGenerator
+from optimize import OPT_LEVELS, PASSES, Optimizer, format_report, resolve_passes
+
+SOURCE = """func sq(x) {
+    return x * x;
+}
+func main() {
+    debug = 0;
+    scale = 2 * 3;
+    for i in 1..4 {
+        if debug == 1 {
+            print(i);
+        }
+        print(sq(i) * scale + 0);
+    }
+}
+"""
+
+
+def generated(source):
+    ast = main.analyze_source(main.lex_source(source))
+    main.check_types(ast)
+    return IRGenerator().generate(ast)
+
+
+def test_required_passes_come_first():
+    assert resolve_passes(["licm"]) == ["sccp", "licm"]
+    assert resolve_passes(["sccp", "licm", "dce"]) == ["sccp", "licm", "dce"]
+    with pytest.raises(ValueError, match="desconhecida"):
+        resolve_passes(["nada"])
+
+
+def test_levels_use_registered_passes():
+    for names, rounds in OPT_LEVELS.values():
+        assert all(name in PASSES for name in names) and rounds >= 1
+    assert Optimizer(level=0).pipeline == []
+    with pytest.raises(ValueError):
+        Optimizer(level=7)
+
+
+def test_level_zero_leaves_the_ir_alone():
+    ir_code = generated(SOURCE)
+    assert Optimizer(level=0).optimize(ir_code) == ir_code
+
+
+def test_higher_levels_do_not_grow_the_ir():
+    ir_code = generated(SOURCE)
+    sizes = [len(Optimizer(level=level).optimize(ir_code)) for level in sorted(OPT_LEVELS)]
+    assert sizes[1] <= sizes[0] and sizes[2] < sizes[1] and sizes[3] <= sizes[2]
+
+
+def test_records_cover_passes_and_conversions():
+    optimizer = Optimizer()
+    optimizer.optimize(generated(SOURCE))
+    report = optimizer.report()
+    assert {"cfg", "ssa", "out_of_ssa", "linearize"} <= set(report["passes"])
+    assert set(optimizer.pipeline) <= set(report["passes"])
+    assert report["passes"]["sccp"]["stats"]["branches"] >= 1
+    table = format_report(report)
+    assert table.startswith("[Optimizer] -O2") and "sccp" in table
+
+
+def test_report_shows_what_the_ast_fold_saved(capsys, tmp_path):
+    path = tmp_path / "report.json"
+    main.compile_pipeline(SOURCE, str(tmp_path / "out.c"), opt_report=str(path))
+    fold = json.loads(path.read_text(encoding="utf-8"))["passes"]["fold"]
+    assert fold["before"] > fold["after"] > 0
+    assert fold["stats"]["folded"] >= 1 and fold["runs"] == 2
+    capsys.readouterr()
+    main.compile_pipeline(SOURCE, str(tmp_path / "out.c"), opt_report="-")
+    assert capsys.readouterr().out.splitlines()[2].split()[:2] == ["fold", "2"]
+
+
+def test_run_prints_the_report_after_the_program(run_output):
+    output = run_output(SOURCE, backend="ir", opt_level=1, opt_report="-")
+    assert output.startswith("6\n24\n54\n96\n[Optimizer] -O1")
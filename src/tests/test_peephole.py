@@ -0,0 +1,61 @@
+# test_peephole.py - Limpeza de desvios direto na lista do IR
+from ir import IRInstruction, Op
+from optimize import Optimizer
+from peephole import STATS, peephole
+
+
+def function(*body):
+    return [IRInstruction(Op.FUNC_BEGIN, dest="f"), *body, IRInstruction(Op.FUNC_END, dest="f")]
+
+
+def label(name):
+    return IRInstruction(Op.LABEL, dest=name)
+
+
+def goto(name):
+    return IRInstruction(Op.GOTO, name)
+
+
+def show(code):
+    return [(instr.op, instr.dest, instr.arg1) for instr in code[1:-1]]
+
+
+def test_jump_chains_go_to_the_final_target():
+    code, stats = peephole(function(
+        IRInstruction(Op.IF_FALSE_GOTO, dest="A", arg1="c"), IRInstruction(Op.PRINT, arg1=1),
+        label("A"), label("B"), goto("C"),
+        label("D"), IRInstruction(Op.PRINT, arg1=2),
+        label("C"), IRInstruction(Op.RETURN, arg1=0)))
+    assert show(code) == [(Op.IF_FALSE_GOTO, "C", "c"), (Op.PRINT, None, 1),
+                          (Op.LABEL, "C", None), (Op.RETURN, None, 0)]
+    assert stats["threaded"] >= 1 and stats["unreachable"] >= 1 and stats["labels"] >= 1
+    assert set(stats) == set(STATS)
+
+
+def test_literal_conditions_become_gotos_or_disappear():
+    code, stats = peephole(function(
+        IRInstruction(Op.IF_FALSE_GOTO, dest="A", arg1=True), IRInstruction(Op.PRINT, arg1=1),
+        IRInstruction(Op.IF_FALSE_GOTO, dest="A", arg1=False), IRInstruction(Op.PRINT, arg1=2),
+        label("A"), IRInstruction(Op.RETURN, arg1=0)))
+    assert show(code) == [(Op.PRINT, None, 1), (Op.RETURN, None, 0)]
+    assert stats["constant_branches"] == 2
+
+
+def test_goto_cycles_stop_at_the_cycle():
+    code, _ = peephole(function(label("A"), goto("B"), label("B"), goto("A")))
+    assert [instr.op for instr in code[1:-1]].count(Op.GOTO) == 1
+
+
+def test_original_instructions_are_not_changed():
+    jump = IRInstruction(Op.GOTO, "A")
+    original = function(jump, label("A"), goto("B"), label("B"), IRInstruction(Op.RETURN, arg1=0))
+    peephole(original)
+    assert jump.dest == "A" and len(original) == 7
+
+
+def test_optimizer_counts_the_peephole():
+    optimizer = Optimizer()
+    optimizer.optimize_function(function(goto("A"), IRInstruction(Op.PRINT, arg1=1), label("A"),
+                                         IRInstruction(Op.RETURN, arg1=0)))
+    assert optimizer.stats["unreachable"] == 1
+
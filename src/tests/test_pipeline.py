@@ -0,0 +1,16 @@
+# test_pipeline.py - Mesma saída no comando run (nos dois backends) e no C gerado, em cada nível -O
+import pytest
+from conftest import EXAMPLES, example
+
+from main import BACKENDS
+from optimize import OPT_LEVELS
+
+
+@pytest.mark.parametrize("level", sorted(OPT_LEVELS))
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("name", sorted(EXAMPLES))
+def test_c_output_matches_run(name, backend, level, run_output, c_output):
+    source, inputs = example(name), EXAMPLES[name]
+    expected = run_output(source, inputs, backend=backend, opt_level=level)
+    assert expected and "[Erro" not in expected
+    assert c_output(source, inputs, opt_level=level) == expected
@@ -0,0 +1,56 @@
+# test_shortcircuit.py - ``and``/``or`` em curto-circuito no IR, no C e nos interpretadores
+import pytest
+
+import main
+from ir import IRGenerator, Op
+
+# ``side`` imprime quando é avaliada: a saída mostra quais operandos da
+# direita rodaram, em condições, em ``not``, como valor e num laço
+SOURCE = """func side(tag, value) {
+    print(tag);
+    return value;
+}
+func number(tag, value) {
+    print(tag);
+    return value + 0;
+}
+func main() {
+    if false and side("a", true) { print("nunca"); }
+    if true or side("b", true) { print("sim"); }
+    if not (true and side("c", false)) { print("not"); }
+    if false or side("d", true) and side("e", false) {
+        print("nunca");
+    } elif side("f", false) or side("g", true) {
+        print("elif");
+    }
+    x = false and side("h", true);
+    y = true or side("i", false);
+    z = 1 and number("j", 7);
+    print(x); print(y); print(z);
+    for i in 1..3 {
+        if i > 1 and side("k", true) { print(i); }
+    }
+}
+"""
+
+EXPECTED = "sim\nc\nnot\nd\ne\nf\ng\nelif\nj\nFalse\nTrue\n7\nk\n2\nk\n3\n"
+
+
+def test_logical_operators_become_jumps():
+    ast = main.analyze_source(main.lex_source(SOURCE))
+    main.check_types(ast)
+    code = IRGenerator().generate(ast)
+    assert not any(instr.op in (Op.AND, Op.OR) for instr in code)
+
+
+@pytest.mark.parametrize("backend", main.BACKENDS)
+def test_right_operand_runs_only_when_needed(run_output, backend):
+    assert run_output(SOURCE, backend=backend) == EXPECTED
+
+
+def test_generic_interpreter_short_circuits(ast_output):
+    assert ast_output(SOURCE, specialize=False) == EXPECTED
+
+
+def test_compiled_program_has_the_same_side_effects(run_output, c_output):
+    assert c_output(SOURCE) == run_output(SOURCE)
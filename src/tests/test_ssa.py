@@ -0,0 +1,106 @@
+# test_ssa.py - Forma SSA, propagação de constantes condicional e numeração de valores
+from conftest import example
+
+import main
+from cfg import ControlFlowGraph
+from ir import IRGenerator, Op
+from optimize import Optimizer, split_functions
+from ssa import BOTTOM, SSAFunction, constant, fold, optimize_ssa
+
+# Desvios decididos por constantes, subexpressões repetidas e uma divisão
+# por zero num desvio que nunca roda
+SOURCE = """func f(a, b) {
+    debug = 0;
+    mode = 3;
+    if debug == 1 {
+        print("depuração");
+    }
+    if mode > 2 {
+        print((a + b) * (a + b));
+    } else {
+        print("nunca");
+    }
+    for i in 0..mode {
+        print(i * mode + (a + b));
+    }
+    return mode * 4 + 1;
+}
+func main() {
+    print(f(2, 5));
+    print(7 / 2);
+    zero = 0;
+    if zero == 1 {
+        print(1 / zero);
+    }
+}
+"""
+
+
+def function_of(source, name):
+    ast = main.analyze_source(main.lex_source(source))
+    main.check_types(ast)
+    for function in split_functions(IRGenerator().generate(ast)):
+        if function[0].dest == name:
+            return function
+
+
+def ssa_optimized(function):
+    graph = ControlFlowGraph(function)
+    stats = optimize_ssa(graph)
+    return graph.linearize(), stats
+
+
+def ops(code):
+    return [instr.op for instr in code]
+
+
+def test_loop_variable_gets_a_phi():
+    ssa = SSAFunction(ControlFlowGraph(function_of(SOURCE, "f")))
+    phis = [phi for block_phis in ssa.phis.values() for phi in block_phis]
+    assert [phi.var for phi in phis] == ["i"]
+    (phi,) = phis
+    # Entra com o valor inicial e volta com o incrementado, que tem outro nome
+    assert phi.dest != "i" and len(phi.args) == 2
+    assert "i" in phi.args.values() and len(set(phi.args.values())) == 2
+
+
+def test_constant_branches_disappear():
+    optimized, stats = ssa_optimized(function_of(SOURCE, "f"))
+    printed = [instr.arg1 for instr in optimized if instr.op is Op.PRINT]
+    assert '"depuração"' not in printed and '"nunca"' not in printed
+    assert stats["branches"] >= 2 and stats["constants"] > 0
+    # O retorno vira constante
+    assert optimized[-2].op is Op.RETURN and optimized[-2].arg1 == 13
+
+
+def test_repeated_expressions_are_numbered_once():
+    optimized, stats = ssa_optimized(function_of(SOURCE, "f"))
+    sums = [instr for instr in optimized if instr.op is Op.PLUS and {instr.arg1, instr.arg2} == {"a", "b"}]
+    assert len(sums) == 1 and stats["redundant"] >= 2
+
+
+def test_folds_that_c_would_not_repeat_are_refused():
+    assert fold(Op.PLUS, [2, 3]) == constant(5)
+    assert fold(Op.DIV, [7, 2]) == constant(3.5)
+    for op, values in ((Op.DIV, [1, 0]), (Op.MOD, [1.5, 0]), (Op.LSHIFT, [1, 64]), (Op.RSHIFT, [1, -1]),
+                       (Op.MUL, [2 ** 62, 4]), (Op.MUL, [1e308, 10.0]), (Op.PLUS, [2 ** 60, 0.5])):
+        assert fold(op, values) is BOTTOM
+    # ``7 / 2`` vira 3.5 e ``1 / zero`` some junto com o desvio que nunca roda
+    optimized, _ = ssa_optimized(function_of(SOURCE, "main"))
+    assert Op.DIV not in ops(optimized)
+
+
+def test_optimized_program_matches_run(run_output, c_output):
+    expected = run_output(SOURCE)
+    assert expected.startswith("49\n7\n10\n13\n16\n13\n3.5\n")
+    assert c_output(SOURCE) == expected
+
+
+def test_ssa_shrinks_the_examples():
+    ast = main.analyze_source(main.lex_source(example("calls.cir")))
+    main.check_types(ast)
+    ir_code = IRGenerator().generate(ast)
+    optimizer = Optimizer()
+    optimized = [instr for function in split_functions(ir_code) for instr in optimizer.optimize_function(function)]
+    assert len(optimized) < len(ir_code)
+    assert optimizer.stats["constants"] > 0
@@ -0,0 +1,93 @@
+# test_strength.py - Redução de força nos laços
+import pytest
+from conftest import TESTS
+
+import main
+from cirius_parser import Parser
+from ir import IRGenerator, Op
+from lexer import Lexer
+from optimize import OPT_LEVELS, Optimizer
+from semantic import SemanticAnalyzer
+from type_inference import infer_types
+
+NEGATIVE = """func f(n) {
+    for i in 0..4 {
+        print((i - n) * 4 + 1);
+        print((n - 9) << 2);
+        print((i - n) % 8);
+    }
+}
+func main() {
+    f(5);
+}
+"""
+
+# ``i * 12`` e ``(k + a) * 4`` viram variáveis de indução; ``i`` só serve ao
+# teste de saída, que passa para a variável reduzida
+INDEX = """func f(a, b) {
+    for i in 0..b + 10 {
+        print(i * 12);
+    }
+    for k in 1..b {
+        print((k + a) * 4 + k);
+    }
+    for j in 0..a {
+        print(j / 4);
+    }
+}
+func main() {
+    f(3, 2);
+}
+"""
+
+PLAIN = [name for name in OPT_LEVELS[2].passes if name != "strength"]
+
+
+def lower(source, optimizer):
+    program = Parser(Lexer(source).tokenize()).parse()
+    SemanticAnalyzer().analyze(program)
+    infer_types(program)
+    return optimizer.optimize(IRGenerator().generate(program))
+
+
+def ops(code):
+    return [instr.op for instr in code]
+
+
+def test_loop_example_uses_a_mask():
+    source = (TESTS / "loop.cir").read_text(encoding="utf-8")
+    code = ops(lower(source, Optimizer()))
+    assert Op.MOD not in code and Op.AND_BIT in code
+    assert Op.MOD in ops(lower(source, Optimizer(passes=PLAIN)))
+
+
+def test_induction_products_leave_the_loop():
+    optimizer = Optimizer()
+    integer = lambda code: [instr for instr in code if instr.op is Op.MUL and instr.type == "int"]
+    assert len(integer(lower(INDEX, Optimizer(passes=PLAIN)))) >= 2
+    # O único produto que sobra é o limite novo do teste de saída, calculado
+    # antes do laço
+    products = integer(lower(INDEX, optimizer))
+    assert all(str(arg).split("_")[0] not in ("i", "k") for instr in products for arg in (instr.arg1, instr.arg2))
+    assert optimizer.stats["induction"] >= 1 and optimizer.stats["exit_tests"] >= 1
+
+
+def test_division_by_a_power_of_two_becomes_a_product():
+    code = lower(INDEX, Optimizer())
+    assert Op.DIV not in ops(code)
+    assert any(instr.op is Op.MUL and 0.25 in (instr.arg1, instr.arg2) for instr in code)
+
+
+@pytest.mark.parametrize("backend", main.BACKENDS)
+def test_reduced_loops_match_run(run_output, c_output, backend):
+    expected = run_output(INDEX, backend=backend)
+    assert expected.startswith("0\n12\n24\n")
+    assert c_output(INDEX) == expected
+
+
+def test_shifts_of_negative_values_match_run(run_output, c_output):
+    assert Op.LSHIFT in ops(lower(NEGATIVE, Optimizer()))
+    expected = run_output(NEGATIVE)
+    assert expected.startswith("-19\n-16\n3\n")
+    assert c_output(NEGATIVE) == expected
+    assert run_output(NEGATIVE, backend="ir") == expected
@@ -0,0 +1,94 @@
+# test_types.py - Inferência de tipos e saída do C contra a do interpretador
+import operator
+
+import pytest
+from conftest import EXAMPLES, example
+
+from cirius_ast import BinaryOp
+from cirius_parser import Parser
+from interpreter import BINARY_OPS, Interpreter
+from lexer import Lexer
+from semantic import SemanticAnalyzer
+from type_inference import infer_types
+
+
+def conflicts_of(source):
+    ast = Parser(Lexer(source).tokenize()).parse()
+    SemanticAnalyzer().analyze(ast)
+    return infer_types(ast)
+
+
+# Um mesmo lugar (variável, parâmetro, retorno) com bool/int/float misturados
+MIXED = {
+    "int_float": ("func main() {\n    x = 4;\n    print(x);\n    x = x / 2;\n    print(x);\n}\n",
+                  "4\n2.0\n"),
+    "bool_int": ("func main() {\n    y = true;\n    print(y);\n    y = 5;\n    print(y);\n}\n",
+                 "True\n5\n"),
+    "param": ("func f(p) {\n    print(p);\n}\nfunc main() {\n    f(false);\n    f(1);\n}\n",
+              "False\n1\n"),
+    "return": ("func g(n) {\n    if n > 0 {\n        return 1;\n    }\n    return 0.5;\n}\n"
+               "func main() {\n    print(g(1));\n    print(g(0));\n}\n",
+               "1\n0.5\n"),
+}
+
+# Números misturados só dentro das expressões: tipos estáticos bastam
+TYPED = """func half(n) {
+    return n / 2;
+}
+func main() {
+    a = 3 + true;
+    b = a * 1.5;
+    c = true and false;
+    print(a);
+    print(b);
+    print(c);
+    print(half(a));
+    print(str(b) + " " + str(c));
+    for i in 0..3 {
+        print(i % 2 == 0);
+        print(i + 0.25);
+    }
+}
+"""
+
+
+@pytest.mark.parametrize("name", sorted(MIXED))
+def test_mixed_numbers_in_one_place_are_conflicts(name):
+    source, _ = MIXED[name]
+    assert conflicts_of(source)
+
+
+@pytest.mark.parametrize("name", sorted(MIXED))
+def test_mixed_numbers_run_dynamically_and_are_not_compiled(name, run_output, c_output):
+    source, expected = MIXED[name]
+    output = run_output(source)
+    assert output.endswith(expected)
+    # Sem alargamento silencioso: o compile recusa em vez de imprimir outra coisa
+    assert c_output(source) is None
+
+
+def test_numbers_widened_inside_expressions_match_run(run_output, c_output):
+    assert conflicts_of(TYPED) == []
+    expected = run_output(TYPED)
+    assert expected.startswith("4\n6.0\nFalse\n2.0\n6.0 False\n")
+    assert c_output(TYPED) == expected
+
+
+def test_typed_operators_are_selected_from_inferred_types():
+    ast = Parser(Lexer("func main() {\n    print(1 + 2);\n    print(\"a\" + \"b\");\n}\n").tokenize()).parse()
+    SemanticAnalyzer().analyze(ast)
+    assert infer_types(ast) == []
+    numbers, texts = [statement.value for statement in ast.functions[0].body.statements]
+    assert isinstance(numbers, BinaryOp) and isinstance(texts, BinaryOp)
+    assert Interpreter().select_binary_op(numbers) is operator.add
+    assert Interpreter().select_binary_op(texts) is operator.concat
+    assert Interpreter(specialize=False).select_binary_op(numbers) is BINARY_OPS["PLUS"]
+
+
+@pytest.mark.parametrize("name", sorted(EXAMPLES) + ["TYPED"])
+def test_specialized_interpreter_matches_generic(name, ast_output, run_output):
+    source, inputs = (TYPED, ()) if name == "TYPED" else (example(name), EXAMPLES[name])
+    expected = ast_output(source, inputs, specialize=False)
+    assert expected and "[Erro" not in expected
+    assert ast_output(source, inputs) == expected
+    assert run_output(source, inputs) == expected
@@ -0,0 +1,351 @@
+# type_inference.py - Inferência estática de tipos para a linguagem Cirius
+"""
+Atribui um tipo (``int``, ``float``, ``bool`` ou ``str``) a cada expressão,
+variável, parâmetro e valor de retorno, sobre a AST já anotada pela análise
+semântica (slots). Os tipos ficam na própria AST:
+
+- ``node.type`` em cada expressão;
+- ``FunctionDecl.slot_types`` (um tipo por slot; os parâmetros vêm primeiro)
+  e ``FunctionDecl.return_type`` (``"void"`` se a função não tem ``return``).
+
+Operações aritméticas alargam os números (``bool`` < ``int`` < ``float``),
+mas uma variável, um parâmetro ou um retorno tem um tipo só: ``x = 1``
+seguido de ``x = 2.5`` é um conflito, como misturar texto e número, porque o
+valor impresso depende de qual atribuição valeu por último (``1`` ou
+``1.0``, ``True`` ou ``1``). Conflitos são reportados com o nome da função.
+Tipos que nada determina (um parâmetro de função nunca chamada) ficam
+``None``.
+
+Parâmetros recebem o tipo dos argumentos de todas as chamadas e o tipo de uma
+chamada é o retorno da função chamada, então a inferência é global: cada
+função é analisada isoladamente (``infer_function``) a partir dos tipos dos
+seus parâmetros e dos retornos das funções que chama, e ``solve`` repete a
+análise das funções afetadas até nada mudar.
+"""
+
+from collections import deque
+
+from cirius_ast import *
+
+INT = "int"
+FLOAT = "float"
+BOOL = "bool"
+STR = "str"
+VOID = "void"
+
+NUMERIC_RANK = {BOOL: 0, INT: 1, FLOAT: 2}
+
+ARITHMETIC_OPS = {"PLUS", "MINUS", "MUL", "MOD"}
+ORDERING_OPS = {"GT", "LT", "GE", "LE"}
+EQUALITY_OPS = {"EQ", "NE"}
+LOGICAL_OPS = {"AND", "OR"}
+BITWISE_OPS = {"AND_BIT", "OR_BIT", "XOR_BIT"}
+SHIFT_OPS = {"LSHIFT", "RSHIFT"}
+
+BUILTIN_RETURNS = {"str": STR}
+
+
+def is_numeric(t) -> bool:
+    return t in NUMERIC_RANK
+
+
+def compatible(a, b) -> bool:
+    return a is None or b is None or a == b or (is_numeric(a) and is_numeric(b))
+
+
+def same(a, b) -> bool:
+    """``a`` e ``b`` podem ocupar o mesmo lugar (variável, parâmetro ou
+    retorno): sem alargamento entre números."""
+    return a is None or b is None or a == b
+
+
+def join(a, b):
+    """Menor tipo que comporta ``a`` e ``b`` (que devem ser compatíveis)."""
+    if a is None:
+        return b
+    if b is None or a == b:
+        return a
+    return a if NUMERIC_RANK[a] >= NUMERIC_RANK[b] else b
+
+
+def widen(*types):
+    """Tipo de uma operação aritmética: ``bool`` vira ``int``."""
+    result = INT
+    for t in types:
+        result = join(result, t)
+    return result
+
+
+class FunctionSummary:
+    """Resultado da inferência de uma função: tipo de retorno, chamadas
+    ``(nome, tipos dos argumentos)`` e conflitos encontrados."""
+    __slots__ = ("return_type", "calls", "conflicts")
+
+    def __init__(self, return_type, calls, conflicts):
+        self.return_type = return_type
+        self.calls = calls
+        self.conflicts = conflicts
+
+    @property
+    def callees(self):
+        return sorted({name for name, _ in self.calls})
+
+
+# -------------------------
+# Inferência de uma função
+# -------------------------
+class FunctionTyper:
+    """Infere os tipos de uma função, dados os tipos dos parâmetros e os
+    retornos conhecidos (``returns``: nome -> tipo, ``None`` se ainda
+    desconhecido). O corpo é percorrido até os tipos dos slots pararem de
+    mudar; só a última passada reporta conflitos."""
+
+    def __init__(self, func: FunctionDecl, param_types, returns):
+        self.func = func
+        self.returns = returns
+        self.slot_types = list(param_types) + [None] * (func.frame_size - len(param_types))
+        self.return_type = None
+        self.has_return = False
+        self.calls = []
+        self.conflicts = []
+        self._visitors = {}
+
+    def run(self) -> FunctionSummary:
+        while True:
+            before = list(self.slot_types)
+            self.return_type = None
+            self.has_return = False
+            self.calls = []
+            self.conflicts = []
+            self.visit(self.func.body)
+            if self.slot_types == before:
+                break
+        func = self.func
+        func.slot_types = self.slot_types
+        func.return_type = self.return_type if self.has_return else VOID
+        return FunctionSummary(func.return_type, self.calls, self.conflicts)
+
+    def conflict(self, message: str):
+        self.conflicts.append(f"Função '{self.func.name}': {message}")
+
+    def visit(self, node):
+        visitor = self._visitors.get(type(node))
+        if visitor is None:
+            visitor = self._visitors[type(node)] = getattr(self, f"visit_{type(node).__name__}")
+        return visitor(node)
+
+    def assign(self, slot: int, name: str, t):
+        current = self.slot_types[slot]
+        if not same(current, t):
+            self.conflict(f"variável '{name}' é {current}, mas recebe {t}")
+        else:
+            self.slot_types[slot] = join(current, t)
+
+    # --- Instruções ---
+    def visit_Block(self, node: Block):
+        for statement in node.statements:
+            if isinstance(statement, FunctionCall):
+                self.visit_call(statement, value=False)
+            else:
+                self.visit(statement)
+
+    def visit_Assignment(self, node: Assignment):
+        t = self.visit(node.expr)
+        target = node.target
+        self.assign(target.slot, target.name, t)
+        target.type = self.slot_types[target.slot]
+
+    def visit_IfStatement(self, node: IfStatement):
+        self.visit(node.cond)
+        self.visit(node.then)
+        for cond, block in node.elifs:
+            self.visit(cond)
+            self.visit(block)
+        if node.otherwise:
+            self.visit(node.otherwise)
+
+    def visit_WhileStatement(self, node: WhileStatement):
+        self.visit(node.cond)
+        self.visit(node.body)
+
+    def visit_ForStatement(self, node: ForStatement):
+        for bound in (node.start, node.end):
+            t = self.visit(bound)
+            if t is not None and t not in (INT, BOOL):
+                self.conflict(f"limites do 'for' devem ser inteiros, não {t}")
+        self.assign(node.slot, node.var, INT)
+        self.visit(node.body)
+
+    def visit_ReturnStatement(self, node: ReturnStatement):
+        self.has_return = True
+        if node.value is None:
+            return
+        t = self.visit(node.value)
+        if not same(self.return_type, t):
+            self.conflict(f"retorna {self.return_type} e {t}")
+        else:
+            self.return_type = join(self.return_type, t)
+
+    def visit_PrintStatement(self, node: PrintStatement):
+        self.visit(node.value)
+
+    # --- Expressões ---
+    def visit_Number(self, node: Number):
+        node.type = FLOAT if isinstance(node.value, float) else INT
+        return node.type
+
+    def visit_String(self, node: String):
+        node.type = STR
+        return STR
+
+    def visit_Boolean(self, node: Boolean):
+        node.type = BOOL
+        return BOOL
+
+    def visit_InputStatement(self, node: InputStatement):
+        node.type = INT
+        return INT
+
+    def visit_Var(self, node: Var):
+        node.type = None if node.slot is None else self.slot_types[node.slot]
+        return node.type
+
+    def visit_UnaryOp(self, node: UnaryOp):
+        t = self.visit(node.operand)
+        result = None
+        if node.op == "NOT":
+            result = BOOL
+        elif t is None:
+            pass
+        elif node.op == "MINUS" and is_numeric(t):
+            result = widen(t)
+        elif node.op == "NOT_BIT" and t in (INT, BOOL):
+            result = INT
+        else:
+            self.conflict(f"operador {node.op} não se aplica a {t}")
+        node.type = result
+        return result
+
+    def visit_BinaryOp(self, node: BinaryOp):
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        node.type = None if left is None or right is None else self.binary_type(node.op, left, right)
+        return node.type
+
+    def binary_type(self, op: str, left, right):
+        numeric = is_numeric(left) and is_numeric(right)
+        if op == "PLUS" and left == right == STR:
+            return STR
+        if op in ARITHMETIC_OPS and numeric:
+            return widen(left, right)
+        if op == "DIV" and numeric:
+            return FLOAT
+        if op in ORDERING_OPS and (numeric or left == right == STR):
+            return BOOL
+        if op in EQUALITY_OPS and compatible(left, right):
+            return BOOL
+        if op in LOGICAL_OPS and numeric and left == right:
+            return left
+        if op in BITWISE_OPS and left == right == BOOL:
+            return BOOL
+        if op in BITWISE_OPS | SHIFT_OPS and left in (INT, BOOL) and right in (INT, BOOL):
+            return INT
+        self.conflict(f"operador {op} não se aplica a {left} e {right}")
+        return None
+
+    def visit_FunctionCall(self, node: FunctionCall):
+        return self.visit_call(node, value=True)
+
+    def visit_call(self, node: FunctionCall, value: bool):
+        arg_types = tuple(self.visit(arg) for arg in node.args)
+        if node.name in BUILTIN_RETURNS:
+            node.type = BUILTIN_RETURNS[node.name]
+            return node.type
+        self.calls.append((node.name, arg_types))
+        result = self.returns.get(node.name)
+        if result == VOID:
+            if value:
+                self.conflict(f"'{node.name}' não retorna valor")
+            result = None
+        node.type = result
+        return result
+
+
+def infer_function(func: FunctionDecl, param_types, returns) -> FunctionSummary:
+    """Anota ``func`` com tipos, dados os tipos dos parâmetros e os retornos
+    das funções chamadas."""
+    return FunctionTyper(func, param_types, returns).run()
+
+
+# -------------------------
+# Programa inteiro
+# -------------------------
+def solve(signatures, analyze):
+    """Ponto fixo da inferência global.
+
+    ``signatures`` é a lista ``(nome, parâmetros)`` das funções, em ordem, e
+    ``analyze(posição, tipos dos parâmetros, retornos)`` analisa uma delas e
+    devolve seu ``FunctionSummary``. Uma função é reanalisada quando o tipo
+    de um parâmetro ou o retorno de uma função chamada muda; os tipos só
+    crescem, então o laço termina.
+
+    Devolve ``(tipos dos parâmetros por função, retornos, conflitos)``.
+    """
+    positions = {}
+    for position, (name, _) in enumerate(signatures):
+        positions.setdefault(name, position)
+    params = [[None] * len(signature_params) for _, signature_params in signatures]
+    returns = {}
+    callers = [set() for _ in signatures]
+    summaries = [None] * len(signatures)
+    param_conflicts = {}
+
+    pending = deque(range(len(signatures)))
+    queued = set(pending)
+    while pending:
+        position = pending.popleft()
+        queued.discard(position)
+        summary = summaries[position] = analyze(position, params[position], returns)
+
+        for callee, arg_types in summary.calls:
+            target = positions.get(callee)
+            if target is None:
+                continue
+            callers[target].add(position)
+            changed = False
+            for index, t in enumerate(arg_types):
+                current = params[target][index]
+                if not same(current, t):
+                    param_name = signatures[target][1][index]
+                    param_conflicts[target, index] = (
+                        f"Função '{callee}': parâmetro '{param_name}' recebe {current} e {t}")
+                elif join(current, t) != current:
+                    params[target][index] = join(current, t)
+                    changed = True
+            if changed and target not in queued:
+                pending.append(target)
+                queued.add(target)
+
+        name = signatures[position][0]
+        if positions[name] == position and returns.get(name) != summary.return_type:
+            returns[name] = summary.return_type
+            for caller in sorted(callers[position] - queued):
+                pending.append(caller)
+                queued.add(caller)
+
+    conflicts = []
+    for position, summary in enumerate(summaries):
+        conflicts.extend(message for (target, _), message in sorted(param_conflicts.items())
+                         if target == position)
+        conflicts.extend(summary.conflicts)
+    return params, returns, conflicts
+
+
+def infer_types(program: Program):
+    """Anota todas as funções de ``program`` com tipos e devolve a lista de
+    conflitos (vazia se o programa é bem tipado)."""
+    functions = program.functions
+    signatures = [(func.name, func.params) for func in functions]
+    _, _, conflicts = solve(signatures, lambda position, param_types, returns:
+                            infer_function(functions[position], param_types, returns))
+    return conflicts